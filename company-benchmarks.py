@@ -0,0 +1,1100 @@
+"""
+会社管理システムのベンチマーク集
+
+社員数の多い会社で、各機能の速度やメモリ使用量を計測します。
+
+実行方法:
+    py company-benchmarks.py                      # すべてのベンチマーク
+    py company-benchmarks.py select_president     # 指定したベンチマークだけ
+    py company-benchmarks.py select_president --sizes 10000 100000
+
+注意:
+    company-system-commented.py を company_management.py として保存してから実行してください
+    （テストスイートと同じく company_management からインポートします）
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import unicodedata
+
+from company_management import (
+    Gender, Post, Company, Employee, compute_payroll,
+    PrintSink, NullSink, BufferedSink, ListSink,
+    AsyncCompany, EmployeeQuery, ChangeLog,
+)
+
+
+# ===================================================================
+# 共通の部品
+# ===================================================================
+
+# 既定の社員数（1万人、10万人、100万人）
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def quiet():
+    """
+    会社のメッセージ表示（print）を捨てるコンテキストマネージャーを返す関数
+
+    Returns:
+        contextlib.redirect_stdout: with 文で使うコンテキストマネージャー
+    """
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def make_rows(count: int, seed: int = 0) -> list:
+    """
+    ベンチマーク用の採用データを作る関数
+
+    Args:
+        count (int): 人数
+        seed (int): 乱数の種（同じ値なら同じデータになる）
+
+    Returns:
+        list: (名前, 性別, 年齢, 役職) のタプルのリスト
+    """
+    rng = random.Random(seed)
+    genders = list(Gender)
+    # 役員は少なめにする（実際の会社に近い比率）
+    posts = [Post.HIRA] * 12 + [Post.SYUNIN] * 5 + [Post.KATYO] * 2 + [Post.YARUIN]
+    return [
+        (f"社員{i}", rng.choice(genders), rng.randint(18, 70), rng.choice(posts))
+        for i in range(count)
+    ]
+
+
+def make_company(count: int, seed: int = 0, **options) -> Company:
+    """
+    count 人の社員がいる会社を作る関数
+
+    Args:
+        count (int): 人数
+        seed (int): 乱数の種
+        **options: Company のコンストラクタに渡す引数（storage など）
+
+    Returns:
+        Company: 社員を採用済みの会社
+    """
+    company = Company(**options)
+    # ベンチマークでは上限を人数に合わせて広げる
+    company.MAX_NUMBER_OF_PEOPLE = count
+    with quiet():
+        company.add_employees(make_rows(count, seed))
+    return company
+
+
+def measure(func, repeat: int) -> float:
+    """
+    func を repeat 回実行したときの1回あたりの時間（マイクロ秒）を返す関数
+
+    Args:
+        func: 計測する関数（引数なし）
+        repeat (int): 実行回数
+
+    Returns:
+        float: 1回あたりの時間（マイクロ秒）
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+# ===================================================================
+# ベンチマーク1: 次期社長の選出
+# ===================================================================
+
+def naive_select_president(company: Company):
+    """
+    従来の（リスト内包表記＋max）方法で次期社長を選出する比較用の関数
+    """
+    employees = company.employees
+    if not employees:
+        return None
+    executives = [emp for emp in employees if emp.post == Post.YARUIN]
+    return max(executives or employees, key=lambda e: e.age)
+
+
+def bench_select_president(sizes: list) -> None:
+    """
+    select_president（年齢順インデックス）と従来の方法の速度を比較する
+
+    それぞれの社員数で、選出だけの場合と
+    「選出した社員を削除する」（辞任を繰り返す）場合を計測する
+
+    Args:
+        sizes (list): 社員数のリスト
+    """
+    print("\n■ select_president: 年齢順インデックス vs リスト内包表記＋max（1回あたり µs）")
+    print(f"{'社員数':>10} {'従来':>12} {'索引':>12} {'倍率':>8} {'辞任(従来)':>12} {'辞任(索引)':>12}")
+
+    for size in sizes:
+        company = make_company(size)
+        assert company.select_president() is naive_select_president(company)
+
+        # 従来の方法は遅いので、社員数に応じて回数を減らす
+        naive_repeat = max(3, 1_000_000 // size)
+        naive_us = measure(lambda: naive_select_president(company), naive_repeat)
+        heap_us = measure(company.select_president, 10_000)
+
+        # 辞任の繰り返し（選出→削除）をシミュレーション
+        succession = 20
+        naive_company = make_company(size, seed=1)
+        start = time.perf_counter()
+        for _ in range(succession):
+            naive_company.employees.remove(naive_select_president(naive_company))
+        naive_resign_us = (time.perf_counter() - start) / succession * 1_000_000
+
+        heap_company = make_company(size, seed=1)
+        start = time.perf_counter()
+        with quiet():
+            for _ in range(succession):
+                heap_company.delete_employees([heap_company.select_president()])
+        heap_resign_us = (time.perf_counter() - start) / succession * 1_000_000
+
+        print(
+            f"{size:>10,} {naive_us:>12.1f} {heap_us:>12.2f} {naive_us / heap_us:>7.0f}x "
+            f"{naive_resign_us:>12.1f} {heap_resign_us:>12.1f}"
+        )
+
+
+# ===================================================================
+# ベンチマーク2: 社員1人あたりのメモリ使用量
+# ===================================================================
+
+def measure_bytes_per_employee(count: int, **options) -> float:
+    """
+    会社を作ったときに増えたメモリを tracemalloc で計測し、1人あたりに換算する関数
+
+    採用データ（名前の文字列など）は計測前に作っておくので、会社が持つ分だけが数えられる
+
+    Args:
+        count (int): 人数
+        **options: Company のコンストラクタに渡す引数
+
+    Returns:
+        float: 社員1人あたりのバイト数
+    """
+    rows = make_rows(count)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        company = Company(**options)
+        company.MAX_NUMBER_OF_PEOPLE = count
+        with quiet():
+            company.add_employees(rows)
+        # 一括採用の結果（HiringSummary）は数えないように捨ててから計測
+        gc.collect()
+        used, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert company.current_number == count
+    return used / count
+
+
+def bench_memory(sizes: list) -> None:
+    """
+    オブジェクト形式と列形式のストレージで、社員1人あたりのメモリ使用量を比較する
+
+    Args:
+        sizes (list): 社員数のリスト
+    """
+    print("\n■ メモリ使用量: オブジェクト形式 vs 列形式（社員1人あたりのバイト数）")
+    print(f"{'社員数':>10} {'オブジェクト':>14} {'列形式':>10} {'削減率':>8}")
+
+    for size in sizes:
+        object_bytes = measure_bytes_per_employee(size, storage=Company.OBJECT_STORAGE)
+        columnar_bytes = measure_bytes_per_employee(size, storage=Company.COLUMNAR_STORAGE)
+        print(
+            f"{size:>10,} {object_bytes:>14.1f} {columnar_bytes:>10.1f} "
+            f"{1 - columnar_bytes / object_bytes:>7.0%}"
+        )
+
+
+# ===================================================================
+# ベンチマーク3: __slots__ ありとなしの Employee の比較
+# ===================================================================
+
+class DictEmployee:
+    """
+    __slots__ を使う前の Employee と同じ持ち方（__dict__）の比較用クラス
+
+    属性・プロパティ・給与の計算は Employee と同じ
+    """
+
+    _salary_map = Employee._salary_map
+
+    def __init__(self, name, gender, age, post, id):
+        self._name = name
+        self._gender = gender
+        self._age = age
+        self._post = post
+        self._id = id
+        self._company = None
+        self._seq = -1
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def gender(self):
+        return self._gender
+
+    @property
+    def age(self):
+        return self._age
+
+    @property
+    def post(self):
+        return self._post
+
+    @property
+    def salary(self):
+        return self._salary_map[self._post]
+
+    def introduction(self):
+        return (
+            f"私の名前は{self.name}です。性別は{self.gender.value}で、"
+            f"年齢は{self.age}歳、役職は{self.post.value}です。"
+        )
+
+
+def measure_object_bytes(cls, rows: list) -> float:
+    """
+    cls のインスタンスを rows の人数分作ったときの1人あたりのバイト数を返す関数
+
+    Args:
+        cls: Employee または DictEmployee
+        rows (list): 採用データ
+
+    Returns:
+        float: 1人あたりのバイト数
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        objects = [cls(name, gender, age, post, str(i)) for i, (name, gender, age, post) in enumerate(rows)]
+        used, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del objects
+    return used / len(rows)
+
+
+def slots_introduction(employee: Employee) -> str:
+    """
+    Employee.do_self_introduction() と同じ文字列を作る関数（print を除いた部分の計測用）
+    """
+    return (
+        f"私の名前は{employee._name}です。性別は{employee._gender.value}で、"
+        f"年齢は{employee._age}歳、役職は{employee._post.value}です。"
+    )
+
+
+def bench_slots(sizes: list) -> None:
+    """
+    __slots__ ありとなしで、メモリ使用量と属性アクセスの速さを比較する
+
+    __slots__ の目的はメモリの削減で、属性アクセスはほぼ同じ速さになる
+    （Python 3.11 以降は __dict__ の属性の読み込みも高速化されているため）
+    1回の計測は CPU の状態で ±数十% ぶれるので、交互に5回ずつ計測して最も速い値を比べる
+
+    Args:
+        sizes (list): 社員数のリスト
+    """
+    print("\n■ __slots__: メモリ（1人あたりのバイト数）と属性アクセス（100万回あたり ms）")
+    print(f"{'社員数':>10} {'__dict__':>10} {'__slots__':>10} {'削減率':>8}")
+
+    for size in sizes:
+        rows = make_rows(size)
+        dict_bytes = measure_object_bytes(DictEmployee, rows)
+        slots_bytes = measure_object_bytes(Employee, rows)
+        print(f"{size:>10,} {dict_bytes:>10.1f} {slots_bytes:>10.1f} {1 - slots_bytes / dict_bytes:>7.0%}")
+
+    name, gender, age, post = make_rows(1)[0]
+    dict_employee = DictEmployee(name, gender, age, post, "1000")
+    slots_employee = Employee(name, gender, age, post, "1000")
+    repeat = 200_000
+    print(f"{'処理':>22} {'__dict__':>10} {'__slots__':>10} {'差':>8}")
+    for label, dict_func, slots_func in [
+        ("salary", lambda: dict_employee.salary, lambda: slots_employee.salary),
+        ("name+age+post", lambda: (dict_employee.name, dict_employee.age, dict_employee.post),
+         lambda: (slots_employee.name, slots_employee.age, slots_employee.post)),
+        ("自己紹介の文字列", dict_employee.introduction, lambda: slots_introduction(slots_employee)),
+    ]:
+        dict_times, slots_times = [], []
+        for _ in range(5):
+            dict_times.append(measure(dict_func, repeat))
+            slots_times.append(measure(slots_func, repeat))
+        # 1回あたりの µs を 100万回あたりの ms にする
+        dict_ms, slots_ms = min(dict_times) * 1000, min(slots_times) * 1000
+        print(f"{label:>22} {dict_ms:>10.1f} {slots_ms:>10.1f} {slots_ms / dict_ms - 1:>+8.0%}")
+
+
+# ===================================================================
+# ベンチマーク4: 給与計算
+# ===================================================================
+
+def loop_payroll(company: Company) -> int:
+    """
+    従来の（社員を1人ずつループする）方法で給与を集計する比較用の関数
+
+    合計と、役職・性別・年齢帯（10歳ごと）の内訳を作り、合計を返す
+    """
+    by_post = {}
+    by_gender = {}
+    by_band = {}
+    for emp in company.employees:
+        salary = emp.salary
+        by_post[emp.post] = by_post.get(emp.post, 0) + salary
+        by_gender[emp.gender] = by_gender.get(emp.gender, 0) + salary
+        band = emp.age // 10 * 10
+        by_band[band] = by_band.get(band, 0) + salary
+    return sum(by_post.values())
+
+
+def bench_payroll(sizes: list) -> None:
+    """
+    compute_payroll と従来のループの速度を、両方のストレージで比較する
+
+    Args:
+        sizes (list): 社員数のリスト
+    """
+    print("\n■ 給与計算: compute_payroll vs 社員ごとのループ（1回あたり ms）")
+    print(f"{'社員数':>10} {'保存形式':>10} {'ループ':>10} {'一括':>10} {'倍率':>8} {'方法':>8}")
+
+    for size in sizes:
+        for storage in (Company.OBJECT_STORAGE, Company.COLUMNAR_STORAGE):
+            company = make_company(size, storage=storage)
+            report = compute_payroll(company)
+            assert report.total == loop_payroll(company)
+
+            repeat = max(3, 100_000 // size)
+            loop_ms = measure(lambda: loop_payroll(company), repeat) / 1000
+            fast_ms = measure(lambda: compute_payroll(company), repeat) / 1000
+            print(
+                f"{size:>10,} {storage:>10} {loop_ms:>10.2f} {fast_ms:>10.2f} "
+                f"{loop_ms / fast_ms:>7.1f}x {report.backend:>8}"
+            )
+
+
+# ===================================================================
+# ベンチマーク5: メッセージの出力先（シンク）
+# ===================================================================
+
+def hire_one_by_one(rows: list, sink) -> float:
+    """
+    add_employee() で1人ずつ採用したときの1人あたりの時間（マイクロ秒）を返す関数
+
+    1人ごとに「〜さんを採用しました。」のメッセージが出力先に渡される
+
+    Args:
+        rows (list): 採用データ
+        sink: 会社の出力先
+
+    Returns:
+        float: 1人あたりの時間（マイクロ秒）
+    """
+    company = Company(sink=sink)
+    company.MAX_NUMBER_OF_PEOPLE = len(rows)
+    start = time.perf_counter()
+    for name, gender, age, post in rows:
+        company.add_employee(name, gender, age, post)
+    sink.flush()
+    return (time.perf_counter() - start) / len(rows) * 1_000_000
+
+
+def promote_and_demote(sink, repeat: int) -> float:
+    """
+    1人の社員の昇進・降格を繰り返したときの1回あたりの時間（マイクロ秒）を返す関数
+
+    1回ごとに「〜さんが〜に昇進しました！」などのメッセージが出力先に渡される
+    採用と違ってストレージの処理が軽いので、メッセージの分の時間がわかりやすい
+
+    Args:
+        sink: 会社の出力先
+        repeat (int): 昇進・降格の回数（それぞれ）
+
+    Returns:
+        float: 1回あたりの時間（マイクロ秒）
+    """
+    company = Company(sink=sink)
+    company.add_employee("太郎", Gender.MAN, 30, Post.HIRA)
+    employee = company.employees[0]
+
+    def cycle():
+        employee.promote()
+        employee.demote()
+
+    elapsed_us = measure(cycle, repeat) / 2
+    sink.flush()
+    if isinstance(sink, ListSink):
+        sink.clear()
+    return elapsed_us
+
+
+def bench_sinks(sizes: list) -> None:
+    """
+    1人ずつの採用と昇進・降格で、出力先ごとの速度を比較する
+
+    print() の書き込み先は os.devnull にする（端末に表示すると端末の速さに左右されるため）
+    採用は1人あたりの時間のほとんどがストレージとインデックスの更新なので、出力先の差は小さい
+    メッセージの分の差は、処理の軽い昇進・降格（交互に5回ずつ計測して最も速い値）で比べる
+
+    Args:
+        sizes (list): 社員数のリスト
+    """
+    print("\n■ 出力先: 1人ずつの採用（1人あたり µs）")
+    print(f"{'社員数':>10} {'print':>10} {'Buffered':>10} {'List':>10} {'Null':>10} {'倍率':>8}")
+
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        for size in sizes:
+            rows = make_rows(size)
+            with contextlib.redirect_stdout(devnull):
+                print_us = hire_one_by_one(rows, PrintSink())
+            buffered_us = hire_one_by_one(rows, BufferedSink(devnull))
+            list_us = hire_one_by_one(rows, ListSink())
+            null_us = hire_one_by_one(rows, NullSink())
+            print(
+                f"{size:>10,} {print_us:>10.2f} {buffered_us:>10.2f} {list_us:>10.2f} "
+                f"{null_us:>10.2f} {print_us / null_us:>7.1f}x"
+            )
+
+        print("\n■ 出力先: 昇進・降格（1回あたり µs）")
+        print(f"{'print':>10} {'Buffered':>10} {'List':>10} {'Null':>10} {'倍率':>8}")
+        times = {"print": [], "buffered": [], "list": [], "null": []}
+        for _ in range(5):
+            with contextlib.redirect_stdout(devnull):
+                times["print"].append(promote_and_demote(PrintSink(), 100_000))
+            times["buffered"].append(promote_and_demote(BufferedSink(devnull), 100_000))
+            times["list"].append(promote_and_demote(ListSink(), 100_000))
+            times["null"].append(promote_and_demote(NullSink(), 100_000))
+        print_us, buffered_us, list_us, null_us = (min(times[key]) for key in ("print", "buffered", "list", "null"))
+        print(
+            f"{print_us:>10.2f} {buffered_us:>10.2f} {list_us:>10.2f} "
+            f"{null_us:>10.2f} {print_us / null_us:>7.1f}x"
+        )
+
+
+# ===================================================================
+# ベンチマーク6: 社員一覧の表示
+# ===================================================================
+
+def legacy_display(company: Company) -> None:
+    """
+    従来の（1行ずつ print() する）方法で社員一覧を表示する比較用の関数
+    """
+    print(f"\n{'='*60}")
+    print(f"{'社員一覧':^54}")
+    print(f"{'='*60}")
+    print(f"{'名前':<15} {'性別':<10} {'年齢':<5} {'役職':<10} {'ID':<10}")
+    print(f"{'-'*60}")
+    for emp in company.employees:
+        print(f"{emp.name:<15} {emp.gender.value:<10} {emp.age:<5} {emp.post.value:<10} {emp.id:<10}")
+    print(f"{'='*60}")
+    print(f"合計: {company.current_number}名\n")
+
+
+def bench_display(sizes: list) -> None:
+    """
+    社員一覧の表示を、従来の1行ずつの print() と write_employee_table() で比較する
+
+    どちらも書き出し先は os.devnull（端末の速さに左右されないように）
+
+    Args:
+        sizes (list): 社員数のリスト
+    """
+    print("\n■ 社員一覧の表示: 1行ずつ print() vs write_employee_table（1回あたり ms）")
+    print(f"{'社員数':>10} {'保存形式':>10} {'print':>10} {'一括':>10} {'倍率':>8} {'1ページ':>10}")
+
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        for size in sizes:
+            for storage in (Company.OBJECT_STORAGE, Company.COLUMNAR_STORAGE):
+                company = make_company(size, storage=storage)
+                repeat = max(1, 100_000 // size)
+                with contextlib.redirect_stdout(devnull):
+                    print_ms = measure(lambda: legacy_display(company), repeat) / 1000
+                table_ms = measure(lambda: company.write_employee_table(devnull), repeat) / 1000
+                # 最後のページ（50行）だけを表示する場合
+                page_ms = measure(
+                    lambda: company.write_employee_table(devnull, offset=size - 50, limit=50), 100
+                ) / 1000
+                print(
+                    f"{size:>10,} {storage:>10} {print_ms:>10.1f} {table_ms:>10.1f} "
+                    f"{print_ms / table_ms:>7.1f}x {page_ms:>10.3f}"
+                )
+
+
+# ===================================================================
+# ベンチマーク7: スナップショットの保存と読み込み
+# ===================================================================
+
+def elapsed_ms(func) -> float:
+    """
+    func を1回実行したときの時間（ミリ秒）を返す関数
+    """
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_snapshot(sizes: list) -> None:
+    """
+    スナップショットからの読み込みと、add_employees() での作り直しの時間を比較する
+
+    読み込み後に最初の検索・選出・1ページ表示にかかる時間も計測する
+    （インデックスは初めて必要になったときに作られる）
+
+    Args:
+        sizes (list): 社員数のリスト
+    """
+    print("\n■ スナップショット: 保存・読み込みと、読み込み後の最初の操作（ms）")
+    print(
+        f"{'社員数':>10} {'作り直し':>10} {'保存':>8} {'読み込み':>8} "
+        f"{'ID検索':>8} {'1ページ':>8} {'社長選出':>8} {'名前検索':>8}"
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "company.snap")
+        for size in sizes:
+            rows = make_rows(size)
+
+            def rebuild():
+                company = Company(sink=NullSink())
+                company.MAX_NUMBER_OF_PEOPLE = size
+                company.add_employees(rows)
+
+            rebuild_ms = elapsed_ms(rebuild)
+            company = make_company(size, storage=Company.COLUMNAR_STORAGE)
+            save_ms = elapsed_ms(lambda: company.save(path))
+            del company
+
+            loaded = None
+
+            def load():
+                nonlocal loaded
+                loaded = Company.load(path, sink=NullSink())
+
+            load_ms = elapsed_ms(load)
+            middle_id = str(1000 + size // 2)
+            id_ms = elapsed_ms(lambda: loaded.get_personnel_by_id(middle_id))
+            page_ms = elapsed_ms(lambda: loaded.write_employee_table(io.StringIO(), offset=size // 2, limit=50))
+            president_ms = elapsed_ms(loaded.select_president)
+            name_ms = elapsed_ms(lambda: loaded.get_personnel_by_name("社員0"))
+            print(
+                f"{size:>10,} {rebuild_ms:>10.1f} {save_ms:>8.1f} {load_ms:>8.2f} "
+                f"{id_ms:>8.3f} {page_ms:>8.3f} {president_ms:>8.1f} {name_ms:>8.1f}"
+            )
+            del loaded
+
+
+# ===================================================================
+# ベンチマーク8: SQLite 形式のストレージ
+# ===================================================================
+
+def bench_sqlite(sizes: list) -> None:
+    """
+    SQLite 形式のストレージで、1人ずつ追加したときの時間を書き込みのため方ごとに比較し、
+    あわせて検索・選出の時間をオブジェクト形式と比較する
+
+    Args:
+        sizes (list): 社員数のリスト
+    """
+    print("\n■ SQLite: 1人ずつ追加（ms）と、検索・選出（µs/回）")
+    print(
+        f"{'社員数':>10} {'毎回実行':>10} {'ためて実行':>10} "
+        f"{'ID検索':>8} {'名前検索':>8} {'社長選出':>8} {'選出(obj)':>10}"
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            rows = make_rows(size)
+            companies = {}
+
+            def add_one_by_one(name, flush_interval):
+                company = Company(
+                    storage=Company.SQLITE_STORAGE, sink=NullSink(),
+                    database=os.path.join(directory, f"{name}-{size}.db"), flush_interval=flush_interval,
+                )
+                company.MAX_NUMBER_OF_PEOPLE = size
+                for row in rows:
+                    company.add_employee(*row)
+                company.flush()
+                companies[name] = company
+
+            each_ms = elapsed_ms(lambda: add_one_by_one("each", 0))
+            batched_ms = elapsed_ms(lambda: add_one_by_one("batched", 0.5))
+            company = companies["batched"]
+            middle_id = str(1000 + size // 2)
+            id_us = measure(lambda: company.get_personnel_by_id(middle_id), 2_000)
+            name_us = measure(lambda: company.get_personnel_by_name(f"社員{size // 2}"), 2_000)
+            president_us = measure(company.select_president, 2_000)
+            object_us = measure(make_company(size).select_president, 2_000)
+            print(
+                f"{size:>10,} {each_ms:>10.1f} {batched_ms:>10.1f} "
+                f"{id_us:>8.1f} {name_us:>8.1f} {president_us:>8.1f} {object_us:>10.1f}"
+            )
+            for company in companies.values():
+                company.close()
+
+
+# ===================================================================
+# ベンチマーク9: asyncio の窓口
+# ===================================================================
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    値のリストのパーセンタイル（最も近い順位の値）を返す関数
+
+    Args:
+        values (list): 値のリスト（ソート済み）
+        fraction (float): 0〜1（0.5 なら中央値）
+
+    Returns:
+        float: パーセンタイルの値
+    """
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+async def hire_concurrently(rows: list, hire) -> tuple:
+    """
+    rows の人数分のコルーチンで同時に採用を依頼し、応答時間と、イベントループが止まった最大時間を計る関数
+
+    応答時間は、全員が依頼した時刻から各コルーチンの採用が終わるまでの時間
+
+    Args:
+        rows (list): 採用データ
+        hire: 1人を採用するコルーチン関数（引数は1行分）
+
+    Returns:
+        tuple: (応答時間のリスト（ms、ソート済み）, ループが止まった最大時間（ms）)
+    """
+    stalls = [0.0]
+    done = False
+
+    async def heartbeat():
+        # 1ms ごとに起き、予定より遅れた時間をイベントループが止まっていた時間とみなす
+        while not done:
+            before = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stalls.append((time.perf_counter() - before - 0.001) * 1000)
+
+    async def request(row):
+        await hire(row)
+        return (time.perf_counter() - start) * 1000
+
+    beat = asyncio.ensure_future(heartbeat())
+    await asyncio.sleep(0.002)
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(request(row) for row in rows))
+    done = True
+    await beat
+    return sorted(latencies), max(stalls)
+
+
+def bench_async(sizes: list) -> None:
+    """
+    同時に動くコルーチンから採用したときの応答時間（p50・p99）を、
+    Company.add_employee() を直接呼ぶ場合と AsyncCompany で比較する
+
+    メッセージは print() で os.devnull に書き出す（1人ずつ表示する従来の使い方を想定）
+
+    Args:
+        sizes (list): 同時に動くコルーチンの数（＝採用人数）のリスト
+    """
+    print("\n■ asyncio: 同時に採用したときの応答時間（ms）と、イベントループが止まった最大時間（ms）")
+    print(
+        f"{'コルーチン数':>10} {'方式':>12} {'p50':>8} {'p99':>8} {'最大停止':>8} {'まとまり数':>10}"
+    )
+
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        for size in sizes:
+            rows = make_rows(size)
+            company = Company()
+            company.MAX_NUMBER_OF_PEOPLE = size
+            facade = AsyncCompany(Company())
+            facade.company.MAX_NUMBER_OF_PEOPLE = size
+
+            async def hire_directly(row):
+                company.add_employee(*row)
+
+            async def hire_through_facade(row):
+                await facade.add_employee(*row)
+
+            async def run_facade():
+                async with facade:
+                    return await hire_concurrently(rows, hire_through_facade)
+
+            with contextlib.redirect_stdout(devnull):
+                results = [
+                    ("直接呼び出し", asyncio.run(hire_concurrently(rows, hire_directly)), "-"),
+                    ("AsyncCompany", asyncio.run(run_facade()), None),
+                ]
+
+            for label, (latencies, stall), batches in results:
+                batches = f"{facade.batch_count:,}" if batches is None else batches
+                print(
+                    f"{size:>10,} {label:>12} {percentile(latencies, 0.5):>8.1f} "
+                    f"{percentile(latencies, 0.99):>8.1f} {stall:>8.1f} {batches:>10}"
+                )
+
+
+# ===================================================================
+# ベンチマーク10: 社員の検索（クエリ）
+# ===================================================================
+
+def bench_query(sizes: list) -> None:
+    """
+    company.query() と、社員リストをリスト内包表記で調べる従来の方法の速度を比較する
+
+    Args:
+        sizes (list): 社員数のリスト
+    """
+    print("\n■ クエリ: 1回あたりの時間（µs）")
+    print(f"{'社員数':>10} {'クエリ':<40} {'インデックス':>8} {'従来':>12} {'query()':>12} {'倍率':>8}")
+
+    for size in sizes:
+        company = make_company(size)
+        employees = company.employees
+        middle = employees[size // 2]
+        repeat = max(1, 100_000 // size)
+        # (説明, クエリ, クエリの結果の取り出し方, 従来の方法)
+        cases = [
+            (
+                "id == 中央の社員",
+                company.query().where(id=middle.id), EmployeeQuery.first,
+                lambda: next((e for e in employees if e.id == middle.id), None),
+            ),
+            (
+                "name == 中央の社員（全員）",
+                company.query().where(name=middle.name), list,
+                lambda: [e for e in employees if e.name == middle.name],
+            ),
+            (
+                "役員・60歳以上・年齢の高い順に10人",
+                company.query().where(post=Post.YARUIN, age__gte=60).order_by("-age").limit(10), list,
+                lambda: sorted(
+                    [e for e in employees if e.post == Post.YARUIN and e.age >= 60], key=lambda e: -e.age,
+                )[:10],
+            ),
+            (
+                "65歳以上の人数（全員を調べる）",
+                company.query().where(age__gte=65), EmployeeQuery.count,
+                lambda: len([e for e in employees if e.age >= 65]),
+            ),
+        ]
+        for label, query, run, naive_func in cases:
+            query_us = measure(lambda: run(query), repeat)
+            naive_us = measure(naive_func, repeat)
+            print(
+                f"{size:>10,} {label:<40} {query.index:>8} "
+                f"{naive_us:>12.1f} {query_us:>12.1f} {naive_us / query_us:>7.1f}x"
+            )
+
+
+# ===================================================================
+# ベンチマーク11: 年齢順インデックス（範囲・上位・パーセンタイル）
+# ===================================================================
+
+def naive_median_age(employees: list, post: Post) -> int:
+    """
+    役職の社員の年齢を並べ替えて中央値（nearest-rank 法）を求める比較用の関数
+    """
+    ages = sorted(e.age for e in employees if e.post == post)
+    return ages[max(1, -(-len(ages) // 2)) - 1]
+
+
+def bench_age_index(sizes: list) -> None:
+    """
+    年齢順インデックスを使った検索と、社員リストを調べる従来の方法の速度を比較する
+
+    あわせて、インデックスを更新する採用・削除・昇進の1人あたりの時間も計測する
+
+    Args:
+        sizes (list): 社員数のリスト
+    """
+    print("\n■ 年齢順インデックス: 1回あたりの時間（µs）")
+    print(f"{'社員数':>10} {'検索':<28} {'従来':>12} {'インデックス':>12} {'倍率':>8}")
+
+    for size in sizes:
+        company = make_company(size)
+        employees = company.employees
+        repeat = max(1, 100_000 // size)
+        # (説明, インデックスを使う関数, 従来の方法)
+        cases = [
+            (
+                "最年長の10人",
+                lambda: company.oldest_employees(10),
+                lambda: sorted(employees, key=lambda e: -e.age)[:10],
+            ),
+            (
+                "55〜60歳の社員",
+                lambda: company.employees_by_age(55, 60),
+                lambda: sorted((e for e in employees if 55 <= e.age <= 60), key=lambda e: -e.age),
+            ),
+            (
+                "55〜60歳の人数",
+                lambda: company.count_by_age(55, 60),
+                lambda: sum(1 for e in employees if 55 <= e.age <= 60),
+            ),
+            (
+                "役職ごとの年齢の中央値",
+                lambda: [company.age_percentile(50, post) for post in Post],
+                lambda: [naive_median_age(employees, post) for post in Post],
+            ),
+        ]
+        for label, indexed, naive_func in cases:
+            assert indexed() == naive_func()
+            indexed_us = measure(indexed, max(repeat, 1_000))
+            naive_us = measure(naive_func, repeat)
+            print(f"{size:>10,} {label:<28} {naive_us:>12.1f} {indexed_us:>12.1f} {naive_us / indexed_us:>7.0f}x")
+
+        # インデックスの更新にかかる時間（採用・昇進・削除を1人ずつ）
+        updates = 2_000
+        rows = make_rows(updates, seed=2)
+        company.MAX_NUMBER_OF_PEOPLE = size + updates
+        with quiet():
+            hire_us = measure(lambda: company.add_employee(*rows.pop()), updates)
+            hired = company.employees[-updates:]
+            promote_us = elapsed_ms(lambda: [employee.promote() for employee in hired]) * 1000 / updates
+            delete_us = elapsed_ms(lambda: [company.delete_employee(employee) for employee in hired]) * 1000 / updates
+        print(f"{size:>10,} {'更新（採用/昇進/削除）':<28} {hire_us:>12.1f} {promote_us:>12.1f} {delete_us:>12.1f}")
+
+
+# ===================================================================
+# ベンチマーク12: 名前の全員検索（完全一致・表記ゆれ・前方一致）
+# ===================================================================
+
+# 日本語の名前の部品（よくある名字・名前。同姓同名がたくさんできる）
+FAMILY_NAMES = (
+    "佐藤 鈴木 高橋 田中 伊藤 渡辺 山本 中村 小林 加藤 吉田 山田 佐々木 山口 松本 井上 木村 林 斎藤 清水 "
+    "山崎 森 池田 橋本 阿部 石川 山下 中島 石井 小川 前田 岡田 長谷川 藤田 後藤 近藤 村上 遠藤 青木 坂本"
+).split()
+GIVEN_NAMES = (
+    "太郎 一郎 健太 翔太 大輔 拓也 直樹 誠 浩 隆 花子 美咲 陽子 恵 愛 優子 由美 真由美 久美子 智子 "
+    "大翔 蓮 悠真 陽翔 湊 結衣 陽菜 凛 葵 芽依 さくら あかり ひなた ゆうき まこと かおり みゆき ひろし たかし あや"
+).split()
+GIVEN_SUFFIXES = ("", "子", "郎", "介", "美")
+# 名字と名前の区切り（なし・半角の空白・全角の空白）
+SEPARATORS = ("", " ", "\u3000")
+
+
+def make_japanese_rows(count: int, seed: int = 0) -> list:
+    """
+    表記ゆれのある日本語の名前で、ベンチマーク用の採用データを作る関数
+
+    Args:
+        count (int): 人数
+        seed (int): 乱数の種
+
+    Returns:
+        list: (名前, 性別, 年齢, 役職) のタプルのリスト
+    """
+    rng = random.Random(seed)
+    genders = list(Gender)
+    posts = list(Post)
+    return [
+        (
+            rng.choice(FAMILY_NAMES) + rng.choice(SEPARATORS) + rng.choice(GIVEN_NAMES) + rng.choice(GIVEN_SUFFIXES),
+            rng.choice(genders), rng.randint(18, 70), rng.choice(posts),
+        )
+        for _ in range(count)
+    ]
+
+
+def naive_normalize(name: str) -> str:
+    """
+    全角・半角と空白の違いをなくす比較用の関数（インデックスと同じ正規化）
+    """
+    return "".join(unicodedata.normalize("NFKC", name).split())
+
+
+def bench_name_search(sizes: list) -> None:
+    """
+    find_personnel_by_name（インデックス）と、全社員を調べる従来の方法の速度を比較する
+
+    名前は日本語（名字40種類 × 名前200種類 × 区切り3種類）なので、同姓同名が多い
+
+    Args:
+        sizes (list): 社員数のリスト
+    """
+    print("\n■ 名前の全員検索: 1回あたりの時間（µs）")
+    print(f"{'社員数':>10} {'検索':<32} {'見つかった人数':>12} {'従来':>12} {'インデックス':>12} {'倍率':>8}")
+
+    for size in sizes:
+        rows = make_japanese_rows(size)
+        company = Company(sink=NullSink())
+        company.MAX_NUMBER_OF_PEOPLE = size
+        hire_ms = elapsed_ms(lambda: company.add_employees(rows))
+        employees = company.employees
+        target = "佐藤　太郎"
+        repeat = max(1, 100_000 // size)
+        # (説明, 一致のしかた, 検索する名前, 従来の方法)
+        cases = [
+            (
+                "完全一致（同姓同名を全員）", Company.EXACT_MATCH, target,
+                lambda: [e for e in employees if e.name == target],
+            ),
+            (
+                "表記ゆれを無視（全角・半角・空白）", Company.NORMALIZED_MATCH, "佐藤太郎",
+                lambda: [e for e in employees if naive_normalize(e.name) == "佐藤太郎"],
+            ),
+            (
+                "前方一致（名字 佐藤）", Company.PREFIX_MATCH, "佐藤",
+                lambda: [e for e in employees if naive_normalize(e.name).startswith("佐藤")],
+            ),
+            (
+                "前方一致（名字＋名前の1文字目）", Company.PREFIX_MATCH, "佐藤 大",
+                lambda: [e for e in employees if naive_normalize(e.name).startswith("佐藤大")],
+            ),
+        ]
+        for label, match, name, naive_func in cases:
+            found = company.find_personnel_by_name(name, match)
+            assert found == naive_func()
+            indexed_us = measure(lambda: company.find_personnel_by_name(name, match), max(repeat, 10))
+            naive_us = measure(naive_func, repeat)
+            print(
+                f"{size:>10,} {label:<32} {len(found):>12,} "
+                f"{naive_us:>12.1f} {indexed_us:>12.1f} {naive_us / indexed_us:>7.0f}x"
+            )
+
+        # 一括採用の時間（インデックスの更新を含む。表記ゆれのインデックスには新しい名前だけが入る）
+        names = {row[0] for row in rows}
+        normalized = {naive_normalize(name) for name in names}
+        print(f"{size:>10,} 一括採用 {hire_ms:,.0f} ms（名前 {len(names):,}種類 / 表記ゆれをなくすと {len(normalized):,}種類）")
+
+
+# ===================================================================
+# ベンチマーク13: 変更履歴（イベントログ）の記録と再生
+# ===================================================================
+
+# 1イベントずつ fsync する場合に計測するイベント数の上限（遅いので全件は計測しない）
+FSYNC_EACH_EVENTS = 2_000
+
+
+def bench_event_log(sizes: list) -> None:
+    """
+    変更履歴の記録（1件ずつ fsync・グループコミット）と再生の速度を計測する
+
+    イベントは「1人ずつ採用」と「採用した社員の昇進」を半分ずつ
+    再生は、最初のスナップショットから全イベントを反映する場合と、
+    全員をスナップショットに入れた後の末尾（1%）だけを反映する場合を計測する
+
+    Args:
+        sizes (list): イベント数のリスト
+    """
+    print("\n■ 変更履歴: 記録と再生の速度（件/秒。末尾の再生は ms）")
+    print(
+        f"{'イベント数':>10} {'記録なし':>10} {'毎回fsync':>10} {'グループ':>10} {'一括採用':>10} "
+        f"{'全件再生':>10} {'末尾再生':>10} {'書き込み回数':>12} {'バイト/件':>10}"
+    )
+
+    for size in sizes:
+        rows = make_rows(size // 2)
+
+        def record(log, rows):
+            company = Company(sink=NullSink())
+            company.MAX_NUMBER_OF_PEOPLE = size
+            if log is not None:
+                log.attach(company)
+            start = time.perf_counter()
+            for name, gender, age, post in rows:
+                company.add_employee(name, gender, age, post)
+            for employee in company.employees:
+                employee.promote()
+            company.flush()
+            return company, 2 * len(rows) / (time.perf_counter() - start)
+
+        with tempfile.TemporaryDirectory() as directory:
+            _, plain_rate = record(None, rows)
+            fsync_log = ChangeLog(os.path.join(directory, "fsync"), commit_size=1)
+            _, fsync_rate = record(fsync_log, rows[:FSYNC_EACH_EVENTS // 2])
+            fsync_log.close()
+
+            path = os.path.join(directory, "group")
+            log = ChangeLog(path, snapshot_interval=0)
+            company, group_rate = record(log, rows)
+            commits = log.commit_count
+            log.close()
+            log_bytes = sum(
+                os.path.getsize(os.path.join(path, name)) for name in os.listdir(path) if name.startswith("events-")
+            )
+
+            bulk_log = ChangeLog(os.path.join(directory, "bulk"), snapshot_interval=0)
+            bulk = Company(sink=NullSink())
+            bulk.MAX_NUMBER_OF_PEOPLE = size
+            bulk_log.attach(bulk)
+            bulk_rate = size / 2 / (elapsed_ms(lambda: bulk.add_employees(rows) and bulk.flush()) / 1000)
+            bulk_log.close()
+
+            # 最初のスナップショット（社員0人）から全イベントを再生する
+            replay_rate = size / (elapsed_ms(lambda: ChangeLog(path).replay(sink=NullSink(), attach=False)) / 1000)
+            replayed = ChangeLog(path).replay(sink=NullSink(), attach=False)
+            assert [(e.id, e.post) for e in replayed.employees] == [(e.id, e.post) for e in company.employees]
+            del replayed
+
+            # 全員をスナップショットに入れ、その後の1%だけを再生する
+            log = ChangeLog(path, snapshot_interval=0)
+            tail = log.replay(sink=NullSink())
+            log.snapshot()
+            for employee in tail.employees[:max(1, size // 100)]:
+                employee.demote()
+            log.close()
+            tail_ms = elapsed_ms(lambda: ChangeLog(path).replay(sink=NullSink(), attach=False))
+
+        print(
+            f"{size:>10,} {plain_rate:>10,.0f} {fsync_rate:>10,.0f} {group_rate:>10,.0f} {bulk_rate:>10,.0f} "
+            f"{replay_rate:>10,.0f} {tail_ms:>10.1f} {commits:>12,} {log_bytes / size:>10.1f}"
+        )
+
+
+# ===================================================================
+# エントリーポイント
+# ===================================================================
+
+# ベンチマーク名 → 関数
+BENCHMARKS = {
+    "select_president": bench_select_president,
+    "memory": bench_memory,
+    "slots": bench_slots,
+    "payroll": bench_payroll,
+    "sinks": bench_sinks,
+    "display": bench_display,
+    "snapshot": bench_snapshot,
+    "sqlite": bench_sqlite,
+    "async": bench_async,
+    "query": bench_query,
+    "age_index": bench_age_index,
+    "name_search": bench_name_search,
+    "event_log": bench_event_log,
+}
+
+
+def main():
+    """
+    コマンドライン引数で指定されたベンチマークを実行する
+    """
+    parser = argparse.ArgumentParser(description="会社管理システムのベンチマーク")
+    parser.add_argument("names", nargs="*", help=f"実行するベンチマーク（{', '.join(BENCHMARKS)}）")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="社員数")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"不明なベンチマーク: {', '.join(unknown)}")
+
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name](args.sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,34 @@
 Classes:
     Gender: 性別を表す列挙型
     Post: 役職を表す列挙型
+    OutputEvent: 会社管理システムが出力する1件のメッセージ
+    OutputSink: メッセージの出力先（シンク）の基底クラス
+    PrintSink: メッセージを print() で表示するシンク（デフォルト）
+    NullSink: メッセージを捨てるシンク（静かなモード）
+    BufferedSink: メッセージをためてまとめて書き出すシンク
+    ListSink: メッセージをイベントのままリストにためるシンク
+    LoggingSink: メッセージを logging に渡すシンク
+    IdAllocator: 社員IDを採番するクラスの基底クラス
+    CounterIdAllocator: 連番で社員IDを採番するクラス
+    SnowflakeIdAllocator: 時刻＋連番で社員IDを採番するクラス
+    BlockIdAllocator: 事前に確保したID範囲から社員IDを採番するクラス
     Human: 人間の基底クラス
     President: 社長クラス
     Employee: 社員クラス
+    HiringSummary: 一括採用の結果クラス
+    DeletionSummary: 一括削除の結果クラス
+    ReviewSummary: 人事評価の一括反映の結果クラス
     Company: 会社クラス
+    EmployeeQuery: 社員を条件で検索するクエリクラス
+    PayrollReport: 給与計算の結果クラス
+    AsyncCompany: asyncio から会社を使うための窓口クラス
+    AsyncPresident: asyncio から社長の操作を行うための窓口クラス
+    CompanyRegistry: 多数の会社をワーカープロセスに分けて管理するクラス
+
+Functions:
+    get_default_sink: 会社に所属しない人やシンク未指定の会社が使う出力先を取得する関数
+    set_default_sink: 上記の出力先を変更する関数
+    compute_payroll: 会社全体の給与を役職・性別・年齢帯ごとにまとめて集計する関数
 """
 
 # ===================================================================
@@ -17,8 +41,34 @@ Classes:
 # ===================================================================
 
 from enum import Enum  # 列挙型（Enum）を使うためのクラスをインポート
-from typing import List, Optional  # 型ヒント用：List（リスト型）、Optional（None許可型）
-import random  # ランダムな数値を生成するためのモジュール
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union  # 型ヒント用
+from array import array  # 同じ型の数値を省メモリで並べる配列（列形式のストレージで使う）
+import asyncio  # 非同期処理（AsyncCompany・AsyncPresident で使う）
+import bisect  # ソート済みの並びを二分探索するためのモジュール
+import hashlib  # プロセスをまたいで同じ値になるハッシュ（会社の振り分けで使う）
+import heapq  # ヒープ（優先度付きキュー）を扱うためのモジュール
+import itertools  # 連番（count）などのイテレータを作るためのモジュール
+import operator  # 比較演算子を関数として使うためのモジュール（クエリの条件で使う）
+import logging  # メッセージを logging に渡すシンク（LoggingSink）で使うモジュール
+import math  # 切り上げ（ceil）に使うモジュール（年齢のパーセンタイルで使う）
+import mmap  # ファイルをメモリに対応づける（スナップショットの読み込みで使う）
+import multiprocessing  # ワーカープロセス（CompanyRegistry のシャード）を作るためのモジュール
+import os  # ファイルの置き換え（os.replace）に使うモジュール
+import sqlite3  # SQLite のデータベース（SQLite 形式のストレージで使う）
+import struct  # バイナリ形式のヘッダーを読み書きするためのモジュール
+import sys  # 文字列の共有（sys.intern）に使うモジュール
+import threading  # 複数スレッドから安全に使うためのロック（Lock）を提供するモジュール
+import time  # 現在時刻（ミリ秒）を取得するためのモジュール
+import unicodedata  # 文字の正規化（全角・半角の統一）に使うモジュール（名前の表記ゆれ検索で使う）
+import zlib  # チェックサム（CRC32）を計算するモジュール（変更履歴の壊れた末尾を見分けるのに使う）
+from collections import Counter  # 要素ごとの個数を数える辞書（給与計算の集計で使う）
+from operator import attrgetter, itemgetter  # 属性・要素を取り出す関数を作るためのモジュール
+
+# NumPy はあれば使う（給与計算をベクトル化する）。なければ標準ライブラリだけで計算する
+try:
+    import numpy as _numpy
+except ImportError:  # NumPy がインストールされていない環境
+    _numpy = None
 
 
 # ===================================================================
@@ -48,13 +98,18 @@ class Post(Enum):
     役職を表す列挙型
     
     社員の役職を管理するための列挙型
-    昇進・降格の順序も暗黙的に定義される
+    定義順（低い順）が昇進・降格の順序になる
+    順位と1つ上・1つ下の役職はクラス定義の直後に1回だけ計算しておくので、
+    昇進・降格のたびにリストを作って探す必要はない
 
     Attributes:
         HIRA: 平社員
         SYUNIN: 主任
         KATYO: 課長
         YARUIN: 役員
+        rank (int): 役職の順位（ヒラが0、上の役職ほど大きい）
+        next (Optional[Post]): 1つ上の役職（最高役職ならNone）
+        prev (Optional[Post]): 1つ下の役職（最低役職ならNone）
     """
 
     HIRA = "ヒラ"    # Post.HIRA で "ヒラ" という文字列にアクセス
@@ -62,373 +117,7076 @@ class Post(Enum):
     KATYO = "課長"   # Post.KATYO で "課長" という文字列にアクセス
     YARUIN = "役員"  # Post.YARUIN で "役員" という文字列にアクセス
 
-
-# ===================================================================
-# 基底クラス：Human（人間）
-# ===================================================================
-
-class Human:
-    """
-    人間を表す基底クラス
-    
-    社員（Employee）と社長（President）の共通部分を定義
-    継承元となるスーパークラス
-
-    Attributes:
-        name (str): 名前
-        gender (Gender): 性別
-        age (int): 年齢
-    """
-
-    def __init__(self, name: str, gender: Gender, age: int):
-        """
-        Humanクラスのコンストラクタ
-        
-        オブジェクト生成時に呼ばれる初期化メソッド
-        引数で受け取った値をインスタンス変数に保存
-
-        Args:
-            name (str): 名前
-            gender (Gender): 性別（Gender列挙型）
-            age (int): 年齢
-        """
-        # 引数 name を protected属性 _name に保存
-        # _name の _ は「外部から直接アクセスしないで」という慣例
-        self._name = name
-        
-        # 引数 gender を protected属性 _gender に保存
-        self._gender = gender
-        
-        # 引数 age を protected属性 _age に保存
-        self._age = age
-
-    @property  # デコレータ：このメソッドをプロパティ（属性のように使える）にする
-    def name(self) -> str:
+    @property  # プロパティ化
+    def rank(self) -> int:
         """
-        名前を取得するプロパティ（getter）
-        
-        obj.name でアクセス可能（メソッドだが括弧不要）
-        読み取り専用（setterがないので変更不可）
+        役職の順位を取得するプロパティ（getter）
 
         Returns:
-            str: 名前
+            int: 順位（ヒラが0、上の役職ほど大きい）
         """
-        return self._name  # 内部の _name を返す
+        return self._rank
 
     @property  # プロパティ化
-    def gender(self) -> Gender:
+    def next(self) -> Optional["Post"]:
         """
-        性別を取得するプロパティ（getter）
-        
-        読み取り専用
+        1つ上の役職を取得するプロパティ（getter）
 
         Returns:
-            Gender: 性別（Gender列挙型）
+            Optional[Post]: 1つ上の役職、最高役職の場合はNone
         """
-        return self._gender  # 内部の _gender を返す
+        return self._next
 
     @property  # プロパティ化
-    def age(self) -> int:
+    def prev(self) -> Optional["Post"]:
         """
-        年齢を取得するプロパティ（getter）
-        
-        読み取り専用
+        1つ下の役職を取得するプロパティ（getter）
 
         Returns:
-            int: 年齢
+            Optional[Post]: 1つ下の役職、最低役職の場合はNone
         """
-        return self._age  # 内部の _age を返す
+        return self._prev
 
-    def do_self_introduction(self) -> None:
-        """
-        自己紹介を行うメソッド
-        
-        継承先のクラスでオーバーライド（上書き）される
-        基本的な自己紹介の形式を提供
 
-        Returns:
-            None: 戻り値なし（画面出力のみ）
-        """
-        # f-string（フォーマット文字列）で変数を埋め込み
-        # self.name はプロパティ経由で _name にアクセス
-        # self.gender.value で Gender列挙型の値（"男性"等）を取得
-        print(
-            f"私の名前は{self.name}です。性別は{self.gender.value}で、年齢は{self.age}歳です。"
-        )
+def _link_posts() -> None:
+    """
+    各役職に順位と1つ上・1つ下の役職を設定するプライベート関数
+
+    モジュールの読み込み時に1回だけ呼ばれる
+
+    Returns:
+        None: 戻り値なし
+    """
+    # tuple(Post) は定義順（ヒラ, 主任, 課長, 役員）に並ぶ
+    posts = tuple(Post)
+    for rank, post in enumerate(posts):
+        post._rank = rank
+        post._next = posts[rank + 1] if rank + 1 < len(posts) else None
+        post._prev = posts[rank - 1] if rank > 0 else None
+
+
+_link_posts()
 
 
 # ===================================================================
-# 継承クラス：Employee（社員）
+# メッセージの出力先（シンク）
 # ===================================================================
 
-class Employee(Human):
+class OutputEvent:
     """
-    社員を表すクラス
-    
-    Humanクラスを継承し、役職・給与・IDなどの社員特有の情報を追加
+    会社管理システムが出力する1件のメッセージを表すクラス
+
+    メッセージの文字列は、必要になったとき（message を読んだとき）に初めて作る
+    そのため、文字列を使わないシンク（NullSink など）では組み立てのコストがかからない
 
     Attributes:
-        post (Post): 役職
-        id (str): 社員ID
-        _salary_map (dict): 役職と給与のマッピング（クラス変数）
+        kind (str): メッセージの種類（"hired", "deleted", "promoted" など）
+        fields (Dict[str, Any]): メッセージに埋め込む値
+        message (str): 表示用の文字列
     """
 
-    # クラス変数：全てのEmployeeインスタンスで共有される辞書
-    # 役職（Post列挙型）をキー、給与（int）を値とする
-    _salary_map = {
-        Post.HIRA: 200000,    # ヒラ社員：20万円
-        Post.SYUNIN: 300000,  # 主任：30万円
-        Post.KATYO: 450000,   # 課長：45万円
-        Post.YARUIN: 600000,  # 役員：60万円
-    }
+    __slots__ = ("_kind", "_template", "_fields")
 
-    def __init__(self, name: str, gender: Gender, age: int, post: Post):
+    def __init__(self, kind: str, template: str, fields: Dict[str, Any]):
         """
-        Employeeクラスのコンストラクタ
-        
-        親クラス（Human）のコンストラクタも呼び出す
+        OutputEventクラスのコンストラクタ
 
         Args:
-            name (str): 名前
-            gender (Gender): 性別
-            age (int): 年齢
-            post (Post): 役職
+            kind (str): メッセージの種類
+            template (str): str.format() 形式のひな形
+            fields (Dict[str, Any]): ひな形に埋め込む値
         """
-        # super() で親クラス（Human）のコンストラクタを呼び出し
-        # name, gender, age を親クラスに渡して初期化
-        super().__init__(name, gender, age)
-        
-        # 引数 post を protected属性 _post に保存
-        self._post = post
-        
-        # _generate_id() メソッドを呼び出して社員IDを生成
-        # 生成されたIDを _id に保存
-        self._id = self._generate_id()
+        self._kind = kind
+        self._template = template
+        self._fields = fields
 
-    def _generate_id(self) -> str:
+    @property  # プロパティ化
+    def kind(self) -> str:
         """
-        社員IDを生成するプライベートメソッド
-        
-        _で始まるメソッド名は「内部実装用」という慣例
-        ランダムな4桁の数字を生成して文字列として返す
+        メッセージの種類を取得するプロパティ（getter）
 
         Returns:
-            str: 社員ID（例："1234"）
+            str: メッセージの種類
         """
-        # random.randint(1000, 9999) で 1000〜9999 のランダムな整数を生成
-        # str() で文字列に変換して返す
-        return str(random.randint(1000, 9999))
+        return self._kind
 
     @property  # プロパティ化
-    def post(self) -> Post:
+    def fields(self) -> Dict[str, Any]:
         """
-        役職を取得するプロパティ（getter）
-        
-        読み取り専用（setterなし）
-        ※昇進・降格は promote(), demote() メソッドで行う
+        メッセージに埋め込む値を取得するプロパティ（getter）
 
         Returns:
-            Post: 役職（Post列挙型）
+            Dict[str, Any]: 項目名 → 値
         """
-        return self._post  # 内部の _post を返す
+        return self._fields
 
     @property  # プロパティ化
-    def salary(self) -> int:
+    def message(self) -> str:
         """
-        給与を取得するプロパティ（getter）
-        
-        現在の役職に応じた給与を _salary_map から取得
-        読み取り専用（給与は役職で自動決定）
+        表示用の文字列を取得するプロパティ（getter）
 
         Returns:
-            int: 給与額
+            str: ひな形に値を埋め込んだ文字列（print() で表示していたものと同じ）
         """
-        # クラス変数 _salary_map を参照
-        # self._post をキーにして対応する給与を取得
-        return self._salary_map[self._post]
+        return self._template.format(**self._fields)
 
-    @property  # プロパティ化
-    def id(self) -> str:
+    def __repr__(self) -> str:
         """
-        社員IDを取得するプロパティ（getter）
-        
-        読み取り専用（IDは生成時に固定）
+        デバッグ用の文字列表現を返すメソッド
 
         Returns:
-            str: 社員ID
+            str: 種類と値を含む文字列
         """
-        return self._id  # 内部の _id を返す
+        return f"OutputEvent({self._kind!r}, {self._fields!r})"
 
-    def do_self_introduction(self) -> None:
+
+class OutputSink:
+    """
+    メッセージの出力先（シンク）の基底クラス
+
+    会社・社員・社長のメッセージは print() で直接表示せず、シンクの emit() に渡す
+    サブクラスで emit() を実装する
+
+    Attributes:
+        enabled (bool): メッセージを受け取るか（False ならメッセージを作ること自体を省く）
+    """
+
+    # False のシンクには、呼び出し側がメッセージを作らずに済ませる
+    enabled = True
+
+    def emit(self, event: OutputEvent) -> None:
         """
-        自己紹介を行うメソッド（オーバーライド）
-        
-        親クラス（Human）のメソッドを上書き
-        社員版の自己紹介（役職情報を追加）
+        メッセージを1件受け取るメソッド
+
+        Args:
+            event (OutputEvent): メッセージ
 
         Returns:
             None: 戻り値なし
         """
-        # 親クラスとほぼ同じだが、役職情報を追加
-        # self.post.value で Post列挙型の値（"ヒラ"等）を取得
-        print(
-            f"私の名前は{self.name}です。性別は{self.gender.value}で、"
-            f"年齢は{self.age}歳、役職は{self.post.value}です。"
-        )
+        raise NotImplementedError
 
-    def promote(self) -> None:
+    def flush(self) -> None:
         """
-        昇進するメソッド
-        
-        現在の役職から1つ上の役職に昇進
-        すでに最高役職（役員）の場合は昇進しない
+        ためているメッセージを書き出すメソッド（ためないシンクでは何もしない）
 
         Returns:
             None: 戻り値なし
         """
-        # 役職の昇進順序をリストで定義（低い順）
-        post_order = [Post.HIRA, Post.SYUNIN, Post.KATYO, Post.YARUIN]
-        
-        # list.index() で現在の役職のインデックスを取得
-        # 例：Post.HIRA なら 0、Post.SYUNIN なら 1
-        current_index = post_order.index(self._post)
 
-        # 現在のインデックスがリストの最後より前かチェック
-        if current_index < len(post_order) - 1:
-            # 1つ上の役職に昇進（インデックスを+1）
-            self._post = post_order[current_index + 1]
-            # 昇進メッセージを表示
-            print(f"{self.name}さんが{self.post.value}に昇進しました！")
-        else:
-            # すでに最高役職の場合
-            print(f"{self.name}さんはすでに最高役職です。")
 
-    def demote(self) -> None:
+class PrintSink(OutputSink):
+    """
+    メッセージを print() で表示するシンク（デフォルト）
+
+    従来の print() と同じ出力になる
+    """
+
+    def emit(self, event: OutputEvent) -> None:
         """
-        降格するメソッド
-        
-        現在の役職から1つ下の役職に降格
-        すでに最低役職（ヒラ）の場合は降格しない
+        メッセージを print() で表示するメソッド
+
+        Args:
+            event (OutputEvent): メッセージ
 
         Returns:
             None: 戻り値なし
         """
-        # 役職の順序リスト（promote() と同じ）
-        post_order = [Post.HIRA, Post.SYUNIN, Post.KATYO, Post.YARUIN]
-        
-        # 現在の役職のインデックスを取得
-        current_index = post_order.index(self._post)
-
-        # 現在のインデックスが0より大きいかチェック
-        if current_index > 0:
-            # 1つ下の役職に降格（インデックスを-1）
-            self._post = post_order[current_index - 1]
-            # 降格メッセージを表示
-            print(f"{self.name}さんが{self.post.value}に降格しました。")
-        else:
-            # すでに最低役職の場合
-            print(f"{self.name}さんはすでに最低役職です。")
-
+        print(event.message)
 
-# ===================================================================
-# 継承クラス：President（社長）
-# ===================================================================
 
-class President(Human):
+class NullSink(OutputSink):
     """
-    社長を表すクラス
-    
-    Humanクラスを継承し、給与・会社情報などの社長特有の情報を追加
-    会社の管理機能（社員の追加・削除・検索など）を持つ
+    メッセージを捨てるシンク（静かなモード）
 
-    Attributes:
-        _salary (int): 社長の給与
-        company (Company): 所属する会社
+    enabled が False なので、呼び出し側はメッセージの文字列もイベントも作らない
     """
 
-    def __init__(self, name: str, gender: Gender, age: int):
-        """
-        Presidentクラスのコンストラクタ
-        
-        親クラス（Human）のコンストラクタも呼び出す
+    enabled = False
 
-        Args:
-            name (str): 名前
-            gender (Gender): 性別
-            age (int): 年齢
+    def emit(self, event: OutputEvent) -> None:
         """
-        # 親クラス（Human）のコンストラクタを呼び出し
-        super().__init__(name, gender, age)
-        
-        # 社長の給与を100万円に設定
-        self._salary = 1000000
-        
-        # 会社は後から設定されるので、最初はNoneで初期化
-        # Optional["Company"] は「Companyクラスまたはnone」という型ヒント
-        # 文字列 "Company" は前方参照（クラスがまだ定義されていないため）
-        self._company: Optional["Company"] = None
+        メッセージを捨てるメソッド
 
-    @property  # プロパティ化
-    def salary(self) -> int:
-        """
-        給与を取得するプロパティ（getter）
-        
-        読み取り専用
+        Args:
+            event (OutputEvent): メッセージ
 
         Returns:
-            int: 給与額（100万円固定）
+            None: 戻り値なし
         """
-        return self._salary  # 内部の _salary を返す
 
-    @property  # プロパティ化
-    def company(self) -> Optional["Company"]:
+
+class BufferedSink(OutputSink):
+    """
+    メッセージをためて、まとめて書き出すシンク
+
+    1件ごとに書き込まず、buffer_size 件たまるか flush() が呼ばれたときに
+    1回の write() でまとめて書き出す（端末やパイプへの書き込み回数が減る）
+    書き出し先を省略した場合は、書き出す時点の sys.stdout に書く
+    """
+
+    def __init__(self, stream: Optional[Any] = None, buffer_size: int = 1024):
         """
-        会社を取得するプロパティ（getter）
-        
-        社長が所属する会社オブジェクトを返す
+        BufferedSinkクラスのコンストラクタ
 
-        Returns:
-            Optional[Company]: 所属する会社（未設定の場合はNone）
+        Args:
+            stream (Optional[Any]): 書き出し先（write() を持つもの）
+            buffer_size (int): まとめて書き出す件数
         """
-        return self._company  # 内部の _company を返す
+        if buffer_size <= 0:
+            raise ValueError(f"buffer_size が不正です: {buffer_size!r}")
+        self._stream = stream
+        self._buffer_size = buffer_size
+        self._lines: List[str] = []
 
-    @company.setter  # companyプロパティのsetter
-    def company(self, company: "Company") -> None:
+    def emit(self, event: OutputEvent) -> None:
         """
-        会社を設定するプロパティ（setter）
-        
-        president.company = some_company のように代入時に呼ばれる
+        メッセージをためるメソッド（buffer_size 件たまったら書き出す）
 
         Args:
-            company (Company): 所属する会社
+            event (OutputEvent): メッセージ
 
         Returns:
             None: 戻り値なし
         """
-        # 引数で受け取った会社オブジェクトを _company に保存
-        self._company = company
+        self._lines.append(event.message)
+        if len(self._lines) >= self._buffer_size:
+            self.flush()
 
-    def do_self_introduction(self) -> None:
+    def flush(self) -> None:
         """
-        自己紹介を行うメソッド（オーバーライド）
-        
-        親クラス（Human）のメソッドを上書き
-        社長版の自己紹介
+        ためているメッセージをまとめて書き出すメソッド
 
         Returns:
             None: 戻り値なし
         """
-        # 社長であることを明示した自己紹介
-        print(
-            f"私の名前は{self.name}です。性別は{self.gender.value}で、"
-            f"年齢は{self.age}歳、社長です。"
-        )
+        if not self._lines:
+            return
+        stream = self._stream if self._stream is not None else sys.stdout
+        # print() と同じく、1件ごとに改行をつける
+        stream.write("\n".join(self._lines) + "\n")
+        self._lines = []
 
-    def get_personnel_by_id(self, id: str) -> Optional[Employee]:
-        """
+
+class ListSink(OutputSink):
+    """
+    メッセージをイベント（OutputEvent）のままリストにためるシンク
+
+    種類や値で絞り込めるので、テストや集計に使う
+    """
+
+    def __init__(self):
+        """
+        ListSinkクラスのコンストラクタ
+        """
+        self._events: List[OutputEvent] = []
+
+    @property  # プロパティ化
+    def events(self) -> List[OutputEvent]:
+        """
+        受け取ったイベントを取得するプロパティ（getter）
+
+        Returns:
+            List[OutputEvent]: 受け取った順のイベント
+        """
+        return self._events
+
+    @property  # プロパティ化
+    def messages(self) -> List[str]:
+        """
+        受け取ったメッセージの文字列を取得するプロパティ（getter）
+
+        Returns:
+            List[str]: 受け取った順のメッセージ
+        """
+        return [event.message for event in self._events]
+
+    def emit(self, event: OutputEvent) -> None:
+        """
+        イベントをリストに追加するメソッド
+
+        Args:
+            event (OutputEvent): メッセージ
+
+        Returns:
+            None: 戻り値なし
+        """
+        self._events.append(event)
+
+    def clear(self) -> None:
+        """
+        ためたイベントを消すメソッド
+
+        Returns:
+            None: 戻り値なし
+        """
+        self._events.clear()
+
+
+class LoggingSink(OutputSink):
+    """
+    メッセージを logging のロガーに渡すシンク
+
+    ロガーでそのレベルが無効なら、メッセージの文字列は作らない
+    メッセージの種類と値は、ログレコードの event / event_fields 属性で参照できる
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO):
+        """
+        LoggingSinkクラスのコンストラクタ
+
+        Args:
+            logger (Optional[logging.Logger]): 渡す先のロガー（省略時はこのモジュールのロガー）
+            level (int): ログレベル
+        """
+        self._logger = logger if logger is not None else logging.getLogger(__name__)
+        self._level = level
+
+    def emit(self, event: OutputEvent) -> None:
+        """
+        メッセージをロガーに渡すメソッド
+
+        Args:
+            event (OutputEvent): メッセージ
+
+        Returns:
+            None: 戻り値なし
+        """
+        if self._logger.isEnabledFor(self._level):
+            self._logger.log(
+                self._level, "%s", event.message,
+                extra={"event": event.kind, "event_fields": event.fields},
+            )
+
+
+# 会社に所属しない人（社長・社員）や、シンクを指定していない会社が使う出力先
+_default_sink: OutputSink = PrintSink()
+
+
+def get_default_sink() -> OutputSink:
+    """
+    デフォルトの出力先を取得する関数
+
+    Returns:
+        OutputSink: デフォルトの出力先
+    """
+    return _default_sink
+
+
+def set_default_sink(sink: OutputSink) -> OutputSink:
+    """
+    デフォルトの出力先を変更する関数
+
+    set_default_sink(NullSink()) でプログラム全体を静かなモードにできる
+
+    Args:
+        sink (OutputSink): 新しい出力先
+
+    Returns:
+        OutputSink: 変更前の出力先（元に戻すときに使う）
+    """
+    global _default_sink
+    previous = _default_sink
+    _default_sink = sink
+    return previous
+
+
+def _sink_of(company: Optional["Company"]) -> OutputSink:
+    """
+    会社の出力先（会社がなければデフォルトの出力先）を返すプライベート関数
+
+    Args:
+        company (Optional[Company]): 所属する会社
+
+    Returns:
+        OutputSink: 出力先
+    """
+    return _default_sink if company is None else company.sink
+
+
+def _emit(sink: OutputSink, kind: str, template: str, **fields: Any) -> None:
+    """
+    メッセージを出力先に渡すプライベート関数
+
+    出力先が無効（NullSink）なら、イベントも文字列も作らずに戻る
+
+    Args:
+        sink (OutputSink): 出力先
+        kind (str): メッセージの種類
+        template (str): str.format() 形式のひな形
+        **fields: ひな形に埋め込む値
+
+    Returns:
+        None: 戻り値なし
+    """
+    if sink.enabled:
+        sink.emit(OutputEvent(kind, template, fields))
+
+
+# ===================================================================
+# 社員IDの採番クラス
+# ===================================================================
+
+class IdAllocator:
+    """
+    社員IDを採番するクラスの基底クラス
+
+    会社（Company）ごとに1つ持ち、社員を採用するたびにIDを払い出す
+    ランダム生成と違って重複が起きず、1件あたり O(1) で採番できる
+    サブクラスで allocate() と allocate_block() を実装する
+
+    どの実装も内部でロックを使うので、複数スレッドから同時に呼んでも安全
+    """
+
+    def allocate(self) -> int:
+        """
+        IDを1つ払い出すメソッド
+
+        Returns:
+            int: 新しいID
+        """
+        raise NotImplementedError
+
+    def allocate_block(self, count: int) -> Sequence[int]:
+        """
+        IDをまとめて払い出すメソッド
+
+        大量採用のときに1件ずつロックを取らなくて済むように、
+        count 個のIDを一度に確保する
+
+        Args:
+            count (int): 払い出すIDの個数
+
+        Returns:
+            Sequence[int]: 払い出したIDの並び（採番順）
+        """
+        raise NotImplementedError
+
+
+class CounterIdAllocator(IdAllocator):
+    """
+    連番で社員IDを採番するクラス
+
+    start から1ずつ増える番号を払い出す（デフォルトは 1000, 1001, ...）
+    まとめて払い出す場合は range を返すので、個数に関係なく O(1)
+
+    Attributes:
+        next_id (int): 次に払い出すID
+    """
+
+    def __init__(self, start: int = 1000):
+        """
+        CounterIdAllocatorクラスのコンストラクタ
+
+        Args:
+            start (int): 最初に払い出すID
+        """
+        # 次に払い出す番号
+        self._next = start
+        # 同時に呼ばれても同じ番号を2回払い出さないためのロック
+        self._lock = threading.Lock()
+
+    @property  # プロパティ化
+    def next_id(self) -> int:
+        """
+        次に払い出すIDを取得するプロパティ（getter）
+
+        Returns:
+            int: 次に払い出すID
+        """
+        return self._next
+
+    def allocate(self) -> int:
+        """
+        IDを1つ払い出すメソッド
+
+        Returns:
+            int: 新しいID
+        """
+        # with 文でロックを取得（ブロックを抜けると自動で解放）
+        with self._lock:
+            new_id = self._next
+            self._next += 1
+        return new_id
+
+    def allocate_block(self, count: int) -> range:
+        """
+        IDをまとめて払い出すメソッド
+
+        Args:
+            count (int): 払い出すIDの個数
+
+        Returns:
+            range: 払い出したIDの範囲
+        """
+        if count < 0:
+            raise ValueError(f"count は0以上である必要があります: {count}")
+
+        with self._lock:
+            start = self._next
+            self._next += count
+        # range は中身を展開しないので、大量でもメモリを使わない
+        return range(start, start + count)
+
+
+class SnowflakeIdAllocator(IdAllocator):
+    """
+    時刻＋連番（Snowflake方式）で社員IDを採番するクラス
+
+    IDの構成（上位ビットから）:
+        経過ミリ秒（41ビット） | ワーカーID（10ビット） | 連番（12ビット）
+
+    ワーカーIDを変えれば、複数プロセス・複数会社で採番しても重複しない
+    1ミリ秒に 4096 個を超えて払い出す場合は、待たずに時刻を1ミリ秒先に進めて
+    続きの番号を払い出す（リトライや sleep はしない）
+
+    Attributes:
+        worker_id (int): ワーカーID（0〜1023）
+    """
+
+    # 各部分のビット数
+    WORKER_BITS = 10
+    SEQUENCE_BITS = 12
+
+    # 時刻の基準（2025-01-01 00:00:00 UTC のミリ秒）
+    DEFAULT_EPOCH_MS = 1735689600000
+
+    def __init__(self, worker_id: int = 0, epoch_ms: int = DEFAULT_EPOCH_MS):
+        """
+        SnowflakeIdAllocatorクラスのコンストラクタ
+
+        Args:
+            worker_id (int): ワーカーID（0〜1023）
+            epoch_ms (int): 時刻の基準となるUNIX時間（ミリ秒）
+        """
+        if not 0 <= worker_id < (1 << self.WORKER_BITS):
+            raise ValueError(f"worker_id は 0〜{(1 << self.WORKER_BITS) - 1} の範囲で指定してください: {worker_id}")
+
+        self._worker_id = worker_id
+        self._epoch_ms = epoch_ms
+        # 最後に払い出したIDの時刻と連番
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    @property  # プロパティ化
+    def worker_id(self) -> int:
+        """
+        ワーカーIDを取得するプロパティ（getter）
+
+        Returns:
+            int: ワーカーID
+        """
+        return self._worker_id
+
+    def _now_ms(self) -> int:
+        """
+        基準時刻からの経過ミリ秒を返すプライベートメソッド
+
+        Returns:
+            int: 経過ミリ秒
+        """
+        return time.time_ns() // 1_000_000 - self._epoch_ms
+
+    def _reserve(self, count: int) -> List[int]:
+        """
+        ロックを取得した状態で count 個のIDを組み立てるプライベートメソッド
+
+        Args:
+            count (int): 払い出すIDの個数
+
+        Returns:
+            List[int]: 払い出したID
+        """
+        seq_limit = 1 << self.SEQUENCE_BITS
+        worker_part = self._worker_id << self.SEQUENCE_BITS
+        time_shift = self.WORKER_BITS + self.SEQUENCE_BITS
+
+        now = self._now_ms()
+        if now > self._last_ms:
+            # 新しいミリ秒に入ったので連番を0から始める
+            self._last_ms = now
+            self._sequence = 0
+        # 時計が戻った場合（now < _last_ms）も _last_ms を使い続けるので、
+        # IDが小さくなる（重複する）ことはない
+
+        ids = []
+        for _ in range(count):
+            if self._sequence >= seq_limit:
+                # このミリ秒の連番を使い切ったら、時刻を1ミリ秒先に進める
+                self._last_ms += 1
+                self._sequence = 0
+            ids.append((self._last_ms << time_shift) | worker_part | self._sequence)
+            self._sequence += 1
+        return ids
+
+    def allocate(self) -> int:
+        """
+        IDを1つ払い出すメソッド
+
+        Returns:
+            int: 新しいID
+        """
+        with self._lock:
+            return self._reserve(1)[0]
+
+    def allocate_block(self, count: int) -> List[int]:
+        """
+        IDをまとめて払い出すメソッド
+
+        Args:
+            count (int): 払い出すIDの個数
+
+        Returns:
+            List[int]: 払い出したID（昇順）
+        """
+        if count < 0:
+            raise ValueError(f"count は0以上である必要があります: {count}")
+
+        with self._lock:
+            return self._reserve(count)
+
+
+class BlockIdAllocator(IdAllocator):
+    """
+    事前に確保したID範囲から社員IDを採番するクラス
+
+    共有の採番元（source）から block_size 個ずつまとめてIDを確保しておき、
+    手元の範囲がなくなるまではロック1回だけで払い出す
+    複数の会社で1つの採番元を共有しつつ、採番元へのアクセスを減らしたい場合に使う
+
+    Attributes:
+        block_size (int): 採番元から一度に確保するIDの個数
+    """
+
+    def __init__(self, source: Optional[IdAllocator] = None, block_size: int = 1024):
+        """
+        BlockIdAllocatorクラスのコンストラクタ
+
+        Args:
+            source (Optional[IdAllocator]): ID範囲を確保する採番元（省略時は新しい連番）
+            block_size (int): 採番元から一度に確保するIDの個数
+        """
+        if block_size <= 0:
+            raise ValueError(f"block_size は1以上である必要があります: {block_size}")
+
+        self._source = source if source is not None else CounterIdAllocator()
+        self._block_size = block_size
+        # 手元に確保済みで、まだ払い出していないID
+        self._block: Sequence[int] = ()
+        self._position = 0
+        self._lock = threading.Lock()
+
+    @property  # プロパティ化
+    def block_size(self) -> int:
+        """
+        採番元から一度に確保するIDの個数を取得するプロパティ（getter）
+
+        Returns:
+            int: ブロックサイズ
+        """
+        return self._block_size
+
+    def allocate(self) -> int:
+        """
+        IDを1つ払い出すメソッド
+
+        Returns:
+            int: 新しいID
+        """
+        with self._lock:
+            if self._position >= len(self._block):
+                # 手元のIDを使い切ったら、採番元から次のブロックを確保
+                self._block = self._source.allocate_block(self._block_size)
+                self._position = 0
+            new_id = self._block[self._position]
+            self._position += 1
+        return new_id
+
+    def allocate_block(self, count: int) -> Sequence[int]:
+        """
+        IDをまとめて払い出すメソッド
+
+        手元の残りで足りない場合は、不足分だけ採番元から直接確保する
+
+        Args:
+            count (int): 払い出すIDの個数
+
+        Returns:
+            Sequence[int]: 払い出したID
+        """
+        if count < 0:
+            raise ValueError(f"count は0以上である必要があります: {count}")
+
+        with self._lock:
+            remaining = len(self._block) - self._position
+            if remaining == 0:
+                # 手元が空なら採番元の結果をそのまま返す（range のまま返せる）
+                return self._source.allocate_block(count)
+
+            # まず手元の残りから払い出す
+            taken = min(count, remaining)
+            ids = list(self._block[self._position:self._position + taken])
+            self._position += taken
+            if taken < count:
+                ids.extend(self._source.allocate_block(count - taken))
+        return ids
+
+
+# 会社に所属していない社員（Employee を直接作った場合）用の採番クラス
+# プロセス全体で共有するので、直接作った社員同士でもIDは重複しない
+_default_id_allocator = CounterIdAllocator()
+
+
+# ===================================================================
+# 読み書きロック（スレッドセーフな会社で使う）
+# ===================================================================
+
+class _LockGuard:
+    """
+    with 文でロックを取って離すためのクラス
+
+    状態を持たないので、1つのオブジェクトを何度でも（複数スレッドからでも）使える
+    """
+
+    __slots__ = ("_acquire", "_release")
+
+    def __init__(self, acquire: Any, release: Any):
+        """
+        _LockGuardクラスのコンストラクタ
+
+        Args:
+            acquire: ロックを取る関数
+            release: ロックを離す関数
+        """
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self) -> None:
+        """
+        with 文の開始時にロックを取るメソッド
+        """
+        self._acquire()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """
+        with 文の終了時に（例外が起きた場合も）ロックを離すメソッド
+        """
+        self._release()
+
+
+class _ReadWriteLock:
+    """
+    読み書きロック（readers-writer lock）
+
+    読み込み（検索など）は何スレッドでも同時に行えるが、
+    書き込み（採用・削除など）は1スレッドだけで、読み込みとも同時に行わない
+    書き込みを待っているスレッドがあれば新しい読み込みを待たせるので、
+    読み込みが続いても書き込みがいつまでも待たされることはない
+
+    再入はできない（ロックを取ったまま同じロックを取ると止まってしまう）
+
+    使い方:
+        with lock.read():
+            ...  # 読み込み
+        with lock.write():
+            ...  # 書き込み
+    """
+
+    def __init__(self):
+        """
+        _ReadWriteLockクラスのコンストラクタ
+        """
+        self._condition = threading.Condition(threading.Lock())
+        # 読み込み中のスレッド数
+        self._readers = 0
+        # 書き込み中のスレッドがあるか
+        self._writing = False
+        # 書き込みを待っているスレッド数
+        self._waiting_writers = 0
+        self._read_guard = _LockGuard(self._acquire_read, self._release_read)
+        self._write_guard = _LockGuard(self._acquire_write, self._release_write)
+
+    def read(self) -> _LockGuard:
+        """
+        読み込み用のロックを返すメソッド（with 文で使う）
+
+        Returns:
+            _LockGuard: 読み込み用のロック
+        """
+        return self._read_guard
+
+    def write(self) -> _LockGuard:
+        """
+        書き込み用のロックを返すメソッド（with 文で使う）
+
+        Returns:
+            _LockGuard: 書き込み用のロック
+        """
+        return self._write_guard
+
+    def _acquire_read(self) -> None:
+        """
+        読み込み用のロックを取るプライベートメソッド
+        """
+        with self._condition:
+            while self._writing or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+
+    def _release_read(self) -> None:
+        """
+        読み込み用のロックを離すプライベートメソッド
+        """
+        with self._condition:
+            self._readers -= 1
+            if self._readers == 0:
+                self._condition.notify_all()
+
+    def _acquire_write(self) -> None:
+        """
+        書き込み用のロックを取るプライベートメソッド
+        """
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+
+    def _release_write(self) -> None:
+        """
+        書き込み用のロックを離すプライベートメソッド
+        """
+        with self._condition:
+            self._writing = False
+            self._condition.notify_all()
+
+
+class _NullLock:
+    """
+    何もしないロック（スレッドセーフでない会社で使う）
+
+    _ReadWriteLock と同じ使い方ができ、ロックの分の時間がかからない
+    """
+
+    # 何もしないロック（全インスタンスで共有する）
+    _GUARD = _LockGuard(lambda: None, lambda: None)
+
+    def read(self) -> _LockGuard:
+        """
+        読み込み用のロック（何もしない）を返すメソッド
+
+        Returns:
+            _LockGuard: 何もしないロック
+        """
+        return self._GUARD
+
+    def write(self) -> _LockGuard:
+        """
+        書き込み用のロック（何もしない）を返すメソッド
+
+        Returns:
+            _LockGuard: 何もしないロック
+        """
+        return self._GUARD
+
+
+# 会社に所属していない社員の昇進・降格で使うロック
+_NULL_LOCK = _NullLock()
+
+
+def _write_lock_of(company: Optional["Company"]) -> _LockGuard:
+    """
+    会社の書き込み用のロック（会社がなければ何もしないロック）を返すプライベート関数
+
+    Args:
+        company (Optional[Company]): 所属する会社
+
+    Returns:
+        _LockGuard: 書き込み用のロック
+    """
+    return _NULL_LOCK.write() if company is None else company._lock.write()
+
+
+# ===================================================================
+# 基底クラス：Human（人間）
+# ===================================================================
+
+class Human:
+    """
+    人間を表す基底クラス
+    
+    社員（Employee）と社長（President）の共通部分を定義
+    継承元となるスーパークラス
+
+    __slots__ を使って属性を固定しているので、インスタンスごとの辞書（__dict__）を持たない
+    社員が数百万人いても1人あたりのメモリが少ない（属性へのアクセスの速さは __dict__ とほぼ同じ）
+    （サブクラスで __slots__ を書かなければ、そのサブクラスは従来どおり __dict__ を持つ）
+
+    Attributes:
+        name (str): 名前
+        gender (Gender): 性別
+        age (int): 年齢
+    """
+
+    # インスタンスが持つ属性の一覧（これ以外の属性は追加できない）
+    __slots__ = ("_name", "_gender", "_age")
+
+    def __init__(self, name: str, gender: Gender, age: int):
+        """
+        Humanクラスのコンストラクタ
+        
+        オブジェクト生成時に呼ばれる初期化メソッド
+        引数で受け取った値をインスタンス変数に保存
+
+        Args:
+            name (str): 名前
+            gender (Gender): 性別（Gender列挙型）
+            age (int): 年齢
+        """
+        # 引数 name を protected属性 _name に保存
+        # _name の _ は「外部から直接アクセスしないで」という慣例
+        self._name = name
+        
+        # 引数 gender を protected属性 _gender に保存
+        self._gender = gender
+        
+        # 引数 age を protected属性 _age に保存
+        self._age = age
+
+    @property  # デコレータ：このメソッドをプロパティ（属性のように使える）にする
+    def name(self) -> str:
+        """
+        名前を取得するプロパティ（getter）
+        
+        obj.name でアクセス可能（メソッドだが括弧不要）
+        読み取り専用（setterがないので変更不可）
+
+        Returns:
+            str: 名前
+        """
+        return self._name  # 内部の _name を返す
+
+    @property  # プロパティ化
+    def gender(self) -> Gender:
+        """
+        性別を取得するプロパティ（getter）
+        
+        読み取り専用
+
+        Returns:
+            Gender: 性別（Gender列挙型）
+        """
+        return self._gender  # 内部の _gender を返す
+
+    @property  # プロパティ化
+    def age(self) -> int:
+        """
+        年齢を取得するプロパティ（getter）
+        
+        読み取り専用
+
+        Returns:
+            int: 年齢
+        """
+        return self._age  # 内部の _age を返す
+
+    def do_self_introduction(self) -> None:
+        """
+        自己紹介を行うメソッド
+        
+        継承先のクラスでオーバーライド（上書き）される
+        基本的な自己紹介の形式を提供
+
+        Returns:
+            None: 戻り値なし（画面出力のみ）
+        """
+        # f-string（フォーマット文字列）で変数を埋め込み
+        # クラスの内部なので、プロパティを経由せず _name などに直接アクセスする（速い）
+        # self._gender.value で Gender列挙型の値（"男性"等）を取得
+        _emit(
+            _default_sink, "introduction",
+            "私の名前は{name}です。性別は{gender}で、年齢は{age}歳です。",
+            name=self._name, gender=self._gender.value, age=self._age,
+        )
+
+
+# ===================================================================
+# 継承クラス：Employee（社員）
+# ===================================================================
+
+class Employee(Human):
+    """
+    社員を表すクラス
+    
+    Humanクラスを継承し、役職・給与・IDなどの社員特有の情報を追加
+
+    Attributes:
+        post (Post): 役職
+        id (str): 社員ID
+        _salary_map (dict): 役職と給与のマッピング（クラス変数）
+    """
+
+    # Humanの属性に加えて持つ属性の一覧
+    __slots__ = ("_post", "_id", "_company", "_seq")
+
+    # クラス変数：全てのEmployeeインスタンスで共有される辞書
+    # 役職（Post列挙型）をキー、給与（int）を値とする
+    _salary_map = {
+        Post.HIRA: 200000,    # ヒラ社員：20万円
+        Post.SYUNIN: 300000,  # 主任：30万円
+        Post.KATYO: 450000,   # 課長：45万円
+        Post.YARUIN: 600000,  # 役員：60万円
+    }
+
+    def __init__(self, name: str, gender: Gender, age: int, post: Post, id: Optional[str] = None):
+        """
+        Employeeクラスのコンストラクタ
+        
+        親クラス（Human）のコンストラクタも呼び出す
+
+        Args:
+            name (str): 名前
+            gender (Gender): 性別
+            age (int): 年齢
+            post (Post): 役職
+            id (Optional[str]): 社員ID（会社が採番したもの。省略時は自動採番）
+        """
+        # super() で親クラス（Human）のコンストラクタを呼び出し
+        # name, gender, age を親クラスに渡して初期化
+        super().__init__(name, gender, age)
+        
+        # 引数 post を protected属性 _post に保存
+        self._post = post
+        
+        # IDが渡されなかった場合は _generate_id() メソッドで社員IDを生成
+        # 会社で採用する場合は、会社の採番クラスが払い出したIDが渡される
+        self._id = id if id is not None else self._generate_id()
+
+        # 所属する会社（採用時に会社が設定し、削除時に None に戻す）
+        # 昇進・降格のときに会社のインデックスを更新するために使う
+        self._company: Optional["Company"] = None
+        # 会社での採用順（会社が設定する。会社に所属していない場合は -1）
+        self._seq = -1
+
+    def _generate_id(self) -> str:
+        """
+        社員IDを生成するプライベートメソッド
+        
+        _で始まるメソッド名は「内部実装用」という慣例
+        会社に所属しない社員用の共通の連番からIDを払い出して文字列として返す
+        （ランダム生成ではないので重複しない）
+
+        Returns:
+            str: 社員ID（例："1000"）
+        """
+        # プロセス共通の連番から1つ払い出し、str() で文字列に変換して返す
+        return str(_default_id_allocator.allocate())
+
+    @property  # プロパティ化
+    def post(self) -> Post:
+        """
+        役職を取得するプロパティ（getter）
+        
+        読み取り専用（setterなし）
+        ※昇進・降格は promote(), demote() メソッドで行う
+
+        Returns:
+            Post: 役職（Post列挙型）
+        """
+        return self._post  # 内部の _post を返す
+
+    @property  # プロパティ化
+    def salary(self) -> int:
+        """
+        給与を取得するプロパティ（getter）
+        
+        現在の役職に応じた給与を _salary_map から取得
+        読み取り専用（給与は役職で自動決定）
+
+        Returns:
+            int: 給与額
+        """
+        # クラス変数 _salary_map を参照
+        # self._post をキーにして対応する給与を取得
+        return self._salary_map[self._post]
+
+    @property  # プロパティ化
+    def id(self) -> str:
+        """
+        社員IDを取得するプロパティ（getter）
+        
+        読み取り専用（IDは生成時に固定）
+
+        Returns:
+            str: 社員ID
+        """
+        return self._id  # 内部の _id を返す
+
+    def do_self_introduction(self) -> None:
+        """
+        自己紹介を行うメソッド（オーバーライド）
+        
+        親クラス（Human）のメソッドを上書き
+        社員版の自己紹介（役職情報を追加）
+
+        Returns:
+            None: 戻り値なし
+        """
+        # 親クラスとほぼ同じだが、役職情報を追加
+        # self._post.value で Post列挙型の値（"ヒラ"等）を取得
+        _emit(
+            _sink_of(self._company), "introduction",
+            "私の名前は{name}です。性別は{gender}で、年齢は{age}歳、役職は{post}です。",
+            name=self._name, gender=self._gender.value, age=self._age, post=self._post.value,
+        )
+
+    def promote(self) -> None:
+        """
+        昇進するメソッド
+        
+        現在の役職から1つ上の役職に昇進
+        すでに最高役職（役員）の場合は昇進しない
+
+        Returns:
+            None: 戻り値なし
+        """
+        # 役職の読み出しからインデックスの更新までを、会社の書き込み用のロックの中で行う
+        # （スレッドセーフな会社で、同時に昇進させても段階を取りこぼさない）
+        with _write_lock_of(self._company):
+            # 1つ上の役職（事前に計算済みなので O(1)）
+            # 例：Post.HIRA なら Post.SYUNIN、Post.YARUIN なら None
+            next_post = self._post.next
+
+            # 1つ上の役職があるかチェック
+            if next_post is not None:
+                # 1つ上の役職に昇進
+                self._post = next_post
+                # 会社に所属していれば、役職別のインデックスを更新してもらう
+                if self._company is not None:
+                    self._company._on_post_changed(self)
+
+        # 静かなモードでは、メッセージの値を集めることもしない
+        sink = _sink_of(self._company)
+        if not sink.enabled:
+            return
+
+        if next_post is not None:
+            # 昇進メッセージを表示
+            _emit(sink, "promoted", "{name}さんが{post}に昇進しました！", name=self._name, post=next_post.value)
+        else:
+            # すでに最高役職の場合
+            _emit(sink, "already_top", "{name}さんはすでに最高役職です。", name=self._name)
+
+    def demote(self) -> None:
+        """
+        降格するメソッド
+        
+        現在の役職から1つ下の役職に降格
+        すでに最低役職（ヒラ）の場合は降格しない
+
+        Returns:
+            None: 戻り値なし
+        """
+        with _write_lock_of(self._company):
+            # 1つ下の役職（事前に計算済みなので O(1)）
+            prev_post = self._post.prev
+
+            # 1つ下の役職があるかチェック
+            if prev_post is not None:
+                # 1つ下の役職に降格
+                self._post = prev_post
+                # 会社に所属していれば、役職別のインデックスを更新してもらう
+                if self._company is not None:
+                    self._company._on_post_changed(self)
+
+        # 静かなモードでは、メッセージの値を集めることもしない
+        sink = _sink_of(self._company)
+        if not sink.enabled:
+            return
+
+        if prev_post is not None:
+            # 降格メッセージを表示
+            _emit(sink, "demoted", "{name}さんが{post}に降格しました。", name=self._name, post=prev_post.value)
+        else:
+            # すでに最低役職の場合
+            _emit(sink, "already_bottom", "{name}さんはすでに最低役職です。", name=self._name)
+
+
+# ===================================================================
+# 継承クラス：President（社長）
+# ===================================================================
+
+class President(Human):
+    """
+    社長を表すクラス
+    
+    Humanクラスを継承し、給与・会社情報などの社長特有の情報を追加
+    会社の管理機能（社員の追加・削除・検索など）を持つ
+
+    Attributes:
+        _salary (int): 社長の給与
+        company (Company): 所属する会社
+    """
+
+    # Humanの属性に加えて持つ属性の一覧
+    __slots__ = ("_salary", "_company")
+
+    def __init__(self, name: str, gender: Gender, age: int):
+        """
+        Presidentクラスのコンストラクタ
+        
+        親クラス（Human）のコンストラクタも呼び出す
+
+        Args:
+            name (str): 名前
+            gender (Gender): 性別
+            age (int): 年齢
+        """
+        # 親クラス（Human）のコンストラクタを呼び出し
+        super().__init__(name, gender, age)
+        
+        # 社長の給与を100万円に設定
+        self._salary = 1000000
+        
+        # 会社は後から設定されるので、最初はNoneで初期化
+        # Optional["Company"] は「Companyクラスまたはnone」という型ヒント
+        # 文字列 "Company" は前方参照（クラスがまだ定義されていないため）
+        self._company: Optional["Company"] = None
+
+    @property  # プロパティ化
+    def salary(self) -> int:
+        """
+        給与を取得するプロパティ（getter）
+        
+        読み取り専用
+
+        Returns:
+            int: 給与額（100万円固定）
+        """
+        return self._salary  # 内部の _salary を返す
+
+    @property  # プロパティ化
+    def company(self) -> Optional["Company"]:
+        """
+        会社を取得するプロパティ（getter）
+        
+        社長が所属する会社オブジェクトを返す
+
+        Returns:
+            Optional[Company]: 所属する会社（未設定の場合はNone）
+        """
+        return self._company  # 内部の _company を返す
+
+    @company.setter  # companyプロパティのsetter
+    def company(self, company: "Company") -> None:
+        """
+        会社を設定するプロパティ（setter）
+        
+        president.company = some_company のように代入時に呼ばれる
+
+        Args:
+            company (Company): 所属する会社
+
+        Returns:
+            None: 戻り値なし
+        """
+        # 引数で受け取った会社オブジェクトを _company に保存
+        self._company = company
+
+    def do_self_introduction(self) -> None:
+        """
+        自己紹介を行うメソッド（オーバーライド）
+        
+        親クラス（Human）のメソッドを上書き
+        社長版の自己紹介
+
+        Returns:
+            None: 戻り値なし
+        """
+        # 社長であることを明示した自己紹介
+        _emit(
+            _sink_of(self._company), "introduction",
+            "私の名前は{name}です。性別は{gender}で、年齢は{age}歳、社長です。",
+            name=self._name, gender=self._gender.value, age=self._age,
+        )
+
+    def get_personnel_by_id(self, id: str) -> Optional[Employee]:
+        """
+        IDで社員を検索するメソッド
+        
+        社員IDを指定して該当する社員オブジェクトを取得
+
+        Args:
+            id (str): 社員ID
+
+        Returns:
+            Optional[Employee]: 見つかった社員、見つからない場合はNone
+        """
+        # 会社が設定されていない場合はNoneを返す
+        if self._company is None:
+            return None
+
+        # 会社のIDインデックスを使って検索（ループせずに O(1) で取得）
+        return self._company.get_personnel_by_id(id)
+
+    def get_personnel_by_name(self, name: str) -> Optional[Employee]:
+        """
+        名前で社員を検索するメソッド
+        
+        社員名を指定して該当する社員オブジェクトを取得
+
+        Args:
+            name (str): 社員名
+
+        Returns:
+            Optional[Employee]: 見つかった社員、見つからない場合はNone
+        """
+        # 会社が設定されていない場合はNoneを返す
+        if self._company is None:
+            return None
+
+        # 会社の名前インデックスを使って検索（ループせずに O(1) で取得）
+        return self._company.get_personnel_by_name(name)
+
+    def find_personnel_by_name(self, name: str, match: str = "exact") -> List[Employee]:
+        """
+        名前で社員を全員検索するメソッド
+
+        Company.find_personnel_by_name() と同じ（同姓同名・表記ゆれ・名字だけでの検索）
+
+        Args:
+            name (str): 名前（match が "prefix" の場合は名前の先頭）
+            match (str): 一致のしかた（"exact"、"normalized" または "prefix"）
+
+        Returns:
+            List[Employee]: 見つかった社員（採用順）、会社が設定されていない場合は空のリスト
+        """
+        # 会社が設定されていない場合は空のリストを返す
+        if self._company is None:
+            return []
+
+        return self._company.find_personnel_by_name(name, match)
+
+    def add_employee(self, name: str, gender: Gender, age: int, post: Post) -> None:
+        """
+        社員を追加するメソッド
+        
+        新しい社員を会社に採用する
+        実際の追加処理は Company クラスに委譲
+
+        Args:
+            name (str): 名前
+            gender (Gender): 性別
+            age (int): 年齢
+            post (Post): 役職
+
+        Returns:
+            None: 戻り値なし
+        """
+        # 会社が設定されていない場合はエラーメッセージを表示
+        if self._company is None:
+            _emit(_default_sink, "no_company", "会社が設定されていません。")
+            return  # メソッドを終了
+
+        # 会社の add_employee() メソッドを呼び出して社員を追加
+        self._company.add_employee(name, gender, age, post)
+
+    def add_employees(self, rows: Any, mode: str = "all_or_nothing") -> Optional["HiringSummary"]:
+        """
+        社員をまとめて追加するメソッド（一括採用）
+
+        実際の追加処理は Company.add_employees() に委譲
+
+        Args:
+            rows (Any): 採用する社員データ（形式は Company.add_employees() を参照）
+            mode (str): 不正な行があった場合の扱い（"all_or_nothing" または "best_effort"）
+
+        Returns:
+            Optional[HiringSummary]: 採用結果、会社が設定されていない場合はNone
+        """
+        # 会社が設定されていない場合はエラーメッセージを表示
+        if self._company is None:
+            _emit(_default_sink, "no_company", "会社が設定されていません。")
+            return None
+
+        # 会社の add_employees() メソッドを呼び出して社員をまとめて追加
+        return self._company.add_employees(rows, mode)
+
+    def delete_employee(self, person: Employee) -> None:
+        """
+        社員を削除するメソッド
+        
+        指定した社員を会社から退職させる
+        実際の削除処理は Company クラスに委譲
+
+        Args:
+            person (Employee): 削除する社員オブジェクト
+
+        Returns:
+            None: 戻り値なし
+        """
+        # 会社が設定されていない場合はエラーメッセージを表示
+        if self._company is None:
+            _emit(_default_sink, "no_company", "会社が設定されていません。")
+            return  # メソッドを終了
+
+        # 会社の delete_employee() メソッドを呼び出して社員を削除
+        self._company.delete_employee(person)
+
+    def delete_employees(self, people: Iterable[Employee]) -> Optional["DeletionSummary"]:
+        """
+        社員をまとめて削除するメソッド（一括削除）
+
+        実際の削除処理は Company.delete_employees() に委譲
+
+        Args:
+            people (Iterable[Employee]): 削除する社員
+
+        Returns:
+            Optional[DeletionSummary]: 削除結果、会社が設定されていない場合はNone
+        """
+        # 会社が設定されていない場合はエラーメッセージを表示
+        if self._company is None:
+            _emit(_default_sink, "no_company", "会社が設定されていません。")
+            return None
+
+        # 会社の delete_employees() メソッドを呼び出して社員をまとめて削除
+        return self._company.delete_employees(people)
+
+    def apply_reviews(self, changes: Iterable[Tuple[Employee, int]]) -> Optional["ReviewSummary"]:
+        """
+        人事評価の結果（昇進・降格）をまとめて反映するメソッド
+
+        実際の処理は Company.apply_reviews() に委譲
+
+        Args:
+            changes (Iterable[Tuple[Employee, int]]): (社員, 段階数) の並び
+
+        Returns:
+            Optional[ReviewSummary]: 反映結果、会社が設定されていない場合はNone
+        """
+        # 会社が設定されていない場合はエラーメッセージを表示
+        if self._company is None:
+            _emit(_default_sink, "no_company", "会社が設定されていません。")
+            return None
+
+        # 会社の apply_reviews() メソッドを呼び出して昇進・降格をまとめて反映
+        return self._company.apply_reviews(changes)
+
+    def resignation(self) -> Optional["President"]:
+        """
+        辞任するメソッド（追加課題）
+        
+        現社長が辞任し、次期社長を選出する
+        次期社長は社員の中から選ばれる
+
+        Returns:
+            Optional[President]: 新しい社長、社員がいない場合はNone
+        """
+        # 会社が設定されていない場合
+        if self._company is None:
+            _emit(_default_sink, "no_company", "会社が設定されていません。")
+            return None  # Noneを返してメソッド終了
+
+        # 社員が0人の場合は辞任できない
+        # （社員リストを作らずに社員数だけを見る。列形式・SQLite 形式では社員リストを作ると全員を読む）
+        if self._company.current_number == 0:
+            _emit(
+                self._company.sink, "resignation_refused",
+                "いいえ、私以外に社員がいない場合は辞任しないでください",
+            )
+            return None  # Noneを返してメソッド終了
+
+        # 会社の select_president() メソッドで次期社長候補を選出
+        # 役員がいれば役員の最年長、いなければ全社員の最年長
+        next_president_employee = self._company.select_president()
+
+        # 候補が見つからなかった場合（通常は発生しない）
+        if next_president_employee is None:
+            _emit(self._company.sink, "no_candidate", "次期社長候補が見つかりません。")
+            return None  # Noneを返してメソッド終了
+
+        # 変更履歴を記録していれば、辞任（次期社長の昇格）を記録する
+        # （社員リストからの削除は、続く delete_employee() が記録する）
+        self._company._record_resignation(next_president_employee)
+
+        # 次期社長は社員から昇格するので、社員リストから削除
+        self._company.delete_employee(next_president_employee)
+
+        # 選ばれた社員の情報を使って新しいPresidentオブジェクトを作成
+        new_president = President(
+            next_president_employee.name,    # 名前を引き継ぐ
+            next_president_employee.gender,  # 性別を引き継ぐ
+            next_president_employee.age,     # 年齢を引き継ぐ
+        )
+
+        # 新社長に会社を設定（setter経由）
+        new_president.company = self._company
+
+        # 辞任メッセージを表示
+        _emit(
+            self._company.sink, "resigned", "{name}は{successor}、辞任はだいた！",
+            name=self._name, successor=new_president.name,
+        )
+
+        # 新しい社長オブジェクトを返す
+        return new_president
+
+
+# ===================================================================
+# クラス：HiringSummary（一括採用の結果）
+# ===================================================================
+
+class HiringSummary:
+    """
+    一括採用（Company.add_employees）の結果を表すクラス
+
+    1人ずつメッセージを表示する代わりに、採用できた社員と
+    採用できなかった行（行番号と理由）をまとめて返す
+
+    Attributes:
+        hired (List[Employee]): 採用した社員（入力順）
+        rejected (List[Tuple[int, str]]): 採用しなかった行の (行番号, 理由)
+        hired_count (int): 採用した人数
+        rejected_count (int): 採用しなかった行数
+        ok (bool): 全行を採用できたか
+    """
+
+    def __init__(self, hired: List[Employee], rejected: List[Tuple[int, str]]):
+        """
+        HiringSummaryクラスのコンストラクタ
+
+        Args:
+            hired (List[Employee]): 採用した社員
+            rejected (List[Tuple[int, str]]): 採用しなかった行の (行番号, 理由)
+        """
+        self._hired = hired
+        self._rejected = rejected
+
+    @property  # プロパティ化
+    def hired(self) -> List[Employee]:
+        """
+        採用した社員を取得するプロパティ（getter）
+
+        Returns:
+            List[Employee]: 採用した社員（入力順）
+        """
+        return self._hired
+
+    @property  # プロパティ化
+    def rejected(self) -> List[Tuple[int, str]]:
+        """
+        採用しなかった行を取得するプロパティ（getter）
+
+        Returns:
+            List[Tuple[int, str]]: (行番号, 理由) のリスト（行番号は0始まり）
+        """
+        return self._rejected
+
+    @property  # プロパティ化
+    def hired_count(self) -> int:
+        """
+        採用した人数を取得するプロパティ（getter）
+
+        Returns:
+            int: 採用した人数
+        """
+        return len(self._hired)
+
+    @property  # プロパティ化
+    def rejected_count(self) -> int:
+        """
+        採用しなかった行数を取得するプロパティ（getter）
+
+        Returns:
+            int: 採用しなかった行数
+        """
+        return len(self._rejected)
+
+    @property  # プロパティ化
+    def ok(self) -> bool:
+        """
+        全行を採用できたかを取得するプロパティ（getter）
+
+        Returns:
+            bool: 採用しなかった行がなければ True
+        """
+        return not self._rejected
+
+    def __repr__(self) -> str:
+        """
+        デバッグ用の文字列表現を返すメソッド
+
+        Returns:
+            str: 採用人数と不採用行数を含む文字列
+        """
+        return f"HiringSummary(hired={self.hired_count}, rejected={self.rejected_count})"
+
+
+# ===================================================================
+# クラス：DeletionSummary（一括削除の結果）
+# ===================================================================
+
+class DeletionSummary:
+    """
+    一括削除（Company.delete_employees）の結果を表すクラス
+
+    Attributes:
+        deleted (List[Employee]): 削除した社員（入力順）
+        not_found (List[Employee]): 社員リストに存在しなかった社員
+        deleted_count (int): 削除した人数
+        ok (bool): 指定した全員を削除できたか
+    """
+
+    def __init__(self, deleted: List[Employee], not_found: List[Employee]):
+        """
+        DeletionSummaryクラスのコンストラクタ
+
+        Args:
+            deleted (List[Employee]): 削除した社員
+            not_found (List[Employee]): 社員リストに存在しなかった社員
+        """
+        self._deleted = deleted
+        self._not_found = not_found
+
+    @property  # プロパティ化
+    def deleted(self) -> List[Employee]:
+        """
+        削除した社員を取得するプロパティ（getter）
+
+        Returns:
+            List[Employee]: 削除した社員（入力順）
+        """
+        return self._deleted
+
+    @property  # プロパティ化
+    def not_found(self) -> List[Employee]:
+        """
+        社員リストに存在しなかった社員を取得するプロパティ（getter）
+
+        同じ社員を2回指定した場合、2回目はここに入る
+
+        Returns:
+            List[Employee]: 存在しなかった社員
+        """
+        return self._not_found
+
+    @property  # プロパティ化
+    def deleted_count(self) -> int:
+        """
+        削除した人数を取得するプロパティ（getter）
+
+        Returns:
+            int: 削除した人数
+        """
+        return len(self._deleted)
+
+    @property  # プロパティ化
+    def ok(self) -> bool:
+        """
+        指定した全員を削除できたかを取得するプロパティ（getter）
+
+        Returns:
+            bool: 存在しなかった社員がいなければ True
+        """
+        return not self._not_found
+
+    def __repr__(self) -> str:
+        """
+        デバッグ用の文字列表現を返すメソッド
+
+        Returns:
+            str: 削除人数と存在しなかった人数を含む文字列
+        """
+        return f"DeletionSummary(deleted={self.deleted_count}, not_found={len(self._not_found)})"
+
+
+# ===================================================================
+# クラス：ReviewSummary（人事評価の一括反映の結果）
+# ===================================================================
+
+class ReviewSummary:
+    """
+    人事評価の一括反映（Company.apply_reviews）の結果を表すクラス
+
+    Attributes:
+        changed (List[Tuple[Employee, Post, Post]]): 役職が変わった社員の (社員, 変更前, 変更後)
+        skipped (List[Tuple[int, str]]): 反映しなかった変更の (行番号, 理由)
+        changed_count (int): 役職が変わった人数
+        promoted_count (int): 昇進した人数
+        demoted_count (int): 降格した人数
+        salary_delta (int): 給与の合計の増減（反映した時点の給与表で計算）
+        ok (bool): 全ての変更を反映できたか
+    """
+
+    def __init__(self, changed: List[Tuple[Employee, Post, Post]], skipped: List[Tuple[int, str]], salary_delta: int):
+        """
+        ReviewSummaryクラスのコンストラクタ
+
+        Args:
+            changed (List[Tuple[Employee, Post, Post]]): 役職が変わった社員の (社員, 変更前, 変更後)
+            skipped (List[Tuple[int, str]]): 反映しなかった変更の (行番号, 理由)
+            salary_delta (int): 給与の合計の増減
+        """
+        self._changed = changed
+        self._skipped = skipped
+        self._salary_delta = salary_delta
+
+    @property  # プロパティ化
+    def changed(self) -> List[Tuple[Employee, Post, Post]]:
+        """
+        役職が変わった社員を取得するプロパティ（getter）
+
+        同じ社員を何回指定しても1件にまとまる
+
+        Returns:
+            List[Tuple[Employee, Post, Post]]: (社員, 変更前の役職, 変更後の役職) のリスト
+        """
+        return self._changed
+
+    @property  # プロパティ化
+    def skipped(self) -> List[Tuple[int, str]]:
+        """
+        反映しなかった変更を取得するプロパティ（getter）
+
+        Returns:
+            List[Tuple[int, str]]: (行番号, 理由) のリスト（行番号は0始まり）
+        """
+        return self._skipped
+
+    @property  # プロパティ化
+    def changed_count(self) -> int:
+        """
+        役職が変わった人数を取得するプロパティ（getter）
+
+        Returns:
+            int: 役職が変わった人数
+        """
+        return len(self._changed)
+
+    @property  # プロパティ化
+    def promoted_count(self) -> int:
+        """
+        昇進した人数を取得するプロパティ（getter）
+
+        Returns:
+            int: 昇進した人数
+        """
+        return sum(1 for _, old, new in self._changed if new.rank > old.rank)
+
+    @property  # プロパティ化
+    def demoted_count(self) -> int:
+        """
+        降格した人数を取得するプロパティ（getter）
+
+        Returns:
+            int: 降格した人数
+        """
+        return sum(1 for _, old, new in self._changed if new.rank < old.rank)
+
+    @property  # プロパティ化
+    def salary_delta(self) -> int:
+        """
+        給与の合計の増減を取得するプロパティ（getter）
+
+        Returns:
+            int: 給与の合計の増減（昇進が多ければ正、降格が多ければ負）
+        """
+        return self._salary_delta
+
+    @property  # プロパティ化
+    def ok(self) -> bool:
+        """
+        全ての変更を反映できたかを取得するプロパティ（getter）
+
+        Returns:
+            bool: 反映しなかった変更がなければ True
+        """
+        return not self._skipped
+
+    def __repr__(self) -> str:
+        """
+        デバッグ用の文字列表現を返すメソッド
+
+        Returns:
+            str: 役職が変わった人数と反映しなかった件数を含む文字列
+        """
+        return f"ReviewSummary(changed={self.changed_count}, skipped={len(self._skipped)})"
+
+
+# ===================================================================
+# 社員データの保存クラス（ストレージ）
+# ===================================================================
+
+# 役職・性別 ⇔ 小さな整数コード の変換表（列形式のストレージで使う）
+# tuple(Post) は定義順（ヒラ, 主任, 課長, 役員）に並ぶ
+_POSTS: Tuple[Post, ...] = tuple(Post)
+_POST_CODES: Dict[Post, int] = {post: code for code, post in enumerate(_POSTS)}
+_GENDERS: Tuple[Gender, ...] = tuple(Gender)
+_GENDER_CODES: Dict[Gender, int] = {gender: code for code, gender in enumerate(_GENDERS)}
+# 整数コード → 表示用の文字列（社員一覧の表で使う）
+_POST_VALUES: Tuple[str, ...] = tuple(post.value for post in _POSTS)
+_GENDER_VALUES: Tuple[str, ...] = tuple(gender.value for gender in _GENDERS)
+
+# 年齢順インデックスの要素は「年齢と採用順を1つの整数に詰めたキー」
+# 上位ビット: (2^16 - 年齢) → 年齢が高いほど小さい
+# 下位40ビット: 採用順 → 同い年なら先に採用された社員ほど小さい
+# キーを昇順に並べると「年齢の高い順・同い年なら採用順」になる
+# （タプルより小さく、比較も速い）
+_SEQ_BITS = 40
+_SEQ_MASK = (1 << _SEQ_BITS) - 1
+_AGE_KEY_BASE = 1 << 16
+# 年齢の上限（列形式のストレージの年齢の列 array('H') と、年齢順インデックスのキーに収まる値）
+_MAX_AGE = _AGE_KEY_BASE - 1
+
+
+def _age_key(age: int, seq: int) -> int:
+    """
+    年齢と採用順から年齢順インデックスのキーを作る関数
+
+    Args:
+        age (int): 年齢
+        seq (int): 採用順
+
+    Returns:
+        int: インデックスのキー
+    """
+    return ((_AGE_KEY_BASE - age) << _SEQ_BITS) | seq
+
+
+def _age_of_key(key: int) -> int:
+    """
+    年齢順インデックスのキーから年齢を取り出す関数（_age_key() の逆）
+
+    Args:
+        key (int): インデックスのキー
+
+    Returns:
+        int: 年齢
+    """
+    return _AGE_KEY_BASE - (key >> _SEQ_BITS)
+
+
+def _normalize_name(name: str) -> str:
+    """
+    名前の表記ゆれをなくした検索用のキーを作る関数
+
+        - NFKC 正規化: 全角の英数字・記号 → 半角、半角カタカナ → 全角
+        - 空白（半角・全角）をすべて取り除く（"佐藤 太郎"・"佐藤　太郎"・"佐藤太郎" が同じになる）
+
+    Args:
+        name (str): 名前
+
+    Returns:
+        str: 検索用のキー（元の名前と同じなら、元の文字列をそのまま返す）
+    """
+    key = "".join(unicodedata.normalize("NFKC", name).split())
+    # 同じ内容の文字列を2つ持たないように、変わらなければ元の文字列を使う
+    return name if key == name else key
+
+
+def _without_rows(values, rows: List[int]):
+    """
+    リストや配列から指定した行を取り除いたコピーを返す関数
+
+    残す区間ごとにスライスしてつなげるので、全体で1回のコピー O(n + k) で済む
+
+    Args:
+        values: list または array.array
+        rows (List[int]): 取り除く行番号（昇順）
+
+    Returns:
+        values と同じ型の、指定行を取り除いたもの
+    """
+    # values[:0] で「同じ型の空のもの」を作る
+    result = values[:0]
+    start = 0
+    for row in rows:
+        result += values[start:row]
+        start = row + 1
+    result += values[start:]
+    return result
+
+
+class _SortedKeys:
+    """
+    キーを昇順に保つリスト（年齢順インデックス・名前の前方一致検索で使う）
+
+    キーは互いに比べられる値なら何でもよい（年齢順インデックスでは整数、名前では文字列）
+
+    1本のリストに bisect.insort() で挿入すると、後ろの要素をずらすのに O(n) かかる
+    そこでキーを最大 2 * LOAD 個ずつの小さなリスト（バケット）に分けて持つ
+        - 追加・削除: 各バケットの最大値を二分探索し、1つのバケットだけを書き換える O(log n + LOAD)
+        - 範囲の取り出し: 開始位置を二分探索し、そこから順に読む O(log n + k)
+        - 先頭から i 番目: バケットの大きさの累積和を二分探索する O(log n)
+          （累積和は追加・削除の後、最初に位置で読んだときに作り直す O(n / LOAD)）
+    """
+
+    # バケットの大きさの目安（2倍を超えたら半分に分ける）
+    LOAD = 512
+
+    def __init__(self, keys: Iterable[int] = ()):
+        """
+        _SortedKeysクラスのコンストラクタ
+
+        Args:
+            keys (Iterable[int]): 最初に入れるキー（順不同）
+        """
+        self._reset(sorted(keys))
+
+    def _reset(self, ordered: List[int]) -> None:
+        """
+        昇順に並んだキーからバケットを作り直すプライベートメソッド O(n)
+
+        Args:
+            ordered (List[int]): 昇順に並んだキー
+
+        Returns:
+            None: 戻り値なし
+        """
+        load = self.LOAD
+        self._buckets: List[List[int]] = [ordered[start:start + load] for start in range(0, len(ordered), load)]
+        # 各バケットの最大値（どのバケットに入るかを二分探索する）
+        self._maxes: List[int] = [bucket[-1] for bucket in self._buckets]
+        self._len = len(ordered)
+        # バケットの大きさの累積和（位置で読むときに作る。変更があったら None に戻す）
+        self._offsets: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        """
+        キーの数を返すメソッド（len() で呼ばれる）
+
+        Returns:
+            int: キーの数
+        """
+        return self._len
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        キーを昇順に返すメソッド（for 文で呼ばれる）
+
+        Returns:
+            Iterator[int]: キーのイテレーター
+        """
+        return itertools.chain.from_iterable(self._buckets)
+
+    def __contains__(self, key: int) -> bool:
+        """
+        キーが含まれているかを確認するメソッド（in 演算子で呼ばれる） O(log n)
+
+        Args:
+            key (int): キー
+
+        Returns:
+            bool: 含まれていれば True
+        """
+        index = bisect.bisect_left(self._maxes, key)
+        if index == len(self._maxes):
+            return False
+        bucket = self._buckets[index]
+        return bucket[bisect.bisect_left(bucket, key)] == key
+
+    def __getitem__(self, position: int) -> int:
+        """
+        先頭から position 番目（0から数える）のキーを返すメソッド
+
+        Args:
+            position (int): 位置（負の数なら末尾から数える）
+
+        Returns:
+            int: キー
+
+        Raises:
+            IndexError: 位置が範囲外の場合
+        """
+        if position < 0:
+            position += self._len
+        if not 0 <= position < self._len:
+            raise IndexError("位置が範囲外です")
+        if self._offsets is None:
+            self._offsets = list(itertools.accumulate(map(len, self._buckets)))
+        index = bisect.bisect_right(self._offsets, position)
+        start = self._offsets[index - 1] if index else 0
+        return self._buckets[index][position - start]
+
+    def rank(self, key: int) -> int:
+        """
+        key より小さいキーの数を返すメソッド O(log n)
+
+        Args:
+            key (int): キー（含まれていなくてもよい）
+
+        Returns:
+            int: key より小さいキーの数
+        """
+        index = bisect.bisect_left(self._maxes, key)
+        if index == len(self._maxes):
+            return self._len
+        if self._offsets is None:
+            self._offsets = list(itertools.accumulate(map(len, self._buckets)))
+        start = self._offsets[index - 1] if index else 0
+        return start + bisect.bisect_left(self._buckets[index], key)
+
+    def add(self, key: Any) -> None:
+        """
+        キーを追加するメソッド O(log n + LOAD)
+
+        Args:
+            key (int): キー（同じキーがすでにあってはいけない）
+
+        Returns:
+            None: 戻り値なし
+        """
+        maxes = self._maxes
+        if not maxes:
+            self._buckets.append([key])
+            maxes.append(key)
+        else:
+            index = bisect.bisect_left(maxes, key)
+            if index == len(maxes):
+                # 最大値より大きいキーは、最後のバケットの末尾に足す
+                index -= 1
+                self._buckets[index].append(key)
+                maxes[index] = key
+            else:
+                bisect.insort(self._buckets[index], key)
+            bucket = self._buckets[index]
+            if len(bucket) > 2 * self.LOAD:
+                # 大きくなりすぎたバケットは半分に分ける
+                half = bucket[self.LOAD:]
+                del bucket[self.LOAD:]
+                maxes[index] = bucket[-1]
+                self._buckets.insert(index + 1, half)
+                maxes.insert(index + 1, half[-1])
+        self._len += 1
+        self._offsets = None
+
+    def remove(self, key: Any) -> bool:
+        """
+        キーを取り除くメソッド O(log n + LOAD)
+
+        Args:
+            key (int): キー
+
+        Returns:
+            bool: 取り除いた場合は True、含まれていなかった場合は False
+        """
+        index = bisect.bisect_left(self._maxes, key)
+        if index == len(self._maxes):
+            return False
+        bucket = self._buckets[index]
+        position = bisect.bisect_left(bucket, key)
+        if bucket[position] != key:
+            return False
+        del bucket[position]
+        if not bucket:
+            del self._buckets[index]
+            del self._maxes[index]
+        elif position == len(bucket):
+            self._maxes[index] = bucket[-1]
+        self._len -= 1
+        self._offsets = None
+        return True
+
+    def update(self, keys: List[Any]) -> None:
+        """
+        キーをまとめて追加するメソッド
+
+        多ければ全体を1回のソートで作り直す（ソート済みの並びどうしなので O(n + k) に近い）
+
+        Args:
+            keys (List[int]): 追加するキー
+
+        Returns:
+            None: 戻り値なし
+        """
+        if len(keys) * 8 > self._len:
+            merged = list(self)
+            merged.extend(keys)
+            merged.sort()
+            self._reset(merged)
+        else:
+            for key in keys:
+                self.add(key)
+
+    def discard_many(self, keys: Any) -> None:
+        """
+        キーをまとめて取り除くメソッド
+
+        多ければ残すキーだけで全体を作り直す O(n)
+
+        Args:
+            keys: 取り除くキーの集合（含まれていないキーは無視する）
+
+        Returns:
+            None: 戻り値なし
+        """
+        if len(keys) * 8 > self._len:
+            self._reset([key for key in self if key not in keys])
+        else:
+            for key in keys:
+                self.remove(key)
+
+    def irange(self, low: Optional[Any] = None, high: Optional[Any] = None) -> Iterator[Any]:
+        """
+        low 以上 high 以下のキーを昇順に返すメソッド O(log n + k)
+
+        Args:
+            low (Optional[int]): 下限（省略時は先頭から）
+            high (Optional[int]): 上限（省略時は末尾まで）
+
+        Returns:
+            Iterator[int]: キーのイテレーター（取り出したときに少しずつ読む）
+        """
+        if low is None:
+            keys = iter(self)
+        else:
+            index = bisect.bisect_left(self._maxes, low)
+            if index == len(self._maxes):
+                return iter(())
+            bucket = self._buckets[index]
+            keys = itertools.chain(
+                itertools.islice(bucket, bisect.bisect_left(bucket, low), None),
+                itertools.chain.from_iterable(itertools.islice(self._buckets, index + 1, None)),
+            )
+        if high is None:
+            return keys
+        return itertools.takewhile(lambda key: key <= high, keys)
+
+
+class _EmployeeStore:
+    """
+    会社の社員データを保存するクラスの基底クラス
+
+    社員データそのものの持ち方（オブジェクトのリスト or 列ごとの配列）は
+    サブクラスが決め、このクラスは共通の検索用インデックスを管理する
+        - 名前 → 採用順のリスト（同姓同名に対応）
+        - 表記ゆれをなくした名前 → 元の名前（表記ゆれ・前方一致の検索用）
+        - 年齢順インデックス（役職ごとと全社員。次期社長の選出・年齢での検索用）
+    表記ゆれをなくした名前のインデックスと年齢順インデックスは、初めて使うときに全社員から作り、
+    それ以降は採用・削除などのたびに更新する（使わない会社では、採用のたびの更新の時間がかからない）
+
+    各社員には採用順（seq）を割り当て、行の位置を探すときのキーにする
+    行は常に採用順に並んでいるので、seq の列を二分探索すれば行番号がわかる
+
+    サブクラスで実装するもの:
+        __len__, get_by_id, employee_at, post_at, age_at, employees, columns,
+        table_rows, export_columns, _encode, _append, _delete_rows
+    """
+
+    # 検索が内部の状態を書き換えないか（スレッドセーフな会社で、検索を同時に行ってよいか）
+    # 検索のついでにインデックスを作る・書き込みを実行するストレージでは False にする
+    CONCURRENT_READS = True
+
+    def __init__(self, company: "Company"):
+        """
+        _EmployeeStoreクラスのコンストラクタ
+
+        Args:
+            company (Company): このストレージを使う会社
+        """
+        self._company = company
+        # 行ごとの採用順（昇順に並ぶ）
+        self._seqs = array("Q")
+        # 採用順を払い出す連番
+        self._seq_counter = itertools.count()
+        # 名前 → 同じ名前の社員の採用順
+        # ほとんどの名前は1人だけなので、1人の間は整数のまま持ち、
+        # 2人目が来たら採用順のリストに切り替える（リスト分のメモリを節約）
+        self._name_index: Dict[str, Union[int, List[int]]] = {}
+        # 表記ゆれをなくした名前（_normalize_name）→ 元の名前
+        # 初めて使うときに作る（_ensure_normalized_index）。作った後は、
+        # 名前インデックスに新しい名前が増えた・なくなったときだけ更新する（同じ名前の2人目以降は何もしない）
+        # 元の名前はほとんど1つなので、1つの間は文字列のまま持つ
+        self._normalized_index: Optional[Dict[str, Union[str, List[str]]]] = None
+        # 表記ゆれをなくした名前を昇順に並べたもの（前方一致は、二分探索した位置から順に読む）
+        self._normalized_keys: Optional[_SortedKeys] = None
+        # 年齢順インデックス：役職（全社員は None）→ 年齢の高い順・同い年なら採用順に並んだキー
+        # 初めて使うときに作る（_ensure_age_index）。作った後は採用・削除・昇進・降格のたびに
+        # その場で更新するので、古い要素は残らない
+        self._age_index: Optional[Dict[Optional[Post], _SortedKeys]] = None
+        # 検索のついでにインデックスを作るときのロック
+        # （読み込み用のロックは複数スレッドが同時に取れるので、作るのが1回になるようにする）
+        self._index_lock = threading.Lock()
+
+    def row_of(self, seq: int) -> Optional[int]:
+        """
+        採用順から行番号を二分探索で求めるメソッド O(log n)
+
+        Args:
+            seq (int): 採用順
+
+        Returns:
+            Optional[int]: 行番号、削除済みの場合はNone
+        """
+        row = bisect.bisect_left(self._seqs, seq)
+        if row < len(self._seqs) and self._seqs[row] == seq:
+            return row
+        return None
+
+    def contains(self, person: Employee) -> bool:
+        """
+        社員がこのストレージに在籍しているかを確認するメソッド
+
+        同じIDの別人（別の会社の社員など）を在籍扱いしないように、
+        所属会社と採用順の両方で確認する
+
+        Args:
+            person (Employee): 確認する社員
+
+        Returns:
+            bool: 在籍していれば True
+        """
+        return person._company is self._company and self.row_of(person._seq) is not None
+
+    def get_by_name(self, name: str) -> Optional[Employee]:
+        """
+        名前で社員を検索するメソッド O(1)
+
+        Args:
+            name (str): 名前
+
+        Returns:
+            Optional[Employee]: 同じ名前の社員のうち最初に採用された社員
+        """
+        seqs = self._name_index.get(name)
+        if seqs is None:
+            return None
+        first = seqs if isinstance(seqs, int) else seqs[0]
+        return self.employee_at(self.row_of(first))
+
+    def find_by_name(self, name: str) -> List[Employee]:
+        """
+        名前で社員を全員検索するメソッド O(同じ名前の人数 × log n)
+
+        Args:
+            name (str): 名前
+
+        Returns:
+            List[Employee]: 同じ名前の社員（採用順）
+        """
+        seqs = self._name_index.get(name)
+        if seqs is None:
+            return []
+        if isinstance(seqs, int):
+            seqs = [seqs]
+        return [self.employee_at(self.row_of(seq)) for seq in seqs]
+
+    def find_by_normalized_name(self, name: str) -> List[Employee]:
+        """
+        全角・半角と空白の違いを無視して、名前で社員を全員検索するメソッド O(見つかった人数 × log n)
+
+        Args:
+            name (str): 名前（表記ゆれがあってもよい）
+
+        Returns:
+            List[Employee]: 表記ゆれをなくすと同じ名前になる社員（採用順）
+        """
+        if self._normalized_index is None:
+            self._ensure_normalized_index()
+        variants = self._normalized_index.get(_normalize_name(name))
+        if variants is None:
+            return []
+        return self._employees_named([variants] if isinstance(variants, str) else variants)
+
+    def find_by_name_prefix(self, prefix: str) -> List[Employee]:
+        """
+        名前の先頭（名字など）で社員を全員検索するメソッド O(log n + 見つかった人数 × log n)
+
+        表記ゆれをなくした名前の並びで prefix の位置を二分探索し、
+        prefix で始まらない名前が出てくるまで順に読む
+
+        Args:
+            prefix (str): 名前の先頭（表記ゆれ・空白があってもよい）
+
+        Returns:
+            List[Employee]: 表記ゆれをなくした名前が prefix で始まる社員（採用順）
+        """
+        if self._normalized_index is None:
+            self._ensure_normalized_index()
+        prefix = _normalize_name(prefix)
+        names: List[str] = []
+        for key in self._normalized_keys.irange(prefix):
+            if not key.startswith(prefix):
+                break
+            variants = self._normalized_index[key]
+            if isinstance(variants, str):
+                names.append(variants)
+            else:
+                names.extend(variants)
+        return self._employees_named(names)
+
+    def age_count(self, post: Optional[Post] = None, min_age: Optional[int] = None, max_age: Optional[int] = None) -> int:
+        """
+        年齢が範囲内の社員数を返すメソッド O(log n)
+
+        範囲の両端の位置を二分探索で求めて引き算する（社員を1人ずつ数えない）
+
+        Args:
+            post (Optional[Post]): 役職（省略時は全社員）
+            min_age (Optional[int]): 年齢の下限（この年齢を含む。省略時は下限なし）
+            max_age (Optional[int]): 年齢の上限（この年齢を含む。省略時は上限なし）
+
+        Returns:
+            int: 社員数
+        """
+        keys = self._age_keys(post)
+        start = 0 if max_age is None else keys.rank(_age_key(max_age, 0))
+        stop = len(keys) if min_age is None else keys.rank(_age_key(min_age, _SEQ_MASK) + 1)
+        return max(0, stop - start)
+
+    def age_range(
+        self,
+        post: Optional[Post] = None,
+        min_age: Optional[int] = None,
+        max_age: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[Employee]:
+        """
+        年齢が範囲内の社員を、年齢の高い順（同い年なら採用順）に返すメソッド O(log n + k log n)
+
+        年齢順インデックスで範囲の先頭を二分探索し、そこから必要な分だけ読む
+
+        Args:
+            post (Optional[Post]): 役職（省略時は全社員）
+            min_age (Optional[int]): 年齢の下限（この年齢を含む。省略時は下限なし）
+            max_age (Optional[int]): 年齢の上限（この年齢を含む。省略時は上限なし）
+            limit (Optional[int]): 最大の人数（省略時は全員）
+
+        Returns:
+            List[Employee]: 社員（年齢の高い順）
+        """
+        # キーは年齢の高い順に並ぶので、上限の年齢が範囲の先頭、下限の年齢が範囲の末尾になる
+        low = None if max_age is None else _age_key(max_age, 0)
+        high = None if min_age is None else _age_key(min_age, _SEQ_MASK)
+        keys = self._age_keys(post).irange(low, high)
+        if limit is not None:
+            keys = itertools.islice(keys, limit)
+        # インデックスの社員は在籍中なので、row_of() の確認を省いて採用順の列を直接二分探索する
+        # （見つかった人数が多いと1人あたりの呼び出しの時間が効くため）
+        seqs, employee_at, bisect_left = self._seqs, self.employee_at, bisect.bisect_left
+        return [employee_at(bisect_left(seqs, key & _SEQ_MASK)) for key in keys]
+
+    def age_at_rank(self, post: Optional[Post], rank: int) -> int:
+        """
+        年齢の高い順で rank 番目（0から数える）の社員の年齢を返すメソッド O(log n)
+
+        Args:
+            post (Optional[Post]): 役職（None なら全社員）
+            rank (int): 順位（0 が最年長。在籍人数より小さいこと）
+
+        Returns:
+            int: 年齢
+        """
+        return _age_of_key(self._age_keys(post)[rank])
+
+    def post_members(self, post: Post) -> List[Employee]:
+        """
+        役職の社員を、年齢の高い順（同い年なら採用順）に返すメソッド O(k log n)
+
+        Args:
+            post (Post): 役職
+
+        Returns:
+            List[Employee]: 役職の社員（年齢の高い順）
+        """
+        return self.age_range(post)
+
+    def add_many(self, records: List[tuple]) -> List[Employee]:
+        """
+        社員をまとめて追加するメソッド
+
+        Args:
+            records (List[tuple]): (名前, 性別, 年齢, 役職, 社員ID) のリスト
+
+        Returns:
+            List[Employee]: 追加した社員
+        """
+        # 列やインデックスを変える前に、全員分の列の値（と年齢順のキー）を作る
+        # （不正な値があればここで例外になり、ストレージは何も変わらない）
+        encoded = [self._encode(*record) for record in records]
+        seqs = list(itertools.islice(self._seq_counter, len(records)))
+        age_keys = None
+        if self._age_index is not None:
+            age_keys = [_age_key(record[2], seq) for record, seq in zip(records, seqs)]
+
+        added = []
+        new_names: List[str] = []
+        for (name, _, _, _, _), values, seq in zip(records, encoded, seqs):
+            added.append(self._append(seq, values))
+            self._seqs.append(seq)
+
+            # 名前インデックスに登録
+            same_name = self._name_index.get(name)
+            if same_name is None:
+                self._name_index[name] = seq
+                new_names.append(name)
+            elif isinstance(same_name, int):
+                self._name_index[name] = [same_name, seq]
+            else:
+                same_name.append(seq)
+
+        if age_keys is not None:
+            # 年齢順インデックスには、役職ごとにまとめて登録する
+            # （全社員の分と役職の分で同じ整数オブジェクトを共有するので、キーのメモリは1人1つ）
+            keys: Dict[Post, List[int]] = {post: [] for post in _POSTS}
+            for record, key in zip(records, age_keys):
+                keys[record[3]].append(key)
+            for post, post_keys in keys.items():
+                if post_keys:
+                    self._age_index[post].update(post_keys)
+            self._age_index[None].update(age_keys)
+        # 初めて登場した名前だけ、表記ゆれをなくした名前のインデックスに登録する
+        self._index_normalized_names(new_names)
+        return added
+
+    def remove(self, people: List[Employee]) -> None:
+        """
+        在籍中の社員をまとめて削除するメソッド
+
+        各列は1回のコピーで詰め直し、名前インデックスは関係する名前ごとに1回だけ詰め直す
+        年齢順インデックスからは、行を消す前に読んだ役職・年齢のキーを取り除く
+
+        Args:
+            people (List[Employee]): 削除する社員（在籍確認済み、重複なし）
+
+        Returns:
+            None: 戻り値なし
+        """
+        doomed = {person._seq for person in people}
+        rows = sorted(self.row_of(seq) for seq in doomed)
+
+        # 年齢順インデックスを作ってあれば、行を消す前に役職・年齢のキーを読んでおく
+        keys: Dict[Post, set] = {post: set() for post in _POSTS}
+        if self._age_index is not None:
+            for row in rows:
+                keys[self.post_at(row)].add(_age_key(self.age_at(row), self._seqs[row]))
+
+        self._delete_rows(rows)
+        self._seqs = _without_rows(self._seqs, rows)
+
+        gone_names = []
+        for name in {person.name for person in people}:
+            same_name = self._name_index[name]
+            remaining = [same_name] if isinstance(same_name, int) else same_name
+            remaining = [seq for seq in remaining if seq not in doomed]
+            if len(remaining) > 1:
+                self._name_index[name] = remaining
+            elif remaining:
+                self._name_index[name] = remaining[0]
+            else:
+                del self._name_index[name]
+                gone_names.append(name)
+        # 誰もいなくなった名前だけ、表記ゆれをなくした名前のインデックスから外す
+        self._unindex_normalized_names(gone_names)
+
+        if self._age_index is not None:
+            for post, post_keys in keys.items():
+                if post_keys:
+                    self._age_index[post].discard_many(post_keys)
+            self._age_index[None].discard_many(set().union(*keys.values()))
+
+    def on_posts_changed(self, employees: List[Employee]) -> None:
+        """
+        社員の役職が変わったときに呼ばれるメソッド
+
+        社員のキーを元の役職のインデックスから新しい役職のインデックスへ移す
+        （年齢は変わらないので、全社員のインデックスはそのまま）
+        元の役職は覚えていないので、新しい役職以外のインデックスを順に二分探索して探す
+
+        Args:
+            employees (List[Employee]): 役職が変わった社員
+
+        Returns:
+            None: 戻り値なし
+        """
+        # 年齢順インデックスを作っていなければ、作るときに今の役職が使われる
+        if self._age_index is None:
+            return
+        for employee in employees:
+            if not self.contains(employee):
+                continue
+            row = self.row_of(employee._seq)
+            post = self.post_at(row)
+            key = _age_key(self.age_at(row), employee._seq)
+            target = self._age_keys(post)
+            # 何段階か動いて元の役職に戻った場合は、すでに入っている
+            if key in target:
+                continue
+            for other in _POSTS:
+                if other is not post and self._age_keys(other).remove(key):
+                    break
+            target.add(key)
+
+    def oldest(self, post: Optional[Post] = None) -> Optional[Employee]:
+        """
+        最年長の社員を取り出すメソッド O(log n)
+
+        Args:
+            post (Optional[Post]): 役職（省略時は全社員から選ぶ）
+
+        Returns:
+            Optional[Employee]: 最年長の社員（同い年なら先に採用された社員）、いない場合はNone
+        """
+        found = self.age_range(post, limit=1)
+        return found[0] if found else None
+
+    def flush(self) -> None:
+        """
+        ためている書き込みを実行するメソッド（メモリ上のストレージでは何もしない）
+
+        Returns:
+            None: 戻り値なし
+        """
+
+    def close(self) -> None:
+        """
+        ストレージを閉じるメソッド（メモリ上のストレージでは何もしない）
+
+        Returns:
+            None: 戻り値なし
+        """
+
+    def _age_keys(self, post: Optional[Post]) -> _SortedKeys:
+        """
+        役職の年齢順インデックスを返すプライベートメソッド
+
+        Args:
+            post (Optional[Post]): 役職（None なら全社員）
+
+        Returns:
+            _SortedKeys: 年齢の高い順・同い年なら採用順に並んだキー
+        """
+        if self._age_index is None:
+            self._ensure_age_index()
+        return self._age_index[post]
+
+    def _ensure_age_index(self) -> None:
+        """
+        年齢順インデックスがなければ、全社員の役職・年齢から作るプライベートメソッド O(n log n)
+
+        Returns:
+            None: 戻り値なし
+        """
+        with self._index_lock:
+            if self._age_index is not None:
+                return
+            posts, _, ages = self.columns()
+            keys: List[List[int]] = [[] for _ in _POSTS]
+            for seq, age, code in zip(self._seqs, ages, posts):
+                keys[code].append(((_AGE_KEY_BASE - age) << _SEQ_BITS) | seq)
+            index: Dict[Optional[Post], _SortedKeys] = {
+                post: _SortedKeys(post_keys) for post, post_keys in zip(_POSTS, keys)
+            }
+            index[None] = _SortedKeys(itertools.chain.from_iterable(keys))
+            # 全部作り終えてから設定する（他のスレッドに作りかけのインデックスを見せない）
+            self._age_index = index
+
+    def _employees_named(self, names: List[str]) -> List[Employee]:
+        """
+        名前ごとの採用順をまとめて、社員を採用順に返すプライベートメソッド
+
+        Args:
+            names (List[str]): 名前インデックスにある名前
+
+        Returns:
+            List[Employee]: その名前の社員全員（採用順）
+        """
+        seqs: List[int] = []
+        for name in names:
+            same_name = self._name_index[name]
+            if isinstance(same_name, int):
+                seqs.append(same_name)
+            else:
+                seqs.extend(same_name)
+        seqs.sort()
+        # 採用順を昇順にしたので、行番号も昇順になる
+        # 採用順は1ずつ増えるので、次の行は「前の行 + 採用順の差」より後ろにはない
+        # （その間だけを二分探索するので、同じ名前が多くても1人あたりの比較が少ない）
+        column, employee_at, bisect_left = self._seqs, self.employee_at, bisect.bisect_left
+        count = len(column)
+        found = []
+        row = previous = 0
+        for seq in seqs:
+            row = bisect_left(column, seq, row, min(count, row + seq - previous + 1))
+            previous = seq
+            found.append(employee_at(row))
+        return found
+
+    def _ensure_normalized_index(self) -> None:
+        """
+        表記ゆれをなくした名前のインデックスがなければ、名前インデックスの全ての名前から作るプライベートメソッド
+
+        作った後は、採用・削除のたびに _index_normalized_names() / _unindex_normalized_names() が更新する
+
+        Returns:
+            None: 戻り値なし
+        """
+        with self._index_lock:
+            if self._normalized_index is not None:
+                return
+            index: Dict[str, Union[str, List[str]]] = {}
+            for name in self._name_index:
+                key = _normalize_name(name)
+                variants = index.get(key)
+                if variants is None:
+                    index[key] = name
+                elif isinstance(variants, str):
+                    index[key] = [variants, name]
+                else:
+                    variants.append(name)
+            # 全部作り終えてから設定する（他のスレッドに作りかけのインデックスを見せない）
+            self._normalized_keys = _SortedKeys(index)
+            self._normalized_index = index
+
+    def _index_normalized_names(self, names: List[str]) -> None:
+        """
+        名前インデックスに新しく増えた名前を、表記ゆれをなくした名前のインデックスに登録するプライベートメソッド
+
+        Args:
+            names (List[str]): 新しく増えた名前
+
+        Returns:
+            None: 戻り値なし
+        """
+        if self._normalized_index is None or not names:
+            return
+        added = []
+        for name in names:
+            key = _normalize_name(name)
+            variants = self._normalized_index.get(key)
+            if variants is None:
+                self._normalized_index[key] = name
+                added.append(key)
+            elif isinstance(variants, str):
+                self._normalized_index[key] = [variants, name]
+            else:
+                variants.append(name)
+        self._normalized_keys.update(added)
+
+    def _unindex_normalized_names(self, names: List[str]) -> None:
+        """
+        名前インデックスからなくなった名前を、表記ゆれをなくした名前のインデックスから外すプライベートメソッド
+
+        Args:
+            names (List[str]): なくなった名前
+
+        Returns:
+            None: 戻り値なし
+        """
+        if self._normalized_index is None or not names:
+            return
+        removed = set()
+        for name in names:
+            key = _normalize_name(name)
+            variants = self._normalized_index[key]
+            if isinstance(variants, str):
+                del self._normalized_index[key]
+                removed.add(key)
+            else:
+                variants.remove(name)
+                if len(variants) == 1:
+                    self._normalized_index[key] = variants[0]
+        self._normalized_keys.discard_many(removed)
+
+
+class _ObjectStore(_EmployeeStore):
+    """
+    社員を Employee オブジェクトのリストで保存するストレージ（デフォルト）
+
+    employees プロパティは内部のリストをそのまま返すので、
+    同じ社員は常に同じオブジェクトになる
+    """
+
+    def __init__(self, company: "Company"):
+        """
+        _ObjectStoreクラスのコンストラクタ
+
+        Args:
+            company (Company): このストレージを使う会社
+        """
+        super().__init__(company)
+        # 社員リスト（採用順）
+        self._rows: List[Employee] = []
+        # 社員ID → 社員
+        self._by_id: Dict[str, Employee] = {}
+
+    def __len__(self) -> int:
+        """
+        社員数を返すメソッド（len() で呼ばれる）
+
+        Returns:
+            int: 社員数
+        """
+        return len(self._rows)
+
+    def get_by_id(self, id: str) -> Optional[Employee]:
+        """
+        IDで社員を検索するメソッド O(1)
+
+        Args:
+            id (str): 社員ID
+
+        Returns:
+            Optional[Employee]: 見つかった社員、見つからない場合はNone
+        """
+        return self._by_id.get(id)
+
+    def employee_at(self, row: int) -> Employee:
+        """
+        行番号の社員を返すメソッド
+
+        Args:
+            row (int): 行番号
+
+        Returns:
+            Employee: 社員
+        """
+        return self._rows[row]
+
+    def post_at(self, row: int) -> Post:
+        """
+        行番号の社員の役職を返すメソッド
+
+        Args:
+            row (int): 行番号
+
+        Returns:
+            Post: 役職
+        """
+        return self._rows[row]._post
+
+    def age_at(self, row: int) -> int:
+        """
+        行番号の社員の年齢を返すメソッド
+
+        Args:
+            row (int): 行番号
+
+        Returns:
+            int: 年齢
+        """
+        return self._rows[row]._age
+
+    def employees(self) -> List[Employee]:
+        """
+        社員リストを返すメソッド
+
+        Returns:
+            List[Employee]: 内部の社員リスト（採用順）
+        """
+        return self._rows
+
+    def columns(self) -> Tuple[array, array, array]:
+        """
+        役職コード・性別コード・年齢の列を作って返すメソッド（給与計算で使う）
+
+        社員オブジェクトを1回ずつ読んで配列に詰める O(n)
+
+        Returns:
+            Tuple[array, array, array]: (役職コード, 性別コード, 年齢) の配列
+        """
+        rows = self._rows
+        posts = array("B", map(_POST_CODES.__getitem__, map(attrgetter("_post"), rows)))
+        genders = array("B", map(_GENDER_CODES.__getitem__, map(attrgetter("_gender"), rows)))
+        ages = array("H", map(attrgetter("_age"), rows))
+        return posts, genders, ages
+
+    def export_columns(self) -> tuple:
+        """
+        スナップショットに保存する列を作って返すメソッド
+
+        Returns:
+            tuple: (社員ID, 年齢, 役職コード, 性別コード, 名前) の列
+        """
+        rows = self._rows
+        ids = array("Q")
+        for employee in rows:
+            # 整数として読めない社員IDはバイナリ形式で保存できない
+            if not employee._id.isdigit() or str(int(employee._id)) != employee._id:
+                raise ValueError(f"スナップショットには整数の社員IDしか保存できません: {employee._id!r}")
+            ids.append(int(employee._id))
+        posts, genders, ages = self.columns()
+        return ids, ages, posts, genders, [employee._name for employee in rows]
+
+    def table_rows(self, start: int, stop: int) -> Iterator[tuple]:
+        """
+        社員一覧の表に表示する値を行ごとに返すメソッド
+
+        Args:
+            start (int): 最初の行番号
+            stop (int): 最後の行番号＋1
+
+        Returns:
+            Iterator[tuple]: (名前, 性別, 年齢, 役職, 社員ID) のタプル（性別・役職は表示用の文字列）
+        """
+        return (
+            (emp._name, emp._gender.value, emp._age, emp._post.value, emp._id)
+            for emp in self._rows[start:stop]
+        )
+
+    def _encode(self, name: str, gender: Gender, age: int, post: Post, employee_id: str) -> tuple:
+        """
+        追加する社員の値を、_append() に渡す形にするプライベートメソッド（そのまま渡す）
+
+        Returns:
+            tuple: (名前, 性別, 年齢, 役職, 社員ID)
+        """
+        return name, gender, age, post, employee_id
+
+    def _append(self, seq: int, values: tuple) -> Employee:
+        """
+        社員オブジェクトを作って末尾に追加するプライベートメソッド
+
+        Args:
+            seq (int): 採用順
+            values (tuple): _encode() が作った値
+
+        Returns:
+            Employee: 追加した社員
+        """
+        employee_id = values[4]
+        employee = Employee(*values)
+        # 所属会社と採用順を設定（昇進・降格の通知と在籍確認に使う）
+        employee._company = self._company
+        employee._seq = seq
+        self._rows.append(employee)
+        self._by_id[employee_id] = employee
+        return employee
+
+    def _delete_rows(self, rows: List[int]) -> None:
+        """
+        指定した行の社員を削除するプライベートメソッド
+
+        Args:
+            rows (List[int]): 削除する行番号（昇順）
+
+        Returns:
+            None: 戻り値なし
+        """
+        for row in rows:
+            employee = self._rows[row]
+            del self._by_id[employee.id]
+            # 所属会社を外す（以降の昇進・降格は会社に通知されない）
+            employee._company = None
+        self._rows = _without_rows(self._rows, rows)
+
+
+class _ColumnarStore(_EmployeeStore):
+    """
+    社員を列ごとの配列（struct-of-arrays）で保存するストレージ
+
+    1人ごとに Employee オブジェクトを持たず、項目ごとに array にまとめて持つ
+        - 年齢: array('H')（2バイト）
+        - 役職・性別: array('B') の小さな整数コード（1バイト）
+        - 社員ID・採用順: array('Q') の整数（8バイト）
+        - 名前: sys.intern() した文字列のリスト（同じ名前は1つの文字列を共有）
+
+    社員を取り出すときは、その場で軽量な Employee（_EmployeeView）を作って返す
+    社員IDは整数に変換できる必要がある（採番クラスが払い出すIDは常に整数）
+    """
+
+    def __init__(self, company: "Company"):
+        """
+        _ColumnarStoreクラスのコンストラクタ
+
+        Args:
+            company (Company): このストレージを使う会社
+        """
+        super().__init__(company)
+        self._ids = array("Q")
+        self._ages = array("H")
+        self._posts = array("B")
+        self._genders = array("B")
+        self._names: List[str] = []
+        # 社員IDが採用順に増えている間は _ids を二分探索するので辞書は不要
+        # 増えない社員IDが来たら、その時点で 社員ID → 採用順 の辞書に切り替える
+        self._seq_by_id: Optional[Dict[int, int]] = None
+
+    def __len__(self) -> int:
+        """
+        社員数を返すメソッド（len() で呼ばれる）
+
+        Returns:
+            int: 社員数
+        """
+        return len(self._seqs)
+
+    def get_by_id(self, id: str) -> Optional[Employee]:
+        """
+        IDで社員を検索するメソッド O(log n)
+
+        Args:
+            id (str): 社員ID
+
+        Returns:
+            Optional[Employee]: 見つかった社員、見つからない場合はNone
+        """
+        # 整数として読めないID・"0123" のように表記が異なるIDは存在しない
+        if not id.isdigit() or str(int(id)) != id:
+            return None
+        number = int(id)
+
+        if self._seq_by_id is None:
+            row = bisect.bisect_left(self._ids, number)
+            if row < len(self._ids) and self._ids[row] == number:
+                return self.employee_at(row)
+            return None
+
+        seq = self._seq_by_id.get(number)
+        return None if seq is None else self.employee_at(self.row_of(seq))
+
+    def employee_at(self, row: int) -> Employee:
+        """
+        行番号の社員を軽量な Employee として作って返すメソッド
+
+        Args:
+            row (int): 行番号
+
+        Returns:
+            Employee: 社員（_EmployeeView）
+        """
+        return _EmployeeView(self, row)
+
+    def post_at(self, row: int) -> Post:
+        """
+        行番号の社員の役職を返すメソッド
+
+        Args:
+            row (int): 行番号
+
+        Returns:
+            Post: 役職
+        """
+        return _POSTS[self._posts[row]]
+
+    def age_at(self, row: int) -> int:
+        """
+        行番号の社員の年齢を返すメソッド
+
+        Args:
+            row (int): 行番号
+
+        Returns:
+            int: 年齢
+        """
+        return self._ages[row]
+
+    def employees(self) -> List[Employee]:
+        """
+        社員リストを作って返すメソッド
+
+        呼ぶたびに全員分の軽量な Employee を作るので O(n)
+
+        Returns:
+            List[Employee]: 社員リスト（採用順）
+        """
+        return [_EmployeeView(self, row) for row in range(len(self._seqs))]
+
+    def columns(self) -> Tuple[array, array, array]:
+        """
+        役職コード・性別コード・年齢の列を返すメソッド（給与計算で使う）
+
+        内部の配列をそのまま返すので O(1)（呼び出し側は書き換えないこと）
+
+        Returns:
+            Tuple[array, array, array]: (役職コード, 性別コード, 年齢) の配列
+        """
+        return self._posts, self._genders, self._ages
+
+    def export_columns(self) -> tuple:
+        """
+        スナップショットに保存する列を返すメソッド
+
+        内部の列をそのまま返すので O(1)
+
+        Returns:
+            tuple: (社員ID, 年齢, 役職コード, 性別コード, 名前) の列
+        """
+        return self._ids, self._ages, self._posts, self._genders, self._names
+
+    def table_rows(self, start: int, stop: int) -> Iterator[tuple]:
+        """
+        社員一覧の表に表示する値を行ごとに返すメソッド
+
+        軽量な Employee を作らず、各列の範囲を切り出して組み合わせる
+
+        Args:
+            start (int): 最初の行番号
+            stop (int): 最後の行番号＋1
+
+        Returns:
+            Iterator[tuple]: (名前, 性別, 年齢, 役職, 社員ID) のタプル（性別・役職は表示用の文字列）
+        """
+        return zip(
+            self._names[start:stop],
+            map(_GENDER_VALUES.__getitem__, self._genders[start:stop]),
+            self._ages[start:stop],
+            map(_POST_VALUES.__getitem__, self._posts[start:stop]),
+            map(str, self._ids[start:stop]),
+        )
+
+    def _encode(self, name: str, gender: Gender, age: int, post: Post, employee_id: str) -> tuple:
+        """
+        追加する社員の値を、各列に入れる整数コードに変換するプライベートメソッド
+
+        列に入らない値はここで例外にする（どの列にも書き込む前に確認するため）
+
+        Returns:
+            tuple: (社員ID, 年齢, 役職コード, 性別コード, 名前)
+
+        Raises:
+            ValueError: 社員ID・年齢が列に入らない場合
+        """
+        if not employee_id.isdigit() or int(employee_id) >= 1 << 64:
+            raise ValueError(f"列形式のストレージでは社員IDは整数である必要があります: {employee_id!r}")
+        if not isinstance(age, int) or not 0 <= age <= _MAX_AGE:
+            raise ValueError(f"年齢が不正です: {age!r}")
+        # sys.intern() で同じ名前の文字列を1つにまとめる
+        return int(employee_id), age, _POST_CODES[post], _GENDER_CODES[gender], sys.intern(name)
+
+    def _append(self, seq: int, values: tuple) -> Optional[Employee]:
+        """
+        社員データを各列の末尾に追加するプライベートメソッド
+
+        Args:
+            seq (int): 採用順
+            values (tuple): _encode() が作った値
+
+        Returns:
+            Employee: 追加した社員（_EmployeeView）
+        """
+        number, age, post_code, gender_code, name = values
+
+        if self._seq_by_id is None and self._ids and number <= self._ids[-1]:
+            # 社員IDが増えなくなったので、二分探索をやめて辞書に切り替える
+            self._seq_by_id = dict(zip(self._ids, self._seqs))
+        if self._seq_by_id is not None:
+            self._seq_by_id[number] = seq
+
+        self._ids.append(number)
+        self._ages.append(age)
+        self._posts.append(post_code)
+        self._genders.append(gender_code)
+        self._names.append(name)
+        return _EmployeeView(self, len(self._ids) - 1, seq)
+
+    def _delete_rows(self, rows: List[int]) -> None:
+        """
+        指定した行を各列から削除するプライベートメソッド
+
+        Args:
+            rows (List[int]): 削除する行番号（昇順）
+
+        Returns:
+            None: 戻り値なし
+        """
+        if self._seq_by_id is not None:
+            for row in rows:
+                del self._seq_by_id[self._ids[row]]
+        self._ids = _without_rows(self._ids, rows)
+        self._ages = _without_rows(self._ages, rows)
+        self._posts = _without_rows(self._posts, rows)
+        self._genders = _without_rows(self._genders, rows)
+        self._names = _without_rows(self._names, rows)
+
+
+class _EmployeeView(Employee):
+    """
+    列形式のストレージ（_ColumnarStore）の1行を Employee として見せるクラス
+
+    名前・性別・年齢・社員IDは変わらないので作成時に読み出して持ち、
+    役職だけは毎回ストレージの列を読み書きする（昇進・降格が列に反映される）
+    削除された後は、最後に読んだ役職を返す
+    """
+
+    # Employeeの属性に加えて持つ属性の一覧
+    # （_post は下のプロパティが使われ、Employee の _post 枠は使わない）
+    __slots__ = ("_store", "_last_post")
+
+    def __init__(self, store: _ColumnarStore, row: int, seq: Optional[int] = None):
+        """
+        _EmployeeViewクラスのコンストラクタ
+
+        Employee.__init__() は社員IDを採番してしまうので呼ばず、
+        Human.__init__() で共通の項目だけ設定する
+
+        Args:
+            store (_ColumnarStore): 社員データを持つストレージ
+            row (int): 行番号
+            seq (Optional[int]): 採用順（省略時はストレージから読む）
+        """
+        Human.__init__(
+            self, store._names[row], _GENDERS[store._genders[row]], store._ages[row]
+        )
+        self._id = str(store._ids[row])
+        self._store = store
+        self._seq = store._seqs[row] if seq is None else seq
+        self._company = store._company
+        self._last_post = _POSTS[store._posts[row]]
+
+    def __eq__(self, other: object) -> bool:
+        """
+        同じストレージの同じ社員を指していれば等しいとみなすメソッド（== で呼ばれる）
+
+        取り出すたびに別のオブジェクトが作られるので、is ではなく == で比較する
+
+        Args:
+            other (object): 比較する相手
+
+        Returns:
+            bool: 同じ社員なら True
+        """
+        if isinstance(other, _EmployeeView):
+            return self._store is other._store and self._seq == other._seq
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        """
+        ハッシュ値を返すメソッド（__eq__ と矛盾しないように採用順から作る）
+
+        Returns:
+            int: ハッシュ値
+        """
+        return hash((id(self._store), self._seq))
+
+    @property  # プロパティ化
+    def _post(self) -> Post:
+        """
+        役職をストレージの列から読むプロパティ（getter）
+
+        Returns:
+            Post: 役職
+        """
+        row = self._store.row_of(self._seq)
+        if row is not None:
+            self._last_post = _POSTS[self._store._posts[row]]
+        return self._last_post
+
+    @_post.setter  # _postプロパティのsetter
+    def _post(self, post: Post) -> None:
+        """
+        役職をストレージの列に書き込むプロパティ（setter）
+
+        Employee.promote() / demote() の self._post = ... から呼ばれる
+
+        Args:
+            post (Post): 新しい役職
+
+        Returns:
+            None: 戻り値なし
+        """
+        self._last_post = post
+        row = self._store.row_of(self._seq)
+        if row is not None:
+            self._store._posts[row] = _POST_CODES[post]
+
+
+# ===================================================================
+# スナップショット（会社の保存と読み込み）
+# ===================================================================
+
+# スナップショットのファイル形式（数値はすべてリトルエンディアン）
+#   ヘッダー（48バイト）:
+#       識別子(8) / 版(2) / フラグ(2) / 予約(4) / 社員数 n(8) / 名前の合計バイト数(8)
+#       / 次に払い出す社員ID(8) / 最大社員数(8)
+#   社員ID     : 8バイト × n
+#   名前の位置 : 8バイト × (n + 1)（i 番目の名前は位置 i から i+1 の手前まで）
+#   年齢       : 2バイト × n
+#   役職コード : 1バイト × n
+#   性別コード : 1バイト × n
+#   名前       : UTF-8 の文字列をつなげたもの
+# 各項目は固定幅なので、読み込み時は mmap したファイルをそのまま列として使える
+_SNAPSHOT_MAGIC = b"CMSNAP\x00\x00"
+_SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<8sHHIQQQQ")
+# フラグ：社員IDが採用順に増えている（IDの検索に二分探索が使える）
+_SNAPSHOT_IDS_SORTED = 1
+
+
+def _little_endian_bytes(values: Any, typecode: str) -> bytes:
+    """
+    数値の列をリトルエンディアンのバイト列にするプライベート関数
+
+    Args:
+        values: array.array または memoryview
+        typecode (str): 配列の型コード
+
+    Returns:
+        bytes: バイト列
+    """
+    if sys.byteorder == "little" or typecode == "B":
+        return values.tobytes()
+    swapped = array(typecode, values)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def _write_snapshot(path: str, columns: tuple, next_id: int, capacity: int) -> None:
+    """
+    会社のスナップショットをファイルに書き出すプライベート関数
+
+    一時ファイルに書いてから os.replace() で置き換えるので、
+    書き出しの途中で失敗しても元のファイルは壊れない
+    （同じファイルを mmap で読み込み中の会社があっても影響しない）
+
+    Args:
+        path (str): 保存先のパス
+        columns (tuple): (社員ID, 年齢, 役職コード, 性別コード, 名前) の列
+        next_id (int): 次に払い出す社員ID
+        capacity (int): 最大社員数
+
+    Returns:
+        None: 戻り値なし
+    """
+    ids, ages, posts, genders, names = columns
+    count = len(ids)
+
+    if isinstance(names, _NameTable):
+        # 読み込んだスナップショットの名前は、デコードせずにそのまま書き出す
+        offsets, blob = names.offsets, names.blob
+    else:
+        encoded = [name.encode("utf-8") for name in names]
+        offsets = array("Q", itertools.accumulate(map(len, encoded), initial=0))
+        blob = b"".join(encoded)
+
+    flags = 0
+    if all(map(int.__lt__, ids, itertools.islice(ids, 1, None))):
+        flags |= _SNAPSHOT_IDS_SORTED
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(_SNAPSHOT_HEADER.pack(
+            _SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, flags, 0, count, len(blob), next_id, capacity,
+        ))
+        file.write(_little_endian_bytes(ids, "Q"))
+        file.write(_little_endian_bytes(offsets, "Q"))
+        file.write(_little_endian_bytes(ages, "H"))
+        file.write(posts.tobytes())
+        file.write(genders.tobytes())
+        file.write(blob)
+    os.replace(temporary, path)
+
+
+class _NameTable:
+    """
+    スナップショットの名前を、必要になったときに1つずつデコードする読み取り専用の列
+
+    名前の位置（offsets）と UTF-8 のバイト列（blob）を持ち、
+    table[row] や table[start:stop] で読んだ名前だけを文字列にする
+    """
+
+    def __init__(self, offsets: Any, blob: memoryview):
+        """
+        _NameTableクラスのコンストラクタ
+
+        Args:
+            offsets: 名前の位置（n + 1 個）
+            blob (memoryview): 名前の UTF-8 のバイト列
+        """
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        """
+        名前の数を返すメソッド（len() で呼ばれる）
+
+        Returns:
+            int: 名前の数
+        """
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        """
+        名前を読むメソッド（table[row] / table[start:stop] で呼ばれる）
+
+        Args:
+            index (Union[int, slice]): 行番号または範囲
+
+        Returns:
+            Union[str, List[str]]: 名前、範囲の場合は名前のリスト
+        """
+        if isinstance(index, slice):
+            return [self[row] for row in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return str(self.blob[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        名前を先頭から順に返すメソッド（for 文で呼ばれる）
+
+        Returns:
+            Iterator[str]: 名前
+        """
+        blob = self.blob
+        offsets = self.offsets
+        return (str(blob[start:stop], "utf-8") for start, stop in zip(offsets, itertools.islice(offsets, 1, None)))
+
+
+class _MappedColumnarStore(_ColumnarStore):
+    """
+    スナップショットのファイルを mmap して、そのまま列として使うストレージ
+
+    読み込み時にはファイルを対応づけるだけで、社員の行を1つも作らない
+        - 社員ID・年齢・役職・性別: ファイル上の固定幅の列を memoryview で読む
+        - 名前: 読んだときに1つずつデコードする（_NameTable）
+        - 名前インデックス・年齢順インデックス: 初めて必要になったときに作る
+        - 採用順: 0, 1, 2, ...（range なので O(1)）
+
+    役職の書き換え（昇進・降格）は ACCESS_COPY の mmap に直接書くので
+    ファイルは変わらない（このプロセスだけの変更になる）
+    採用・削除のときに初めて、各列を通常の array にコピーする
+    """
+
+    # 名前インデックス・年齢順インデックスを初めて必要になったときに作るので、検索も書き込み扱い
+    CONCURRENT_READS = False
+
+    def __init__(self, company: Optional["Company"], path: str):
+        """
+        _MappedColumnarStoreクラスのコンストラクタ
+
+        Args:
+            company (Optional[Company]): このストレージを使う会社（後から設定してもよい）
+            path (str): スナップショットのパス
+
+        Raises:
+            ValueError: スナップショットの形式ではないファイルの場合
+        """
+        super().__init__(company)
+
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            # 空のファイルは mmap できないので、ヘッダーより大きいことを先に確認する
+            if size < _SNAPSHOT_HEADER.size:
+                raise ValueError(f"スナップショットの形式ではありません: {path}")
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        magic, version, flags, _, count, names_size, next_id, capacity = _SNAPSHOT_HEADER.unpack_from(mapping)
+        expected = _SNAPSHOT_HEADER.size + count * (8 + 8 + 2 + 1 + 1) + 8 + names_size
+        if magic != _SNAPSHOT_MAGIC or version != _SNAPSHOT_VERSION or size != expected:
+            mapping.close()
+            raise ValueError(f"スナップショットの形式ではありません: {path}")
+        self.next_id = next_id
+        self.capacity = capacity
+
+        # 各列の範囲を切り出す（コピーはしない）
+        view = memoryview(mapping)
+        position = _SNAPSHOT_HEADER.size
+        sections = []
+        for typecode, length in (("Q", count), ("Q", count + 1), ("H", count), ("B", count), ("B", count)):
+            end = position + length * array(typecode).itemsize
+            sections.append(view[position:end].cast(typecode))
+            position = end
+        blob = view[position:]
+        ids, offsets, ages, posts, genders = sections
+
+        if sys.byteorder != "little":
+            # ビッグエンディアンの環境では、バイト順を入れ替えた配列にコピーする
+            ids, offsets, ages = (array(column.format, column) for column in (ids, offsets, ages))
+            for column in (ids, offsets, ages):
+                column.byteswap()
+
+        self._ids = ids
+        self._ages = ages
+        self._posts = posts
+        self._genders = genders
+        self._names = _NameTable(offsets, blob)
+        self._seqs = range(count)
+        self._seq_counter = itertools.count(count)
+        # 社員IDが採用順に増えていなければ、社員ID → 採用順 の辞書を作る
+        if not flags & _SNAPSHOT_IDS_SORTED:
+            self._seq_by_id = dict(zip(ids, range(count)))
+        # 名前インデックスは、初めて必要になったときに作る
+        # （表記ゆれをなくした名前のインデックスと年齢順インデックスは、基底クラスが同じように作る）
+        self._name_index = None
+        # mmap の参照（列を array にコピーしたら手放す）
+        self._mapping: Optional[mmap.mmap] = mapping
+
+    def get_by_name(self, name: str) -> Optional[Employee]:
+        """
+        名前で社員を検索するメソッド（初回は名前インデックスを作る）
+
+        Args:
+            name (str): 名前
+
+        Returns:
+            Optional[Employee]: 同じ名前の社員のうち最初に採用された社員
+        """
+        self._ensure_name_index()
+        return super().get_by_name(name)
+
+    def find_by_name(self, name: str) -> List[Employee]:
+        """
+        名前で社員を全員検索するメソッド（初回は名前インデックスを作る）
+
+        Args:
+            name (str): 名前
+
+        Returns:
+            List[Employee]: 同じ名前の社員（採用順）
+        """
+        self._ensure_name_index()
+        return super().find_by_name(name)
+
+    def add_many(self, records: List[tuple]) -> List[Employee]:
+        """
+        社員をまとめて追加するメソッド（初回は各列を array にコピーする）
+
+        Args:
+            records (List[tuple]): (名前, 性別, 年齢, 役職, 社員ID) のリスト
+
+        Returns:
+            List[Employee]: 追加した社員
+        """
+        self._materialize()
+        return super().add_many(records)
+
+    def remove(self, people: List[Employee]) -> None:
+        """
+        在籍中の社員をまとめて削除するメソッド（初回は各列を array にコピーする）
+
+        Args:
+            people (List[Employee]): 削除する社員
+
+        Returns:
+            None: 戻り値なし
+        """
+        self._materialize()
+        super().remove(people)
+
+    def _ensure_name_index(self) -> None:
+        """
+        名前インデックスがなければ作るプライベートメソッド
+
+        Returns:
+            None: 戻り値なし
+        """
+        if self._name_index is not None:
+            return
+        index: Dict[str, Union[int, List[int]]] = {}
+        for seq, name in enumerate(self._names):
+            same_name = index.get(name)
+            if same_name is None:
+                index[name] = seq
+            elif isinstance(same_name, int):
+                index[name] = [same_name, seq]
+            else:
+                same_name.append(seq)
+        self._name_index = index
+
+    def _ensure_normalized_index(self) -> None:
+        """
+        表記ゆれをなくした名前のインデックスがなければ作るプライベートメソッド（先に名前インデックスを作る）
+
+        Returns:
+            None: 戻り値なし
+        """
+        self._ensure_name_index()
+        super()._ensure_normalized_index()
+
+    def _materialize(self) -> None:
+        """
+        各列を通常の array とリストにコピーし、mmap を手放すプライベートメソッド
+
+        以降は _ColumnarStore と同じように採用・削除できる
+
+        Returns:
+            None: 戻り値なし
+        """
+        if self._mapping is None:
+            return
+        self._ensure_name_index()
+
+        columns = []
+        for column in (self._ids, self._ages, self._posts, self._genders):
+            if isinstance(column, memoryview):
+                # frombytes() はメモリをまとめてコピーする
+                copied = array(column.format)
+                copied.frombytes(column.cast("B"))
+                column = copied
+            columns.append(column)
+        self._ids, self._ages, self._posts, self._genders = columns
+        self._names = [sys.intern(name) for name in self._names]
+        self._seqs = array("Q", self._seqs)
+        # memoryview への参照がなくなれば、mmap はガベージコレクションで解放される
+        self._mapping = None
+
+
+# ===================================================================
+# SQLite 形式のストレージ
+# ===================================================================
+
+# 社員テーブルとインデックス
+# seq（採用順）を INTEGER PRIMARY KEY にするので、行の並びは採用順になる
+# 役職・性別は小さな整数コード（_POST_CODES / _GENDER_CODES）で持つ
+# name_key は接続ごとに登録する _normalize_name（表記ゆれをなくした名前）で、式のインデックスにする
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS employees (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    gender INTEGER NOT NULL,
+    age INTEGER NOT NULL,
+    post INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS employees_name ON employees (name, seq);
+CREATE INDEX IF NOT EXISTS employees_name_key ON employees (name_key(name), seq);
+CREATE INDEX IF NOT EXISTS employees_post_age ON employees (post, age DESC, seq);
+CREATE INDEX IF NOT EXISTS employees_age ON employees (age DESC, seq);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+_SQLITE_INSERT = "INSERT INTO employees (seq, id, name, gender, age, post) VALUES (?, ?, ?, ?, ?, ?)"
+_SQLITE_DELETE = "DELETE FROM employees WHERE seq = ?"
+_SQLITE_UPDATE_POST = "UPDATE employees SET post = ? WHERE seq = ?"
+_SQLITE_COLUMNS = "seq, id, name, gender, age, post"
+# 次に払い出す社員ID（削除した社員のIDを、開き直した後に払い出さないように保存する。小さくはしない）
+_SQLITE_SAVE_NEXT_ID = (
+    "INSERT INTO meta (key, value) VALUES ('next_id', ?) "
+    "ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)"
+)
+# 社員IDがすでに使われているかを一度に調べる件数（SQL のパラメーターの数の上限より小さくする）
+_SQLITE_ID_CHECK_CHUNK = 500
+
+
+class _SqliteStore(_EmployeeStore):
+    """
+    社員を SQLite のデータベースに保存するストレージ
+
+    ID・名前・役職＋年齢・年齢のインデックスはデータベースが持つので、
+    基底クラスの名前インデックスと年齢順インデックスは使わない
+        - get_by_id / get_by_name / oldest はインデックスを使う SQL で1件だけ読む
+        - 年齢の範囲・順位も 役職＋年齢・年齢のインデックスを使う SQL で読む
+        - 読み込んだ社員は 採用順 → Employee の辞書に入れ、同じ社員は常に同じオブジェクトにする
+        - 在籍確認と社員数は、データベースを読まずに辞書と人数のカウンターで答える
+
+    採用・削除・昇進・降格の書き込みはすぐには実行せず、ためておいて
+    まとめて1つのトランザクションで実行する。実行するのは次のとき
+        - ためた件数が batch_size に達したとき
+        - 最初にためてから flush_interval 秒以上たった後に書き込みがあったとき
+        - データベースを読む前（読んだ結果に、ためていた書き込みが必ず反映される）
+        - flush() / close() が呼ばれたとき
+    トランザクションが失敗した場合は、ためた書き込みを残しておく（次の flush() でもう一度実行する）
+    社員IDの重複は採用するときに調べるので、重複による失敗は採用したときにその場で例外になる
+
+    実行するときは、会社の採番クラスの次のIDも meta テーブルに保存する
+    （開き直した会社は、削除した社員のIDを払い出さない）
+    """
+
+    # 読み込みの前にためた書き込みを実行し、読み込んだ社員を覚えておくので、検索も書き込み扱い
+    CONCURRENT_READS = False
+
+    def __init__(
+        self,
+        company: "Company",
+        database: str,
+        flush_interval: float,
+        batch_size: int,
+        check_same_thread: bool = True,
+    ):
+        """
+        _SqliteStoreクラスのコンストラクタ
+
+        Args:
+            company (Company): このストレージを使う会社
+            database (str): データベースのパス（":memory:" ならメモリ上）
+            flush_interval (float): ためた書き込みを実行するまでの最大の秒数
+            batch_size (int): まとめて実行する書き込みの最大件数
+            check_same_thread (bool): 作ったスレッド以外から使えないようにするか
+                （スレッドセーフな会社では False。アクセスは会社のロックで1スレッドずつになる）
+        """
+        if flush_interval < 0 or batch_size < 1:
+            raise ValueError(f"flush_interval・batch_size が不正です: {flush_interval!r}, {batch_size!r}")
+        self._company = company
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._connection = sqlite3.connect(database, check_same_thread=check_same_thread)
+        # 式のインデックスで使う関数は、スキーマより先に登録する（同じ入力なら必ず同じ結果になる関数）
+        self._connection.create_function("name_key", 1, _normalize_name, deterministic=True)
+        self._connection.executescript(_SQLITE_SCHEMA)
+
+        # 既存のデータベースなら、社員数と採用順の続きを読み込む
+        count, last_seq = self._connection.execute("SELECT COUNT(*), MAX(seq) FROM employees").fetchone()
+        self._count = count
+        self._seq_counter = itertools.count(0 if last_seq is None else last_seq + 1)
+        # 採用順 → 読み込み済みの在籍中の社員
+        self._loaded: Dict[int, Employee] = {}
+        # ためている書き込み：(SQL, パラメーターのリスト) を実行する順に並べる
+        self._pending: List[Tuple[str, list]] = []
+        self._pending_count = 0
+        # ためている書き込みで使われる・空く社員ID → 実行後に使われているか
+        # （採用するときの重複の確認で、まだ実行していない採用・削除も数える）
+        self._pending_ids: Dict[str, bool] = {}
+        # 最初に書き込みをためた時刻（ためていなければ None）
+        self._pending_since: Optional[float] = None
+
+    def __len__(self) -> int:
+        """
+        社員数を返すメソッド（len() で呼ばれる）
+
+        データベースは読まず、採用・削除のたびに更新している人数を返す
+
+        Returns:
+            int: 社員数
+        """
+        return self._count
+
+    def next_numeric_id(self) -> int:
+        """
+        開き直した会社で次に払い出す社員IDを返すメソッド（採番を続けるために使う）
+
+        保存した採番クラスの次のIDと、データベースにある整数の社員IDの最大値＋1の大きい方
+        （最後に採用した社員を削除していても、そのIDは払い出さない）
+
+        Returns:
+            int: 次に払い出す社員ID（社員がいたことがなければ 0）
+        """
+        self.flush()
+        row = self._connection.execute(
+            "SELECT MAX(CAST(id AS INTEGER)) FROM employees WHERE id GLOB '[0-9]*'"
+        ).fetchone()
+        saved = self._connection.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        return max(0 if row[0] is None else row[0] + 1, 0 if saved is None else saved[0])
+
+    def contains(self, person: Employee) -> bool:
+        """
+        社員がこのストレージに在籍しているかを確認するメソッド O(1)
+
+        在籍中の社員は、読み込んだときに辞書に入っているので、辞書だけで確認できる
+
+        Args:
+            person (Employee): 確認する社員
+
+        Returns:
+            bool: 在籍していれば True
+        """
+        return person._company is self._company and self._loaded.get(person._seq) is person
+
+    def get_by_id(self, id: str) -> Optional[Employee]:
+        """
+        IDで社員を検索するメソッド（id の UNIQUE インデックスを使う）
+
+        Args:
+            id (str): 社員ID
+
+        Returns:
+            Optional[Employee]: 見つかった社員、見つからない場合はNone
+        """
+        return self._fetch_one(f"SELECT {_SQLITE_COLUMNS} FROM employees WHERE id = ?", (id,))
+
+    def get_by_name(self, name: str) -> Optional[Employee]:
+        """
+        名前で社員を検索するメソッド（name のインデックスを使う）
+
+        Args:
+            name (str): 名前
+
+        Returns:
+            Optional[Employee]: 同じ名前の社員のうち最初に採用された社員
+        """
+        return self._fetch_one(
+            f"SELECT {_SQLITE_COLUMNS} FROM employees WHERE name = ? ORDER BY seq LIMIT 1", (name,)
+        )
+
+    def find_by_name(self, name: str) -> List[Employee]:
+        """
+        名前で社員を全員検索するメソッド（name のインデックスを使う）
+
+        Args:
+            name (str): 名前
+
+        Returns:
+            List[Employee]: 同じ名前の社員（採用順）
+        """
+        return self._fetch_all(f"SELECT {_SQLITE_COLUMNS} FROM employees WHERE name = ? ORDER BY seq", (name,))
+
+    def find_by_normalized_name(self, name: str) -> List[Employee]:
+        """
+        表記ゆれを無視して名前で社員を全員検索するメソッド（name_key の式のインデックスを使う）
+
+        Args:
+            name (str): 名前
+
+        Returns:
+            List[Employee]: 表記ゆれをなくすと同じ名前になる社員（採用順）
+        """
+        return self._fetch_all(
+            f"SELECT {_SQLITE_COLUMNS} FROM employees WHERE name_key(name) = ? ORDER BY seq", (_normalize_name(name),)
+        )
+
+    def find_by_name_prefix(self, prefix: str) -> List[Employee]:
+        """
+        名前の先頭で社員を全員検索するメソッド（name_key の式のインデックスを範囲で読む）
+
+        prefix で始まる文字列は「prefix 以上、prefix の最後の文字を1つ進めた文字列未満」の範囲に入る
+
+        Args:
+            prefix (str): 名前の先頭
+
+        Returns:
+            List[Employee]: 表記ゆれをなくした名前が prefix で始まる社員（採用順）
+        """
+        prefix = _normalize_name(prefix)
+        if not prefix:
+            return self._fetch_all(f"SELECT {_SQLITE_COLUMNS} FROM employees ORDER BY seq", ())
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return self._fetch_all(
+            f"SELECT {_SQLITE_COLUMNS} FROM employees WHERE name_key(name) >= ? AND name_key(name) < ? ORDER BY seq",
+            (prefix, upper),
+        )
+
+    def age_count(self, post: Optional[Post] = None, min_age: Optional[int] = None, max_age: Optional[int] = None) -> int:
+        """
+        年齢が範囲内の社員数を返すメソッド（役職＋年齢、または年齢のインデックスを使う）
+
+        Args:
+            post (Optional[Post]): 役職（省略時は全社員）
+            min_age (Optional[int]): 年齢の下限（この年齢を含む）
+            max_age (Optional[int]): 年齢の上限（この年齢を含む）
+
+        Returns:
+            int: 社員数
+        """
+        if post is None and min_age is None and max_age is None:
+            return self._count
+        where, parameters = self._age_conditions(post, min_age, max_age)
+        self.flush()
+        return self._connection.execute(f"SELECT COUNT(*) FROM employees{where}", tuple(parameters)).fetchone()[0]
+
+    def age_range(
+        self,
+        post: Optional[Post] = None,
+        min_age: Optional[int] = None,
+        max_age: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[Employee]:
+        """
+        年齢が範囲内の社員を年齢の高い順に返すメソッド（役職＋年齢、または年齢のインデックスを使う）
+
+        Args:
+            post (Optional[Post]): 役職（省略時は全社員）
+            min_age (Optional[int]): 年齢の下限（この年齢を含む）
+            max_age (Optional[int]): 年齢の上限（この年齢を含む）
+            limit (Optional[int]): 最大の人数
+
+        Returns:
+            List[Employee]: 社員（年齢の高い順、同い年なら採用順）
+        """
+        where, parameters = self._age_conditions(post, min_age, max_age)
+        sql = f"SELECT {_SQLITE_COLUMNS} FROM employees{where} ORDER BY age DESC, seq"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        return self._fetch_all(sql, tuple(parameters))
+
+    def age_at_rank(self, post: Optional[Post], rank: int) -> int:
+        """
+        年齢の高い順で rank 番目（0から数える）の社員の年齢を返すメソッド
+
+        Args:
+            post (Optional[Post]): 役職（None なら全社員）
+            rank (int): 順位（0 が最年長）
+
+        Returns:
+            int: 年齢
+        """
+        where, parameters = self._age_conditions(post, None, None)
+        self.flush()
+        return self._connection.execute(
+            f"SELECT age FROM employees{where} ORDER BY age DESC, seq LIMIT 1 OFFSET ?", (*parameters, rank)
+        ).fetchone()[0]
+
+    def employees(self) -> List[Employee]:
+        """
+        社員リストを作って返すメソッド
+
+        Returns:
+            List[Employee]: 社員リスト（採用順）
+        """
+        self.flush()
+        cursor = self._connection.execute(f"SELECT {_SQLITE_COLUMNS} FROM employees ORDER BY seq")
+        return [self._employee_from_row(row) for row in cursor]
+
+    def columns(self) -> Tuple[array, array, array]:
+        """
+        役職コード・性別コード・年齢の列を作って返すメソッド（給与計算で使う）
+
+        Returns:
+            Tuple[array, array, array]: (役職コード, 性別コード, 年齢) の配列
+        """
+        self.flush()
+        posts, genders, ages = array("B"), array("B"), array("H")
+        for post, gender, age in self._connection.execute("SELECT post, gender, age FROM employees ORDER BY seq"):
+            posts.append(post)
+            genders.append(gender)
+            ages.append(age)
+        return posts, genders, ages
+
+    def table_rows(self, start: int, stop: int) -> Iterator[tuple]:
+        """
+        社員一覧の表に表示する値を行ごとに返すメソッド
+
+        Args:
+            start (int): 最初の行番号
+            stop (int): 最後の行番号＋1
+
+        Returns:
+            Iterator[tuple]: (名前, 性別, 年齢, 役職, 社員ID) のタプル（性別・役職は表示用の文字列）
+        """
+        self.flush()
+        cursor = self._connection.execute(
+            "SELECT name, gender, age, post, id FROM employees ORDER BY seq LIMIT ? OFFSET ?",
+            (max(stop - start, 0), start),
+        )
+        return (
+            (name, _GENDER_VALUES[gender], age, _POST_VALUES[post], employee_id)
+            for name, gender, age, post, employee_id in cursor.fetchall()
+        )
+
+    def export_columns(self) -> tuple:
+        """
+        スナップショットに保存する列を作って返すメソッド
+
+        Returns:
+            tuple: (社員ID, 年齢, 役職コード, 性別コード, 名前) の列
+        """
+        self.flush()
+        ids, ages, posts, genders, names = array("Q"), array("H"), array("B"), array("B"), []
+        for employee_id, name, gender, age, post in self._connection.execute(
+            "SELECT id, name, gender, age, post FROM employees ORDER BY seq"
+        ):
+            if not employee_id.isdigit() or str(int(employee_id)) != employee_id:
+                raise ValueError(f"スナップショットには整数の社員IDしか保存できません: {employee_id!r}")
+            ids.append(int(employee_id))
+            ages.append(age)
+            posts.append(post)
+            genders.append(gender)
+            names.append(name)
+        return ids, ages, posts, genders, names
+
+    def add_many(self, records: List[tuple]) -> List[Employee]:
+        """
+        社員をまとめて追加するメソッド（INSERT はためておき、まとめて実行する）
+
+        Args:
+            records (List[tuple]): (名前, 性別, 年齢, 役職, 社員ID) のリスト
+
+        Returns:
+            List[Employee]: 追加した社員
+        """
+        # 読み込み済みの社員を変える前に、社員IDの重複を調べて全員分の行を作る
+        # （重複や不正な値があればここで例外になり、ストレージは変わらない）
+        self._check_new_ids([record[4] for record in records])
+        seqs = list(itertools.islice(self._seq_counter, len(records)))
+        rows = [
+            (seq, employee_id, name, _GENDER_CODES[gender], age, _POST_CODES[post])
+            for seq, (name, gender, age, post, employee_id) in zip(seqs, records)
+        ]
+        added = []
+        for seq, record in zip(seqs, records):
+            employee = Employee(*record)
+            employee._company = self._company
+            employee._seq = seq
+            self._loaded[seq] = employee
+            self._pending_ids[employee.id] = True
+            added.append(employee)
+        self._count += len(added)
+        self._queue(_SQLITE_INSERT, rows)
+        return added
+
+    def remove(self, people: List[Employee]) -> None:
+        """
+        在籍中の社員をまとめて削除するメソッド（DELETE はためておき、まとめて実行する）
+
+        Args:
+            people (List[Employee]): 削除する社員（在籍確認済み、重複なし）
+
+        Returns:
+            None: 戻り値なし
+        """
+        for person in people:
+            del self._loaded[person._seq]
+            self._pending_ids[person.id] = False
+            # 所属会社を外す（以降の昇進・降格は会社に通知されない）
+            person._company = None
+        self._count -= len(people)
+        self._queue(_SQLITE_DELETE, [(person._seq,) for person in people])
+
+    def on_posts_changed(self, employees: List[Employee]) -> None:
+        """
+        社員の役職が変わったときに呼ばれるメソッド（UPDATE はためておき、まとめて実行する）
+
+        Args:
+            employees (List[Employee]): 役職が変わった社員
+
+        Returns:
+            None: 戻り値なし
+        """
+        rows = [(_POST_CODES[employee._post], employee._seq) for employee in employees if self.contains(employee)]
+        self._queue(_SQLITE_UPDATE_POST, rows)
+
+    def flush(self) -> None:
+        """
+        ためている書き込みを1つのトランザクションで実行するメソッド
+
+        会社の採番クラスの次のIDも、同じトランザクションで保存する
+        失敗した場合はロールバックし、ためた書き込みは消さずに例外を送出する
+        （メモリ上の社員とデータベースが食い違ったままにならない）
+
+        Returns:
+            None: 戻り値なし
+
+        Raises:
+            sqlite3.Error: 書き込みに失敗した場合
+        """
+        if not self._pending:
+            return
+        # 会社を作っている途中（採番クラスがまだない）と、次のIDを持たない採番クラスでは保存しない
+        next_id = getattr(getattr(self._company, "_id_allocator", None), "next_id", None)
+        # with 文を抜けるときにコミットされる（途中で失敗したらロールバック）
+        with self._connection:
+            for sql, rows in self._pending:
+                self._connection.executemany(sql, rows)
+            if next_id is not None:
+                self._connection.execute(_SQLITE_SAVE_NEXT_ID, (next_id,))
+        # コミットできてから、ためた書き込みを消す
+        self._pending = []
+        self._pending_count = 0
+        self._pending_since = None
+        self._pending_ids.clear()
+
+    def close(self) -> None:
+        """
+        ためている書き込みを実行してから、データベースを閉じるメソッド
+
+        Returns:
+            None: 戻り値なし
+        """
+        self.flush()
+        self._connection.close()
+
+    def _queue(self, sql: str, rows: list) -> None:
+        """
+        書き込みをためるプライベートメソッド
+
+        同じ SQL が続く場合は1つの executemany() にまとめる
+
+        Args:
+            sql (str): 実行する SQL
+            rows (list): SQL のパラメーターのリスト
+
+        Returns:
+            None: 戻り値なし
+        """
+        if not rows:
+            return
+        if self._pending and self._pending[-1][0] == sql:
+            self._pending[-1][1].extend(rows)
+        else:
+            self._pending.append((sql, rows))
+        self._pending_count += len(rows)
+
+        now = time.monotonic()
+        if self._pending_since is None:
+            self._pending_since = now
+        if self._pending_count >= self._batch_size or now - self._pending_since >= self._flush_interval:
+            self.flush()
+
+    def _check_new_ids(self, ids: List[str]) -> None:
+        """
+        採用する社員のIDが、まだ使われていないかを調べるプライベートメソッド
+
+        データベースの id の UNIQUE インデックスで調べ、まだ実行していない採用・削除も数える
+        （書き込みを実行しないので、ためる動きは変わらない）
+
+        Args:
+            ids (List[str]): 採用する社員のID
+
+        Returns:
+            None: 戻り値なし
+
+        Raises:
+            ValueError: 同じIDが2回あるか、すでに使われているIDがある場合
+        """
+        if len(set(ids)) != len(ids):
+            raise ValueError("採用する社員の社員IDが重複しています。")
+        unknown = []
+        for employee_id in ids:
+            in_use = self._pending_ids.get(employee_id)
+            if in_use:
+                raise ValueError(f"社員ID {employee_id} はすでに使われています。")
+            if in_use is None:
+                unknown.append(employee_id)
+        for start in range(0, len(unknown), _SQLITE_ID_CHECK_CHUNK):
+            chunk = unknown[start:start + _SQLITE_ID_CHECK_CHUNK]
+            row = self._connection.execute(
+                f"SELECT id FROM employees WHERE id IN ({', '.join('?' * len(chunk))}) LIMIT 1", chunk
+            ).fetchone()
+            if row is not None:
+                raise ValueError(f"社員ID {row[0]} はすでに使われています。")
+
+    @staticmethod  # インスタンスを使わないので静的メソッドにする
+    def _age_conditions(post: Optional[Post], min_age: Optional[int], max_age: Optional[int]) -> Tuple[str, list]:
+        """
+        役職・年齢の範囲から WHERE 句を作るプライベートメソッド
+
+        Args:
+            post (Optional[Post]): 役職
+            min_age (Optional[int]): 年齢の下限
+            max_age (Optional[int]): 年齢の上限
+
+        Returns:
+            Tuple[str, list]: (WHERE 句（条件がなければ空文字列）, パラメーター)
+        """
+        clauses, parameters = [], []
+        for clause, value in (("post = ?", None if post is None else _POST_CODES[post]), ("age >= ?", min_age), ("age <= ?", max_age)):
+            if value is not None:
+                clauses.append(clause)
+                parameters.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), parameters
+
+    def _fetch_one(self, sql: str, parameters: tuple) -> Optional[Employee]:
+        """
+        SQL で社員を1人だけ読むプライベートメソッド
+
+        Args:
+            sql (str): 実行する SQL
+            parameters (tuple): SQL のパラメーター
+
+        Returns:
+            Optional[Employee]: 見つかった社員、見つからない場合はNone
+        """
+        self.flush()
+        row = self._connection.execute(sql, parameters).fetchone()
+        return None if row is None else self._employee_from_row(row)
+
+    def _fetch_all(self, sql: str, parameters: tuple) -> List[Employee]:
+        """
+        SQL で社員を全員読むプライベートメソッド
+
+        Args:
+            sql (str): 実行する SQL
+            parameters (tuple): SQL のパラメーター
+
+        Returns:
+            List[Employee]: 見つかった社員（SQL の順）
+        """
+        self.flush()
+        return [self._employee_from_row(row) for row in self._connection.execute(sql, parameters).fetchall()]
+
+    def _employee_from_row(self, row: tuple) -> Employee:
+        """
+        データベースの1行を Employee にするプライベートメソッド
+
+        読み込み済みの社員なら、同じオブジェクトを返す
+
+        Args:
+            row (tuple): (採用順, 社員ID, 名前, 性別コード, 年齢, 役職コード)
+
+        Returns:
+            Employee: 社員
+        """
+        seq, employee_id, name, gender, age, post = row
+        employee = self._loaded.get(seq)
+        if employee is None:
+            employee = Employee(name, _GENDERS[gender], age, _POSTS[post], employee_id)
+            employee._company = self._company
+            employee._seq = seq
+            self._loaded[seq] = employee
+        return employee
+
+
+# ===================================================================
+# クラス：Company（会社）
+# ===================================================================
+
+class Company:
+    """
+    会社を表すクラス
+    
+    社員の管理（追加・削除・検索）を行う
+    社員リストを保持し、次期社長の選出も担当
+
+    Attributes:
+        MAX_NUMBER_OF_PEOPLE (int): 最大社員数（クラス変数）
+        current_number (int): 現在の社員数
+        employees (List[Employee]): 社員リスト
+        id_allocator (IdAllocator): 社員IDの採番クラス（会社ごとに独立）
+        sink (OutputSink): メッセージの出力先
+        storage (str): 社員データの保存形式（"object"、"columnar" または "sqlite"）
+        thread_safe (bool): 複数スレッドから同時に使えるか
+        change_log (Optional[ChangeLog]): 変更を記録している変更履歴
+        _store (_EmployeeStore): 社員データと検索用インデックスを持つストレージ
+        _lock (_ReadWriteLock): 社員データを読み書きするときのロック（スレッドセーフでなければ何もしない）
+    """
+
+    # クラス変数：最大社員数を10名に設定
+    # 全てのCompanyインスタンスで共有される
+    MAX_NUMBER_OF_PEOPLE = 10
+
+    # 一括採用で一部の行が不正だった場合の扱い
+    # ALL_OR_NOTHING: 1行でも問題があれば誰も採用しない
+    # BEST_EFFORT: 問題のない行だけ採用する（上限を超えた分は採用しない）
+    ALL_OR_NOTHING = "all_or_nothing"
+    BEST_EFFORT = "best_effort"
+
+    # 社員データの保存形式
+    # OBJECT_STORAGE: 社員ごとに Employee オブジェクトを持つ（デフォルト）
+    # COLUMNAR_STORAGE: 項目ごとの配列で持つ（大人数でもメモリが少ない）
+    # SQLITE_STORAGE: SQLite のデータベースに持つ（インデックスを使った検索・ファイルへの保存）
+    OBJECT_STORAGE = "object"
+    COLUMNAR_STORAGE = "columnar"
+    SQLITE_STORAGE = "sqlite"
+
+    # SQLite 形式のストレージで、まとめて実行する書き込みの最大件数
+    SQLITE_BATCH_SIZE = 1000
+
+    # 名前での全員検索（find_personnel_by_name）の一致のしかた
+    # EXACT_MATCH: 名前が完全に同じ
+    # NORMALIZED_MATCH: 全角・半角と空白の違いを無視して同じ（"佐藤　太郎" と "佐藤太郎" など）
+    # PREFIX_MATCH: 名前の先頭が同じ（名字だけで探す。全角・半角と空白の違いは無視する）
+    EXACT_MATCH = "exact"
+    NORMALIZED_MATCH = "normalized"
+    PREFIX_MATCH = "prefix"
+
+    # 人事評価の一括反映（apply_reviews）で使う段階数
+    PROMOTE = 1
+    DEMOTE = -1
+
+    # 給与計算の年齢帯の既定の幅（10歳ごと：20〜29歳、30〜39歳、…）
+    PAYROLL_BAND_WIDTH = 10
+
+    # 社員一覧の表の列：列名 → (見出し, 幅, table_rows() のタプルでの位置)
+    EMPLOYEE_COLUMNS = {
+        "name": ("名前", 15, 0),
+        "gender": ("性別", 10, 1),
+        "age": ("年齢", 5, 2),
+        "post": ("役職", 10, 3),
+        "id": ("ID", 10, 4),
+    }
+    # 社員一覧の表を何行ずつまとめて書き出すか
+    DISPLAY_CHUNK_SIZE = 1000
+    # page を指定したときの1ページの行数
+    DISPLAY_PAGE_SIZE = 50
+
+    # 一括採用の入力で使う項目名（辞書・列形式のキー）
+    _EMPLOYEE_FIELDS = ("name", "gender", "age", "post")
+
+    def __init__(
+        self,
+        id_allocator: Optional[IdAllocator] = None,
+        storage: str = OBJECT_STORAGE,
+        sink: Optional[OutputSink] = None,
+        database: str = ":memory:",
+        flush_interval: float = 0.5,
+        thread_safe: bool = False,
+    ):
+        """
+        Companyクラスのコンストラクタ
+        
+        空の社員リストで初期化
+        （SQLite 形式で既存のデータベースを指定した場合は、その社員を引き継ぐ）
+
+        Args:
+            id_allocator (Optional[IdAllocator]): 社員IDの採番クラス
+                （省略時は 1000 から始まる連番。既存のデータベースではその続きから）
+            storage (str): 社員データの保存形式
+                （Company.OBJECT_STORAGE、Company.COLUMNAR_STORAGE または Company.SQLITE_STORAGE）
+            sink (Optional[OutputSink]): メッセージの出力先
+                （省略時はデフォルトの出力先。set_default_sink() で変更できる）
+            database (str): SQLite 形式で使うデータベースのパス（":memory:" ならメモリ上）
+            flush_interval (float): SQLite 形式で、ためた書き込みを実行するまでの最大の秒数
+            thread_safe (bool): 複数スレッドから同時に使えるようにするか
+                （True なら検索・採用・削除などを読み書きロックで守る。上限のチェックと採用も
+                1つのロックの中で行うので、同時に採用しても上限を超えない）
+        """
+        # メッセージの出力先（None の間はデフォルトの出力先を使う）
+        self._sink = sink
+
+        # 社員データを読み書きするときのロック
+        # 検索は同時に行えるが、採用・削除・昇進・降格は1スレッドずつ行う
+        # スレッドセーフでなければ、何もしないロックを使う（ロックの分の時間がかからない）
+        self._lock: Union[_ReadWriteLock, _NullLock] = _ReadWriteLock() if thread_safe else _NULL_LOCK
+        self._thread_safe = thread_safe
+
+        # 社員データを保存するストレージを作成
+        # 社員リストと検索用インデックス（ID・名前・年齢順）はストレージが持ち、
+        # 追加・削除・昇進・降格のたびに一緒に更新する
+        if storage == self.OBJECT_STORAGE:
+            self._store: _EmployeeStore = _ObjectStore(self)
+        elif storage == self.COLUMNAR_STORAGE:
+            self._store = _ColumnarStore(self)
+        elif storage == self.SQLITE_STORAGE:
+            self._store = _SqliteStore(
+                self, database, flush_interval, self.SQLITE_BATCH_SIZE, check_same_thread=not thread_safe,
+            )
+        else:
+            raise ValueError(f"storage が不正です: {storage!r}")
+        self._storage = storage
+
+        # 社員IDの採番クラス（会社ごとに持つので、会社内でIDが重複しない）
+        if id_allocator is None:
+            start = 1000
+            if storage == self.SQLITE_STORAGE:
+                # 既存のデータベースでは、保存済みの社員IDの続きから採番する
+                # （削除した社員のIDも払い出さない）
+                start = max(start, self._store.next_numeric_id())
+            id_allocator = CounterIdAllocator(start)
+        self._id_allocator: IdAllocator = id_allocator
+
+        # 変更履歴（ChangeLog.attach() / replay() で設定される。記録しなければ None）
+        self._change_log: Optional["ChangeLog"] = None
+
+    @property  # プロパティ化
+    def id_allocator(self) -> IdAllocator:
+        """
+        社員IDの採番クラスを取得するプロパティ（getter）
+
+        Returns:
+            IdAllocator: この会社の採番クラス
+        """
+        return self._id_allocator
+
+    @property  # プロパティ化
+    def storage(self) -> str:
+        """
+        社員データの保存形式を取得するプロパティ（getter）
+
+        Returns:
+            str: "object"、"columnar" または "sqlite"
+        """
+        return self._storage
+
+    @property  # プロパティ化
+    def thread_safe(self) -> bool:
+        """
+        複数スレッドから同時に使えるかを取得するプロパティ（getter）
+
+        Returns:
+            bool: スレッドセーフなら True
+        """
+        return self._thread_safe
+
+    @property  # プロパティ化
+    def change_log(self) -> Optional["ChangeLog"]:
+        """
+        変更を記録している変更履歴を取得するプロパティ（getter）
+
+        Returns:
+            Optional[ChangeLog]: 変更履歴（記録していなければ None）
+        """
+        return self._change_log
+
+    @property  # プロパティ化
+    def sink(self) -> OutputSink:
+        """
+        メッセージの出力先を取得するプロパティ（getter）
+
+        会社・社員・社長のメッセージはすべてここに渡される
+
+        Returns:
+            OutputSink: 出力先（指定していなければデフォルトの出力先）
+        """
+        return _default_sink if self._sink is None else self._sink
+
+    @sink.setter  # sinkプロパティのsetter
+    def sink(self, sink: Optional[OutputSink]) -> None:
+        """
+        メッセージの出力先を設定するプロパティ（setter）
+
+        Args:
+            sink (Optional[OutputSink]): 出力先（None ならデフォルトの出力先に戻す）
+
+        Returns:
+            None: 戻り値なし
+        """
+        self._sink = sink
+
+    @property  # プロパティ化
+    def current_number(self) -> int:
+        """
+        現在の社員数を取得するプロパティ（getter）
+        
+        社員リストの長さを返す
+
+        Returns:
+            int: 社員数
+        """
+        # len() 関数でストレージの社員数を取得
+        with self._reading():
+            return len(self._store)
+
+    @property  # プロパティ化
+    def employees(self) -> List[Employee]:
+        """
+        社員リストを取得するプロパティ（getter）
+        
+        全社員のリストを返す
+        列形式のストレージの場合は、呼ぶたびに軽量な Employee のリストを作って返す
+        スレッドセーフな会社では、その時点の社員リストのコピーを返す
+        （他のスレッドが採用・削除しても、受け取ったリストは変わらない）
+
+        Returns:
+            List[Employee]: 社員リスト
+        """
+        with self._reading():
+            employees = self._store.employees()  # ストレージの社員リスト
+            return list(employees) if self._thread_safe else employees
+
+    @property  # プロパティ化
+    def number_of_employee(self) -> int:
+        """
+        社員数を取得するプロパティ（getter）
+        
+        current_number と同じ（互換性のため残されている）
+
+        Returns:
+            int: 社員数
+        """
+        with self._reading():
+            return len(self._store)  # ストレージの社員数を返す
+
+    def get_personnel_by_id(self, id: str) -> Optional[Employee]:
+        """
         IDで社員を検索するメソッド
         
-        社員IDを指定して該当する社員オブジェクトを取得
+        社員IDを指定して該当する社員を検索
+
+        Args:
+            id (str): 社員ID
+
+        Returns:
+            Optional[Employee]: 見つかった社員、見つからない場合はNone
+        """
+        # ストレージのIDインデックスから直接取得（ループしない）
+        # スレッドセーフでない会社では、何もしないロックの with 文の分の時間も省く
+        if not self._thread_safe:
+            return self._store.get_by_id(id)
+        with self._reading():
+            return self._store.get_by_id(id)
+
+    def get_personnel_by_name(self, name: str) -> Optional[Employee]:
+        """
+        名前で社員を検索するメソッド
+        
+        社員名を指定して該当する社員を検索
+
+        Args:
+            name (str): 社員名
+
+        Returns:
+            Optional[Employee]: 見つかった社員、見つからない場合はNone
+        """
+        # ストレージの名前インデックスから取得 O(1)
+        # 同姓同名がいる場合は、従来どおり最初に採用された社員を返す
+        if not self._thread_safe:
+            return self._store.get_by_name(name)
+        with self._reading():
+            return self._store.get_by_name(name)
+
+    def find_personnel_by_name(self, name: str, match: str = EXACT_MATCH) -> List[Employee]:
+        """
+        名前で社員を全員検索するメソッド
+
+        get_personnel_by_name() と違い、同姓同名の社員も全員返す
+        どの一致のしかたでもインデックスを使う（全社員は調べない）
+            - Company.EXACT_MATCH: 名前インデックス O(見つかった人数)
+            - Company.NORMALIZED_MATCH: 表記ゆれをなくした名前のインデックス O(見つかった人数)
+            - Company.PREFIX_MATCH: 表記ゆれをなくした名前の並びを二分探索 O(log n + 見つかった人数)
+
+        Args:
+            name (str): 名前（PREFIX_MATCH の場合は名前の先頭。例：名字の "佐藤"）
+            match (str): 一致のしかた
+
+        Returns:
+            List[Employee]: 見つかった社員（採用順）、いない場合は空のリスト
+
+        Raises:
+            ValueError: match が不正な場合
+        """
+        lookups = {
+            self.EXACT_MATCH: self._store.find_by_name,
+            self.NORMALIZED_MATCH: self._store.find_by_normalized_name,
+            self.PREFIX_MATCH: self._store.find_by_name_prefix,
+        }
+        if match not in lookups:
+            raise ValueError(f"match が不正です: {match!r}")
+        with self._reading():
+            return lookups[match](name)
+
+    def employees_by_age(
+        self, min_age: Optional[int] = None, max_age: Optional[int] = None, post: Optional[Post] = None
+    ) -> List[Employee]:
+        """
+        年齢が範囲内の社員を検索するメソッド
+
+        例：company.employees_by_age(55, 60) で55歳以上60歳以下の社員
+        年齢順インデックスで範囲の先頭を二分探索するので O(log n + k)（k は見つかった人数）
+
+        Args:
+            min_age (Optional[int]): 年齢の下限（この年齢を含む。省略時は下限なし）
+            max_age (Optional[int]): 年齢の上限（この年齢を含む。省略時は上限なし）
+            post (Optional[Post]): 役職（省略時は全社員）
+
+        Returns:
+            List[Employee]: 社員（年齢の高い順、同い年なら採用順）
+        """
+        with self._reading():
+            return self._store.age_range(post, min_age, max_age)
+
+    def count_by_age(
+        self, min_age: Optional[int] = None, max_age: Optional[int] = None, post: Optional[Post] = None
+    ) -> int:
+        """
+        年齢が範囲内の社員数を返すメソッド
+
+        社員を取り出さず、年齢順インデックスの範囲の両端を二分探索するだけなので O(log n)
+
+        Args:
+            min_age (Optional[int]): 年齢の下限（この年齢を含む。省略時は下限なし）
+            max_age (Optional[int]): 年齢の上限（この年齢を含む。省略時は上限なし）
+            post (Optional[Post]): 役職（省略時は全社員）
+
+        Returns:
+            int: 社員数
+        """
+        with self._reading():
+            return self._store.age_count(post, min_age, max_age)
+
+    def oldest_employees(self, count: int, post: Optional[Post] = None) -> List[Employee]:
+        """
+        年齢の高い順に count 人の社員を返すメソッド O(log n + count)
+
+        Args:
+            count (int): 人数
+            post (Optional[Post]): 役職（省略時は全社員）
+
+        Returns:
+            List[Employee]: 社員（年齢の高い順、同い年なら採用順。社員が少なければ全員）
+
+        Raises:
+            ValueError: count が負の場合
+        """
+        if count < 0:
+            raise ValueError(f"count は0以上である必要があります: {count!r}")
+        with self._reading():
+            return self._store.age_range(post, limit=count)
+
+    def age_percentile(self, percent: float, post: Optional[Post] = None) -> Optional[int]:
+        """
+        年齢のパーセンタイルを返すメソッド（percent=50 なら年齢の中央値）
+
+        若い順に並べて、全体の percent % 以上をカバーする最初の社員の年齢を返す（nearest-rank 法）
+        人数が偶数の場合の中央値は、真ん中の2人のうち若いほうの年齢になる
+        年齢順インデックスの位置で読むので O(log n)
+
+        Args:
+            percent (float): パーセント（0〜100。0 なら最年少、100 なら最年長）
+            post (Optional[Post]): 役職（省略時は全社員）
+
+        Returns:
+            Optional[int]: 年齢、社員がいない場合はNone
+
+        Raises:
+            ValueError: percent が0〜100の範囲外の場合
+        """
+        if not 0 <= percent <= 100:
+            raise ValueError(f"percent は0〜100である必要があります: {percent!r}")
+        with self._reading():
+            count = self._store.age_count(post)
+            if count == 0:
+                return None
+            # 若い順で何番目か（1から数える）。インデックスは年齢の高い順なので、末尾から数える
+            rank = max(1, math.ceil(percent * count / 100))
+            return self._store.age_at_rank(post, count - rank)
+
+    def query(self) -> "EmployeeQuery":
+        """
+        社員を条件で検索するクエリを作るメソッド
+
+        例：company.query().where(post=Post.KATYO, age__gte=40).order_by("-age").limit(10)
+        条件に合わせて使うインデックス（社員ID・名前・役職）を選び、全員を調べるのは最後の手段
+        どのインデックスを使うかは explain() で確認できる
+
+        Returns:
+            EmployeeQuery: 条件のないクエリ（全社員・採用順）
+        """
+        return EmployeeQuery(self)
+
+    def add_employee(self, name: str, gender: Gender, age: int, post: Post) -> None:
+        """
+        社員を追加するメソッド
+        
+        新しい社員を作成して社員リストに追加
+        最大社員数を超える場合は追加しない
+
+        Args:
+            name (str): 名前
+            gender (Gender): 性別
+            age (int): 年齢
+            post (Post): 役職
+
+        Returns:
+            None: 戻り値なし
+
+        Raises:
+            ValueError: 名前・性別・年齢・役職が不正な場合、
+                SQLite 形式で払い出したIDがすでに使われている場合（社員リストは変わらない）
+        """
+        # ストレージを変える前に、一括採用と同じ検証をする
+        reason = self._validate_row((name, gender, age, post))
+        if reason is not None:
+            raise ValueError(reason)
+
+        # 上限のチェックから追加までを1つの書き込み用のロックの中で行う
+        # （スレッドセーフな会社で、同時に採用しても上限を超えない）
+        with self._lock.write():
+            # 現在の社員数が最大数以上かチェック
+            if len(self._store) >= self.MAX_NUMBER_OF_PEOPLE:
+                new_employee = None
+            else:
+                # ストレージに新しい社員を追加（検索用インデックスも一緒に更新される）
+                # 名前・性別・年齢・役職と、会社の採番クラスが払い出したIDを渡す
+                new_employee = self._store.add_many(
+                    [(name, gender, age, post, str(self._id_allocator.allocate()))]
+                )[0]
+                # 変更履歴を記録していれば、採用イベントをためる
+                if self._change_log is not None:
+                    self._change_log._record(_EVENT_HIRE, [new_employee])
+
+        # メッセージはロックの外で表示する（出力先が遅くても他のスレッドを待たせない）
+        # 静かなモードでは、メッセージの値を集めることもしない
+        sink = self.sink
+        if not sink.enabled:
+            return
+
+        if new_employee is None:
+            # 上限に達している場合はエラーメッセージを表示
+            _emit(
+                sink, "capacity_reached", "社員数が上限（{limit}名）に達しています。",
+                limit=self.MAX_NUMBER_OF_PEOPLE,
+            )
+            return  # メソッドを終了（追加しない）
+
+        # 採用メッセージを表示
+        _emit(sink, "hired", "{name}さん（ID: {id}）を採用しました。", name=name, id=new_employee.id)
+
+    def add_employees(self, rows: Any, mode: str = ALL_OR_NOTHING) -> HiringSummary:
+        """
+        社員をまとめて追加するメソッド（一括採用）
+
+        大量の採用データを取り込むためのメソッド
+        上限チェックは1回だけ、IDは採番クラスからまとめて払い出し、
+        1人ずつメッセージを表示する代わりに結果オブジェクトを返す
+
+        受け付ける rows の形式:
+            - タプルの並び: [(名前, 性別, 年齢, 役職), ...]
+            - 辞書の並び: [{"name": ..., "gender": ..., "age": ..., "post": ...}, ...]
+            - 列形式の辞書: {"name": [...], "gender": [...], "age": [...], "post": [...]}
+
+        Args:
+            rows (Any): 採用する社員データ
+            mode (str): 不正な行があった場合の扱い
+                （Company.ALL_OR_NOTHING または Company.BEST_EFFORT）
+
+        Returns:
+            HiringSummary: 採用結果（採用した社員と採用しなかった行）
+        """
+        if mode not in (self.ALL_OR_NOTHING, self.BEST_EFFORT):
+            raise ValueError(f"mode が不正です: {mode!r}")
+
+        # まず全行を検証し、採用できる行と問題のある行に分ける
+        valid: List[Tuple[int, tuple]] = []
+        rejected: List[Tuple[int, str]] = []
+        for index, row in enumerate(self._iter_rows(rows)):
+            reason = self._validate_row(row)
+            if reason is None:
+                valid.append((index, row))
+            else:
+                rejected.append((index, reason))
+
+        # 上限チェックは1回だけ、追加と同じ書き込み用のロックの中で行う
+        with self._lock.write():
+            available = max(self.MAX_NUMBER_OF_PEOPLE - len(self._store), 0)
+            if len(valid) > available:
+                # 上限を超える分は採用しない（入力順で後ろの行から）
+                over_reason = f"社員数が上限（{self.MAX_NUMBER_OF_PEOPLE}名）に達しています。"
+                rejected.extend((index, over_reason) for index, _ in valid[available:])
+                valid = valid[:available]
+
+            aborted = bool(rejected) and mode == self.ALL_OR_NOTHING
+            if not aborted:
+                # IDをまとめて払い出し、社員リストとインデックスを1回のループで更新
+                ids = self._id_allocator.allocate_block(len(valid))
+                hired = self._store.add_many([
+                    (name, gender, age, post, str(new_id))
+                    for (_, (name, gender, age, post)), new_id in zip(valid, ids)
+                ])
+                if self._change_log is not None:
+                    self._change_log._record(_EVENT_HIRE, hired)
+
+        if aborted:
+            # 1行でも問題があれば誰も採用しない
+            # 採用予定だった行も「採用しなかった行」として返す
+            # （メッセージでは、問題のある行と取り消した行を分けて数える）
+            invalid_count = len(rejected)
+            rejected.extend((index, "他の行に問題があったため採用しませんでした。") for index, _ in valid)
+            rejected.sort()
+            _emit(
+                self.sink, "bulk_hiring_aborted",
+                "一括採用を中止しました（問題のある行: {invalid}件、取り消した行: {rolled_back}件）。",
+                invalid=invalid_count, rolled_back=len(valid),
+            )
+            return HiringSummary([], rejected)
+
+        rejected.sort()
+
+        # 1人ずつではなく、まとめて1行だけ表示
+        _emit(
+            self.sink, "bulk_hired", "{hired}名を採用しました（採用しなかった行: {rejected}件）。",
+            hired=len(hired), rejected=len(rejected),
+        )
+        return HiringSummary(hired, rejected)
+
+    def _iter_rows(self, rows: Any) -> Iterable[tuple]:
+        """
+        一括採用の入力を (名前, 性別, 年齢, 役職) のタプルに揃えるプライベートメソッド
+
+        Args:
+            rows (Any): タプルの並び、辞書の並び、または列形式の辞書
+
+        Returns:
+            Iterable[tuple]: 1行ずつのタプル（項目が足りない行は要素数が4未満になる）
+        """
+        # 列形式の辞書：{"name": [...], ...} を行ごとに組み直す
+        if isinstance(rows, Mapping):
+            columns = [rows[field] for field in self._EMPLOYEE_FIELDS]
+            lengths = {len(column) for column in columns}
+            if len(lengths) > 1:
+                raise ValueError(f"列の長さが揃っていません: {sorted(lengths)}")
+            return zip(*columns)
+
+        # 行の並び：辞書の行はタプルに変換し、それ以外はそのまま使う
+        return (
+            tuple(row[field] for field in self._EMPLOYEE_FIELDS if field in row)
+            if isinstance(row, Mapping) else tuple(row)
+            for row in rows
+        )
+
+    @staticmethod  # インスタンスを使わないので静的メソッドにする
+    def _validate_row(row: tuple) -> Optional[str]:
+        """
+        一括採用の1行を検証するプライベートメソッド
+
+        Args:
+            row (tuple): (名前, 性別, 年齢, 役職) のタプル
+
+        Returns:
+            Optional[str]: 問題があればその理由、なければNone
+        """
+        if len(row) != 4:
+            return "項目は (名前, 性別, 年齢, 役職) の4つが必要です。"
+        name, gender, age, post = row
+        if not isinstance(name, str):
+            return f"名前が文字列ではありません: {name!r}"
+        if not isinstance(gender, Gender):
+            return f"性別が不正です: {gender!r}"
+        # bool は int のサブクラスなので明示的に除外する
+        if not isinstance(age, int) or isinstance(age, bool) or not 0 <= age <= _MAX_AGE:
+            return f"年齢が不正です: {age!r}"
+        if not isinstance(post, Post):
+            return f"役職が不正です: {post!r}"
+        return None
+
+    def delete_employee(self, person: Employee) -> None:
+        """
+        社員を削除するメソッド
+        
+        指定された社員を社員リストから削除
+
+        Args:
+            person (Employee): 削除する社員オブジェクト
+
+        Returns:
+            None: 戻り値なし
+        """
+        # 在籍の確認から削除までを1つの書き込み用のロックの中で行う
+        with self._lock.write():
+            # 社員が会社に存在するかチェック
+            # リストを先頭から探す（in演算子）代わりに、所属会社と採用順で確認する
+            found = self._store.contains(person)
+            if found:
+                # 存在する場合はストレージから削除（検索用インデックスも一緒に更新される）
+                self._store.remove([person])
+                if self._change_log is not None:
+                    self._change_log._record(_EVENT_DELETE, [person])
+
+        # 静かなモードでは、メッセージの値を集めることもしない
+        sink = self.sink
+        if not sink.enabled:
+            return
+
+        if found:
+            # 削除メッセージを表示
+            _emit(sink, "deleted", "{name}さんを削除しました。", name=person.name)
+        else:
+            # 存在しない場合はエラーメッセージを表示
+            _emit(sink, "not_found", "{name}さんは社員リストに存在しません。", name=person.name)
+
+    def delete_employees(self, people: Iterable[Employee]) -> DeletionSummary:
+        """
+        社員をまとめて削除するメソッド（一括削除）
+
+        在籍確認はIDインデックスで1人 O(1)、社員リストの詰め直しは1回だけ行う
+        そのため k 人の削除にかかる時間は O(k + n)（1人ずつ削除すると O(k·n)）
+        1人ずつメッセージを表示する代わりに結果オブジェクトを返す
+
+        Args:
+            people (Iterable[Employee]): 削除する社員
+
+        Returns:
+            DeletionSummary: 削除結果（削除した社員と存在しなかった社員）
+        """
+        deleted: List[Employee] = []
+        not_found: List[Employee] = []
+        # 削除する社員の採用順の集合（同じ社員の重複指定を見分けるのにも使う）
+        doomed = set()
+        # ロックを取る前に並びを読み切る（ジェネレーターが会社を検索しても止まらないように）
+        people = list(people)
+
+        with self._lock.write():
+            for person in people:
+                if self._store.contains(person) and person._seq not in doomed:
+                    doomed.add(person._seq)
+                    deleted.append(person)
+                else:
+                    not_found.append(person)
+
+            if deleted:
+                # ストレージを1回で詰め直し、検索用インデックスも更新する
+                self._store.remove(deleted)
+                if self._change_log is not None:
+                    self._change_log._record(_EVENT_DELETE, deleted)
+
+        # 1人ずつではなく、まとめて1行だけ表示
+        _emit(
+            self.sink, "bulk_deleted", "{deleted}名を削除しました（社員リストに存在しなかった社員: {not_found}名）。",
+            deleted=len(deleted), not_found=len(not_found),
+        )
+        return DeletionSummary(deleted, not_found)
+
+    def _reading(self) -> _LockGuard:
+        """
+        検索に使うロックを返すプライベートメソッド
+
+        検索が内部の状態を書き換えるストレージ（SQLite 形式・スナップショットの読み込み直後）では、
+        読み込み用ではなく書き込み用のロックを返す
+
+        Returns:
+            _LockGuard: ロック（with 文で使う）
+        """
+        return self._lock.read() if self._store.CONCURRENT_READS else self._lock.write()
+
+    def _on_post_changed(self, employee: Employee) -> None:
+        """
+        社員の役職が変わったときに呼ばれるプライベートメソッド
+
+        Employee.promote() / demote() から呼ばれ、
+        役職別のインデックスの更新をストレージに依頼する
+        （書き込み用のロックは呼び出し側が取っている）
+        変更履歴を記録していれば、役職イベントもためる
+
+        Args:
+            employee (Employee): 役職が変わった社員
+
+        Returns:
+            None: 戻り値なし
+        """
+        self._store.on_posts_changed([employee])
+        if self._change_log is not None:
+            self._change_log._record(_EVENT_POST, [employee])
+
+    def _record_resignation(self, successor: Employee) -> None:
+        """
+        社長の辞任を変更履歴に記録するプライベートメソッド
+
+        President.resignation() から、次期社長を社員リストから削除する前に呼ばれる
+        （変更履歴を記録していなければ何もしない）
+
+        Args:
+            successor (Employee): 次期社長になる社員
+
+        Returns:
+            None: 戻り値なし
+        """
+        with self._lock.write():
+            if self._change_log is not None:
+                self._change_log._record(_EVENT_RESIGN, [successor])
+
+    def apply_reviews(self, changes: Iterable[Tuple[Employee, int]]) -> ReviewSummary:
+        """
+        人事評価の結果（昇進・降格）をまとめて反映するメソッド
+
+        changes の各要素は (社員, 段階数) のタプル
+        段階数は Company.PROMOTE（1つ昇進）、Company.DEMOTE（1つ降格）、
+        または任意の0以外の整数（2 なら2つ昇進）
+        最高役職・最低役職を超える分は切り捨てる
+
+        同じ社員が何回出てきても順に適用し、役職の書き込みと
+        年齢順インデックスの更新は最後に1人1回だけ行う
+        1人ずつメッセージを表示する代わりに結果オブジェクトを返す
+
+        Args:
+            changes (Iterable[Tuple[Employee, int]]): (社員, 段階数) の並び
+
+        Returns:
+            ReviewSummary: 反映結果（役職が変わった社員と反映しなかった変更）
+        """
+        top_rank = len(_POSTS) - 1
+        # 採用順 → [社員, 変更前の役職, 変更後の順位]
+        pending: Dict[int, list] = {}
+        skipped: List[Tuple[int, str]] = []
+        # 役職が変わった社員と、給与の増減
+        changed: List[Tuple[Employee, Post, Post]] = []
+        salary_delta = 0
+        # ロックを取る前に並びを読み切る（ジェネレーターが会社を検索しても止まらないように）
+        changes = list(changes)
+
+        # 在籍の確認から役職の書き込みまでを1つの書き込み用のロックの中で行う
+        with self._lock.write():
+            for index, change in enumerate(changes):
+                try:
+                    person, steps = change
+                except (TypeError, ValueError):
+                    skipped.append((index, "項目は (社員, 段階数) の2つが必要です。"))
+                    continue
+                # bool は int のサブクラスなので明示的に除外する
+                if not isinstance(steps, int) or isinstance(steps, bool) or steps == 0:
+                    skipped.append((index, f"段階数が不正です: {steps!r}"))
+                    continue
+                if not isinstance(person, Employee) or not self._store.contains(person):
+                    skipped.append((index, f"{getattr(person, 'name', person)}さんは社員リストに存在しません。"))
+                    continue
+
+                entry = pending.get(person._seq)
+                if entry is None:
+                    entry = pending[person._seq] = [person, person.post, person.post.rank]
+                rank = entry[2]
+                target = min(max(rank + steps, 0), top_rank)
+                if target == rank:
+                    skipped.append((index, "すでに最高役職です。" if steps > 0 else "すでに最低役職です。"))
+                    continue
+                entry[2] = target
+
+            # 役職を書き込み、給与の増減を計算する（給与表は反映した時点のもの）
+            for person, old_post, rank in pending.values():
+                new_post = _POSTS[rank]
+                if new_post is old_post:
+                    # 昇進と降格が打ち消し合った場合は変更なし
+                    continue
+                person._post = new_post
+                changed.append((person, old_post, new_post))
+                salary_delta += Employee._salary_map[new_post] - Employee._salary_map[old_post]
+
+            # 役職別のインデックスをまとめて更新する
+            self._store.on_posts_changed([person for person, _, _ in changed])
+            if self._change_log is not None:
+                self._change_log._record(_EVENT_POST, [person for person, _, _ in changed])
+
+        # 1人ずつではなく、まとめて1行だけ表示
+        _emit(
+            self.sink, "reviews_applied", "{changed}名の役職を変更しました（反映しなかった変更: {skipped}件）。",
+            changed=len(changed), skipped=len(skipped),
+        )
+        return ReviewSummary(changed, skipped, salary_delta)
+
+    def flush(self) -> None:
+        """
+        ストレージにためている書き込みを実行するメソッド
+
+        SQLite 形式のストレージでは、ためている書き込みを1つのトランザクションで実行する
+        （他の形式では何もしない）
+        変更履歴を記録していれば、ためているイベントも書き込む
+
+        Returns:
+            None: 戻り値なし
+        """
+        with self._lock.write():
+            self._store.flush()
+            if self._change_log is not None:
+                self._change_log._commit()
+
+    def close(self) -> None:
+        """
+        ストレージを閉じるメソッド
+
+        SQLite 形式のストレージでは、ためている書き込みを実行してからデータベースを閉じる
+        （他の形式では何もしない）
+        変更履歴を記録していれば、ためているイベントを書き込んで記録をやめる
+
+        Returns:
+            None: 戻り値なし
+        """
+        with self._lock.write():
+            self._store.close()
+            if self._change_log is not None:
+                self._change_log._close()
+
+    def save(self, path: str) -> None:
+        """
+        会社をバイナリ形式のスナップショットとしてファイルに保存するメソッド
+
+        保存するのは社員（名前・性別・年齢・役職・社員ID）と、
+        次に払い出す社員ID・最大社員数
+        社員IDは整数として読める必要がある（採番クラスが払い出すIDは常に整数）
+
+        Args:
+            path (str): 保存先のパス
+
+        Returns:
+            None: 戻り値なし
+        """
+        # 書き出し終わるまで採用・削除を待たせる（列形式では内部の配列をそのまま書き出すため）
+        with self._reading():
+            columns = self._store.export_columns()
+            ids = columns[0]
+            # 削除された社員のIDを読み込んだ後に払い出し直さないように、採番クラスの次のIDも使う
+            # （次のIDを持たない採番クラスでは、保存する社員IDの最大値の次）
+            next_id = max(
+                getattr(self._id_allocator, "next_id", 0),
+                max(ids) + 1 if len(ids) else 0,
+            )
+            _write_snapshot(path, columns, next_id, self.MAX_NUMBER_OF_PEOPLE)
+
+    @classmethod  # クラスメソッド（インスタンスではなくクラスから呼ぶ）
+    def load(
+        cls,
+        path: str,
+        id_allocator: Optional[IdAllocator] = None,
+        storage: str = COLUMNAR_STORAGE,
+        sink: Optional[OutputSink] = None,
+        thread_safe: bool = False,
+    ) -> "Company":
+        """
+        save() で保存したスナップショットから会社を読み込むメソッド
+
+        storage が列形式（デフォルト）の場合はファイルを mmap するだけなので、
+        社員数によらずすぐに使える（社員は読んだときに作られる）
+        オブジェクト形式の場合は、全社員の Employee を作る
+
+        Args:
+            path (str): スナップショットのパス
+            id_allocator (Optional[IdAllocator]): 社員IDの採番クラス
+                （省略時は保存した会社のIDと重ならない連番）
+            storage (str): 社員データの保存形式
+            sink (Optional[OutputSink]): メッセージの出力先
+            thread_safe (bool): 複数スレッドから同時に使えるようにするか
+
+        Returns:
+            Company: 読み込んだ会社
+
+        Raises:
+            ValueError: スナップショットの形式ではないファイルの場合
+        """
+        mapped = _MappedColumnarStore(None, path)
+        if id_allocator is None:
+            id_allocator = CounterIdAllocator(max(mapped.next_id, 1000))
+        company = cls(id_allocator, storage, sink, thread_safe=thread_safe)
+        if mapped.capacity != cls.MAX_NUMBER_OF_PEOPLE:
+            company.MAX_NUMBER_OF_PEOPLE = mapped.capacity
+
+        if storage == cls.COLUMNAR_STORAGE:
+            mapped._company = company
+            company._store = mapped
+        else:
+            # オブジェクト形式では、全社員をまとめて追加する
+            company._store.add_many([
+                (name, _GENDERS[gender], age, _POSTS[post], str(employee_id))
+                for employee_id, age, post, gender, name in zip(*mapped.export_columns())
+            ])
+        return company
+
+    def payroll(self, band_width: int = PAYROLL_BAND_WIDTH) -> "PayrollReport":
+        """
+        会社全体の給与を集計するメソッド
+
+        compute_payroll(self, band_width) と同じ
+
+        Args:
+            band_width (int): 年齢帯の幅（歳）
+
+        Returns:
+            PayrollReport: 給与の合計と、役職・性別・年齢帯ごとの内訳
+        """
+        return compute_payroll(self, band_width)
+
+    def select_president(self) -> Optional[Employee]:
+        """
+        次期社長を選出するメソッド（追加課題）
+        
+        次期社長選出基準:
+        1. 役員がいる場合：役員の中で最年長の人
+        2. 役員がいない場合：全社員の中で最年長の人
+        同い年の場合は先に採用された社員を選ぶ
+
+        社員リストを毎回ループせず、採用・削除・昇進・降格のたびに更新している
+        年齢順インデックスの先頭を見るだけなので O(log n)
+
+        Returns:
+            Optional[Employee]: 次期社長候補、社員がいない場合はNone
+        """
+        with self._reading():
+            # 社員が0人の場合はNoneを返す
+            if len(self._store) == 0:
+                return None
+
+            # 役員の最年長を取り出す
+            oldest_executive = self._store.oldest(Post.YARUIN)
+
+            # 役員がいるかチェック
+            if oldest_executive is not None:
+                return oldest_executive
+            else:
+                # 役員がいない場合は全社員から最年長を選出
+                return self._store.oldest()
+
+    def display_all_employees(
+        self,
+        page: Optional[int] = None,
+        page_size: int = DISPLAY_PAGE_SIZE,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+        stream: Optional[Any] = None,
+    ) -> None:
+        """
+        全社員の情報を表示するメソッド
+        
+        社員一覧を表形式で見やすく表示
+        表は iter_employee_table() で何行かずつまとめて作る
+        stream を省略した場合はメッセージの出力先（sink）に、
+        指定した場合はそのストリームに書き出す
+        引数をすべて省略した場合の表示は、1行ずつ print() していたころと同じ
+
+        Args:
+            page (Optional[int]): 表示するページ（1始まり。指定すると offset と limit より優先）
+            page_size (int): 1ページの行数
+            offset (int): 最初に表示する行（0始まり）
+            limit (Optional[int]): 表示する最大の行数（省略時は最後まで）
+            columns (Optional[Sequence[str]]): 表示する列（Company.EMPLOYEE_COLUMNS のキー。省略時は全列）
+            stream (Optional[Any]): 書き出し先（write() を持つもの）
+
+        Returns:
+            None: 戻り値なし
+        """
+        if page is not None:
+            # ページ番号を offset と limit に変換
+            if page < 1 or page_size < 1:
+                raise ValueError(f"page と page_size は1以上である必要があります: {page!r}, {page_size!r}")
+            offset, limit = (page - 1) * page_size, page_size
+
+        # 引数の確認はここで行い、表の文字列は書き出すときに少しずつ作る
+        chunks = self.iter_employee_table(offset, limit, columns)
+
+        if stream is not None:
+            self._write_chunks(stream, chunks)
+            return
+
+        # 出力先が無効（静かなモード）なら、表を作ることもしない
+        sink = self.sink
+        if not sink.enabled:
+            return
+
+        # 社員が0人の場合
+        if self.current_number == 0:
+            _emit(sink, "no_employees", "社員がいません。")
+            return  # メソッドを終了
+
+        # 表をまとめて出力先に渡す
+        # 出力先は1件ごとに改行をつけるので、かたまりの最後の改行は取り除いて渡す
+        for chunk in chunks:
+            _emit(sink, "table", "{text}", text=chunk[:-1])
+
+    def write_employee_table(
+        self,
+        stream: Any,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+        chunk_size: int = DISPLAY_CHUNK_SIZE,
+    ) -> None:
+        """
+        社員一覧の表をストリームに書き出すメソッド
+
+        chunk_size 行ごとに1回だけ write() を呼ぶ
+
+        Args:
+            stream (Any): 書き出し先（write() を持つもの。ファイル、io.StringIO など）
+            offset (int): 最初に表示する行（0始まり）
+            limit (Optional[int]): 表示する最大の行数（省略時は最後まで）
+            columns (Optional[Sequence[str]]): 表示する列（省略時は全列）
+            chunk_size (int): まとめて書き出す行数
+
+        Returns:
+            None: 戻り値なし
+        """
+        self._write_chunks(stream, self.iter_employee_table(offset, limit, columns, chunk_size))
+
+    def _write_chunks(self, stream: Any, chunks: Iterator[str]) -> None:
+        """
+        表の文字列のかたまりを、1つにつき1回の write() で書き出すプライベートメソッド
+
+        Args:
+            stream (Any): 書き出し先
+            chunks (Iterator[str]): iter_employee_table() が返すかたまり
+
+        Returns:
+            None: 戻り値なし
+        """
+        # 社員が0人の場合
+        if self.current_number == 0:
+            stream.write("社員がいません。\n")
+            return
+
+        for chunk in chunks:
+            stream.write(chunk)
+
+    def iter_employee_table(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+        chunk_size: int = DISPLAY_CHUNK_SIZE,
+    ) -> Iterator[str]:
+        """
+        社員一覧の表を、何行かずつまとめた文字列として順に返すメソッド
+
+        最初にヘッダー、次に chunk_size 行ずつの社員の行、最後にフッターを返す
+        どのかたまりも改行で終わるので、順につなげると表全体になる
+        行の書式（列の幅）は最初に1回だけ組み立てておき、全員分の行を一度に作らない
+
+        Args:
+            offset (int): 最初に表示する行（0始まり）
+            limit (Optional[int]): 表示する最大の行数（省略時は最後まで）
+            columns (Optional[Sequence[str]]): 表示する列（省略時は全列）
+            chunk_size (int): 1つのかたまりの最大の行数
+
+        Returns:
+            Iterator[str]: 表の文字列のかたまり（ジェネレーター）
+        """
+        # 引数はすぐに確認し、表の文字列はジェネレーターで少しずつ作る
+        # （ジェネレーター関数にすると、最初の next() まで確認が遅れてしまう）
+        if offset < 0 or (limit is not None and limit < 0) or chunk_size < 1:
+            raise ValueError(f"offset・limit・chunk_size が不正です: {offset!r}, {limit!r}, {chunk_size!r}")
+        if columns is None:
+            columns = list(self.EMPLOYEE_COLUMNS)
+        unknown = [column for column in columns if column not in self.EMPLOYEE_COLUMNS]
+        if not columns or unknown:
+            raise ValueError(f"columns が不正です: {list(columns)!r}")
+
+        # 列の幅から、見出しと行の書式を1回だけ組み立てる
+        # 例：全列なら "{0:<15} {1:<10} {2:<5} {3:<10} {4:<10}"
+        specs = [self.EMPLOYEE_COLUMNS[column] for column in columns]
+        row_format = " ".join(f"{{{index}:<{width}}}" for _, width, index in specs).format
+        heading = " ".join(f"{title:<{width}}" for title, width, _ in specs)
+        return self._generate_table(offset, limit, heading, row_format, chunk_size)
+
+    def _generate_table(self, offset: int, limit: Optional[int], heading: str, row_format: Any, chunk_size: int) -> Iterator[str]:
+        """
+        社員一覧の表の文字列のかたまりを順に作るジェネレーター（プライベートメソッド）
+
+        Args:
+            offset (int): 最初に表示する行
+            limit (Optional[int]): 表示する最大の行数
+            heading (str): 見出しの行
+            row_format: 1行分のタプルを文字列にする関数（str.format）
+            chunk_size (int): 1つのかたまりの最大の行数
+
+        Returns:
+            Iterator[str]: 表の文字列のかたまり
+        """
+        # 社員数と表示する行は、読み込み用のロックの中でまとめて取り出す
+        # （table_rows() は範囲を切り出したコピーを返すので、表を作る間はロックを持たない）
+        with self._reading():
+            total = len(self._store)
+            start = min(offset, total)
+            stop = total if limit is None else min(start + limit, total)
+            rows = self._store.table_rows(start, stop)
+
+        # ヘッダー部分
+        # "=" * 60 で "=" を60個繰り返した文字列を作成（区切り線）
+        # ^54 は「54文字幅で中央揃え」という意味
+        yield f"\n{'='*60}\n{'社員一覧':^54}\n{'='*60}\n{heading}\n{'-'*60}\n"
+
+        # 社員の行を chunk_size 行ずつまとめて返す
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            # starmap() で各行のタプルを書式に当てはめる（行の値は位置で参照する）
+            yield "\n".join(itertools.starmap(row_format, chunk)) + "\n"
+
+        # フッター部分（一部だけ表示した場合は、表示した範囲も添える）
+        if start == 0 and stop == total:
+            shown = ""
+        elif start < stop:
+            shown = f"（{start + 1}〜{stop}件目を表示）"
+        else:
+            shown = "（この範囲に社員はいません）"
+        yield f"{'='*60}\n合計: {total}名{shown}\n\n"
+
+
+# ===================================================================
+# クラス：ChangeLog（変更履歴・イベントログ）
+# ===================================================================
+
+# 変更履歴は1つのディレクトリに次のファイルを置く（数字はイベント番号。20桁の0埋め）
+#   events-<番号>.log   : その番号から始まるイベントを追記していくファイル（セグメント）
+#   snapshot-<番号>.snap : その番号の手前までのイベントを反映した会社のスナップショット
+# スナップショットを取るたびに新しいセグメントを始める。古いスナップショットは消すが、
+# セグメントは消さない（監査のために、最初からの全イベントを読める）
+_EVENT_SEGMENT_FORMAT = "events-{:020d}.log"
+_EVENT_SNAPSHOT_FORMAT = "snapshot-{:020d}.snap"
+
+# セグメントのファイル形式（数値はすべてリトルエンディアン）
+#   ヘッダー（24バイト）: 識別子(8) / 版(2) / フラグ(2) / 予約(4) / 最初のイベント番号(8)
+#   イベント（繰り返し）: CRC32(4) / 内容の長さ(4) / 種類(1) / 内容
+#       CRC32 は「内容の長さ・種類・内容」から計算する。書き込みの途中で止まった末尾は
+#       長さが足りないか CRC32 が合わないので、読み込み時にそこで打ち切る
+_EVENT_SEGMENT_MAGIC = b"CMEVLOG\x00"
+_EVENT_SEGMENT_VERSION = 1
+_EVENT_SEGMENT_HEADER = struct.Struct("<8sHHIQ")
+_EVENT_CRC = struct.Struct("<I")
+_EVENT_RECORD = struct.Struct("<IB")
+
+# イベントの種類と内容
+#   採用 : 社員ID(8) / 年齢(2) / 役職コード(1) / 性別コード(1) / 名前（UTF-8）
+#   削除 : 社員ID(8)
+#   役職 : 社員ID(8) / 変更後の役職コード(1)（何段階動いても変更後の役職だけを記録する）
+#   辞任 : 次期社長になった社員ID(8)（記録のためだけのイベント。社員リストからの削除は
+#          続く削除イベントで反映するので、再生では何もしない）
+_EVENT_HIRE = 1
+_EVENT_DELETE = 2
+_EVENT_POST = 3
+_EVENT_RESIGN = 4
+_EVENT_HIRE_FIELDS = struct.Struct("<QHBB")
+_EVENT_ID_FIELD = struct.Struct("<Q")
+_EVENT_POST_FIELDS = struct.Struct("<QB")
+
+
+def _scan_event_segment(path: str) -> Tuple[int, List[Tuple[int, memoryview]], int]:
+    """
+    セグメントを読み、壊れていないイベントを取り出すプライベート関数
+
+    Args:
+        path (str): セグメントのパス
+
+    Returns:
+        Tuple[int, List[Tuple[int, memoryview]], int]:
+            (最初のイベント番号, (種類, 内容) のリスト, 壊れていない部分のバイト数)
+
+    Raises:
+        ValueError: セグメントの形式ではないファイルの場合
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < _EVENT_SEGMENT_HEADER.size:
+        raise ValueError(f"変更履歴の形式ではありません: {path}")
+    magic, version, _, _, start = _EVENT_SEGMENT_HEADER.unpack_from(data)
+    if magic != _EVENT_SEGMENT_MAGIC or version != _EVENT_SEGMENT_VERSION:
+        raise ValueError(f"変更履歴の形式ではありません: {path}")
+
+    view = memoryview(data)
+    records = []
+    position = _EVENT_SEGMENT_HEADER.size
+    size = len(data)
+    # ループ内で何度も使うので、ローカル変数に入れておく
+    crc32 = zlib.crc32
+    unpack_crc = _EVENT_CRC.unpack_from
+    unpack_record = _EVENT_RECORD.unpack_from
+    while position + 9 <= size:
+        length, kind = unpack_record(data, position + 4)
+        end = position + 9 + length
+        # 書き込みの途中で止まった末尾（長さが足りない・CRC32 が合わない）はここで打ち切る
+        if end > size or crc32(view[position + 4:end]) != unpack_crc(data, position)[0]:
+            break
+        records.append((kind, view[position + 9:end]))
+        position = end
+    return start, records, position
+
+
+class ChangeEvent:
+    """
+    変更履歴の1件のイベントを表すクラス（ChangeLog.events() が返す）
+
+    Attributes:
+        lsn (int): イベント番号（0 から始まる通し番号）
+        kind (str): 種類（"hire", "delete", "post", "resign"）
+        employee_id (str): 社員ID
+        fields (Dict[str, Any]): 種類ごとの値
+            （採用なら name・gender・age・post、役職なら post。削除・辞任では空）
+    """
+
+    __slots__ = ("_lsn", "_kind", "_employee_id", "_fields")
+
+    def __init__(self, lsn: int, kind: str, employee_id: str, fields: Dict[str, Any]):
+        """
+        ChangeEventクラスのコンストラクタ
+
+        Args:
+            lsn (int): イベント番号
+            kind (str): 種類
+            employee_id (str): 社員ID
+            fields (Dict[str, Any]): 種類ごとの値
+        """
+        self._lsn = lsn
+        self._kind = kind
+        self._employee_id = employee_id
+        self._fields = fields
+
+    @property  # プロパティ化
+    def lsn(self) -> int:
+        """
+        イベント番号を取得するプロパティ（getter）
+
+        Returns:
+            int: イベント番号
+        """
+        return self._lsn
+
+    @property  # プロパティ化
+    def kind(self) -> str:
+        """
+        イベントの種類を取得するプロパティ（getter）
+
+        Returns:
+            str: 種類（"hire", "delete", "post", "resign"）
+        """
+        return self._kind
+
+    @property  # プロパティ化
+    def employee_id(self) -> str:
+        """
+        社員IDを取得するプロパティ（getter）
+
+        Returns:
+            str: 社員ID
+        """
+        return self._employee_id
+
+    @property  # プロパティ化
+    def fields(self) -> Dict[str, Any]:
+        """
+        種類ごとの値を取得するプロパティ（getter）
+
+        Returns:
+            Dict[str, Any]: 項目名 → 値
+        """
+        return self._fields
+
+    def __repr__(self) -> str:
+        """
+        デバッグ用の文字列表現を返すメソッド
+
+        Returns:
+            str: イベント番号・種類・社員ID・値を含む文字列
+        """
+        return f"ChangeEvent({self._lsn}, {self._kind!r}, {self._employee_id!r}, {self._fields!r})"
+
+
+class ChangeLog:
+    """
+    会社の変更（採用・削除・昇進・降格・辞任）を追記していく変更履歴（イベントログ）
+
+    attach() した会社の変更を、コンパクトなバイナリ形式のイベントとしてファイルに追記する
+    replay() は最新のスナップショットを読み込み、その後のイベントだけを反映して会社を作り直す
+    （監査や複製の作り直しで、最初から全操作をやり直さなくてよい）
+
+    イベントはすぐにはファイルに書かず、メモリにためてまとめて書き込む（グループコミット）
+    1件ごとに fsync しないので、追記は速い。書き込んで fsync するのは次のとき
+        - ためた件数が commit_size に達したとき
+        - 最初にためてから commit_interval 秒以上たった後にイベントがあったとき
+        - flush() / close() / snapshot() / events() が呼ばれたとき（会社の flush() / close() でも）
+    そのため、プロセスが異常終了すると、まだ書き込んでいないイベントは失われる
+    （書き込み済みのイベントは、途中までしか書けていない末尾を除いて読み直せる）
+
+    snapshot_interval 件のイベントごとに、会社のスナップショットを自動で取る
+
+    Attributes:
+        directory (str): 変更履歴のディレクトリ
+        company (Optional[Company]): 変更を記録している会社
+        lsn (int): 次のイベント番号（これまでに記録したイベント数）
+        committed_lsn (int): ファイルに書き込み済みのイベント数
+        commit_count (int): まとめて書き込んだ回数
+        snapshot_lsn (int): 最新のスナップショットのイベント番号
+    """
+
+    # イベントの種類（ChangeEvent.kind）
+    HIRE = "hire"
+    DELETE = "delete"
+    POST = "post"
+    RESIGN = "resign"
+
+    # 種類のコード → 種類の名前
+    _KINDS = {_EVENT_HIRE: HIRE, _EVENT_DELETE: DELETE, _EVENT_POST: POST, _EVENT_RESIGN: RESIGN}
+
+    def __init__(
+        self,
+        directory: str,
+        commit_size: int = 1000,
+        commit_interval: float = 0.05,
+        snapshot_interval: int = 100_000,
+        sync: bool = True,
+    ):
+        """
+        ChangeLogクラスのコンストラクタ
+
+        ディレクトリがなければ作る（ファイルは attach() / replay() のときに作る）
+
+        Args:
+            directory (str): 変更履歴のディレクトリ
+            commit_size (int): まとめて書き込むイベントの最大件数
+            commit_interval (float): ためたイベントを書き込むまでの最大の秒数
+            snapshot_interval (int): 何件のイベントごとにスナップショットを取るか（0 なら自動では取らない）
+            sync (bool): 書き込みのたびに fsync するか（False なら OS に任せる）
+
+        Raises:
+            ValueError: commit_size・commit_interval・snapshot_interval が不正な場合
+        """
+        if commit_size < 1 or commit_interval < 0 or snapshot_interval < 0:
+            raise ValueError(
+                f"commit_size・commit_interval・snapshot_interval が不正です: "
+                f"{commit_size!r}, {commit_interval!r}, {snapshot_interval!r}"
+            )
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._commit_size = commit_size
+        self._commit_interval = commit_interval
+        self._snapshot_interval = snapshot_interval
+        self._sync = sync
+
+        self._company: Optional["Company"] = None
+        # 追記中のセグメント（attach() / replay() で開く）とその最初のイベント番号
+        self._file: Optional[Any] = None
+        self._file_start = 0
+        # ためているイベント（エンコード済み）と件数、最初にためた時刻
+        self._buffer = bytearray()
+        self._pending_count = 0
+        self._pending_since: Optional[float] = None
+        self._lsn = 0
+        self._snapshot_lsn = 0
+        self._commit_count = 0
+        # 次に払い出されうる社員IDの下限（スナップショットに保存し、再生後の採番に使う）
+        self._next_id = 0
+
+    @property  # プロパティ化
+    def directory(self) -> str:
+        """
+        変更履歴のディレクトリを取得するプロパティ（getter）
+
+        Returns:
+            str: ディレクトリのパス
+        """
+        return self._directory
+
+    @property  # プロパティ化
+    def company(self) -> Optional["Company"]:
+        """
+        変更を記録している会社を取得するプロパティ（getter）
+
+        Returns:
+            Optional[Company]: 会社（attach() / replay() する前と close() の後は None）
+        """
+        return self._company
+
+    @property  # プロパティ化
+    def lsn(self) -> int:
+        """
+        次のイベント番号を取得するプロパティ（getter）
+
+        Returns:
+            int: これまでに記録したイベント数
+        """
+        return self._lsn
+
+    @property  # プロパティ化
+    def committed_lsn(self) -> int:
+        """
+        ファイルに書き込み済みのイベント数を取得するプロパティ（getter）
+
+        Returns:
+            int: 書き込み済みのイベント数（ためているイベントは含まない）
+        """
+        return self._lsn - self._pending_count
+
+    @property  # プロパティ化
+    def commit_count(self) -> int:
+        """
+        まとめて書き込んだ回数を取得するプロパティ（getter）
+
+        Returns:
+            int: 書き込み（fsync）の回数
+        """
+        return self._commit_count
+
+    @property  # プロパティ化
+    def snapshot_lsn(self) -> int:
+        """
+        最新のスナップショットのイベント番号を取得するプロパティ（getter）
+
+        Returns:
+            int: スナップショットに反映済みのイベント数
+        """
+        return self._snapshot_lsn
+
+    def attach(self, company: "Company") -> None:
+        """
+        会社の変更の記録を始めるメソッド
+
+        空のディレクトリに、会社の今の状態をスナップショットとして保存してから記録を始める
+        （既存の社員は採用イベントではなく、最初のスナップショットに入る）
+
+        Args:
+            company (Company): 変更を記録する会社
+
+        Returns:
+            None: 戻り値なし
+
+        Raises:
+            ValueError: すでに会社を記録している場合、会社が別の変更履歴を使っている場合、
+                ディレクトリに変更履歴がある場合（続きを記録するには replay() を使う）
+        """
+        if self._company is not None or company._change_log is not None:
+            raise ValueError("会社の変更はすでに記録されています。")
+        if self._list_files("snapshot-") or self._list_files("events-"):
+            raise ValueError(f"変更履歴がすでにあります（続きを記録するには replay() を使ってください）: {self._directory}")
+
+        with company._lock.write():
+            ids = company._store.export_columns()[0]
+            self._next_id = max(ids) + 1 if len(ids) else 0
+            self._company = company
+            company._change_log = self
+            self._start_segment(0)
+            self._snapshot()
+
+    def replay(
+        self,
+        id_allocator: Optional[IdAllocator] = None,
+        storage: str = Company.COLUMNAR_STORAGE,
+        sink: Optional[OutputSink] = None,
+        thread_safe: bool = False,
+        attach: bool = True,
+    ) -> Company:
+        """
+        最新のスナップショットとその後のイベントから会社を作り直すメソッド
+
+        スナップショットは Company.load() で読み込み（列形式なら mmap するだけ）、
+        その後のイベントは連続する採用・削除をまとめてストレージに反映する
+        途中までしか書けていないイベント（異常終了した末尾）は読み飛ばす
+
+        Args:
+            id_allocator (Optional[IdAllocator]): 社員IDの採番クラス
+                （省略時は、記録された社員IDと重ならない連番）
+            storage (str): 社員データの保存形式
+            sink (Optional[OutputSink]): メッセージの出力先
+            thread_safe (bool): 複数スレッドから同時に使えるようにするか
+            attach (bool): 作り直した会社の変更を、続けてこの変更履歴に記録するか
+                （False なら読むだけ。複製を作る場合など）
+
+        Returns:
+            Company: 作り直した会社
+
+        Raises:
+            ValueError: すでに会社を記録している場合、スナップショットがない場合
+        """
+        if self._company is not None:
+            raise ValueError("会社の変更はすでに記録されています。")
+        snapshots = self._list_files("snapshot-")
+        if not snapshots:
+            raise ValueError(f"変更履歴のスナップショットがありません: {self._directory}")
+        snapshot_lsn, snapshot_name = snapshots[-1]
+        path = os.path.join(self._directory, snapshot_name)
+        company = Company.load(path, id_allocator, storage, sink, thread_safe)
+        # スナップショットに保存した「次に払い出す社員ID」（形式は Company.load() が確認済み）
+        with open(path, "rb") as file:
+            next_id = _SNAPSHOT_HEADER.unpack(file.read(_SNAPSHOT_HEADER.size))[6]
+
+        lsn = snapshot_lsn
+        # 最後に読んだセグメントの (最初のイベント番号, イベント数, 壊れていない部分のバイト数)
+        segment: Optional[Tuple[int, int, int]] = None
+        segments = self._list_files("events-")
+        # スナップショットより後のイベントを含みうるのは、スナップショットの番号以前に始まる最後のセグメントから
+        first = max([index for index, (start, _) in enumerate(segments) if start <= snapshot_lsn], default=0)
+        for start, name in segments[first:]:
+            path = os.path.join(self._directory, name)
+            start, records, valid_size = _scan_event_segment(path)
+            if start > lsn:
+                # 途中のイベントが欠けている（この先は反映できない）
+                break
+            next_id = max(next_id, self._apply_events(company._store, records[lsn - start:]))
+            lsn = max(lsn, start + len(records))
+            segment = (start, len(records), valid_size)
+
+        if id_allocator is None:
+            company._id_allocator = CounterIdAllocator(max(next_id, 1000))
+
+        if attach:
+            with company._lock.write():
+                self._company = company
+                company._change_log = self
+                self._lsn = lsn
+                self._snapshot_lsn = snapshot_lsn
+                self._next_id = next_id
+                if segment is not None and segment[0] + segment[1] == lsn:
+                    # 最後のセグメントの壊れた末尾を切り捨て、その続きから追記する
+                    start, _, valid_size = segment
+                    self._file = open(os.path.join(self._directory, _EVENT_SEGMENT_FORMAT.format(start)), "r+b")
+                    self._file.truncate(valid_size)
+                    self._file.seek(valid_size)
+                    self._file_start = start
+                else:
+                    self._start_segment(lsn)
+        return company
+
+    def events(self, start: int = 0) -> Iterator[ChangeEvent]:
+        """
+        記録したイベントを古い順に返すジェネレーター（監査用）
+
+        ためているイベントは先に書き込むので、呼んだ時点までの全イベントを読める
+
+        Args:
+            start (int): 最初に返すイベント番号
+
+        Yields:
+            ChangeEvent: イベント
+        """
+        self.flush()
+        lsn = start
+        for segment_start, name in self._list_files("events-"):
+            segment_start, records, _ = _scan_event_segment(os.path.join(self._directory, name))
+            if segment_start > lsn:
+                break
+            for offset in range(lsn - segment_start, len(records)):
+                kind, payload = records[offset]
+                yield self._decode_event(segment_start + offset, kind, payload)
+            lsn = max(lsn, segment_start + len(records))
+
+    def flush(self) -> None:
+        """
+        ためているイベントをファイルに書き込むメソッド
+
+        Returns:
+            None: 戻り値なし
+        """
+        if self._company is None:
+            return
+        with self._company._lock.write():
+            self._commit()
+
+    def snapshot(self) -> None:
+        """
+        会社のスナップショットを今すぐ取るメソッド
+
+        次の replay() は、このスナップショットとその後のイベントだけを読む
+
+        Returns:
+            None: 戻り値なし
+
+        Raises:
+            ValueError: 会社を記録していない場合
+        """
+        if self._company is None:
+            raise ValueError("変更を記録している会社がありません。")
+        with self._company._lock.write():
+            self._snapshot()
+
+    def close(self) -> None:
+        """
+        ためているイベントを書き込み、記録をやめるメソッド
+
+        Returns:
+            None: 戻り値なし
+        """
+        if self._company is None:
+            return
+        with self._company._lock.write():
+            self._close()
+
+    def _close(self) -> None:
+        """
+        記録をやめるプライベートメソッド（会社の書き込み用のロックは呼び出し側が取っている）
+
+        Returns:
+            None: 戻り値なし
+        """
+        self._commit()
+        self._file.close()
+        self._file = None
+        self._company._change_log = None
+        self._company = None
+
+    def _record(self, kind: int, employees: Iterable[Employee]) -> None:
+        """
+        イベントをためるプライベートメソッド（会社の書き込み用のロックの中で呼ばれる）
+
+        Args:
+            kind (int): イベントの種類のコード
+            employees (Iterable[Employee]): 対象の社員（採用・役職では変更後の値を記録する）
+
+        Returns:
+            None: 戻り値なし
+        """
+        buffer = self._buffer
+        count = 0
+        # ループ内で何度も使うので、ローカル変数に入れておく
+        crc32 = zlib.crc32
+        pack_crc = _EVENT_CRC.pack
+        pack_record = _EVENT_RECORD.pack
+        for employee in employees:
+            employee_id = int(employee.id)
+            if kind == _EVENT_HIRE:
+                name = employee.name.encode("utf-8")
+                payload = _EVENT_HIRE_FIELDS.pack(
+                    employee_id, employee.age, _POST_CODES[employee.post], _GENDER_CODES[employee.gender],
+                ) + name
+                if employee_id >= self._next_id:
+                    self._next_id = employee_id + 1
+            elif kind == _EVENT_POST:
+                payload = _EVENT_POST_FIELDS.pack(employee_id, _POST_CODES[employee.post])
+            else:
+                payload = _EVENT_ID_FIELD.pack(employee_id)
+            body = pack_record(len(payload), kind) + payload
+            buffer += pack_crc(crc32(body))
+            buffer += body
+            count += 1
+        if not count:
+            return
+        self._lsn += count
+        self._pending_count += count
+
+        now = time.monotonic()
+        if self._pending_since is None:
+            self._pending_since = now
+        if self._pending_count >= self._commit_size or now - self._pending_since >= self._commit_interval:
+            self._commit()
+        if self._snapshot_interval and self._lsn - self._snapshot_lsn >= self._snapshot_interval:
+            self._snapshot()
+
+    def _commit(self) -> None:
+        """
+        ためているイベントをまとめて書き込むプライベートメソッド（グループコミット）
+
+        Returns:
+            None: 戻り値なし
+        """
+        if not self._pending_count:
+            return
+        self._file.write(self._buffer)
+        self._file.flush()
+        if self._sync:
+            os.fsync(self._file.fileno())
+        self._buffer = bytearray()
+        self._pending_count = 0
+        self._pending_since = None
+        self._commit_count += 1
+
+    def _snapshot(self) -> None:
+        """
+        スナップショットを取り、新しいセグメントを始めるプライベートメソッド
+        （会社の書き込み用のロックは呼び出し側が取っている）
+
+        Returns:
+            None: 戻り値なし
+        """
+        self._commit()
+        company = self._company
+        path = os.path.join(self._directory, _EVENT_SNAPSHOT_FORMAT.format(self._lsn))
+        columns = company._store.export_columns()
+        ids = columns[0]
+        next_id = max(self._next_id, max(ids) + 1 if len(ids) else 0)
+        _write_snapshot(path, columns, next_id, company.MAX_NUMBER_OF_PEOPLE)
+        if self._sync:
+            with open(path, "rb") as file:
+                os.fsync(file.fileno())
+
+        # 古いスナップショットは消す（読み込み中の会社が mmap していても、消せなければそのまま残す）
+        for lsn, name in self._list_files("snapshot-"):
+            if lsn < self._lsn:
+                try:
+                    os.remove(os.path.join(self._directory, name))
+                except OSError:
+                    pass
+        self._snapshot_lsn = self._lsn
+        if self._file is not None and self._file_start != self._lsn:
+            self._file.close()
+            self._start_segment(self._lsn)
+
+    def _start_segment(self, lsn: int) -> None:
+        """
+        新しいセグメントを作って開くプライベートメソッド
+
+        Args:
+            lsn (int): セグメントの最初のイベント番号
+
+        Returns:
+            None: 戻り値なし
+        """
+        self._file = open(os.path.join(self._directory, _EVENT_SEGMENT_FORMAT.format(lsn)), "wb")
+        self._file.write(_EVENT_SEGMENT_HEADER.pack(_EVENT_SEGMENT_MAGIC, _EVENT_SEGMENT_VERSION, 0, 0, lsn))
+        self._file.flush()
+        self._file_start = lsn
+
+    def _list_files(self, prefix: str) -> List[Tuple[int, str]]:
+        """
+        ディレクトリにあるセグメントまたはスナップショットを、番号順に返すプライベートメソッド
+
+        Args:
+            prefix (str): ファイル名の先頭（"events-" または "snapshot-"）
+
+        Returns:
+            List[Tuple[int, str]]: (番号, ファイル名) のリスト
+        """
+        found = []
+        for name in os.listdir(self._directory):
+            number = name[len(prefix):].split(".", 1)[0]
+            if name.startswith(prefix) and number.isdigit() and not name.endswith(".tmp"):
+                found.append((int(number), name))
+        found.sort()
+        return found
+
+    @staticmethod  # インスタンスを使わないので静的メソッドにする
+    def _apply_events(store: _EmployeeStore, records: List[Tuple[int, memoryview]]) -> int:
+        """
+        イベントをストレージに反映するプライベートメソッド
+
+        連続する採用は1回の add_many()、連続する削除は1回の remove() にまとめる
+
+        Args:
+            store (_EmployeeStore): 反映先のストレージ
+            records (List[Tuple[int, memoryview]]): (種類, 内容) のリスト
+
+        Returns:
+            int: 採用イベントに出てきた社員IDの最大値 + 1（採用がなければ 0）
+        """
+        next_id = 0
+        hires: List[tuple] = []
+        deletes: List[Employee] = []
+        unpack_hire = _EVENT_HIRE_FIELDS.unpack_from
+        unpack_id = _EVENT_ID_FIELD.unpack_from
+        name_offset = _EVENT_HIRE_FIELDS.size
+
+        for kind, payload in records:
+            if kind != _EVENT_HIRE and hires:
+                store.add_many(hires)
+                hires = []
+            if kind != _EVENT_DELETE and deletes:
+                store.remove(deletes)
+                deletes = []
+
+            if kind == _EVENT_HIRE:
+                employee_id, age, post, gender = unpack_hire(payload)
+                hires.append((
+                    str(payload[name_offset:], "utf-8"), _GENDERS[gender], age, _POSTS[post], str(employee_id),
+                ))
+                if employee_id >= next_id:
+                    next_id = employee_id + 1
+            elif kind == _EVENT_DELETE:
+                deletes.append(store.get_by_id(str(unpack_id(payload)[0])))
+            elif kind == _EVENT_POST:
+                employee_id, post = _EVENT_POST_FIELDS.unpack_from(payload)
+                employee = store.get_by_id(str(employee_id))
+                employee._post = _POSTS[post]
+                store.on_posts_changed([employee])
+            # 辞任は記録のためだけのイベント（削除は続く削除イベントで反映する）
+
+        if hires:
+            store.add_many(hires)
+        if deletes:
+            store.remove(deletes)
+        return next_id
+
+    def _decode_event(self, lsn: int, kind: int, payload: memoryview) -> ChangeEvent:
+        """
+        イベントの内容を ChangeEvent にするプライベートメソッド
+
+        Args:
+            lsn (int): イベント番号
+            kind (int): 種類のコード
+            payload (memoryview): 内容
+
+        Returns:
+            ChangeEvent: イベント
+        """
+        if kind == _EVENT_HIRE:
+            employee_id, age, post, gender = _EVENT_HIRE_FIELDS.unpack_from(payload)
+            fields = {
+                "name": str(payload[_EVENT_HIRE_FIELDS.size:], "utf-8"),
+                "gender": _GENDERS[gender], "age": age, "post": _POSTS[post],
+            }
+        elif kind == _EVENT_POST:
+            employee_id, post = _EVENT_POST_FIELDS.unpack_from(payload)
+            fields = {"post": _POSTS[post]}
+        else:
+            employee_id, = _EVENT_ID_FIELD.unpack_from(payload)
+            fields = {}
+        return ChangeEvent(lsn, self._KINDS[kind], str(employee_id), fields)
+
+
+# ===================================================================
+# クラス：EmployeeQuery（社員の検索）
+# ===================================================================
+
+# where() の演算子：接尾辞 → (表示用の記号, 比較する関数)
+_QUERY_OPERATORS: Dict[str, Tuple[str, Any]] = {
+    "eq": ("==", operator.eq),
+    "ne": ("!=", operator.ne),
+    "lt": ("<", operator.lt),
+    "lte": ("<=", operator.le),
+    "gt": (">", operator.gt),
+    "gte": (">=", operator.ge),
+    "in": ("in", lambda value, candidates: value in candidates),
+}
+
+# where() と order_by() で使える項目：項目名 → 比較・並べ替えに使う値を取り出す関数
+# 役職は順位（ヒラ 0 〜 役員 3）、性別は定義順の番号で比べる
+# 全員を調べるときは1人ずつ呼ばれるので、プロパティを通さず内部の属性を直接読む
+_QUERY_FIELDS: Dict[str, Any] = {
+    "id": attrgetter("_id"),
+    "name": attrgetter("_name"),
+    "gender": lambda employee: _GENDER_CODES[employee._gender],
+    "age": attrgetter("_age"),
+    "post": lambda employee: employee._post.rank,
+}
+
+# 並べ替えで符号を反転できる（数値で比べる）項目
+_NUMERIC_QUERY_FIELDS = frozenset(("gender", "age", "post"))
+
+
+class EmployeeQuery:
+    """
+    社員を条件で検索するクエリを表すクラス
+
+    Company.query() で作り、where() / order_by() / limit() / offset() で条件を足していく
+    各メソッドは元のクエリを変えずに新しいクエリを返すので、途中のクエリを使い回せる
+    結果は for 文などで取り出したときに少しずつ作られる（イテレーター）
+
+    使うインデックスは条件から選ぶ（上ほど優先）
+        1. id == 値 → 社員IDのインデックス（1人だけ）
+        2. name == 値 → 名前のインデックス（同じ名前の社員だけ）
+        3. post の条件 → 役職別の年齢順インデックス（その役職の社員だけ。年齢の高い順に並んでいる）
+        4. 年齢の上限と下限の両方（age=値 も含む）、または order_by("-age") → 全社員の年齢順インデックス
+        5. どれもなければ全社員を採用順に調べる
+        年齢順インデックスを使う場合、年齢の条件は範囲の二分探索で絞り込む（範囲外の社員は読まない）
+
+    例:
+        company.query().where(post=Post.KATYO, age__gte=40).order_by("-age").limit(10)
+
+    条件の書き方（where() のキーワード引数）:
+        項目名=値（等しい）、項目名__演算子=値
+        演算子: eq, ne, lt, lte, gt, gte, in（in は値の集まりを渡す）
+        項目名: id, name, gender, age, post（post の大小は順位で比べる）
+    """
+
+    def __init__(
+        self,
+        company: Company,
+        conditions: Tuple[Tuple[str, str, Any], ...] = (),
+        ordering: Tuple[Tuple[str, bool], ...] = (),
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ):
+        """
+        EmployeeQueryクラスのコンストラクタ（Company.query() から呼ばれる）
+
+        Args:
+            company (Company): 検索する会社
+            conditions (Tuple[Tuple[str, str, Any], ...]): (項目名, 演算子, 値) の並び
+            ordering (Tuple[Tuple[str, bool], ...]): (項目名, 降順か) の並び
+            limit (Optional[int]): 最大の件数
+            offset (int): 読み飛ばす件数
+        """
+        self._company = company
+        self._conditions = conditions
+        self._ordering = ordering
+        self._limit = limit
+        self._offset = offset
+
+    def _replace(self, **changes: Any) -> "EmployeeQuery":
+        """
+        一部の設定だけ変えた新しいクエリを作るプライベートメソッド
+
+        Args:
+            **changes: 変える設定（conditions, ordering, limit, offset）
+
+        Returns:
+            EmployeeQuery: 新しいクエリ
+        """
+        settings = {
+            "conditions": self._conditions, "ordering": self._ordering,
+            "limit": self._limit, "offset": self._offset,
+        }
+        settings.update(changes)
+        return EmployeeQuery(self._company, **settings)
+
+    def where(self, **conditions: Any) -> "EmployeeQuery":
+        """
+        条件を足したクエリを返すメソッド（すべての条件を満たす社員だけになる）
+
+        Args:
+            **conditions: 項目名=値、または項目名__演算子=値
+
+        Returns:
+            EmployeeQuery: 新しいクエリ
+
+        Raises:
+            ValueError: 項目名・演算子が不正な場合
+        """
+        added = []
+        for key, value in conditions.items():
+            field, _, op = key.partition("__")
+            op = op or "eq"
+            if field not in _QUERY_FIELDS or op not in _QUERY_OPERATORS:
+                raise ValueError(f"条件が不正です: {key!r}")
+            if field == "gender" and op not in ("eq", "ne", "in"):
+                raise ValueError(f"性別は大小を比べられません: {key!r}")
+            added.append((field, op, value))
+        return self._replace(conditions=self._conditions + tuple(added))
+
+    def order_by(self, *fields: str) -> "EmployeeQuery":
+        """
+        並べ替えを指定したクエリを返すメソッド
+
+        項目名の前に "-" をつけると降順（"-age" なら年齢の高い順）
+        どの項目も同じ社員は採用順に並ぶ（select_president() と同じ）
+        呼ぶたびに前の並べ替えは置き換わる
+
+        Args:
+            *fields (str): 並べ替えに使う項目名（先にあるほど優先）
+
+        Returns:
+            EmployeeQuery: 新しいクエリ
+
+        Raises:
+            ValueError: 項目名が不正な場合
+        """
+        ordering = []
+        for field in fields:
+            name = field.lstrip("-")
+            if name not in _QUERY_FIELDS or len(field) - len(name) > 1:
+                raise ValueError(f"並べ替えの項目が不正です: {field!r}")
+            ordering.append((name, field.startswith("-")))
+        return self._replace(ordering=tuple(ordering))
+
+    def limit(self, count: int) -> "EmployeeQuery":
+        """
+        最大の件数を指定したクエリを返すメソッド
+
+        Args:
+            count (int): 最大の件数
+
+        Returns:
+            EmployeeQuery: 新しいクエリ
+        """
+        if count < 0:
+            raise ValueError(f"limit は0以上である必要があります: {count!r}")
+        return self._replace(limit=count)
+
+    def offset(self, count: int) -> "EmployeeQuery":
+        """
+        先頭から読み飛ばす件数を指定したクエリを返すメソッド
+
+        Args:
+            count (int): 読み飛ばす件数
+
+        Returns:
+            EmployeeQuery: 新しいクエリ
+        """
+        if count < 0:
+            raise ValueError(f"offset は0以上である必要があります: {count!r}")
+        return self._replace(offset=count)
+
+    @property  # プロパティ化
+    def index(self) -> str:
+        """
+        このクエリで使うインデックスを取得するプロパティ（getter）
+
+        Returns:
+            str: "id"、"name"、"post"、"age" または "scan"（全員を調べる）
+        """
+        return self._plan()[0]
+
+    def explain(self) -> str:
+        """
+        クエリの実行方法（使うインデックス・残りの条件・並べ替え・件数）を文字列で返すメソッド
+
+        Returns:
+            str: 実行方法の説明（複数行）
+        """
+        index, detail, remaining = self._plan()
+        lines = [f"インデックス: {index}（{detail}）"]
+        for field, op, value in remaining:
+            lines.append(f"絞り込み: {field} {_QUERY_OPERATORS[op][0]} {self._format_value(value)}")
+        if self._ordering:
+            fields = ", ".join(("-" if descending else "") + field for field, descending in self._ordering)
+            how = "インデックスの順のまま" if self._index_order_matches(index) else "並べ替える"
+            lines.append(f"並べ替え: {fields}（{how}）")
+        elif index in ("post", "age"):
+            lines.append("並べ替え: 採用順（並べ替える）")
+        if index in ("post", "age"):
+            min_age, max_age, _ = self._age_bounds()
+            if min_age is not None or max_age is not None:
+                low = "" if min_age is None else f"{min_age}歳"
+                high = "" if max_age is None else f"{max_age}歳"
+                lines.append(f"範囲: age {low}〜{high}（インデックスの範囲外は読まない）")
+        if self._limit is not None or self._offset:
+            start = f"{self._offset}件読み飛ばして" if self._offset else "先頭から"
+            limit = "最後まで" if self._limit is None else f"{self._limit}件"
+            lines.append(f"件数: {start}{limit}")
+        return "\n".join(lines)
+
+    def first(self) -> Optional[Employee]:
+        """
+        条件に合う最初の社員を返すメソッド
+
+        Returns:
+            Optional[Employee]: 最初の社員、いない場合はNone
+        """
+        return next(iter(self.limit(1)), None)
+
+    def count(self) -> int:
+        """
+        条件に合う社員の数を返すメソッド
+
+        年齢順インデックスだけで条件がすべて確認できる場合は、社員を取り出さずに数える O(log n)
+
+        Returns:
+            int: 社員の数（limit・offset も反映する）
+        """
+        index, _, remaining = self._plan()
+        if index not in ("post", "age") or remaining:
+            return len(list(self))
+        min_age, max_age, _ = self._age_bounds()
+        posts = [None] if index == "age" else self._allowed_posts()
+        with self._company._reading():
+            total = sum(self._company._store.age_count(post, min_age, max_age) for post in posts)
+        total = max(0, total - self._offset)
+        return total if self._limit is None else min(total, self._limit)
+
+    def __iter__(self) -> Iterator[Employee]:
+        """
+        条件に合う社員を順に返すメソッド（for 文で呼ばれる）
+
+        インデックスから候補を取り出し（スレッドセーフな会社では、ここだけロックを取る）、
+        残りの条件での絞り込みと件数の制限は、取り出しながら少しずつ行う
+        年齢順インデックスの順のまま返せて、残りの条件もなければ、必要な件数だけ取り出す
+
+        Returns:
+            Iterator[Employee]: 社員のイテレーター
+        """
+        index, _, remaining = self._plan()
+        stop = None if self._limit is None else self._offset + self._limit
+        in_index_order = self._index_order_matches(index)
+        candidates = self._candidates(index, stop if in_index_order and not remaining else None)
+
+        # 残りの条件で絞り込む（取り出したときに1人ずつ確認する）
+        if remaining:
+            candidates = filter(self._predicate(remaining), candidates)
+
+        if self._ordering and not in_index_order:
+            candidates = iter(self._sorted(candidates, stop))
+        elif not self._ordering and index in ("post", "age"):
+            # 年齢順インデックスから取り出したので、採用順に並べ直す
+            candidates = iter(self._sorted_by(candidates, [("_seq", False)], stop))
+        if self._offset or stop is not None:
+            candidates = itertools.islice(candidates, self._offset, stop)
+        return candidates
+
+    def _predicate(self, conditions: List[Tuple[str, str, Any]]) -> Any:
+        """
+        条件をすべて満たすかを判定する関数を作るプライベートメソッド
+
+        条件が1つなら、その比較だけをする関数を返す（全員を調べるときの1人あたりの時間を減らす）
+
+        Args:
+            conditions (List[Tuple[str, str, Any]]): 条件
+
+        Returns:
+            社員を受け取って bool を返す関数
+        """
+        tests = [
+            (_QUERY_FIELDS[field], _QUERY_OPERATORS[op][1], self._comparable(field, value, op))
+            for field, op, value in conditions
+        ]
+        if len(tests) == 1:
+            (get, compare, value), = tests
+            return lambda employee: compare(get(employee), value)
+        return lambda employee: all(compare(get(employee), value) for get, compare, value in tests)
+
+    def _plan(self) -> Tuple[str, str, List[Tuple[str, str, Any]]]:
+        """
+        使うインデックスを選ぶプライベートメソッド
+
+        Returns:
+            Tuple[str, str, list]: (インデックス, 説明, インデックスで絞り込めない残りの条件)
+        """
+        conditions = list(self._conditions)
+        for field in ("id", "name"):
+            for condition in conditions:
+                if condition[0] == field and condition[1] == "eq":
+                    remaining = [other for other in conditions if other is not condition]
+                    return field, f"{field} == {self._format_value(condition[2])}", remaining
+
+        # 年齢の範囲に置き換えられる条件は、年齢順インデックスの範囲で絞り込むので残さない
+        min_age, max_age, bounded = self._age_bounds()
+        unbounded = [condition for condition in conditions if condition not in bounded]
+
+        posts = self._allowed_posts()
+        if posts is not None:
+            remaining = [condition for condition in unbounded if condition[0] != "post"]
+            names = "・".join(post.value for post in posts) or "なし"
+            return "post", f"役職別の年齢順インデックス: {names}", remaining
+
+        if (min_age is not None and max_age is not None) or self._ordering[:1] == (("age", True),):
+            return "age", "全社員の年齢順インデックス", unbounded
+
+        return "scan", "全社員を採用順に調べる", conditions
+
+    def _age_bounds(self) -> Tuple[Optional[int], Optional[int], List[Tuple[str, str, Any]]]:
+        """
+        年齢の条件を、年齢順インデックスで読む範囲（下限・上限）に置き換えるプライベートメソッド
+
+        年齢は整数なので、age > 40 は「41歳以上」、age < 60 は「59歳以下」と同じになる
+        値が整数でない条件は置き換えず、取り出した後の絞り込みで確認する
+
+        Returns:
+            Tuple: (年齢の下限, 年齢の上限, 置き換えた条件)（下限・上限がなければ None）
+        """
+        min_age = max_age = None
+        bounded = []
+        for condition in self._conditions:
+            field, op, value = condition
+            if field != "age" or not isinstance(value, int) or isinstance(value, bool):
+                continue
+            low = {"eq": value, "gt": value + 1, "gte": value}.get(op)
+            high = {"eq": value, "lt": value - 1, "lte": value}.get(op)
+            if low is None and high is None:
+                continue
+            if low is not None:
+                min_age = low if min_age is None else max(min_age, low)
+            if high is not None:
+                max_age = high if max_age is None else min(max_age, high)
+            bounded.append(condition)
+        return min_age, max_age, bounded
+
+    def _allowed_posts(self) -> Optional[List[Post]]:
+        """
+        post の条件をすべて満たす役職を求めるプライベートメソッド
+
+        Returns:
+            Optional[List[Post]]: 役職のリスト（順位の高い順）、post の条件がない場合はNone
+        """
+        post_conditions = [condition for condition in self._conditions if condition[0] == "post"]
+        if not post_conditions:
+            return None
+        return [
+            post for post in reversed(_POSTS)
+            if all(
+                _QUERY_OPERATORS[op][1](post.rank, self._comparable("post", value, op))
+                for _, op, value in post_conditions
+            )
+        ]
+
+    def _candidates(self, index: str, limit: Optional[int] = None) -> Iterator[Employee]:
+        """
+        インデックスから候補の社員を取り出すプライベートメソッド
+
+        Args:
+            index (str): 使うインデックス
+            limit (Optional[int]): 年齢順インデックスから読む最大の人数（省略時は範囲内の全員）
+
+        Returns:
+            Iterator[Employee]: 候補の社員
+                （id・name・scan は採用順、post・age は年齢の高い順・同い年なら採用順）
+        """
+        company = self._company
+        if index == "scan":
+            # 社員リストを順に調べる（スレッドセーフな会社では、その時点のコピー）
+            return iter(company.employees)
+
+        with company._reading():
+            store = company._store
+            if index == "id":
+                value = next(value for field, op, value in self._conditions if field == "id" and op == "eq")
+                employee = store.get_by_id(value) if isinstance(value, str) else None
+                return iter([] if employee is None else [employee])
+            if index == "name":
+                value = next(value for field, op, value in self._conditions if field == "name" and op == "eq")
+                return iter(store.find_by_name(value) if isinstance(value, str) else [])
+            min_age, max_age, _ = self._age_bounds()
+            if index == "age":
+                return iter(store.age_range(None, min_age, max_age, limit))
+            # 各役職から最大 limit 人ずつ読めば、合わせた上位 limit 人は必ず含まれる
+            members = [store.age_range(post, min_age, max_age, limit) for post in self._allowed_posts()]
+        # 役職ごとの年齢順のリストを、年齢の高い順（同い年なら採用順）に合わせる
+        return heapq.merge(*members, key=lambda employee: (-employee.age, employee._seq))
+
+    def _index_order_matches(self, index: str) -> bool:
+        """
+        インデックスから取り出した順が、指定された並べ替えと同じかを判定するプライベートメソッド
+
+        Args:
+            index (str): 使うインデックス
+
+        Returns:
+            bool: 並べ替えが不要なら True
+        """
+        if index in ("post", "age"):
+            return self._ordering == (("age", True),)
+        # id・name・scan は採用順。1人しかいない id は何順でもよい
+        return index == "id"
+
+    def _sorted(self, candidates: Iterable[Employee], stop: Optional[int]) -> List[Employee]:
+        """
+        候補を order_by() の順に並べるプライベートメソッド
+
+        Args:
+            candidates (Iterable[Employee]): 候補の社員
+            stop (Optional[int]): 必要な件数（offset + limit。None なら全員）
+
+        Returns:
+            List[Employee]: 並べた社員（stop 件まで）
+        """
+        return self._sorted_by(candidates, list(self._ordering) + [("_seq", False)], stop)
+
+    @staticmethod  # インスタンスを使わないので静的メソッドにする
+    def _sorted_by(candidates: Iterable[Employee], keys: List[Tuple[str, bool]], stop: Optional[int]) -> List[Employee]:
+        """
+        候補を keys の順に並べるプライベートメソッド
+
+        すべての項目が数値なら、降順は符号を反転した1つのキーにまとめ、
+        件数の指定があれば heapq.nsmallest() で必要な分だけ取り出す O(n log k)
+        文字列の項目を降順にする場合は、後ろの項目から順に安定ソートを重ねる
+
+        Args:
+            candidates (Iterable[Employee]): 候補の社員
+            keys (List[Tuple[str, bool]]): (項目名 または "_seq", 降順か) の並び
+            stop (Optional[int]): 必要な件数
+
+        Returns:
+            List[Employee]: 並べた社員（stop 件まで）
+        """
+        getters = [(attrgetter("_seq") if field == "_seq" else _QUERY_FIELDS[field], descending) for field, descending in keys]
+        if all(field in _NUMERIC_QUERY_FIELDS or field == "_seq" or not descending for field, descending in keys):
+            def sort_key(employee):
+                return tuple(
+                    -get(employee) if descending else get(employee) for get, descending in getters
+                )
+            if stop is not None:
+                return heapq.nsmallest(stop, candidates, key=sort_key)
+            return sorted(candidates, key=sort_key)
+
+        result = list(candidates)
+        for get, descending in reversed(getters):
+            result.sort(key=get, reverse=descending)
+        return result if stop is None else result[:stop]
+
+    @staticmethod  # インスタンスを使わないので静的メソッドにする
+    def _comparable(field: str, value: Any, op: str) -> Any:
+        """
+        条件の値を、_QUERY_FIELDS の関数が返す値と比べられる形にするプライベートメソッド
+
+        Args:
+            field (str): 項目名
+            value (Any): 条件の値
+            op (str): 演算子
+
+        Returns:
+            Any: 比べられる形の値（役職は順位、性別は番号。in の場合は集合）
+        """
+        convert = {"post": lambda post: post.rank, "gender": _GENDER_CODES.__getitem__}.get(field)
+        if op == "in":
+            return frozenset(map(convert, value)) if convert else frozenset(value)
+        return convert(value) if convert else value
+
+    @staticmethod  # インスタンスを使わないので静的メソッドにする
+    def _format_value(value: Any) -> str:
+        """
+        explain() で表示する値の文字列を作るプライベートメソッド
+
+        Args:
+            value (Any): 条件の値
+
+        Returns:
+            str: 表示用の文字列（Enum は値、集まりは中身を並べる）
+        """
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return "[" + ", ".join(EmployeeQuery._format_value(item) for item in value) + "]"
+        return repr(value)
+
+    def __repr__(self) -> str:
+        """
+        クエリの文字列表現を返すメソッド
+
+        Returns:
+            str: 例 "EmployeeQuery(index='post', conditions=2, limit=10)"
+        """
+        return f"EmployeeQuery(index={self.index!r}, conditions={len(self._conditions)}, limit={self._limit})"
+
+
+# ===================================================================
+# 給与計算（Payroll）
+# ===================================================================
+
+class PayrollReport:
+    """
+    給与計算（compute_payroll）の結果を表すクラス
+
+    Attributes:
+        total (int): 全社員の給与の合計
+        headcount (int): 集計した社員数
+        by_post (Dict[Post, int]): 役職ごとの給与の合計
+        by_gender (Dict[Gender, int]): 性別ごとの給与の合計
+        by_age_band (Dict[int, int]): 年齢帯（下限の年齢）ごとの給与の合計
+        band_width (int): 年齢帯の幅（10 なら 20 は 20〜29歳）
+        backend (str): 計算に使った方法（"numpy" または "array"）
+    """
+
+    def __init__(
+        self,
+        total: int,
+        headcount: int,
+        by_post: Dict[Post, int],
+        by_gender: Dict[Gender, int],
+        by_age_band: Dict[int, int],
+        band_width: int,
+        backend: str,
+    ):
+        """
+        PayrollReportクラスのコンストラクタ
+
+        Args:
+            total (int): 給与の合計
+            headcount (int): 社員数
+            by_post (Dict[Post, int]): 役職ごとの給与の合計
+            by_gender (Dict[Gender, int]): 性別ごとの給与の合計
+            by_age_band (Dict[int, int]): 年齢帯ごとの給与の合計
+            band_width (int): 年齢帯の幅
+            backend (str): 計算に使った方法
+        """
+        self._total = total
+        self._headcount = headcount
+        self._by_post = by_post
+        self._by_gender = by_gender
+        self._by_age_band = by_age_band
+        self._band_width = band_width
+        self._backend = backend
+
+    @property  # プロパティ化
+    def total(self) -> int:
+        """
+        給与の合計を取得するプロパティ（getter）
+
+        Returns:
+            int: 全社員の給与の合計
+        """
+        return self._total
+
+    @property  # プロパティ化
+    def headcount(self) -> int:
+        """
+        集計した社員数を取得するプロパティ（getter）
+
+        Returns:
+            int: 社員数
+        """
+        return self._headcount
+
+    @property  # プロパティ化
+    def by_post(self) -> Dict[Post, int]:
+        """
+        役職ごとの給与の合計を取得するプロパティ（getter）
+
+        Returns:
+            Dict[Post, int]: 役職 → 給与の合計（社員がいない役職は 0）
+        """
+        return self._by_post
+
+    @property  # プロパティ化
+    def by_gender(self) -> Dict[Gender, int]:
+        """
+        性別ごとの給与の合計を取得するプロパティ（getter）
+
+        Returns:
+            Dict[Gender, int]: 性別 → 給与の合計（社員がいない性別は 0）
+        """
+        return self._by_gender
+
+    @property  # プロパティ化
+    def by_age_band(self) -> Dict[int, int]:
+        """
+        年齢帯ごとの給与の合計を取得するプロパティ（getter）
+
+        Returns:
+            Dict[int, int]: 年齢帯の下限の年齢 → 給与の合計（社員がいる年齢帯だけ、昇順）
+        """
+        return self._by_age_band
+
+    @property  # プロパティ化
+    def band_width(self) -> int:
+        """
+        年齢帯の幅を取得するプロパティ（getter）
+
+        Returns:
+            int: 年齢帯の幅（歳）
+        """
+        return self._band_width
+
+    @property  # プロパティ化
+    def backend(self) -> str:
+        """
+        計算に使った方法を取得するプロパティ（getter）
+
+        Returns:
+            str: "numpy" または "array"
+        """
+        return self._backend
+
+    def __repr__(self) -> str:
+        """
+        デバッグ用の文字列表現を返すメソッド
+
+        Returns:
+            str: 合計と社員数を含む文字列
+        """
+        return f"PayrollReport(total={self._total}, headcount={self._headcount})"
+
+
+def _payroll_counts_numpy(posts: array, genders: array, ages: array, band_width: int) -> Dict[Tuple[int, int, int], int]:
+    """
+    (役職コード, 性別コード, 年齢帯) ごとの人数を NumPy で数えるプライベート関数
+
+    3つのコードを1つの整数にまとめ、bincount() で1回で数える
+
+    Returns:
+        Dict[Tuple[int, int, int], int]: (役職コード, 性別コード, 年齢帯の番号) → 人数
+    """
+    # frombuffer() は配列のメモリをそのまま使うのでコピーしない
+    post_codes = _numpy.frombuffer(posts, dtype=_numpy.uint8).astype(_numpy.int64)
+    gender_codes = _numpy.frombuffer(genders, dtype=_numpy.uint8).astype(_numpy.int64)
+    bands = _numpy.frombuffer(ages, dtype=_numpy.uint16).astype(_numpy.int64) // band_width
+
+    cells = len(_POSTS) * len(_GENDERS)
+    counts = _numpy.bincount(bands * cells + gender_codes * len(_POSTS) + post_codes)
+    result = {}
+    for code in _numpy.flatnonzero(counts).tolist():
+        band, rest = divmod(code, cells)
+        gender, post = divmod(rest, len(_POSTS))
+        result[(post, gender, band)] = int(counts[code])
+    return result
+
+
+def _payroll_counts_array(posts: array, genders: array, ages: array, band_width: int) -> Dict[Tuple[int, int, int], int]:
+    """
+    (役職コード, 性別コード, 年齢帯) ごとの人数を標準ライブラリだけで数えるプライベート関数
+
+    Counter は C で実装されたループで数えるので、社員を1人ずつ読むループより速い
+
+    Returns:
+        Dict[Tuple[int, int, int], int]: (役職コード, 性別コード, 年齢帯の番号) → 人数
+    """
+    bands = map(int.__floordiv__, ages, itertools.repeat(band_width))
+    return Counter(zip(posts, genders, bands))
+
+
+def compute_payroll(company: Company, band_width: int = Company.PAYROLL_BAND_WIDTH) -> PayrollReport:
+    """
+    会社全体の給与を役職・性別・年齢帯ごとにまとめて集計する関数
+
+    給与は役職だけで決まるので、社員ごとに給与を引かずに
+    (役職, 性別, 年齢帯) ごとの人数を1回で数え、最後に給与表を掛け合わせる
+    給与表は呼ぶたびに Employee._salary_map から読むので、実行中に変更しても反映される
+
+    NumPy があれば NumPy で、なければ標準ライブラリ（array と Counter）で数える
+
+    Args:
+        company (Company): 集計する会社
+        band_width (int): 年齢帯の幅（歳）
+
+    Returns:
+        PayrollReport: 給与の合計と、役職・性別・年齢帯ごとの内訳
+    """
+    if not isinstance(band_width, int) or isinstance(band_width, bool) or band_width <= 0:
+        raise ValueError(f"band_width が不正です: {band_width!r}")
+
+    # 役職コード → 給与（Employee.salary と同じく、役職が見つからなければ KeyError）
+    salary_of = [Employee._salary_map[post] for post in _POSTS]
+
+    # 数え終わるまで採用・削除を待たせる（列形式では内部の配列をそのまま数えるため）
+    with company._reading():
+        posts, genders, ages = company._store.columns()
+        headcount = len(posts)
+        if _numpy is not None:
+            counts = _payroll_counts_numpy(posts, genders, ages, band_width)
+            backend = "numpy"
+        else:
+            counts = _payroll_counts_array(posts, genders, ages, band_width)
+            backend = "array"
+
+    by_post = dict.fromkeys(_POSTS, 0)
+    by_gender = dict.fromkeys(_GENDERS, 0)
+    by_band: Dict[int, int] = {}
+    for (post, gender, band), count in counts.items():
+        amount = salary_of[post] * count
+        by_post[_POSTS[post]] += amount
+        by_gender[_GENDERS[gender]] += amount
+        by_band[band * band_width] = by_band.get(band * band_width, 0) + amount
+
+    return PayrollReport(
+        total=sum(by_post.values()),
+        headcount=headcount,
+        by_post=by_post,
+        by_gender=by_gender,
+        by_age_band=dict(sorted(by_band.items())),
+        band_width=band_width,
+        backend=backend,
+    )
+
+
+# ===================================================================
+# 非同期の窓口（asyncio から使う）
+# ===================================================================
+
+# AsyncCompany のキューに入れる依頼の種類
+_ASYNC_HIRE = "hire"
+_ASYNC_DELETE = "delete"
+_ASYNC_CALL = "call"
+
+
+class AsyncCompany:
+    """
+    asyncio のプログラムから会社を使うための窓口クラス
+
+    採用・削除などの変更は内部のキューに入れ、1つのタスク（ワーカー）が順に実行する
+    キューにたまった連続する採用・削除は、add_employees() / delete_employees() の
+    1回の呼び出しにまとめる（メッセージもまとめて1行になる）
+    そのため、大量のコルーチンから同時に採用しても、イベントループを長く止めない
+
+    検索（get_personnel_by_id など）は await せずにその場で答える
+    変更はすべてイベントループのスレッドで実行されるので、検索の途中で変わることはない
+    （キューに入れたばかりでまだ実行されていない変更は、検索結果に含まれない）
+
+    会社はこの窓口からだけ使うこと（他のスレッドからも使う場合は thread_safe=True の会社を渡す）
+
+    Attributes:
+        MAX_BATCH_SIZE (int): 1回にまとめて実行する依頼の最大件数（クラス変数）
+        company (Company): 操作する会社
+        batch_count (int): これまでにワーカーが実行したまとまりの数
+    """
+
+    MAX_BATCH_SIZE = 1000
+
+    def __init__(self, company: Optional[Company] = None, max_batch_size: int = MAX_BATCH_SIZE):
+        """
+        AsyncCompanyクラスのコンストラクタ
+
+        キューとワーカーは、最初に変更を依頼したときにイベントループの中で作る
+
+        Args:
+            company (Optional[Company]): 操作する会社（省略時は新しい会社を作る）
+            max_batch_size (int): 1回にまとめて実行する依頼の最大件数
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size は1以上である必要があります: {max_batch_size!r}")
+        self._company = Company() if company is None else company
+        self._max_batch_size = max_batch_size
+        # 依頼のキュー：(依頼の種類, 内容, 結果を受け取る Future) を入れる
+        self._queue: Optional[asyncio.Queue] = None
+        # キューから依頼を取り出して実行するタスク
+        self._worker: Optional[asyncio.Task] = None
+        self._batch_count = 0
+
+    @property  # プロパティ化
+    def company(self) -> Company:
+        """
+        操作する会社を取得するプロパティ（getter）
+
+        Returns:
+            Company: 会社
+        """
+        return self._company
+
+    @property  # プロパティ化
+    def batch_count(self) -> int:
+        """
+        ワーカーが実行したまとまりの数を取得するプロパティ（getter）
+
+        Returns:
+            int: まとまりの数（依頼がよくまとまっているほど、依頼の件数より小さくなる）
+        """
+        return self._batch_count
+
+    @property  # プロパティ化
+    def current_number(self) -> int:
+        """
+        現在の社員数を取得するプロパティ（getter）
+
+        Returns:
+            int: 社員数
+        """
+        return self._company.current_number
+
+    @property  # プロパティ化
+    def employees(self) -> List[Employee]:
+        """
+        社員リストを取得するプロパティ（getter）
+
+        Returns:
+            List[Employee]: 社員リスト
+        """
+        return self._company.employees
+
+    def get_personnel_by_id(self, id: str) -> Optional[Employee]:
+        """
+        IDで社員を検索するメソッド（await しない）
+
+        Args:
+            id (str): 社員ID
+
+        Returns:
+            Optional[Employee]: 見つかった社員、見つからない場合はNone
+        """
+        return self._company.get_personnel_by_id(id)
+
+    def get_personnel_by_name(self, name: str) -> Optional[Employee]:
+        """
+        名前で社員を検索するメソッド（await しない）
+
+        Args:
+            name (str): 社員名
+
+        Returns:
+            Optional[Employee]: 見つかった社員、見つからない場合はNone
+        """
+        return self._company.get_personnel_by_name(name)
+
+    def select_president(self) -> Optional[Employee]:
+        """
+        次期社長候補を選出するメソッド（await しない）
+
+        Returns:
+            Optional[Employee]: 次期社長候補、社員がいない場合はNone
+        """
+        return self._company.select_president()
+
+    async def add_employee(self, name: str, gender: Gender, age: int, post: Post) -> Optional[Employee]:
+        """
+        社員を追加するメソッド
+
+        同じころに依頼された採用とまとめて、add_employees() で1回で採用する
+        （最大社員数を超えた分は、依頼の順で後ろから採用しない）
+
+        Args:
+            name (str): 名前
+            gender (Gender): 性別
+            age (int): 年齢
+            post (Post): 役職
+
+        Returns:
+            Optional[Employee]: 採用した社員、最大社員数に達していて採用しなかった場合はNone
+
+        Raises:
+            ValueError: 名前・性別・年齢・役職が不正な場合（キューには入れない）
+        """
+        row = (name, gender, age, post)
+        reason = Company._validate_row(row)
+        if reason is not None:
+            raise ValueError(reason)
+        return await self._submit(_ASYNC_HIRE, row)
+
+    async def delete_employee(self, person: Employee) -> bool:
+        """
+        社員を削除するメソッド
+
+        同じころに依頼された削除とまとめて、delete_employees() で1回で削除する
+
+        Args:
+            person (Employee): 削除する社員
+
+        Returns:
+            bool: 削除した場合は True、社員リストに存在しなかった場合は False
+        """
+        return await self._submit(_ASYNC_DELETE, person)
+
+    async def add_employees(self, rows: Any, mode: str = Company.ALL_OR_NOTHING) -> HiringSummary:
+        """
+        社員をまとめて追加するメソッド（Company.add_employees() を順番に実行する）
+
+        Args:
+            rows (Any): 採用する社員データ
+            mode (str): 不正な行があった場合の扱い
+
+        Returns:
+            HiringSummary: 採用結果
+        """
+        return await self.run(self._company.add_employees, rows, mode)
+
+    async def delete_employees(self, people: Iterable[Employee]) -> DeletionSummary:
+        """
+        社員をまとめて削除するメソッド（Company.delete_employees() を順番に実行する）
+
+        Args:
+            people (Iterable[Employee]): 削除する社員
+
+        Returns:
+            DeletionSummary: 削除結果
+        """
+        return await self.run(self._company.delete_employees, list(people))
+
+    async def apply_reviews(self, changes: Iterable[Tuple[Employee, int]]) -> ReviewSummary:
+        """
+        人事評価の結果をまとめて反映するメソッド（Company.apply_reviews() を順番に実行する）
+
+        Args:
+            changes (Iterable[Tuple[Employee, int]]): (社員, 段階数) の並び
+
+        Returns:
+            ReviewSummary: 反映結果
+        """
+        return await self.run(self._company.apply_reviews, list(changes))
+
+    async def run(self, func: Any, *args: Any) -> Any:
+        """
+        会社を変更する任意の関数を、他の変更と順番に実行するメソッド
+
+        昇進・降格・社長の辞任など、採用・削除以外の変更に使う
+
+        Args:
+            func: 実行する関数（イベントループのスレッドで呼ばれる）
+            *args: 関数に渡す引数
+
+        Returns:
+            Any: 関数の戻り値（関数が例外を送出した場合は、その例外を送出する）
+        """
+        return await self._submit(_ASYNC_CALL, (func, args))
+
+    async def drain(self) -> None:
+        """
+        キューに入っている依頼がすべて実行されるまで待つメソッド
+
+        Returns:
+            None: 戻り値なし
+        """
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """
+        残りの依頼を実行してから、ワーカーを止めるメソッド
+
+        Returns:
+            None: 戻り値なし
+        """
+        await self.drain()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            self._queue = None
+
+    async def __aenter__(self) -> "AsyncCompany":
+        """
+        async with 文の開始時に呼ばれるメソッド
+
+        Returns:
+            AsyncCompany: 自分自身
+        """
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """
+        async with 文の終了時に、残りの依頼を実行してワーカーを止めるメソッド
+        """
+        await self.close()
+
+    def _submit(self, kind: str, payload: Any) -> "asyncio.Future":
+        """
+        依頼をキューに入れ、結果を受け取る Future を返すプライベートメソッド
+
+        ワーカーがまだない（または別のイベントループのものだった）場合は、ここで作る
+
+        Args:
+            kind (str): 依頼の種類
+            payload (Any): 依頼の内容
+
+        Returns:
+            asyncio.Future: 結果を受け取る Future
+        """
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._work(self._queue))
+        future = loop.create_future()
+        self._queue.put_nowait((kind, payload, future))
+        return future
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        """
+        キューから依頼を取り出して実行し続けるワーカー（プライベートメソッド）
+
+        1件目を取り出したら一度だけ他のコルーチンに順番を譲り、
+        その間にたまった依頼を max_batch_size 件までまとめて取り出す
+
+        Args:
+            queue (asyncio.Queue): 依頼のキュー
+        """
+        while True:
+            batch = [await queue.get()]
+            # 同時に動いているコルーチンに依頼を入れ終えてもらう
+            await asyncio.sleep(0)
+            while len(batch) < self._max_batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                self._run_batch(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def _run_batch(self, batch: List[tuple]) -> None:
+        """
+        取り出した依頼を、依頼された順に実行するプライベートメソッド
+
+        連続する採用・削除はそれぞれ1回の呼び出しにまとめる
+        結果を待つのをやめた（キャンセルした）依頼は実行しない
+
+        Args:
+            batch (List[tuple]): (依頼の種類, 内容, Future) のリスト
+
+        Returns:
+            None: 戻り値なし
+        """
+        self._batch_count += 1
+        live = [request for request in batch if not request[2].done()]
+        for kind, group in itertools.groupby(live, key=itemgetter(0)):
+            group = list(group)
+            try:
+                if kind == _ASYNC_HIRE:
+                    self._hire(group)
+                elif kind == _ASYNC_DELETE:
+                    self._delete(group)
+                else:
+                    for _, (func, args), future in group:
+                        try:
+                            future.set_result(func(*args))
+                        except Exception as error:  # 関数の例外は、依頼したコルーチンで送出する
+                            future.set_exception(error)
+            except Exception as error:  # まとめた呼び出しの例外は、まとめた依頼すべてで送出する
+                for _, _, future in group:
+                    if not future.done():
+                        future.set_exception(error)
+
+    def _hire(self, group: List[tuple]) -> None:
+        """
+        まとめた採用の依頼を add_employees() で実行するプライベートメソッド
+
+        Args:
+            group (List[tuple]): 採用の依頼
+
+        Returns:
+            None: 戻り値なし
+        """
+        summary = self._company.add_employees([row for _, row, _ in group], mode=Company.BEST_EFFORT)
+        # 行は依頼の前に確認済みなので、採用しなかった行は最大社員数を超えた分だけ
+        rejected = {index for index, _ in summary.rejected}
+        hired = iter(summary.hired)
+        for index, (_, _, future) in enumerate(group):
+            future.set_result(None if index in rejected else next(hired))
+
+    def _delete(self, group: List[tuple]) -> None:
+        """
+        まとめた削除の依頼を delete_employees() で実行するプライベートメソッド
+
+        同じ社員を何回依頼しても、削除したことになるのは最初の1回だけ
+
+        Args:
+            group (List[tuple]): 削除の依頼
+
+        Returns:
+            None: 戻り値なし
+        """
+        summary = self._company.delete_employees([person for _, person, _ in group])
+        # 削除した社員（まだ結果を返していない人）の id() の集合
+        deleted = {id(person) for person in summary.deleted}
+        for _, person, future in group:
+            future.set_result(id(person) in deleted)
+            deleted.discard(id(person))
+
+
+class AsyncPresident:
+    """
+    asyncio のプログラムから社長の操作を行うための窓口クラス
+
+    社長の会社の AsyncCompany を通して操作するので、採用・削除はまとめて実行され、
+    検索は await せずにその場で答える
+
+    Attributes:
+        president (President): 社長
+        company (AsyncCompany): 社長の会社の窓口
+    """
+
+    def __init__(self, president: President, company: Optional[AsyncCompany] = None):
+        """
+        AsyncPresidentクラスのコンストラクタ
+
+        Args:
+            president (President): 社長
+            company (Optional[AsyncCompany]): 社長の会社の窓口（省略時は社長の会社の窓口を作る）
+
+        Raises:
+            ValueError: 社長に会社が設定されていない場合
+        """
+        if company is None:
+            if president.company is None:
+                raise ValueError(f"{president.name}さんに会社が設定されていません。")
+            company = AsyncCompany(president.company)
+        elif president.company is not company.company:
+            # 窓口の会社を社長の会社にする（setter経由）
+            president.company = company.company
+        self._president = president
+        self._company = company
+
+    @property  # プロパティ化
+    def president(self) -> President:
+        """
+        社長を取得するプロパティ（getter）
+
+        Returns:
+            President: 社長
+        """
+        return self._president
+
+    @property  # プロパティ化
+    def company(self) -> AsyncCompany:
+        """
+        社長の会社の窓口を取得するプロパティ（getter）
+
+        Returns:
+            AsyncCompany: 会社の窓口
+        """
+        return self._company
+
+    def get_personnel_by_id(self, id: str) -> Optional[Employee]:
+        """
+        IDで社員を検索するメソッド（await しない）
 
         Args:
             id (str): 社員ID
@@ -436,381 +7194,770 @@ class President(Human):
         Returns:
             Optional[Employee]: 見つかった社員、見つからない場合はNone
         """
-        # 会社が設定されていない場合はNoneを返す
-        if self._company is None:
-            return None
-
-        # 会社の全社員をループで検索
-        for employee in self._company.employees:
-            # 社員のIDが一致するかチェック
-            if employee.id == id:
-                # 見つかったらその社員を返す
-                return employee
-        
-        # 見つからなければNoneを返す
-        return None
+        return self._company.get_personnel_by_id(id)
 
     def get_personnel_by_name(self, name: str) -> Optional[Employee]:
         """
-        名前で社員を検索するメソッド
-        
-        社員名を指定して該当する社員オブジェクトを取得
+        名前で社員を検索するメソッド（await しない）
 
         Args:
             name (str): 社員名
 
         Returns:
-            Optional[Employee]: 見つかった社員、見つからない場合はNone
+            Optional[Employee]: 見つかった社員、見つからない場合はNone
+        """
+        return self._company.get_personnel_by_name(name)
+
+    async def add_employee(self, name: str, gender: Gender, age: int, post: Post) -> Optional[Employee]:
+        """
+        社員を追加するメソッド（AsyncCompany.add_employee() と同じ）
+
+        Args:
+            name (str): 名前
+            gender (Gender): 性別
+            age (int): 年齢
+            post (Post): 役職
+
+        Returns:
+            Optional[Employee]: 採用した社員、採用しなかった場合はNone
+        """
+        return await self._company.add_employee(name, gender, age, post)
+
+    async def delete_employee(self, person: Employee) -> bool:
+        """
+        社員を削除するメソッド（AsyncCompany.delete_employee() と同じ）
+
+        Args:
+            person (Employee): 削除する社員
+
+        Returns:
+            bool: 削除した場合は True
+        """
+        return await self._company.delete_employee(person)
+
+    async def apply_reviews(self, changes: Iterable[Tuple[Employee, int]]) -> ReviewSummary:
+        """
+        人事評価の結果をまとめて反映するメソッド（AsyncCompany.apply_reviews() と同じ）
+
+        Args:
+            changes (Iterable[Tuple[Employee, int]]): (社員, 段階数) の並び
+
+        Returns:
+            ReviewSummary: 反映結果
+        """
+        return await self._company.apply_reviews(changes)
+
+    async def resignation(self) -> Optional["AsyncPresident"]:
+        """
+        辞任するメソッド
+
+        President.resignation() を他の変更と順番に実行し、
+        新しい社長を同じ会社の窓口で包んで返す
+
+        Returns:
+            Optional[AsyncPresident]: 新しい社長の窓口、社員がいない場合はNone
+        """
+        new_president = await self._company.run(self._president.resignation)
+        if new_president is None:
+            return None
+        return AsyncPresident(new_president, self._company)
+
+
+# ===================================================================
+# 会社の登録簿（複数のワーカープロセスに会社を分けて持つ）
+# ===================================================================
+
+def _merge_payroll_reports(reports: Iterable[PayrollReport], band_width: int) -> PayrollReport:
+    """
+    複数の会社の給与計算の結果を1つにまとめる関数
+
+    Args:
+        reports (Iterable[PayrollReport]): まとめる結果（年齢帯の幅はすべて band_width）
+        band_width (int): 年齢帯の幅
+
+    Returns:
+        PayrollReport: 合計した結果
+    """
+    by_post = dict.fromkeys(_POSTS, 0)
+    by_gender = dict.fromkeys(_GENDERS, 0)
+    by_band: Dict[int, int] = {}
+    headcount = 0
+    backend = "numpy" if _numpy is not None else "array"
+    for report in reports:
+        headcount += report.headcount
+        backend = report.backend
+        for post, amount in report.by_post.items():
+            by_post[post] += amount
+        for gender, amount in report.by_gender.items():
+            by_gender[gender] += amount
+        for band, amount in report.by_age_band.items():
+            by_band[band] = by_band.get(band, 0) + amount
+
+    return PayrollReport(
+        total=sum(by_post.values()),
+        headcount=headcount,
+        by_post=by_post,
+        by_gender=by_gender,
+        by_age_band=dict(sorted(by_band.items())),
+        band_width=band_width,
+        backend=backend,
+    )
+
+
+def _employee_record(employee: Employee) -> tuple:
+    """
+    社員をプロセス間で受け渡せるタプルにする関数
+
+    Args:
+        employee (Employee): 社員
+
+    Returns:
+        tuple: (名前, 性別, 年齢, 役職, 社員ID)
+    """
+    return employee.name, employee.gender, employee.age, employee.post, employee.id
+
+
+class _HashRing:
+    """
+    コンシステントハッシュ法で、会社名をシャード（番号）に振り分けるクラス
+
+    各シャードを virtual_nodes 個の点として円（64ビットのハッシュ値）の上に置き、
+    会社名のハッシュ値から時計回りに進んで最初に当たった点のシャードに振り分ける
+    シャードを増やしても、移る会社はおよそ 1 / (シャード数) だけで済む
+
+    ハッシュには hashlib を使う（hash() はプロセスごとに値が変わるため）
+    """
+
+    def __init__(self, shards: Iterable[int], virtual_nodes: int):
+        """
+        _HashRingクラスのコンストラクタ
+
+        Args:
+            shards (Iterable[int]): シャードの番号
+            virtual_nodes (int): 1つのシャードを円の上に置く点の数
+        """
+        if virtual_nodes < 1:
+            raise ValueError(f"virtual_nodes は1以上である必要があります: {virtual_nodes!r}")
+        self._virtual_nodes = virtual_nodes
+        # 円の上の点：(ハッシュ値, シャード番号) をハッシュ値の順に並べる
+        self._points: List[Tuple[int, int]] = []
+        self._hashes: List[int] = []
+        for shard in shards:
+            self.add(shard)
+
+    @staticmethod  # インスタンスを使わないので静的メソッドにする
+    def _hash(key: str) -> int:
+        """
+        文字列を64ビットの整数にするプライベートメソッド
+
+        Args:
+            key (str): 文字列
+
+        Returns:
+            int: ハッシュ値
+        """
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def add(self, shard: int) -> None:
+        """
+        シャードを円の上に置くメソッド
+
+        Args:
+            shard (int): シャードの番号
+
+        Returns:
+            None: 戻り値なし
+        """
+        for replica in range(self._virtual_nodes):
+            bisect.insort(self._points, (self._hash(f"shard-{shard}#{replica}"), shard))
+        self._hashes = [point for point, _ in self._points]
+
+    def remove(self, shard: int) -> None:
+        """
+        シャードを円の上から取り除くメソッド
+
+        Args:
+            shard (int): シャードの番号
+
+        Returns:
+            None: 戻り値なし
+        """
+        self._points = [point for point in self._points if point[1] != shard]
+        self._hashes = [point for point, _ in self._points]
+
+    def shard_of(self, key: str) -> int:
+        """
+        会社名を振り分けるシャードを返すメソッド O(log (シャード数 × virtual_nodes))
+
+        Args:
+            key (str): 会社名
+
+        Returns:
+            int: シャードの番号
+        """
+        if not self._points:
+            raise ValueError("シャードがありません。")
+        index = bisect.bisect(self._hashes, self._hash(key))
+        # 円の最後を過ぎたら先頭に戻る
+        return self._points[index % len(self._points)][1]
+
+
+class _Shard:
+    """
+    1つのシャードが持つ会社の集まり
+
+    ワーカープロセスの中で動き、CompanyRegistry からの依頼を実行する
+    受け渡しはプロセス間で送れる値（タプル・文字列・PayrollReport など）だけで行い、
+    社員は (名前, 性別, 年齢, 役職, 社員ID) のタプルにして返す
+    """
+
+    def __init__(self):
+        """
+        _Shardクラスのコンストラクタ
+        """
+        # 会社名 → 会社
+        self._companies: Dict[str, Company] = {}
+
+    def _company(self, name: str) -> Company:
+        """
+        会社名から会社を取り出すプライベートメソッド
+
+        Args:
+            name (str): 会社名
+
+        Returns:
+            Company: 会社
+
+        Raises:
+            KeyError: 登録されていない会社名の場合
+        """
+        company = self._companies.get(name)
+        if company is None:
+            raise KeyError(f"会社 {name!r} は登録されていません。")
+        return company
+
+    def create_company(self, name: str, capacity: int, storage: str) -> None:
+        """
+        会社を作って登録するメソッド
+
+        シャードの中のメッセージは表示しない（NullSink）
+
+        Args:
+            name (str): 会社名
+            capacity (int): 最大社員数
+            storage (str): 社員データの保存形式
+
+        Returns:
+            None: 戻り値なし
+        """
+        if name in self._companies:
+            raise ValueError(f"会社 {name!r} はすでに登録されています。")
+        company = Company(storage=storage, sink=NullSink())
+        company.MAX_NUMBER_OF_PEOPLE = capacity
+        self._companies[name] = company
+
+    def add_employees(self, name: str, rows: list, mode: str) -> Tuple[List[str], List[Tuple[int, str]]]:
+        """
+        会社に社員をまとめて追加するメソッド
+
+        Args:
+            name (str): 会社名
+            rows (list): 採用する社員データ
+            mode (str): 不正な行があった場合の扱い
+
+        Returns:
+            Tuple[List[str], List[Tuple[int, str]]]: (採用した社員のID, 採用しなかった行)
+        """
+        summary = self._company(name).add_employees(rows, mode)
+        return [employee.id for employee in summary.hired], summary.rejected
+
+    def get_personnel_by_id(self, name: str, id: str) -> Optional[tuple]:
+        """
+        IDで社員を検索するメソッド
+
+        Args:
+            name (str): 会社名
+            id (str): 社員ID
+
+        Returns:
+            Optional[tuple]: 社員のタプル、見つからない場合はNone
         """
-        # 会社が設定されていない場合はNoneを返す
-        if self._company is None:
-            return None
+        employee = self._company(name).get_personnel_by_id(id)
+        return None if employee is None else _employee_record(employee)
 
-        # 会社の全社員をループで検索
-        for employee in self._company.employees:
-            # 社員の名前が一致するかチェック
-            if employee.name == name:
-                # 見つかったらその社員を返す
-                return employee
-        
-        # 見つからなければNoneを返す
-        return None
-
-    def add_employee(self, name: str, gender: Gender, age: int, post: Post) -> None:
+    def delete_employee(self, name: str, id: str) -> bool:
         """
-        社員を追加するメソッド
-        
-        新しい社員を会社に採用する
-        実際の追加処理は Company クラスに委譲
+        IDで指定した社員を削除するメソッド
 
         Args:
-            name (str): 名前
-            gender (Gender): 性別
-            age (int): 年齢
-            post (Post): 役職
+            name (str): 会社名
+            id (str): 社員ID
 
         Returns:
-            None: 戻り値なし
+            bool: 削除した場合は True、見つからない場合は False
         """
-        # 会社が設定されていない場合はエラーメッセージを表示
-        if self._company is None:
-            print("会社が設定されていません。")
-            return  # メソッドを終了
+        company = self._company(name)
+        employee = company.get_personnel_by_id(id)
+        if employee is None:
+            return False
+        company.delete_employees([employee])
+        return True
+
+    def headcounts(self) -> Dict[str, int]:
+        """
+        会社ごとの社員数を返すメソッド
 
-        # 会社の add_employee() メソッドを呼び出して社員を追加
-        self._company.add_employee(name, gender, age, post)
+        Returns:
+            Dict[str, int]: 会社名 → 社員数
+        """
+        return {name: company.current_number for name, company in self._companies.items()}
 
-    def delete_employee(self, person: Employee) -> None:
+    def payroll(self, band_width: int) -> PayrollReport:
         """
-        社員を削除するメソッド
-        
-        指定した社員を会社から退職させる
-        実際の削除処理は Company クラスに委譲
+        このシャードの全社の給与をまとめて集計するメソッド
 
         Args:
-            person (Employee): 削除する社員オブジェクト
+            band_width (int): 年齢帯の幅
 
         Returns:
-            None: 戻り値なし
+            PayrollReport: 集計結果
         """
-        # 会社が設定されていない場合はエラーメッセージを表示
-        if self._company is None:
-            print("会社が設定されていません。")
-            return  # メソッドを終了
-
-        # 会社の delete_employee() メソッドを呼び出して社員を削除
-        self._company.delete_employee(person)
+        return _merge_payroll_reports(
+            (compute_payroll(company, band_width) for company in self._companies.values()), band_width,
+        )
 
-    def resignation(self) -> Optional["President"]:
+    def oldest_executive(self) -> Optional[Tuple[int, str, tuple]]:
         """
-        辞任するメソッド（追加課題）
-        
-        現社長が辞任し、次期社長を選出する
-        次期社長は社員の中から選ばれる
+        このシャードの全社の役員のうち、最年長の人を返すメソッド
+
+        同い年の場合は会社名の順、同じ会社なら先に採用された人を選ぶ
 
         Returns:
-            Optional[President]: 新しい社長、社員がいない場合はNone
+            Optional[Tuple[int, str, tuple]]: (年齢, 会社名, 社員のタプル)、役員がいない場合はNone
         """
-        # 会社が設定されていない場合
-        if self._company is None:
-            print("会社が設定されていません。")
-            return None  # Noneを返してメソッド終了
+        best = None
+        for name, company in self._companies.items():
+            # 役員の年齢順インデックスの先頭を見るだけなので、会社ごとに O(log n)
+            employee = company._store.oldest(Post.YARUIN)
+            if employee is None:
+                continue
+            if best is None or (-employee.age, name) < (-best[0], best[1]):
+                best = (employee.age, name, _employee_record(employee))
+        return best
+
+
+def _run_shard(connection: Any) -> None:
+    """
+    ワーカープロセスで動く関数
 
-        # 社員が0人の場合は辞任できない
-        if len(self._company.employees) == 0:
-            print("いいえ、私以外に社員がいない場合は辞任しないでください")
-            return None  # Noneを返してメソッド終了
+    パイプから (メソッド名, 引数) を受け取り、_Shard のメソッドを実行して
+    (成功したか, 戻り値または例外) を送り返す。None を受け取ったら終了する
 
-        # 会社の select_president() メソッドで次期社長候補を選出
-        # 役員がいれば役員の最年長、いなければ全社員の最年長
-        next_president_employee = self._company.select_president()
+    Args:
+        connection: 親プロセスとつながったパイプ
 
-        # 候補が見つからなかった場合（通常は発生しない）
-        if next_president_employee is None:
-            print("次期社長候補が見つかりません。")
-            return None  # Noneを返してメソッド終了
+    Returns:
+        None: 戻り値なし
+    """
+    shard = _Shard()
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:  # 親プロセスがパイプを閉じた
+            break
+        if message is None:
+            break
+        method, args = message
+        try:
+            reply = (True, getattr(shard, method)(*args))
+        except Exception as error:  # 例外は親プロセスに送り、親プロセスで送出する
+            reply = (False, error)
+        connection.send(reply)
+    connection.close()
+
+
+class _LocalShardClient:
+    """
+    同じプロセスの中でシャードを動かすクライアント（processes=False のとき）
 
-        # 次期社長は社員から昇格するので、社員リストから削除
-        self._company.delete_employee(next_president_employee)
+    _ProcessShardClient と同じ使い方ができる
+    """
 
-        # 選ばれた社員の情報を使って新しいPresidentオブジェクトを作成
-        new_president = President(
-            next_president_employee.name,    # 名前を引き継ぐ
-            next_president_employee.gender,  # 性別を引き継ぐ
-            next_president_employee.age,     # 年齢を引き継ぐ
-        )
+    def __init__(self):
+        """
+        _LocalShardClientクラスのコンストラクタ
+        """
+        self._shard = _Shard()
+        self._reply: Optional[tuple] = None
 
-        # 新社長に会社を設定（setter経由）
-        new_president.company = self._company
+    def send(self, method: str, args: tuple) -> None:
+        """
+        依頼をその場で実行し、結果を取っておくメソッド
+        """
+        try:
+            self._reply = (True, getattr(self._shard, method)(*args))
+        except Exception as error:  # _run_shard() と同じく、例外は結果として返す
+            self._reply = (False, error)
 
-        # 辞任メッセージを表示
-        print(f"{self.name}は{new_president.name}、辞任はだいた！")
+    def receive(self) -> tuple:
+        """
+        取っておいた結果を返すメソッド
 
-        # 新しい社長オブジェクトを返す
-        return new_president
+        Returns:
+            tuple: (成功したか, 戻り値または例外)
+        """
+        reply, self._reply = self._reply, None
+        return reply
 
+    def close(self) -> None:
+        """
+        クライアントを閉じるメソッド（何もしない）
+        """
 
-# ===================================================================
-# クラス：Company（会社）
-# ===================================================================
 
-class Company:
+class _ProcessShardClient:
     """
-    会社を表すクラス
-    
-    社員の管理（追加・削除・検索）を行う
-    社員リストを保持し、次期社長の選出も担当
+    ワーカープロセスでシャードを動かすクライアント
 
-    Attributes:
-        MAX_NUMBER_OF_PEOPLE (int): 最大社員数（クラス変数）
-        current_number (int): 現在の社員数
-        employees (List[Employee]): 社員リスト
+    send() で依頼を送り、receive() で結果を受け取る
+    （全シャードに送ってから受け取れば、シャードは並行して動く）
     """
 
-    # クラス変数：最大社員数を10名に設定
-    # 全てのCompanyインスタンスで共有される
-    MAX_NUMBER_OF_PEOPLE = 10
+    def __init__(self, context: Any):
+        """
+        _ProcessShardClientクラスのコンストラクタ
 
-    def __init__(self):
+        ワーカープロセスを起動する
+
+        Args:
+            context: multiprocessing のコンテキスト
         """
-        Companyクラスのコンストラクタ
-        
-        空の社員リストで初期化
+        self._connection, child = context.Pipe()
+        self._process = context.Process(target=_run_shard, args=(child,), daemon=True)
+        self._process.start()
+        # 子プロセス側の端は、子プロセスに渡したので閉じる
+        child.close()
+
+    def send(self, method: str, args: tuple) -> None:
         """
-        # 空のリストで初期化
-        # List[Employee] は「Employeeオブジェクトのリスト」という型ヒント
-        self._employees: List[Employee] = []
+        依頼をワーカープロセスに送るメソッド
+        """
+        self._connection.send((method, args))
 
-    @property  # プロパティ化
-    def current_number(self) -> int:
+    def receive(self) -> tuple:
         """
-        現在の社員数を取得するプロパティ（getter）
-        
-        社員リストの長さを返す
+        ワーカープロセスから結果を受け取るメソッド
 
         Returns:
-            int: 社員数
+            tuple: (成功したか, 戻り値または例外)
         """
-        # len() 関数でリストの要素数を取得
-        return len(self._employees)
+        return self._connection.recv()
 
-    @property  # プロパティ化
-    def employees(self) -> List[Employee]:
+    def close(self) -> None:
         """
-        社員リストを取得するプロパティ（getter）
-        
-        全社員のリストを返す
+        ワーカープロセスを止めるメソッド
+        """
+        try:
+            self._connection.send(None)
+        except (OSError, ValueError):  # すでにパイプが閉じている
+            pass
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._connection.close()
+
+
+class CompanyRegistry:
+    """
+    多数の会社（子会社など）を、複数のワーカープロセス（シャード）に分けて管理するクラス
 
-        Returns:
-            List[Employee]: 社員リスト
+    会社は会社名のコンシステントハッシュでシャードに振り分けられ、
+    採用・検索・削除は、その会社を持つシャードだけに送られる
+    全社の集計（社員数・給与・最年長の役員）は、全シャードに同時に依頼して結果を合わせる
+    （scatter-gather）
+
+    会社・社員のオブジェクトはワーカープロセスの中にあるので、
+    社員は会社に所属しない Employee のコピーとして返す（昇進させても会社には反映されない）
+
+    processes=False にすると、シャードを同じプロセスの中で動かす（デバッグ用）
+
+    Attributes:
+        DEFAULT_SHARDS (int): 既定のシャード数（クラス変数）
+        VIRTUAL_NODES (int): 1つのシャードをハッシュの円の上に置く点の数（クラス変数）
+        shard_count (int): シャード数
+    """
+
+    DEFAULT_SHARDS = 4
+    VIRTUAL_NODES = 64
+
+    def __init__(self, shards: int = DEFAULT_SHARDS, processes: bool = True, virtual_nodes: int = VIRTUAL_NODES):
+        """
+        CompanyRegistryクラスのコンストラクタ
+
+        processes=True の場合は、ここでシャードの数だけワーカープロセスを起動する
+
+        Args:
+            shards (int): シャード数
+            processes (bool): シャードをワーカープロセスで動かすか
+            virtual_nodes (int): 1つのシャードをハッシュの円の上に置く点の数
         """
-        return self._employees  # 内部の _employees を返す
+        if shards < 1:
+            raise ValueError(f"shards は1以上である必要があります: {shards!r}")
+        self._ring = _HashRing(range(shards), virtual_nodes)
+        if processes:
+            context = multiprocessing.get_context()
+            self._clients: List[Any] = [_ProcessShardClient(context) for _ in range(shards)]
+        else:
+            self._clients = [_LocalShardClient() for _ in range(shards)]
+        # パイプは同時に1つの依頼しか扱えないので、シャードごとにロックを持つ
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._closed = False
 
     @property  # プロパティ化
-    def number_of_employee(self) -> int:
+    def shard_count(self) -> int:
         """
-        社員数を取得するプロパティ（getter）
-        
-        current_number と同じ（互換性のため残されている）
+        シャード数を取得するプロパティ（getter）
 
         Returns:
-            int: 社員数
+            int: シャード数
         """
-        return len(self._employees)  # リストの長さを返す
+        return len(self._clients)
 
-    def get_personnel_by_id(self, id: str) -> Optional[Employee]:
+    def shard_of(self, company: str) -> int:
         """
-        IDで社員を検索するメソッド
-        
-        社員IDを指定して該当する社員を検索
+        会社を持つシャードの番号を返すメソッド
 
         Args:
-            id (str): 社員ID
+            company (str): 会社名
 
         Returns:
-            Optional[Employee]: 見つかった社員、見つからない場合はNone
+            int: シャードの番号
         """
-        # 社員リストをループで検索
-        for employee in self._employees:
-            # 社員のIDが一致するかチェック
-            if employee.id == id:
-                # 見つかったらその社員を返す
-                return employee
-        
-        # 見つからなければNoneを返す
-        return None
-
-    def get_personnel_by_name(self, name: str) -> Optional[Employee]:
+        return self._ring.shard_of(company)
+
+    def create_company(
+        self,
+        company: str,
+        capacity: int = Company.MAX_NUMBER_OF_PEOPLE,
+        storage: str = Company.OBJECT_STORAGE,
+    ) -> None:
         """
-        名前で社員を検索するメソッド
-        
-        社員名を指定して該当する社員を検索
+        会社を作って登録するメソッド
 
         Args:
-            name (str): 社員名
+            company (str): 会社名
+            capacity (int): 最大社員数
+            storage (str): 社員データの保存形式
 
         Returns:
-            Optional[Employee]: 見つかった社員、見つからない場合はNone
+            None: 戻り値なし
+
+        Raises:
+            ValueError: 同じ名前の会社がすでに登録されている場合
         """
-        # 社員リストをループで検索
-        for employee in self._employees:
-            # 社員の名前が一致するかチェック
-            if employee.name == name:
-                # 見つかったらその社員を返す
-                return employee
-        
-        # 見つからなければNoneを返す
-        return None
+        self._call(company, "create_company", company, capacity, storage)
 
-    def add_employee(self, name: str, gender: Gender, age: int, post: Post) -> None:
+    def add_employee(self, company: str, name: str, gender: Gender, age: int, post: Post) -> Optional[str]:
         """
-        社員を追加するメソッド
-        
-        新しい社員を作成して社員リストに追加
-        最大社員数を超える場合は追加しない
+        会社に社員を追加するメソッド
 
         Args:
+            company (str): 会社名
             name (str): 名前
             gender (Gender): 性別
             age (int): 年齢
             post (Post): 役職
 
         Returns:
-            None: 戻り値なし
+            Optional[str]: 採用した社員のID、最大社員数に達していて採用しなかった場合はNone
+
+        Raises:
+            ValueError: 名前・性別・年齢・役職が不正な場合
+            KeyError: 登録されていない会社名の場合
         """
-        # 現在の社員数が最大数以上かチェック
-        if self.current_number >= self.MAX_NUMBER_OF_PEOPLE:
-            # 上限に達している場合はエラーメッセージを表示
-            print(f"社員数が上限（{self.MAX_NUMBER_OF_PEOPLE}名）に達しています。")
-            return  # メソッドを終了（追加しない）
+        row = (name, gender, age, post)
+        reason = Company._validate_row(row)
+        if reason is not None:
+            raise ValueError(reason)
+        hired, _ = self._call(company, "add_employees", company, [row], Company.BEST_EFFORT)
+        return hired[0] if hired else None
+
+    def add_employees(
+        self, company: str, rows: Any, mode: str = Company.ALL_OR_NOTHING,
+    ) -> Tuple[List[str], List[Tuple[int, str]]]:
+        """
+        会社に社員をまとめて追加するメソッド（1回の依頼で送る）
 
-        # 新しいEmployeeオブジェクトを作成
-        # コンストラクタに名前・性別・年齢・役職を渡す
-        new_employee = Employee(name, gender, age, post)
-        
-        # 社員リストに新しい社員を追加
-        self._employees.append(new_employee)
-        
-        # 採用メッセージを表示
-        print(f"{name}さん（ID: {new_employee.id}）を採用しました。")
+        Args:
+            company (str): 会社名
+            rows (Any): 採用する社員データ（Company.add_employees() と同じ形式）
+            mode (str): 不正な行があった場合の扱い
 
-    def delete_employee(self, person: Employee) -> None:
+        Returns:
+            Tuple[List[str], List[Tuple[int, str]]]: (採用した社員のID, 採用しなかった行)
         """
-        社員を削除するメソッド
-        
-        指定された社員を社員リストから削除
+        if not isinstance(rows, Mapping):
+            rows = list(rows)
+        return self._call(company, "add_employees", company, rows, mode)
+
+    def get_personnel_by_id(self, company: str, id: str) -> Optional[Employee]:
+        """
+        会社の社員をIDで検索するメソッド
 
         Args:
-            person (Employee): 削除する社員オブジェクト
+            company (str): 会社名
+            id (str): 社員ID
 
         Returns:
-            None: 戻り値なし
+            Optional[Employee]: 社員のコピー（会社に所属しない）、見つからない場合はNone
         """
-        # 社員がリストに存在するかチェック（in演算子）
-        if person in self._employees:
-            # 存在する場合はリストから削除
-            self._employees.remove(person)
-            # 削除メッセージを表示
-            print(f"{person.name}さんを削除しました。")
-        else:
-            # 存在しない場合はエラーメッセージを表示
-            print(f"{person.name}さんは社員リストに存在しません。")
+        record = self._call(company, "get_personnel_by_id", company, id)
+        return None if record is None else Employee(*record)
 
-    def select_president(self) -> Optional[Employee]:
+    def delete_employee(self, company: str, id: str) -> bool:
         """
-        次期社長を選出するメソッド（追加課題）
-        
-        次期社長選出基準:
-        1. 役員がいる場合：役員の中で最年長の人
-        2. 役員がいない場合：全社員の中で最年長の人
+        会社の社員をIDで指定して削除するメソッド
+
+        Args:
+            company (str): 会社名
+            id (str): 社員ID
 
         Returns:
-            Optional[Employee]: 次期社長候補、社員がいない場合はNone
+            bool: 削除した場合は True、見つからない場合は False
         """
-        # 社員が0人の場合はNoneを返す
-        if len(self._employees) == 0:
-            return None
+        return self._call(company, "delete_employee", company, id)
 
-        # リスト内包表記で役員のみを抽出
-        # [条件に合う要素 for 要素 in リスト if 条件]
-        executives = [emp for emp in self._employees if emp.post == Post.YARUIN]
+    def headcounts(self) -> Dict[str, int]:
+        """
+        全社の社員数を、会社名ごとに返すメソッド（全シャードに依頼する）
 
-        # 役員リストが空でないかチェック
-        if executives:
-            # max() 関数で最年長の役員を選出
-            # key=lambda e: e.age で「年齢を比較基準にする」という意味
-            return max(executives, key=lambda e: e.age)
-        else:
-            # 役員がいない場合は全社員から最年長を選出
-            return max(self._employees, key=lambda e: e.age)
+        Returns:
+            Dict[str, int]: 会社名 → 社員数（会社名の順）
+        """
+        merged: Dict[str, int] = {}
+        for counts in self._scatter("headcounts"):
+            merged.update(counts)
+        return dict(sorted(merged.items()))
 
-    def display_all_employees(self) -> None:
+    def headcount(self) -> int:
         """
-        全社員の情報を表示するメソッド
-        
-        社員一覧を表形式で見やすく表示
+        全社の社員数の合計を返すメソッド（全シャードに依頼する）
+
+        Returns:
+            int: 社員数の合計
+        """
+        return sum(self.headcounts().values())
+
+    def payroll(self, band_width: int = Company.PAYROLL_BAND_WIDTH) -> PayrollReport:
+        """
+        全社の給与をまとめて集計するメソッド（全シャードに依頼する）
+
+        各シャードが自分の会社の分を集計し、最後にここで合計する
+
+        Args:
+            band_width (int): 年齢帯の幅（歳）
+
+        Returns:
+            PayrollReport: 全社の給与の合計と内訳
+        """
+        return _merge_payroll_reports(self._scatter("payroll", band_width), band_width)
+
+    def oldest_executive(self) -> Optional[Tuple[str, Employee]]:
+        """
+        全社の役員のうち、最年長の人を返すメソッド（全シャードに依頼する）
+
+        同い年の場合は会社名の順、同じ会社なら先に採用された人を選ぶ
+
+        Returns:
+            Optional[Tuple[str, Employee]]: (会社名, 社員のコピー)、役員がいない場合はNone
+        """
+        candidates = [candidate for candidate in self._scatter("oldest_executive") if candidate is not None]
+        if not candidates:
+            return None
+        _, company, record = min(candidates, key=lambda candidate: (-candidate[0], candidate[1]))
+        return company, Employee(*record)
+
+    def close(self) -> None:
+        """
+        ワーカープロセスを止めるメソッド
 
         Returns:
             None: 戻り値なし
         """
-        # 社員が0人の場合
-        if len(self._employees) == 0:
-            print("社員がいません。")
-            return  # メソッドを終了
+        if self._closed:
+            return
+        self._closed = True
+        for client in self._clients:
+            client.close()
 
-        # ヘッダー部分を表示
-        # "=" * 60 で "=" を60個繰り返した文字列を作成（区切り線）
-        print(f"\n{'='*60}")
-        
-        # タイトルを中央揃えで表示
-        # ^54 は「54文字幅で中央揃え」という意味
-        print(f"{'社員一覧':^54}")
-        
-        # 区切り線を表示
-        print(f"{'='*60}")
-        
-        # テーブルのヘッダー行を表示
-        # <15 は「15文字幅で左揃え」という意味
-        print(f"{'名前':<15} {'性別':<10} {'年齢':<5} {'役職':<10} {'ID':<10}")
-        
-        # ヘッダーとデータの区切り線
-        # "-" * 60 で "-" を60個繰り返した文字列を作成
-        print(f"{'-'*60}")
+    def __enter__(self) -> "CompanyRegistry":
+        """
+        with 文の開始時に呼ばれるメソッド
 
-        # 社員リストをループで表示
-        for emp in self._employees:
-            # 各社員の情報を1行ずつ表示
-            # emp.name で名前、emp.gender.value で性別の文字列、など
-            print(
-                f"{emp.name:<15} {emp.gender.value:<10} {emp.age:<5} {emp.post.value:<10} {emp.id:<10}"
-            )
+        Returns:
+            CompanyRegistry: 自分自身
+        """
+        return self
 
-        # フッター部分を表示
-        print(f"{'='*60}")
-        
-        # 合計人数を表示
-        # self.current_number でプロパティ経由で社員数を取得
-        print(f"合計: {self.current_number}名\n")
+    def __exit__(self, *exc_info: Any) -> None:
+        """
+        with 文の終了時にワーカープロセスを止めるメソッド
+        """
+        self.close()
+
+    def _call(self, company: str, method: str, *args: Any) -> Any:
+        """
+        会社を持つシャードに依頼し、結果を待つプライベートメソッド
+
+        Args:
+            company (str): 会社名
+            method (str): _Shard のメソッド名
+            *args: メソッドに渡す引数
+
+        Returns:
+            Any: メソッドの戻り値（シャードで例外が起きた場合は、その例外を送出する）
+        """
+        if self._closed:
+            raise ValueError("CompanyRegistry は閉じられています。")
+        shard = self._ring.shard_of(company)
+        with self._locks[shard]:
+            client = self._clients[shard]
+            client.send(method, args)
+            ok, result = client.receive()
+        if not ok:
+            raise result
+        return result
+
+    def _scatter(self, method: str, *args: Any) -> List[Any]:
+        """
+        全シャードに同じ依頼を送り、全員の結果を集めるプライベートメソッド（scatter-gather）
+
+        先に全シャードに送ってから受け取るので、シャードは並行して集計する
+
+        Args:
+            method (str): _Shard のメソッド名
+            *args: メソッドに渡す引数
+
+        Returns:
+            List[Any]: シャードの番号順の戻り値
+        """
+        if self._closed:
+            raise ValueError("CompanyRegistry は閉じられています。")
+        # ロックは番号順に取る（他のスレッドと逆順に取り合って止まらないように）
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            for client in self._clients:
+                client.send(method, args)
+            replies = [client.receive() for client in self._clients]
+        finally:
+            for lock in self._locks:
+                lock.release()
+        for ok, result in replies:
+            if not ok:
+                raise result
+        return [result for _, result in replies]
 
 
 # ===================================================================
@@ -877,11 +8024,12 @@ def main():
         ("周 八郎", Gender.MAN, 21, Post.YARUIN),           # 役員
     ]
 
-    # リストの各要素（タプル）をループで取り出す
-    # for 変数1, 変数2, 変数3, 変数4 in リスト: でアンパック
-    for name, gender, age, post in employees_data:
-        # 社長のadd_employeeメソッドを呼び出して社員を追加
-        president.add_employee(name, gender, age, post)
+    # 社長のadd_employeesメソッドでまとめて採用
+    # 上限チェックとID採番はまとめて1回だけ行われ、結果がオブジェクトで返る
+    hiring_summary = president.add_employees(employees_data)
+    # 採用できた社員のIDを表示
+    for employee in hiring_summary.hired:
+        print(f"  {employee.name}さん（ID: {employee.id}）")
 
     # ===================================================================
     # 4. 社員一覧の表示
@@ -967,8 +8115,8 @@ def main():
     # ===================================================================
     print("\n■ 9. 社員削除テスト")  # セクションタイトル
     
-    # 社員が1人以上いるかチェック
-    if len(company.employees) > 0:
+    # 社員が1人以上いるかチェック（社員リストを作らずに社員数を見る）
+    if company.current_number > 0:
         # 社員リストの最初の社員を取得
         # インデックス[0]で最初の要素にアクセス
         employee_to_delete = company.employees[0]
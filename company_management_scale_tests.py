@@ -0,0 +1,2870 @@
+"""
+会社管理システムの大規模運用向け機能のテストスイート
+
+company_management_complete_tests.py が基本機能を確認するのに対し、
+このモジュールは社員数が多い会社を想定した機能（インデックスなど）をテストします。
+
+Test Classes:
+    TestPersonnelIndexes: ID・名前インデックスのテスト
+    TestIdAllocators: 社員ID採番クラスのテスト
+    TestBulkHiring: 一括採用のテスト
+    TestBulkDeletion: 一括削除のテスト
+    TestSelectPresident: 次期社長候補ヒープのテスト
+    TestColumnarStorage: 列形式のストレージのテスト
+    TestSlots: __slots__ によるコンパクトなクラスのテスト
+    TestPayroll: 給与計算のテスト
+    TestReviews: 役職の順位と人事評価の一括反映のテスト
+    TestOutputSinks: メッセージの出力先（シンク）のテスト
+    TestEmployeeTable: 社員一覧の表（ページ分割・列の選択）のテスト
+    TestSnapshot: スナップショット（保存と読み込み）のテスト
+    TestSqliteStorage: SQLite 形式のストレージのテスト
+    TestThreadSafety: スレッドセーフな会社のテスト
+    TestAsyncFacade: asyncio の窓口（AsyncCompany・AsyncPresident）のテスト
+    TestCompanyRegistry: 会社の登録簿（シャード分割）のテスト
+    TestEmployeeQuery: 社員の検索（クエリ）のテスト
+    TestAgeIndex: 年齢順インデックス（範囲・上位・パーセンタイル）のテスト
+    TestNameSearch: 名前の全員検索（完全一致・表記ゆれ・前方一致）のテスト
+    TestEventLog: 変更履歴（イベントログ）の記録と再生のテスト
+    TestStorageBackends: 3つのストレージで基本機能が同じように動くかのテスト
+
+実行方法:
+    pytest company_management_scale_tests.py -v
+"""
+
+import asyncio
+import io
+import logging
+import operator
+import random
+import sqlite3
+import sys
+import threading
+import unicodedata
+
+import pytest
+import company_management
+from company_management import (
+    Gender, Post, Human, Employee, President, Company,
+    IdAllocator, CounterIdAllocator, SnowflakeIdAllocator, BlockIdAllocator,
+    compute_payroll,
+    OutputSink, PrintSink, NullSink, BufferedSink, ListSink, LoggingSink,
+    get_default_sink, set_default_sink,
+    AsyncCompany, AsyncPresident, CompanyRegistry, EmployeeQuery, ChangeLog,
+)
+
+
+# ============================================================
+# テストクラス1: ID・名前インデックスのテスト
+# ============================================================
+
+class TestPersonnelIndexes:
+    """
+    ID・名前インデックスのテストクラス
+
+    テスト項目:
+    - 追加した社員がインデックスから検索できるか
+    - 削除した社員がインデックスから消えるか
+    - 同姓同名の扱い
+    """
+
+    def test_lookup_after_add(self):
+        """
+        追加した社員をIDと名前で検索できることを確認
+        """
+        company = Company()
+        company.add_employee("太郎", Gender.MAN, 25, Post.HIRA)
+        company.add_employee("花子", Gender.WOMAN, 30, Post.SYUNIN)
+
+        for employee in company.employees:
+            assert company.get_personnel_by_id(employee.id) is employee
+            assert company.get_personnel_by_name(employee.name) is employee
+
+    def test_lookup_after_delete(self):
+        """
+        削除した社員がインデックスから消えることを確認
+        """
+        company = Company()
+        company.add_employee("太郎", Gender.MAN, 25, Post.HIRA)
+        taro = company.employees[0]
+
+        company.delete_employee(taro)
+
+        assert company.get_personnel_by_id(taro.id) is None
+        assert company.get_personnel_by_name("太郎") is None
+
+    def test_same_name_returns_first_hired(self):
+        """
+        同姓同名の場合は先に採用された社員が返り、
+        その社員を削除すると次の社員が返ることを確認
+        """
+        company = Company()
+        company.add_employee("佐藤 太郎", Gender.MAN, 25, Post.HIRA)
+        company.add_employee("佐藤 太郎", Gender.MAN, 40, Post.KATYO)
+        first, second = company.employees
+
+        assert company.get_personnel_by_name("佐藤 太郎") is first
+
+        company.delete_employee(first)
+        assert company.get_personnel_by_name("佐藤 太郎") is second
+
+    def test_president_uses_company_index(self):
+        """
+        社長の検索メソッドが会社と同じ結果を返すことを確認
+        """
+        president = President("倍井 杉蔵", Gender.MAN, 88)
+        company = Company()
+        president.company = company
+        president.add_employee("太郎", Gender.MAN, 25, Post.HIRA)
+        taro = company.employees[0]
+
+        assert president.get_personnel_by_id(taro.id) is taro
+        assert president.get_personnel_by_name("太郎") is taro
+        assert president.get_personnel_by_name("存在しない") is None
+
+
+# ============================================================
+# テストクラス2: 社員ID採番クラスのテスト
+# ============================================================
+
+class TestIdAllocators:
+    """
+    社員ID採番クラスのテストクラス
+
+    テスト項目:
+    - 会社内でIDが重複しないか
+    - まとめて払い出したIDが重複しないか
+    - 複数スレッドから同時に採番しても重複しないか
+    """
+
+    def test_company_ids_are_unique(self):
+        """
+        大量に採用してもIDが重複しないことを確認
+        """
+        company = Company()
+        company.MAX_NUMBER_OF_PEOPLE = 20000
+        for i in range(20000):
+            company.add_employee(f"社員{i}", Gender.MAN, 25, Post.HIRA)
+
+        ids = [emp.id for emp in company.employees]
+        assert len(set(ids)) == 20000
+
+    def test_counter_starts_with_four_digits(self):
+        """
+        連番の最初のIDが従来どおり4桁の数字であることを確認
+        """
+        company = Company()
+        company.add_employee("太郎", Gender.MAN, 25, Post.HIRA)
+
+        assert company.employees[0].id == "1000"
+
+    def test_custom_allocator(self):
+        """
+        会社に採番クラスを渡せることを確認
+        """
+        company = Company(id_allocator=CounterIdAllocator(start=500000))
+        company.add_employee("太郎", Gender.MAN, 25, Post.HIRA)
+
+        assert company.employees[0].id == "500000"
+        assert company.get_personnel_by_id("500000") is company.employees[0]
+
+    @pytest.mark.parametrize("allocator_factory", [
+        CounterIdAllocator,
+        SnowflakeIdAllocator,
+        lambda: BlockIdAllocator(block_size=7),
+    ])
+    def test_block_and_single_ids_do_not_overlap(self, allocator_factory):
+        """
+        1件ずつの採番とまとめての採番を混ぜても重複しないことを確認
+        """
+        allocator = allocator_factory()
+        ids = [allocator.allocate() for _ in range(10)]
+        ids.extend(allocator.allocate_block(10000))
+        ids.append(allocator.allocate())
+
+        assert len(set(ids)) == len(ids)
+
+    @pytest.mark.parametrize("allocator_factory", [
+        CounterIdAllocator,
+        SnowflakeIdAllocator,
+        lambda: BlockIdAllocator(block_size=16),
+    ])
+    def test_thread_safety(self, allocator_factory):
+        """
+        複数スレッドから同時に採番しても重複しないことを確認
+        """
+        allocator = allocator_factory()
+        results = [[] for _ in range(8)]
+
+        def worker(out):
+            for _ in range(2000):
+                out.append(allocator.allocate())
+            out.extend(allocator.allocate_block(100))
+
+        threads = [threading.Thread(target=worker, args=(out,)) for out in results]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        ids = [i for out in results for i in out]
+        assert len(set(ids)) == len(ids) == 8 * 2100
+
+    def test_snowflake_ids_are_increasing(self):
+        """
+        Snowflake方式のIDが採番順に増えていくことを確認
+        """
+        allocator = SnowflakeIdAllocator(worker_id=3)
+        ids = list(allocator.allocate_block(10000)) + [allocator.allocate()]
+
+        assert ids == sorted(ids)
+        assert all((i >> SnowflakeIdAllocator.SEQUENCE_BITS) & 0x3FF == 3 for i in ids)
+
+
+# ============================================================
+# テストクラス3: 一括採用のテスト
+# ============================================================
+
+# 一括採用のテストで使う採用データ
+BULK_ROWS = [
+    ("太郎", Gender.MAN, 25, Post.HIRA),
+    ("花子", Gender.WOMAN, 30, Post.SYUNIN),
+    ("次郎", Gender.MAN, 35, Post.KATYO),
+]
+BULK_FIELDS = ("name", "gender", "age", "post")
+
+
+class TestBulkHiring:
+    """
+    一括採用（add_employees）のテストクラス
+
+    テスト項目:
+    - タプル・辞書・列形式のどれでも採用できるか
+    - 上限チェックと不正な行の扱い（全件 or 可能な分だけ）
+    - 1行ずつメッセージを表示しないか
+    """
+
+    @pytest.mark.parametrize("rows", [
+        BULK_ROWS,
+        [dict(zip(BULK_FIELDS, row)) for row in BULK_ROWS],
+        {key: [row[i] for row in BULK_ROWS] for i, key in enumerate(BULK_FIELDS)},
+    ], ids=["tuples", "dicts", "columns"])
+    def test_input_formats(self, rows):
+        """
+        タプル・辞書・列形式のどれでも同じように採用できることを確認
+        """
+        company = Company()
+
+        summary = company.add_employees(rows)
+
+        assert summary.ok
+        assert summary.hired_count == 3
+        assert [emp.name for emp in company.employees] == ["太郎", "花子", "次郎"]
+        assert company.get_personnel_by_name("花子").post == Post.SYUNIN
+        assert company.get_personnel_by_id(summary.hired[2].id) is summary.hired[2]
+
+    def test_single_summary_line(self, capsys):
+        """
+        1人ずつではなく1行だけメッセージを表示することを確認
+        """
+        company = Company()
+        company.add_employees(BULK_ROWS)
+
+        captured = capsys.readouterr()
+        assert captured.out.count("\n") == 1
+        assert "3名を採用しました" in captured.out
+
+    def test_all_or_nothing_rejects_everything(self):
+        """
+        全件モードでは1行でも不正なら誰も採用しないことを確認
+        """
+        company = Company()
+        rows = BULK_ROWS + [("不正", "男性", 20, Post.HIRA)]
+
+        summary = company.add_employees(rows, Company.ALL_OR_NOTHING)
+
+        assert company.current_number == 0
+        assert summary.hired_count == 0
+        assert [index for index, _ in summary.rejected] == [0, 1, 2, 3]
+
+    def test_aborted_message_counts(self):
+        """
+        中止のメッセージで、問題のある行と取り消した行を分けて数えることを確認
+        """
+        sink = ListSink()
+        company = Company(sink=sink)
+        rows = BULK_ROWS + [("不正", "男性", 20, Post.HIRA), ("不正", Gender.MAN, -1, Post.HIRA)]
+
+        company.add_employees(rows, Company.ALL_OR_NOTHING)
+
+        assert [event.kind for event in sink.events] == ["bulk_hiring_aborted"]
+        assert sink.events[0].fields == {"invalid": 2, "rolled_back": 3}
+        assert "問題のある行: 2件、取り消した行: 3件" in sink.events[0].message
+
+    def test_best_effort_skips_bad_rows(self):
+        """
+        可能な分だけモードでは不正な行だけを飛ばすことを確認
+        """
+        company = Company()
+        rows = [("不正", Gender.MAN, -1, Post.HIRA)] + BULK_ROWS
+
+        summary = company.add_employees(rows, Company.BEST_EFFORT)
+
+        assert company.current_number == 3
+        assert summary.rejected[0][0] == 0
+        assert "年齢" in summary.rejected[0][1]
+
+    def test_capacity_checked_once(self):
+        """
+        上限を超える分は採用されないことを確認
+        """
+        company = Company()
+        rows = [(f"社員{i}", Gender.MAN, 25, Post.HIRA) for i in range(12)]
+
+        all_or_nothing = company.add_employees(rows)
+        assert all_or_nothing.hired_count == 0
+        assert company.current_number == 0
+
+        best_effort = company.add_employees(rows, Company.BEST_EFFORT)
+        assert best_effort.hired_count == Company.MAX_NUMBER_OF_PEOPLE
+        assert [index for index, _ in best_effort.rejected] == [10, 11]
+        assert company.current_number == Company.MAX_NUMBER_OF_PEOPLE
+
+    def test_president_add_employees(self):
+        """
+        社長からも一括採用できることを確認
+        """
+        president = President("倍井 杉蔵", Gender.MAN, 88)
+        assert president.add_employees(BULK_ROWS) is None
+
+        company = Company()
+        president.company = company
+        summary = president.add_employees(BULK_ROWS)
+
+        assert summary.hired_count == 3
+        assert company.current_number == 3
+
+
+# ============================================================
+# テストクラス4: 一括削除のテスト
+# ============================================================
+
+class TestBulkDeletion:
+    """
+    一括削除（delete_employees）のテストクラス
+
+    テスト項目:
+    - まとめて削除でき、残りの順序が保たれるか
+    - インデックスが正しく更新されるか
+    - 存在しない社員・重複指定の扱い
+    """
+
+    def _make_company(self, count):
+        """
+        count 人の社員がいる会社を作るヘルパーメソッド
+        """
+        company = Company()
+        company.MAX_NUMBER_OF_PEOPLE = count
+        company.add_employees([(f"社員{i % 3}", Gender.MAN, 20 + i, Post.HIRA) for i in range(count)])
+        return company
+
+    def test_delete_many(self):
+        """
+        まとめて削除でき、残った社員の順序とインデックスが正しいことを確認
+        """
+        company = self._make_company(9)
+        doomed = company.employees[::2]
+        survivors = company.employees[1::2]
+
+        summary = company.delete_employees(doomed)
+
+        assert summary.ok
+        assert summary.deleted_count == 5
+        assert company.employees == survivors
+        for person in doomed:
+            assert company.get_personnel_by_id(person.id) is None
+        for person in survivors:
+            assert company.get_personnel_by_id(person.id) is person
+        # 同名の社員は採用順で最初の残った社員が返る
+        assert company.get_personnel_by_name("社員1") is survivors[0]
+        assert company.get_personnel_by_name("社員0") is survivors[1]
+
+    def test_not_found_and_duplicates(self, capsys):
+        """
+        存在しない社員と重複指定が「存在しない」として報告されることを確認
+        """
+        company = self._make_company(3)
+        target = company.employees[0]
+        outsider = Employee("部外者", Gender.MAN, 30, Post.HIRA, id=company.employees[1].id)
+
+        summary = company.delete_employees([target, target, outsider])
+
+        assert summary.deleted == [target]
+        assert summary.not_found == [target, outsider]
+        assert company.current_number == 2
+
+        captured = capsys.readouterr()
+        assert captured.out.count("削除しました") == 1
+
+    def test_single_delete_ignores_same_id_outsider(self):
+        """
+        同じIDを持つ別人は1人ずつの削除でも削除されないことを確認
+        """
+        company = self._make_company(2)
+        outsider = Employee("部外者", Gender.MAN, 30, Post.HIRA, id=company.employees[0].id)
+
+        company.delete_employee(outsider)
+
+        assert company.current_number == 2
+
+
+# ============================================================
+# テストクラス5: 次期社長候補ヒープのテスト
+# ============================================================
+
+def naive_select_president(company):
+    """
+    従来の（リスト内包表記＋max）方法で次期社長を選出する比較用の関数
+    """
+    if not company.employees:
+        return None
+    executives = [emp for emp in company.employees if emp.post == Post.YARUIN]
+    return max(executives or company.employees, key=lambda e: e.age)
+
+
+class TestSelectPresident:
+    """
+    次期社長候補ヒープのテストクラス
+
+    テスト項目:
+    - 同い年の場合に先に採用された社員が選ばれるか
+    - 採用・削除・昇進・降格を繰り返しても従来の方法と同じ結果になるか
+    """
+
+    def test_tie_breaks_by_hire_order(self):
+        """
+        同い年の役員がいる場合は先に採用された役員が選ばれることを確認
+        """
+        company = Company()
+        company.add_employees([
+            ("若手", Gender.MAN, 30, Post.YARUIN),
+            ("先輩", Gender.MAN, 50, Post.YARUIN),
+            ("後輩", Gender.WOMAN, 50, Post.YARUIN),
+        ])
+
+        assert company.select_president().name == "先輩"
+
+    def test_promotion_makes_candidate(self):
+        """
+        昇進で役員になった社員が候補になり、降格で外れることを確認
+        """
+        company = Company()
+        company.add_employees([
+            ("課長", Gender.MAN, 60, Post.KATYO),
+            ("役員", Gender.MAN, 40, Post.YARUIN),
+        ])
+        katyo = company.get_personnel_by_name("課長")
+
+        katyo.promote()
+        assert company.select_president() is katyo
+
+        katyo.demote()
+        assert company.select_president().name == "役員"
+
+    def test_matches_naive_selection(self):
+        """
+        ランダムな操作を繰り返しても従来の方法と同じ社員が選ばれることを確認
+        """
+        rng = random.Random(2025)
+        company = Company()
+        company.MAX_NUMBER_OF_PEOPLE = 10 ** 6
+
+        for step in range(3000):
+            action = rng.random()
+            if action < 0.4 or company.current_number == 0:
+                company.add_employee(
+                    f"社員{step}", Gender.MAN, rng.randint(18, 70), rng.choice(list(Post))
+                )
+            elif action < 0.6:
+                company.delete_employee(rng.choice(company.employees))
+            elif action < 0.8:
+                rng.choice(company.employees).promote()
+            else:
+                rng.choice(company.employees).demote()
+
+            assert company.select_president() is naive_select_president(company)
+
+        # 削除した社員は昇進しても会社のインデックスに影響しない
+        leaver = company.employees[0]
+        company.delete_employee(leaver)
+        leaver.promote()
+        assert company.select_president() is naive_select_president(company)
+
+
+# ============================================================
+# テストクラス6: 列形式のストレージのテスト
+# ============================================================
+
+class TestColumnarStorage:
+    """
+    列形式のストレージ（Company.COLUMNAR_STORAGE）のテストクラス
+
+    テスト項目:
+    - 公開プロパティ・検索メソッドがオブジェクト形式と同じ結果になるか
+    - 昇進・降格・削除が列に反映されるか
+    """
+
+    def _make_pair(self):
+        """
+        同じ社員を採用したオブジェクト形式と列形式の会社を作るヘルパーメソッド
+        """
+        rows = [(f"社員{i % 5}", list(Gender)[i % 3], 20 + i * 7 % 45, list(Post)[i % 4]) for i in range(10)]
+        object_company = Company()
+        columnar_company = Company(storage=Company.COLUMNAR_STORAGE)
+        object_company.add_employees(rows)
+        columnar_company.add_employees(rows)
+        return object_company, columnar_company
+
+    @staticmethod
+    def _snapshot(company):
+        """
+        会社の全社員を比較しやすいタプルのリストにするヘルパーメソッド
+        """
+        return [(e.name, e.gender, e.age, e.post, e.id, e.salary) for e in company.employees]
+
+    def test_same_results_as_object_storage(self):
+        """
+        採用直後の社員一覧・検索結果がオブジェクト形式と同じことを確認
+        """
+        object_company, columnar_company = self._make_pair()
+
+        assert columnar_company.storage == "columnar"
+        assert columnar_company.current_number == object_company.current_number == 10
+        assert self._snapshot(columnar_company) == self._snapshot(object_company)
+        for emp in object_company.employees:
+            found = columnar_company.get_personnel_by_id(emp.id)
+            assert (found.name, found.post) == (emp.name, emp.post)
+            assert columnar_company.get_personnel_by_name(emp.name).id == object_company.get_personnel_by_name(emp.name).id
+        assert columnar_company.get_personnel_by_id("9999") is None
+        assert columnar_company.get_personnel_by_id("abc") is None
+        assert columnar_company.select_president().id == object_company.select_president().id
+
+    @pytest.mark.parametrize("storage", ["object", "columnar", "sqlite"])
+    @pytest.mark.parametrize("age", [30.5, "30", -1, 65536, True])
+    def test_add_employee_rejects_invalid_age(self, storage, age):
+        """
+        不正な年齢の採用は、どのストレージでも ValueError になり何も変わらないことを確認
+        """
+        company = Company(storage=storage)
+        company.add_employee("太郎", Gender.MAN, 40, Post.KATYO)
+
+        with pytest.raises(ValueError, match="年齢"):
+            company.add_employee("花子", Gender.WOMAN, age, Post.YARUIN)
+
+        assert company.current_number == 1
+        assert company.get_personnel_by_name("花子") is None
+        assert [emp.name for emp in company.oldest_employees(5)] == ["太郎"]
+        assert company.select_president().name == "太郎"
+
+    def test_add_many_leaves_columns_unchanged_on_error(self):
+        """
+        列に入らない値を含む追加では、どの列・インデックスも変わらないことを確認
+        """
+        company = Company(storage=Company.COLUMNAR_STORAGE)
+        company.add_employee("太郎", Gender.MAN, 40, Post.KATYO)
+
+        with pytest.raises(ValueError):
+            company._store.add_many([
+                ("花子", Gender.WOMAN, 30, Post.HIRA, "2000"),
+                ("次郎", Gender.MAN, 70_000, Post.HIRA, "2001"),
+            ])
+
+        assert company.current_number == 1
+        assert company.get_personnel_by_name("花子") is None
+        assert company.count_by_age() == 1
+
+    def test_mutations_are_written_to_columns(self):
+        """
+        昇進・降格・削除が列に反映され、オブジェクト形式と同じ結果になることを確認
+        """
+        object_company, columnar_company = self._make_pair()
+
+        for company in (object_company, columnar_company):
+            employees = company.employees
+            employees[0].promote()
+            employees[1].demote()
+            employees[2].promote()
+            company.delete_employee(employees[3])
+            company.delete_employees([employees[4], employees[6]])
+
+        assert self._snapshot(columnar_company) == self._snapshot(object_company)
+        assert columnar_company.select_president().id == object_company.select_president().id
+
+    def test_views_compare_by_identity_of_row(self):
+        """
+        同じ社員を取り出した軽量オブジェクト同士が == で等しいことを確認
+        """
+        _, company = self._make_pair()
+        first = company.employees[0]
+
+        assert company.get_personnel_by_id(first.id) == first
+        assert company.employees[1] != first
+
+        company.delete_employee(first)
+        assert first not in company.employees
+        # 削除後も名前や役職は読める
+        assert first.name == "社員0"
+        assert first.post == Post.HIRA
+
+    def test_non_monotonic_ids(self):
+        """
+        社員IDが採用順に増えない採番クラスでも検索できることを確認
+        """
+        class ReverseAllocator(CounterIdAllocator):
+            def allocate(self):
+                return 100000 - super().allocate()
+
+        company = Company(id_allocator=ReverseAllocator(), storage=Company.COLUMNAR_STORAGE)
+        for i in range(5):
+            company.add_employee(f"社員{i}", Gender.MAN, 30, Post.HIRA)
+        company.delete_employee(company.employees[2])
+
+        for emp in company.employees:
+            assert company.get_personnel_by_id(emp.id) == emp
+
+    def test_unknown_storage(self):
+        """
+        不明な保存形式を指定するとエラーになることを確認
+        """
+        with pytest.raises(ValueError):
+            Company(storage="csv")
+
+
+# ============================================================
+# テストクラス7: __slots__ によるコンパクトなクラスのテスト
+# ============================================================
+
+class TestSlots:
+    """
+    __slots__ によるコンパクトなクラスのテストクラス
+
+    テスト項目:
+    - インスタンスが __dict__ を持たないか
+    - 読み取り専用のプロパティと継承が保たれているか
+    """
+
+    @pytest.mark.parametrize("obj", [
+        Human("太郎", Gender.MAN, 25),
+        Employee("太郎", Gender.MAN, 25, Post.HIRA),
+        President("倍井 杉蔵", Gender.MAN, 88),
+    ], ids=["human", "employee", "president"])
+    def test_no_instance_dict(self, obj):
+        """
+        インスタンスが __dict__ を持たず、属性を追加できないことを確認
+        """
+        assert not hasattr(obj, "__dict__")
+        with pytest.raises(AttributeError):
+            obj.nickname = "たろちゃん"
+        # プロパティは従来どおり読み取り専用
+        with pytest.raises(AttributeError):
+            obj.name = "次郎"
+
+    def test_subclass_without_slots_gets_dict(self):
+        """
+        __slots__ を書かないサブクラスは従来どおり属性を追加できることを確認
+        """
+        class Intern(Employee):
+            pass
+
+        intern = Intern("三郎", Gender.MAN, 20, Post.HIRA)
+        intern.school = "大学"
+
+        assert isinstance(intern, Human)
+        assert intern.salary == 200000
+        assert intern.school == "大学"
+
+
+# ============================================================
+# テストクラス8: 給与計算のテスト
+# ============================================================
+
+def naive_payroll(company: Company, band_width: int = 10):
+    """
+    社員を1人ずつループして給与を集計する比較用の関数
+    """
+    by_post = {post: 0 for post in Post}
+    by_gender = {gender: 0 for gender in Gender}
+    by_band = {}
+    for emp in company.employees:
+        by_post[emp.post] += emp.salary
+        by_gender[emp.gender] += emp.salary
+        band = emp.age // band_width * band_width
+        by_band[band] = by_band.get(band, 0) + emp.salary
+    return sum(by_post.values()), by_post, by_gender, dict(sorted(by_band.items()))
+
+
+class TestPayroll:
+    """
+    給与計算（compute_payroll / Company.payroll）のテストクラス
+
+    テスト項目:
+    - 1人ずつループした結果と一致するか（両方のストレージ、NumPy あり・なし）
+    - 実行中に給与表を変更しても反映されるか
+    - 社員がいない会社・不正な年齢帯の幅
+    """
+
+    @pytest.fixture(params=["numpy", "array"])
+    def backend(self, request, monkeypatch):
+        """
+        NumPy を使う場合と使わない場合の両方でテストするフィクスチャ
+        """
+        if request.param == "numpy":
+            pytest.importorskip("numpy")
+        else:
+            monkeypatch.setattr(company_management, "_numpy", None)
+        return request.param
+
+    def make_company(self, storage, count=500, seed=0):
+        """
+        ランダムな社員がいる会社を作るヘルパー
+        """
+        rng = random.Random(seed)
+        company = Company(storage=storage)
+        company.MAX_NUMBER_OF_PEOPLE = count
+        company.add_employees([
+            (f"社員{i}", rng.choice(list(Gender)), rng.randint(18, 70), rng.choice(list(Post)))
+            for i in range(count)
+        ])
+        return company
+
+    @pytest.mark.parametrize("storage", [Company.OBJECT_STORAGE, Company.COLUMNAR_STORAGE])
+    @pytest.mark.parametrize("band_width", [1, 10, 25])
+    def test_matches_naive_loop(self, backend, storage, band_width):
+        """
+        1人ずつループして集計した結果と一致することを確認
+        """
+        company = self.make_company(storage)
+        # 昇進・降格・削除の後でも一致すること
+        company.employees[0].promote()
+        company.employees[1].demote()
+        company.delete_employees(company.employees[10:20])
+
+        report = compute_payroll(company, band_width)
+        total, by_post, by_gender, by_band = naive_payroll(company, band_width)
+
+        assert report.backend == backend
+        assert report.headcount == company.current_number
+        assert report.total == total
+        assert report.by_post == by_post
+        assert report.by_gender == by_gender
+        assert report.by_age_band == by_band
+        assert report.band_width == band_width
+
+    def test_salary_map_change_is_reflected(self, backend, monkeypatch):
+        """
+        実行中に給与表を変更すると、次の集計から反映されることを確認
+        """
+        company = Company()
+        company.add_employee("太郎", Gender.MAN, 25, Post.HIRA)
+        company.add_employee("花子", Gender.WOMAN, 35, Post.KATYO)
+        assert company.payroll().total == 200000 + 450000
+
+        monkeypatch.setitem(Employee._salary_map, Post.HIRA, 250000)
+        report = company.payroll()
+
+        assert report.total == 250000 + 450000
+        assert report.by_post[Post.HIRA] == 250000
+        assert report.by_gender == {Gender.MAN: 250000, Gender.WOMAN: 450000, Gender.OTHER: 0}
+        assert report.by_age_band == {20: 250000, 30: 450000}
+
+    def test_empty_company(self, backend):
+        """
+        社員がいない会社では合計が 0 になることを確認
+        """
+        report = Company().payroll()
+
+        assert report.total == 0
+        assert report.headcount == 0
+        assert set(report.by_post.values()) == {0}
+        assert report.by_age_band == {}
+
+    @pytest.mark.parametrize("band_width", [0, -10, 2.5, True])
+    def test_invalid_band_width(self, band_width):
+        """
+        年齢帯の幅が正の整数でない場合は ValueError になることを確認
+        """
+        with pytest.raises(ValueError):
+            Company().payroll(band_width)
+
+
+# ============================================================
+# テストクラス9: 役職の順位と人事評価の一括反映のテスト
+# ============================================================
+
+class TestReviews:
+    """
+    役職の順位（Post.rank / next / prev）と Company.apply_reviews のテストクラス
+
+    テスト項目:
+    - 役職の順位と1つ上・1つ下の役職が定義順どおりか
+    - まとめて昇進・降格した結果と、1人ずつ昇進・降格した結果が一致するか
+    - 反映できない変更が理由つきで返されるか
+    - 次期社長候補のインデックスが更新されるか
+    """
+
+    def test_post_transitions(self):
+        """
+        役職の順位と1つ上・1つ下の役職を確認
+        """
+        order = [Post.HIRA, Post.SYUNIN, Post.KATYO, Post.YARUIN]
+
+        assert [post.rank for post in order] == [0, 1, 2, 3]
+        assert [post.next for post in order] == order[1:] + [None]
+        assert [post.prev for post in order] == [None] + order[:-1]
+
+    @pytest.fixture
+    def company(self):
+        """
+        ヒラ・主任・課長・役員が1人ずついる会社
+        """
+        company = Company()
+        company.add_employees([
+            ("ヒラ太郎", Gender.MAN, 25, Post.HIRA),
+            ("主任花子", Gender.WOMAN, 35, Post.SYUNIN),
+            ("課長次郎", Gender.MAN, 45, Post.KATYO),
+            ("役員三郎", Gender.MAN, 55, Post.YARUIN),
+        ])
+        return company
+
+    def test_apply_reviews(self, company, capsys):
+        """
+        昇進・降格をまとめて反映し、結果と給与の増減を確認
+        """
+        hira, syunin, katyo, yaruin = company.employees
+        capsys.readouterr()
+
+        summary = company.apply_reviews([
+            (hira, Company.PROMOTE),
+            (katyo, Company.DEMOTE),
+            (syunin, 2),
+        ])
+
+        assert summary.ok
+        assert summary.changed == [
+            (hira, Post.HIRA, Post.SYUNIN),
+            (katyo, Post.KATYO, Post.SYUNIN),
+            (syunin, Post.SYUNIN, Post.YARUIN),
+        ]
+        assert summary.promoted_count == 2
+        assert summary.demoted_count == 1
+        assert summary.salary_delta == 100000 - 150000 + 300000
+        assert (hira.post, katyo.post, syunin.post) == (Post.SYUNIN, Post.SYUNIN, Post.YARUIN)
+        # メッセージは1行だけ
+        assert capsys.readouterr().out.count("\n") == 1
+
+    def test_skipped_changes(self, company):
+        """
+        反映できない変更が (行番号, 理由) で返されることを確認
+        """
+        hira, _, _, yaruin = company.employees
+        outsider = Employee("部外者", Gender.MAN, 30, Post.HIRA)
+
+        summary = company.apply_reviews([
+            (yaruin, Company.PROMOTE),
+            (hira, Company.DEMOTE),
+            (outsider, Company.PROMOTE),
+            (hira, 0),
+            (hira, True),
+            (hira,),
+            (hira, Company.PROMOTE),
+        ])
+
+        assert not summary.ok
+        assert [index for index, _ in summary.skipped] == [0, 1, 2, 3, 4, 5]
+        assert "最高役職" in summary.skipped[0][1]
+        assert "最低役職" in summary.skipped[1][1]
+        assert "存在しません" in summary.skipped[2][1]
+        assert summary.changed == [(hira, Post.HIRA, Post.SYUNIN)]
+
+    def test_repeated_changes_are_applied_in_order(self, company):
+        """
+        同じ社員への変更は順に適用され、上限・下限で切り捨てられることを確認
+        """
+        hira, syunin, _, _ = company.employees
+
+        summary = company.apply_reviews([
+            (hira, 10),      # 役員まで
+            (hira, -1),      # 課長
+            (syunin, 1),     # 課長
+            (syunin, -1),    # 主任に戻る（変更なし）
+        ])
+
+        assert summary.changed == [(hira, Post.HIRA, Post.KATYO)]
+        assert syunin.post == Post.SYUNIN
+
+    @pytest.mark.parametrize("storage", [Company.OBJECT_STORAGE, Company.COLUMNAR_STORAGE])
+    def test_matches_individual_promotions(self, storage):
+        """
+        まとめて反映した結果が、1人ずつ promote()/demote() した結果と一致し、
+        次期社長候補も正しく更新されることを確認
+        """
+        rng = random.Random(0)
+        rows = [
+            (f"社員{i}", rng.choice(list(Gender)), rng.randint(18, 70), rng.choice(list(Post)))
+            for i in range(300)
+        ]
+        changes = [(rng.randrange(300), rng.choice([Company.PROMOTE, Company.DEMOTE])) for _ in range(600)]
+
+        bulk = Company(storage=storage)
+        bulk.MAX_NUMBER_OF_PEOPLE = 300
+        bulk.add_employees(rows)
+        bulk_employees = bulk.employees
+        bulk.apply_reviews([(bulk_employees[i], steps) for i, steps in changes])
+
+        single = Company(storage=storage)
+        single.MAX_NUMBER_OF_PEOPLE = 300
+        single.add_employees(rows)
+        single_employees = single.employees
+        for i, steps in changes:
+            if steps == Company.PROMOTE:
+                single_employees[i].promote()
+            else:
+                single_employees[i].demote()
+
+        assert [emp.post for emp in bulk.employees] == [emp.post for emp in single.employees]
+        assert bulk.select_president().id == naive_select_president(bulk).id
+        assert bulk.select_president().id == single.select_president().id
+
+    def test_president_apply_reviews(self, company, capsys):
+        """
+        社長経由で反映できること、会社がない場合は None を返すことを確認
+        """
+        president = President("倍井 杉蔵", Gender.MAN, 88)
+        assert president.apply_reviews([]) is None
+        assert "会社が設定されていません" in capsys.readouterr().out
+
+        president.company = company
+        summary = president.apply_reviews([(company.employees[0], Company.PROMOTE)])
+        assert summary.changed_count == 1
+
+
+# ============================================================
+# テストクラス10: メッセージの出力先（シンク）のテスト
+# ============================================================
+
+class TestOutputSinks:
+    """
+    メッセージの出力先（OutputSink）のテストクラス
+
+    テスト項目:
+    - 各シンクがメッセージを受け取り、print() と同じ文字列になるか
+    - NullSink では何も表示されないか
+    - デフォルトの出力先を切り替えられるか
+    """
+
+    def run_scenario(self, company):
+        """
+        採用・自己紹介・昇進・降格・削除・一覧表示を一通り行うヘルパー
+        """
+        company.add_employee("太郎", Gender.MAN, 25, Post.HIRA)
+        company.add_employee("花子", Gender.WOMAN, 30, Post.YARUIN)
+        taro, hanako = company.employees
+        taro.do_self_introduction()
+        taro.promote()
+        hanako.promote()
+        taro.demote()
+        taro.demote()
+        company.display_all_employees()
+        company.delete_employee(taro)
+        company.delete_employee(taro)
+
+    def test_list_sink_records_structured_events(self, capsys):
+        """
+        ListSink がメッセージの種類と値を記録し、何も表示しないことを確認
+        """
+        sink = ListSink()
+        company = Company(sink=sink)
+        self.run_scenario(company)
+
+        kinds = [event.kind for event in sink.events]
+        assert kinds[:7] == [
+            "hired", "hired", "introduction", "promoted", "already_top", "demoted", "already_bottom",
+        ]
+        assert kinds[-2:] == ["deleted", "not_found"]
+        hired = sink.events[0]
+        assert hired.fields == {"name": "太郎", "id": "1000"}
+        assert sink.events[3].fields == {"name": "太郎", "post": "主任"}
+        assert capsys.readouterr().out == ""
+
+        sink.clear()
+        assert sink.events == []
+
+    def test_sinks_match_print_output(self, capsys):
+        """
+        ListSink・BufferedSink のメッセージが PrintSink の表示と同じになることを確認
+        """
+        self.run_scenario(Company(sink=PrintSink()))
+        printed = capsys.readouterr().out
+
+        list_sink = ListSink()
+        self.run_scenario(Company(sink=list_sink))
+        # 会社ごとに社員IDは 1000 から採番されるので、表示は完全に一致する
+        assert "".join(message + "\n" for message in list_sink.messages) == printed
+
+        stream = io.StringIO()
+        buffered = BufferedSink(stream, buffer_size=10_000)
+        self.run_scenario(Company(sink=buffered))
+        # flush() するまでは書き出さない
+        assert stream.getvalue() == ""
+        buffered.flush()
+        assert stream.getvalue() == printed
+
+    def test_buffered_sink_flushes_when_full(self):
+        """
+        BufferedSink が buffer_size 件ごとにまとめて書き出すことを確認
+        """
+        stream = io.StringIO()
+        company = Company(sink=BufferedSink(stream, buffer_size=2))
+        company.add_employee("太郎", Gender.MAN, 25, Post.HIRA)
+        assert stream.getvalue() == ""
+        company.add_employee("花子", Gender.WOMAN, 30, Post.HIRA)
+        assert stream.getvalue().count("採用しました") == 2
+
+        with pytest.raises(ValueError):
+            BufferedSink(buffer_size=0)
+
+    def test_null_sink_is_silent(self, capsys):
+        """
+        NullSink では何も表示されず、処理の結果は変わらないことを確認
+        """
+        company = Company(sink=NullSink())
+        self.run_scenario(company)
+
+        assert capsys.readouterr().out == ""
+        assert [emp.name for emp in company.employees] == ["花子"]
+        assert company.employees[0].post == Post.YARUIN
+
+    def test_logging_sink(self, caplog):
+        """
+        LoggingSink がメッセージと種類をログレコードに渡すことを確認
+        """
+        logger = logging.getLogger("company_management.test_sink")
+        company = Company(sink=LoggingSink(logger, logging.INFO))
+
+        with caplog.at_level(logging.INFO, logger=logger.name):
+            company.add_employee("太郎", Gender.MAN, 25, Post.HIRA)
+
+        record, = caplog.records
+        assert record.getMessage() == f"太郎さん（ID: {company.employees[0].id}）を採用しました。"
+        assert record.event == "hired"
+        assert record.event_fields["name"] == "太郎"
+
+    def test_default_sink(self, capsys):
+        """
+        デフォルトの出力先を切り替えると、シンク未指定の会社と会社のない人に反映されることを確認
+        """
+        assert isinstance(get_default_sink(), OutputSink)
+        sink = ListSink()
+        previous = set_default_sink(sink)
+        try:
+            company = Company()
+            company.add_employee("太郎", Gender.MAN, 25, Post.HIRA)
+            Human("次郎", Gender.MAN, 30).do_self_introduction()
+            President("倍井 杉蔵", Gender.MAN, 88).delete_employee(company.employees[0])
+
+            # 会社ごとに指定した出力先はデフォルトより優先される
+            own = ListSink()
+            company.sink = own
+            company.employees[0].promote()
+        finally:
+            set_default_sink(previous)
+
+        assert [event.kind for event in sink.events] == ["hired", "introduction", "no_company"]
+        assert [event.kind for event in own.events] == ["promoted"]
+        assert capsys.readouterr().out == ""
+
+        # None を設定するとデフォルトの出力先に戻る
+        company.sink = None
+        assert company.sink is get_default_sink()
+
+
+# ============================================================
+# テストクラス11: 社員一覧の表のテスト
+# ============================================================
+
+def legacy_display(company: Company) -> None:
+    """
+    1行ずつ print() していたころの display_all_employees と同じ表示をする比較用の関数
+    """
+    if not company.employees:
+        print("社員がいません。")
+        return
+    print(f"\n{'='*60}")
+    print(f"{'社員一覧':^54}")
+    print(f"{'='*60}")
+    print(f"{'名前':<15} {'性別':<10} {'年齢':<5} {'役職':<10} {'ID':<10}")
+    print(f"{'-'*60}")
+    for emp in company.employees:
+        print(f"{emp.name:<15} {emp.gender.value:<10} {emp.age:<5} {emp.post.value:<10} {emp.id:<10}")
+    print(f"{'='*60}")
+    print(f"合計: {company.current_number}名\n")
+
+
+class CountingStream(io.StringIO):
+    """
+    write() の呼び出し回数を数える StringIO
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+class TestEmployeeTable:
+    """
+    社員一覧の表（display_all_employees / write_employee_table / iter_employee_table）のテストクラス
+
+    テスト項目:
+    - 従来の表示と1バイトも変わらないか
+    - かたまりごとに1回だけ write() するか
+    - ページ分割・offset/limit・列の選択
+    """
+
+    def make_company(self, storage=Company.OBJECT_STORAGE, count=7):
+        """
+        count 人の社員がいる会社を作るヘルパー
+        """
+        company = Company(storage=storage, sink=NullSink())
+        company.MAX_NUMBER_OF_PEOPLE = count
+        company.add_employees([
+            (f"社員{i}", list(Gender)[i % 3], 20 + i, list(Post)[i % 4]) for i in range(count)
+        ])
+        return company
+
+    @pytest.mark.parametrize("storage", [Company.OBJECT_STORAGE, Company.COLUMNAR_STORAGE])
+    @pytest.mark.parametrize("count", [0, 1, 7])
+    def test_byte_identical_to_legacy(self, storage, count, capsys):
+        """
+        引数なしの表示が、従来の1行ずつの print() と同じであることを確認
+        """
+        company = self.make_company(storage, count)
+        legacy_display(company)
+        expected = capsys.readouterr().out
+
+        company.sink = PrintSink()
+        company.display_all_employees()
+        assert capsys.readouterr().out == expected
+
+        stream = io.StringIO()
+        company.display_all_employees(stream=stream)
+        assert stream.getvalue() == expected
+
+    def test_one_write_per_chunk(self):
+        """
+        chunk_size 行ごとに1回だけ write() することを確認
+        """
+        company = self.make_company(count=7)
+        stream = CountingStream()
+
+        company.write_employee_table(stream, chunk_size=3)
+
+        # ヘッダー1回 + 行 3/3/1 の3回 + フッター1回
+        assert stream.writes == 5
+        assert list(company.iter_employee_table(chunk_size=3))[1].count("\n") == 3
+
+    def test_pagination(self):
+        """
+        ページ・offset・limit で表示する行を選べることを確認
+        """
+        company = self.make_company(count=7)
+        names = lambda text: [line.split()[0] for line in text.splitlines() if line.startswith("社員")]
+
+        stream = io.StringIO()
+        company.display_all_employees(page=2, page_size=3, stream=stream)
+        assert names(stream.getvalue()) == ["社員3", "社員4", "社員5"]
+        assert "合計: 7名（4〜6件目を表示）" in stream.getvalue()
+
+        stream = io.StringIO()
+        company.display_all_employees(offset=5, limit=10, stream=stream)
+        assert names(stream.getvalue()) == ["社員5", "社員6"]
+
+        stream = io.StringIO()
+        company.display_all_employees(page=9, page_size=3, stream=stream)
+        assert names(stream.getvalue()) == []
+        assert "この範囲に社員はいません" in stream.getvalue()
+
+        with pytest.raises(ValueError):
+            company.display_all_employees(page=0)
+        with pytest.raises(ValueError):
+            company.display_all_employees(offset=-1)
+
+    def test_column_selection(self):
+        """
+        表示する列を選べること、列名が不正なら ValueError になることを確認
+        """
+        company = self.make_company(count=2)
+        stream = io.StringIO()
+        company.display_all_employees(columns=["id", "name"], stream=stream)
+        lines = stream.getvalue().splitlines()
+
+        assert lines[4] == f"{'ID':<10} {'名前':<15}"
+        assert lines[6] == f"{company.employees[0].id:<10} {'社員0':<15}"
+
+        with pytest.raises(ValueError):
+            company.display_all_employees(columns=["salary"], stream=stream)
+        with pytest.raises(ValueError):
+            company.display_all_employees(columns=[], stream=stream)
+
+
+# ============================================================
+# テストクラス12: スナップショットのテスト
+# ============================================================
+
+def employee_records(company: Company) -> list:
+    """
+    会社の全社員を (名前, 性別, 年齢, 役職, 社員ID) のリストにするヘルパー
+    """
+    return [(emp.name, emp.gender, emp.age, emp.post, emp.id) for emp in company.employees]
+
+
+class DescendingIdAllocator(IdAllocator):
+    """
+    社員IDを大きい順に払い出す採番クラス（IDが採用順に増えない場合のテスト用）
+    """
+
+    def __init__(self):
+        self._next = 9000
+
+    def allocate(self):
+        self._next -= 1
+        return self._next
+
+    def allocate_block(self, count):
+        return [self.allocate() for _ in range(count)]
+
+
+class TestSnapshot:
+    """
+    スナップショット（Company.save / Company.load）のテストクラス
+
+    テスト項目:
+    - 保存して読み込んだ会社が元の会社と同じか（両方のストレージ）
+    - 読み込んだ会社で検索・選出・採用・削除・昇進ができるか
+    - 読み込んだ会社を変更してもファイルは変わらないか
+    - 不正なファイルは ValueError になるか
+    """
+
+    @pytest.fixture
+    def company(self):
+        """
+        日本語の名前・同姓同名を含む30人の会社
+        """
+        rng = random.Random(0)
+        company = Company(sink=NullSink())
+        company.MAX_NUMBER_OF_PEOPLE = 100
+        company.add_employees([
+            (f"山田 花子{i % 25}", rng.choice(list(Gender)), rng.randint(18, 70), rng.choice(list(Post)))
+            for i in range(30)
+        ])
+        return company
+
+    @pytest.mark.parametrize("saved_storage", [Company.OBJECT_STORAGE, Company.COLUMNAR_STORAGE])
+    @pytest.mark.parametrize("loaded_storage", [Company.OBJECT_STORAGE, Company.COLUMNAR_STORAGE])
+    def test_round_trip(self, tmp_path, saved_storage, loaded_storage):
+        """
+        保存して読み込むと、社員・最大社員数・検索結果が元の会社と同じになることを確認
+        """
+        rng = random.Random(1)
+        original = Company(storage=saved_storage, sink=NullSink())
+        original.MAX_NUMBER_OF_PEOPLE = 50
+        original.add_employees([
+            (f"社員{i % 7}", rng.choice(list(Gender)), rng.randint(18, 70), rng.choice(list(Post)))
+            for i in range(40)
+        ])
+        path = tmp_path / "company.snap"
+        original.save(path)
+
+        loaded = Company.load(path, storage=loaded_storage, sink=NullSink())
+
+        assert loaded.storage == loaded_storage
+        assert employee_records(loaded) == employee_records(original)
+        assert loaded.MAX_NUMBER_OF_PEOPLE == 50
+        assert loaded.get_personnel_by_id("1017").name == original.get_personnel_by_id("1017").name
+        assert loaded.get_personnel_by_name("社員3").id == original.get_personnel_by_name("社員3").id
+        assert loaded.select_president().id == original.select_president().id
+        assert loaded.payroll().by_post == original.payroll().by_post
+
+    def test_loaded_company_is_usable(self, tmp_path, company):
+        """
+        読み込んだ会社で昇進・削除・採用ができ、インデックスも正しく更新されることを確認
+        """
+        path = tmp_path / "company.snap"
+        company.save(path)
+        loaded = Company.load(path, sink=NullSink())
+
+        loaded.employees[0].promote()
+        loaded.delete_employees(loaded.employees[1:4])
+        loaded.add_employee("新人", Gender.WOMAN, 22, Post.HIRA)
+
+        assert loaded.current_number == 28
+        assert loaded.employees[0].post == (company.employees[0].post.next or Post.YARUIN)
+        assert loaded.get_personnel_by_id(company.employees[1].id) is None
+        # 採番は保存した会社のIDの続きから行う（IDが重複しない）
+        new_hire = loaded.get_personnel_by_name("新人")
+        assert int(new_hire.id) > max(int(emp.id) for emp in company.employees)
+        assert loaded.select_president().id == naive_select_president(loaded).id
+
+        # ファイルは変わっていない
+        assert employee_records(Company.load(path)) == employee_records(company)
+
+        # 変更後の会社を同じパスに保存し直せる
+        loaded.save(path)
+        assert employee_records(Company.load(path)) == employee_records(loaded)
+
+    @pytest.mark.parametrize("storage", [Company.OBJECT_STORAGE, Company.COLUMNAR_STORAGE])
+    def test_deleted_ids_are_not_reissued(self, tmp_path, storage):
+        """
+        最後に採用した社員を削除してから保存しても、読み込んだ会社がそのIDを払い出し直さないことを確認
+        """
+        original = Company(storage=storage, sink=NullSink())
+        original.add_employees(BULK_ROWS)
+        original.delete_employee(original.get_personnel_by_id("1002"))
+        path = tmp_path / "company.snap"
+        original.save(path)
+
+        loaded = Company.load(path, storage=storage, sink=NullSink())
+        loaded.add_employee("新人", Gender.WOMAN, 22, Post.HIRA)
+        original.add_employee("新人", Gender.WOMAN, 22, Post.HIRA)
+
+        assert loaded.get_personnel_by_name("新人").id == original.get_personnel_by_name("新人").id == "1003"
+
+    def test_save_loaded_company_without_changes(self, tmp_path, company):
+        """
+        読み込んだままの会社を別のファイルに保存し直せることを確認
+        """
+        first = tmp_path / "first.snap"
+        second = tmp_path / "second.snap"
+        company.save(first)
+        Company.load(first).save(second)
+
+        assert second.read_bytes() == first.read_bytes()
+
+    def test_unsorted_ids(self, tmp_path):
+        """
+        社員IDが採用順に増えていない会社でも、IDで検索できることを確認
+        """
+        company = Company(id_allocator=DescendingIdAllocator(), sink=NullSink())
+        company.add_employees([(f"社員{i}", Gender.MAN, 30 + i, Post.HIRA) for i in range(5)])
+        path = tmp_path / "company.snap"
+        company.save(path)
+
+        loaded = Company.load(path, id_allocator=DescendingIdAllocator())
+
+        assert [loaded.get_personnel_by_id(emp.id).name for emp in company.employees] == \
+            [emp.name for emp in company.employees]
+
+    def test_empty_company(self, tmp_path):
+        """
+        社員がいない会社も保存・読み込みできることを確認
+        """
+        path = tmp_path / "empty.snap"
+        Company().save(path)
+        loaded = Company.load(path)
+
+        assert loaded.current_number == 0
+        assert loaded.select_president() is None
+
+    @pytest.mark.parametrize("content", [b"", b"not a snapshot" * 10])
+    def test_invalid_file(self, tmp_path, content):
+        """
+        スナップショットではないファイルは ValueError になることを確認
+        """
+        path = tmp_path / "broken.snap"
+        path.write_bytes(content)
+
+        with pytest.raises(ValueError):
+            Company.load(path)
+
+    def test_non_integer_ids_cannot_be_saved(self, tmp_path):
+        """
+        整数でない社員IDを持つ会社は保存できないことを確認
+        """
+        class NamedIdAllocator(CounterIdAllocator):
+            def allocate_block(self, count):
+                return [f"E{n}" for n in super().allocate_block(count)]
+
+        company = Company(id_allocator=NamedIdAllocator(), storage=Company.OBJECT_STORAGE, sink=NullSink())
+        company.add_employees([("太郎", Gender.MAN, 25, Post.HIRA)])
+
+        with pytest.raises(ValueError):
+            company.save(tmp_path / "company.snap")
+
+
+# ============================================================
+# テストクラス13: SQLite 形式のストレージのテスト
+# ============================================================
+
+class TestSqliteStorage:
+    """
+    SQLite 形式のストレージのテストクラス
+
+    テスト項目:
+    - 検索・選出がインデックスを使う SQL になっているか
+    - 書き込みがためられ、まとめて実行されるか
+    - データベースのファイルを開き直すと社員が引き継がれるか
+    """
+
+    def count_rows(self, path) -> int:
+        """
+        別の接続でデータベースの社員数を数えるヘルパー（書き込みが実行されたかの確認用）
+        """
+        connection = sqlite3.connect(path)
+        try:
+            return connection.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+        finally:
+            connection.close()
+
+    @pytest.mark.parametrize("sql, parameters", [
+        ("SELECT seq FROM employees WHERE id = ?", ("1000",)),
+        ("SELECT seq FROM employees WHERE name = ? ORDER BY seq LIMIT 1", ("太郎",)),
+        ("SELECT seq FROM employees WHERE post = ? ORDER BY age DESC, seq LIMIT 1", (3,)),
+        ("SELECT seq FROM employees ORDER BY age DESC, seq LIMIT 1", ()),
+    ], ids=["id", "name", "post_age", "age"])
+    def test_queries_use_indexes(self, sql, parameters):
+        """
+        検索・選出の SQL が表全体を読まずにインデックスを使うことを確認
+        """
+        company = Company(storage=Company.SQLITE_STORAGE)
+        plan = company._store._connection.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+        details = " ".join(row[-1] for row in plan)
+
+        assert "INDEX" in details
+        assert "TEMP B-TREE" not in details
+
+    def test_select_president_matches_naive(self):
+        """
+        昇進・降格・削除を繰り返しても、次期社長候補が従来の方法と一致することを確認
+        """
+        rng = random.Random(0)
+        company = Company(storage=Company.SQLITE_STORAGE, sink=NullSink())
+        company.MAX_NUMBER_OF_PEOPLE = 200
+        company.add_employees([
+            (f"社員{i}", rng.choice(list(Gender)), rng.randint(18, 70), rng.choice(list(Post)))
+            for i in range(200)
+        ])
+        for _ in range(100):
+            employee = rng.choice(company.employees)
+            rng.choice([employee.promote, employee.demote, lambda: company.delete_employee(employee)])()
+            assert company.select_president() is naive_select_president(company)
+
+    def test_writes_are_batched(self, tmp_path, monkeypatch):
+        """
+        書き込みは batch_size 件たまるまで、または読み込み・flush() まで実行されないことを確認
+        """
+        path = tmp_path / "company.db"
+        monkeypatch.setattr(Company, "SQLITE_BATCH_SIZE", 3)
+        company = Company(storage=Company.SQLITE_STORAGE, sink=NullSink(), database=path, flush_interval=3600)
+
+        company.add_employee("太郎", Gender.MAN, 25, Post.HIRA)
+        company.add_employee("花子", Gender.WOMAN, 30, Post.HIRA)
+        assert company.current_number == 2
+        assert self.count_rows(path) == 0
+
+        # 3件目で batch_size に達してまとめて実行される
+        company.add_employee("次郎", Gender.MAN, 35, Post.HIRA)
+        assert self.count_rows(path) == 3
+
+        # 読み込む前には、ためていた書き込みが実行される
+        company.employees[0].promote()
+        company.delete_employee(company.employees[1])
+        assert company.get_personnel_by_name("花子") is None
+        assert company.get_personnel_by_name("太郎").post == Post.SYUNIN
+        assert self.count_rows(path) == 2
+        company.close()
+
+    def test_flush_interval(self, tmp_path):
+        """
+        flush_interval が 0 なら、書き込みのたびに実行されることを確認
+        """
+        path = tmp_path / "company.db"
+        company = Company(storage=Company.SQLITE_STORAGE, sink=NullSink(), database=path, flush_interval=0)
+
+        company.add_employee("太郎", Gender.MAN, 25, Post.HIRA)
+        assert self.count_rows(path) == 1
+
+        with pytest.raises(ValueError):
+            Company(storage=Company.SQLITE_STORAGE, flush_interval=-1)
+
+    def test_reopen_database(self, tmp_path):
+        """
+        データベースを開き直すと社員が引き継がれ、社員IDはその続きから採番されることを確認
+        """
+        path = tmp_path / "company.db"
+        company = Company(storage=Company.SQLITE_STORAGE, sink=NullSink(), database=path)
+        company.add_employees([
+            ("太郎", Gender.MAN, 25, Post.HIRA),
+            ("花子", Gender.WOMAN, 50, Post.YARUIN),
+        ])
+        company.employees[0].promote()
+        company.close()
+
+        reopened = Company(storage=Company.SQLITE_STORAGE, sink=NullSink(), database=path)
+
+        assert [(emp.name, emp.post, emp.id) for emp in reopened.employees] == [
+            ("太郎", Post.SYUNIN, "1000"), ("花子", Post.YARUIN, "1001"),
+        ]
+        assert reopened.current_number == 2
+        assert reopened.select_president().name == "花子"
+        # 同じ社員は同じオブジェクトとして返される
+        assert reopened.get_personnel_by_id("1000") is reopened.employees[0]
+
+        reopened.add_employee("次郎", Gender.MAN, 30, Post.HIRA)
+        assert reopened.get_personnel_by_name("次郎").id == "1002"
+        reopened.close()
+
+    def test_deleted_ids_are_not_reissued(self, tmp_path):
+        """
+        最後に採用した社員を削除してから開き直しても、そのIDを払い出し直さないことを確認
+        """
+        path = tmp_path / "company.db"
+        company = Company(storage=Company.SQLITE_STORAGE, sink=NullSink(), database=path)
+        company.add_employees(BULK_ROWS)
+        company.flush()
+        company.delete_employee(company.get_personnel_by_id("1002"))
+        company.close()
+
+        reopened = Company(storage=Company.SQLITE_STORAGE, sink=NullSink(), database=path)
+        reopened.add_employee("新人", Gender.WOMAN, 22, Post.HIRA)
+
+        assert reopened.get_personnel_by_name("新人").id == "1003"
+        reopened.close()
+
+    def test_duplicate_id_is_rejected_when_hiring(self, tmp_path):
+        """
+        すでに使われている社員IDを払い出した採用は、その採用で ValueError になり、
+        ためていた他の採用は失われないことを確認
+        """
+        path = tmp_path / "company.db"
+        company = Company(storage=Company.SQLITE_STORAGE, sink=NullSink(), database=path)
+        company.add_employees([("A", Gender.MAN, 30, Post.HIRA), ("B", Gender.WOMAN, 40, Post.HIRA)])
+        company.close()
+
+        reopened = Company(
+            CounterIdAllocator(1001), storage=Company.SQLITE_STORAGE, sink=NullSink(), database=path,
+        )
+        with pytest.raises(ValueError):
+            reopened.add_employee("X", Gender.MAN, 25, Post.HIRA)   # ID 1001 は B が使っている
+        reopened.add_employee("Y", Gender.WOMAN, 26, Post.HIRA)     # ID 1002（まだ書き込まない）
+        assert reopened.current_number == 3
+
+        # まだ書き込んでいない採用（Y）と同じIDも、一括採用の一部の行だけの重複も ValueError になる
+        reopened._id_allocator = CounterIdAllocator(1002)
+        with pytest.raises(ValueError):
+            reopened.add_employee("W", Gender.MAN, 28, Post.HIRA)
+        reopened._id_allocator = CounterIdAllocator(999)
+        with pytest.raises(ValueError):
+            reopened.add_employees([("Z", Gender.MAN, 27, Post.HIRA)] * 2)   # ID 999, 1000
+        assert reopened.current_number == 3
+
+        # 削除した社員のIDは、書き込む前でも使える
+        reopened.delete_employee(reopened.get_personnel_by_name("Y"))
+        reopened._id_allocator = CounterIdAllocator(1002)
+        reopened.add_employee("V", Gender.WOMAN, 29, Post.HIRA)
+
+        assert reopened.get_personnel_by_name("A").id == "1000"
+        assert [(emp.name, emp.id) for emp in reopened.employees] == [("A", "1000"), ("B", "1001"), ("V", "1002")]
+        reopened.close()
+
+    def test_failed_flush_keeps_pending_writes(self, tmp_path):
+        """
+        ためた書き込みの実行に失敗してもロールバックして書き込みを残し、
+        原因を取り除いた後の flush() で全て書き込まれることを確認
+        """
+        path = tmp_path / "company.db"
+        company = Company(storage=Company.SQLITE_STORAGE, sink=NullSink(), database=path)
+        company.add_employees([("A", Gender.MAN, 30, Post.HIRA), ("B", Gender.WOMAN, 40, Post.HIRA)])
+        company.flush()
+        company.add_employee("X", Gender.MAN, 25, Post.HIRA)   # ID 1002
+        company.add_employee("Y", Gender.WOMAN, 26, Post.HIRA)  # ID 1003
+
+        # 採用を確認した後で、別の接続が同じIDの行を書き込む
+        other = sqlite3.connect(path)
+        other.create_function("name_key", 1, company_management._normalize_name, deterministic=True)
+        with other:
+            other.execute("INSERT INTO employees (seq, id, name, gender, age, post) VALUES (99, '1003', '他', 0, 50, 0)")
+        with pytest.raises(sqlite3.IntegrityError):
+            company.flush()
+        assert company.current_number == 4
+
+        with other:
+            other.execute("DELETE FROM employees WHERE seq = 99")
+        other.close()
+        company.flush()
+
+        assert [(emp.name, emp.id) for emp in company.employees] == [
+            ("A", "1000"), ("B", "1001"), ("X", "1002"), ("Y", "1003"),
+        ]
+        company.close()
+
+
+# ============================================================
+# テストクラス14: スレッドセーフな会社のテスト
+# ============================================================
+
+THREAD_COUNT = 32
+
+
+def run_threads(worker, count=THREAD_COUNT):
+    """
+    count 個のスレッドで worker(番号) を一斉に実行し、例外があれば呼び出し元で送出するヘルパー
+    """
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def run(number):
+        barrier.wait()
+        try:
+            worker(number)
+        except BaseException as error:  # スレッド内の例外はテストを失敗させないので集める
+            errors.append(error)
+
+    threads = [threading.Thread(target=run, args=(number,)) for number in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+@pytest.fixture
+def fast_switching():
+    """
+    スレッドの切り替えを頻繁にして、競合が起きやすくするフィクスチャ
+    """
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+@pytest.mark.usefixtures("fast_switching")
+class TestThreadSafety:
+    """
+    スレッドセーフな会社のテストクラス
+
+    テスト項目:
+    - 同時に採用しても上限を超えないか
+    - 採用・削除・検索を32スレッドから同時に行っても、インデックスが社員リストと一致するか
+    - 同時に昇進させても段階を取りこぼさないか
+    """
+
+    def test_capacity_is_atomic(self):
+        """
+        32スレッドが同時に採用しても、採用されるのは上限の人数だけであることを確認
+        """
+        company = Company(sink=ListSink(), thread_safe=True)
+        company.MAX_NUMBER_OF_PEOPLE = 10
+
+        def worker(number):
+            for i in range(5):
+                company.add_employee(f"社員{number}-{i}", Gender.MAN, 30, Post.HIRA)
+            company.add_employees([(f"一括{number}", Gender.WOMAN, 40, Post.HIRA)], mode=Company.BEST_EFFORT)
+
+        run_threads(worker)
+
+        kinds = [event.kind for event in company.sink.events]
+        assert company.current_number == 10
+        assert kinds.count("hired") + sum(
+            event.fields["hired"] for event in company.sink.events if event.kind == "bulk_hired"
+        ) == 10
+        assert kinds.count("capacity_reached") + kinds.count("bulk_hired") == THREAD_COUNT * 6 - kinds.count("hired")
+
+    @pytest.mark.parametrize("storage", [Company.OBJECT_STORAGE, Company.COLUMNAR_STORAGE, Company.SQLITE_STORAGE])
+    def test_stress_invariants(self, storage):
+        """
+        32スレッドから採用・削除・検索を同時に行った後も、会社の状態に矛盾がないことを確認
+        """
+        company = Company(storage=storage, sink=NullSink(), thread_safe=True)
+        company.MAX_NUMBER_OF_PEOPLE = 300
+        company.add_employees([(f"初期{i}", Gender.MAN, 20 + i % 50, Post.HIRA) for i in range(100)])
+        seen_over_capacity = []
+
+        def worker(number):
+            rng = random.Random(number)
+            for i in range(150):
+                action = rng.random()
+                if action < 0.4:
+                    company.add_employee(f"社員{number}-{i}", rng.choice(list(Gender)), rng.randint(18, 70), rng.choice(list(Post)))
+                elif action < 0.6:
+                    employees = company.employees
+                    if employees:
+                        company.delete_employee(rng.choice(employees))
+                elif action < 0.7:
+                    employees = company.employees
+                    if employees:
+                        rng.choice([Employee.promote, Employee.demote])(rng.choice(employees))
+                else:
+                    employee_id = str(1000 + rng.randrange(100 + THREAD_COUNT * 60))
+                    found = company.get_personnel_by_id(employee_id)
+                    # 見つかった社員は、検索したIDを持っている
+                    assert found is None or found.id == employee_id
+                if company.current_number > company.MAX_NUMBER_OF_PEOPLE:
+                    seen_over_capacity.append(company.current_number)
+
+        run_threads(worker)
+
+        employees = company.employees
+        ids = [employee.id for employee in employees]
+        assert not seen_over_capacity
+        assert len(employees) == company.current_number <= company.MAX_NUMBER_OF_PEOPLE
+        assert len(set(ids)) == len(ids)
+        for employee in employees:
+            assert company.get_personnel_by_id(employee.id) == employee
+            assert company.get_personnel_by_name(employee.name) == employee
+        candidate = company.select_president()
+        expected = naive_select_president(company)
+        assert (candidate.age, candidate.post == Post.YARUIN) == (expected.age, expected.post == Post.YARUIN)
+        company.close()
+
+    def test_concurrent_promotions(self):
+        """
+        同じ社員を同時に昇進させても、段階を取りこぼさないことを確認
+        """
+        company = Company(sink=ListSink(), thread_safe=True)
+        company.MAX_NUMBER_OF_PEOPLE = 200
+        company.add_employees([(f"社員{i}", Gender.MAN, 20 + i % 40, Post.HIRA) for i in range(200)])
+        employees = company.employees
+        company.sink.clear()
+
+        def worker(number):
+            # 3スレッドが全員を1回ずつ昇進させる（スレッドごとに順番を変える）
+            for employee in random.Random(number).sample(employees, len(employees)):
+                employee.promote()
+
+        run_threads(worker, count=3)
+
+        assert all(employee.post == Post.YARUIN for employee in employees)
+        assert [event.kind for event in company.sink.events].count("promoted") == 3 * 200
+        assert company.select_president() is naive_select_president(company)
+
+    def test_employees_is_a_snapshot(self):
+        """
+        スレッドセーフな会社の employees は、その時点の社員リストのコピーであることを確認
+        """
+        company = Company(sink=NullSink(), thread_safe=True)
+        company.add_employee("太郎", Gender.MAN, 40, Post.HIRA)
+        snapshot = company.employees
+
+        company.add_employee("花子", Gender.WOMAN, 30, Post.HIRA)
+
+        assert [employee.name for employee in snapshot] == ["太郎"]
+        assert company.thread_safe
+        assert not Company().thread_safe
+
+
+# ============================================================
+# テストクラス15: asyncio の窓口のテスト
+# ============================================================
+
+class TestAsyncFacade:
+    """
+    asyncio の窓口（AsyncCompany・AsyncPresident）のテストクラス
+
+    テスト項目:
+    - 同時に依頼された採用・削除がまとめて実行されるか
+    - まとめても依頼の順番・上限・結果が1人ずつの場合と同じか
+    - 検索・辞任・例外の扱い
+    """
+
+    def make_async_company(self, capacity=1000, **options):
+        """
+        メッセージをイベントとしてためる会社の窓口を作るヘルパー
+        """
+        company = Company(sink=ListSink())
+        company.MAX_NUMBER_OF_PEOPLE = capacity
+        return AsyncCompany(company, **options)
+
+    def test_burst_is_batched(self):
+        """
+        同時に依頼した採用が1回の add_employees() にまとめられ、依頼の順に採用されることを確認
+        """
+        facade = self.make_async_company()
+
+        async def scenario():
+            async with facade:
+                return await asyncio.gather(*(
+                    facade.add_employee(f"社員{i}", Gender.MAN, 20 + i % 40, Post.HIRA) for i in range(500)
+                ))
+
+        hired = asyncio.run(scenario())
+
+        assert [employee.name for employee in hired] == [f"社員{i}" for i in range(500)]
+        assert facade.employees == hired
+        assert facade.batch_count == 1
+        assert [event.kind for event in facade.company.sink.events] == ["bulk_hired"]
+        assert facade.get_personnel_by_id(hired[10].id) is hired[10]
+
+    def test_max_batch_size(self):
+        """
+        まとめる件数が max_batch_size を超えないことを確認
+        """
+        facade = self.make_async_company(max_batch_size=100)
+
+        async def scenario():
+            async with facade:
+                await asyncio.gather(*(facade.add_employee(f"社員{i}", Gender.MAN, 30, Post.HIRA) for i in range(250)))
+
+        asyncio.run(scenario())
+
+        assert facade.current_number == 250
+        assert facade.batch_count == 3
+
+    def test_capacity(self):
+        """
+        上限を超えた依頼は、依頼の順で後ろから採用されないことを確認
+        """
+        facade = self.make_async_company(capacity=10)
+
+        async def scenario():
+            async with facade:
+                return await asyncio.gather(*(facade.add_employee(f"社員{i}", Gender.MAN, 30, Post.HIRA) for i in range(30)))
+
+        hired = asyncio.run(scenario())
+
+        assert [employee is not None for employee in hired] == [True] * 10 + [False] * 20
+        assert facade.current_number == 10
+
+    def test_mixed_requests_keep_order(self):
+        """
+        採用・削除・その他の変更が混ざっても、依頼の順に実行されることを確認
+        """
+        facade = self.make_async_company()
+
+        async def scenario():
+            async with facade:
+                taro = await facade.add_employee("太郎", Gender.MAN, 40, Post.HIRA)
+                results = await asyncio.gather(
+                    facade.delete_employee(taro),
+                    facade.delete_employee(taro),
+                    facade.add_employee("太郎", Gender.MAN, 41, Post.HIRA),
+                    facade.run(lambda: facade.get_personnel_by_name("太郎").age),
+                    facade.delete_employee(Employee("部外者", Gender.MAN, 30, Post.HIRA)),
+                )
+                return taro, results
+
+        taro, (first, second, rehired, age, outsider) = asyncio.run(scenario())
+
+        assert (first, second, outsider) == (True, False, False)
+        assert age == 41
+        assert facade.get_personnel_by_name("太郎") is rehired is not taro
+
+    def test_invalid_row_and_errors(self):
+        """
+        不正な採用の依頼はすぐに ValueError になり、run() の例外は依頼したコルーチンで送出されることを確認
+        """
+        facade = self.make_async_company()
+
+        def fail():
+            raise KeyError("失敗")
+
+        async def scenario():
+            async with facade:
+                with pytest.raises(ValueError):
+                    await facade.add_employee("太郎", Gender.MAN, -1, Post.HIRA)
+                with pytest.raises(KeyError):
+                    await facade.run(fail)
+                # 例外の後もワーカーは動き続ける
+                return await facade.add_employee("花子", Gender.WOMAN, 30, Post.HIRA)
+
+        assert asyncio.run(scenario()).name == "花子"
+        assert facade.current_number == 1
+
+    def test_cancelled_request_is_skipped(self):
+        """
+        結果を待つのをやめた依頼は実行されないことを確認
+        """
+        facade = self.make_async_company()
+
+        async def scenario():
+            async with facade:
+                task = asyncio.ensure_future(facade.add_employee("太郎", Gender.MAN, 30, Post.HIRA))
+                await asyncio.sleep(0)
+                task.cancel()
+                await facade.add_employee("花子", Gender.WOMAN, 30, Post.HIRA)
+
+        asyncio.run(scenario())
+
+        assert [employee.name for employee in facade.employees] == ["花子"]
+
+    def test_reuse_across_event_loops(self):
+        """
+        別のイベントループ（asyncio.run() を2回）からでも使えることを確認
+        """
+        facade = self.make_async_company()
+        for name in ("太郎", "花子"):
+            asyncio.run(facade.add_employee(name, Gender.MAN, 30, Post.HIRA))
+
+        assert facade.current_number == 2
+
+    def test_async_president(self):
+        """
+        AsyncPresident で採用・人事評価・辞任ができることを確認
+        """
+        president = President("社長", Gender.MAN, 70)
+        with pytest.raises(ValueError):
+            AsyncPresident(president)
+        facade = self.make_async_company()
+        boss = AsyncPresident(president, facade)
+        assert president.company is facade.company
+
+        async def scenario():
+            async with facade:
+                hired = await asyncio.gather(
+                    boss.add_employee("太郎", Gender.MAN, 50, Post.HIRA),
+                    boss.add_employee("花子", Gender.WOMAN, 45, Post.KATYO),
+                )
+                await boss.apply_reviews([(hired[1], Company.PROMOTE)])
+                return await boss.resignation()
+
+        successor = asyncio.run(scenario())
+
+        assert successor.president.name == "花子"
+        assert successor.company is facade
+        assert boss.get_personnel_by_name("花子") is None
+        assert successor.get_personnel_by_name("太郎") is not None
+
+
+# ============================================================
+# テストクラス16: 会社の登録簿（シャード分割）のテスト
+# ============================================================
+
+class TestCompanyRegistry:
+    """
+    会社の登録簿（CompanyRegistry）のテストクラス
+
+    テスト項目:
+    - コンシステントハッシュで会社がシャードに振り分けられるか
+    - ワーカープロセスに分けても、採用・検索・削除・全社の集計が1プロセスの場合と一致するか
+    - シャードで起きた例外が呼び出し元で送出されるか
+    """
+
+    def build(self, registry, count=30, seed=0):
+        """
+        登録簿と、同じ内容の会社（比較用、同じプロセスの中）を作るヘルパー
+        """
+        rng = random.Random(seed)
+        mirror = {}
+        for number in range(count):
+            name = f"子会社{number}"
+            rows = [
+                (f"社員{i}", rng.choice(list(Gender)), rng.randint(18, 70), rng.choice(list(Post)))
+                for i in range(rng.randint(0, 40))
+            ]
+            registry.create_company(name, capacity=50)
+            registry.add_employees(name, rows)
+            company = Company(sink=NullSink())
+            company.MAX_NUMBER_OF_PEOPLE = 50
+            company.add_employees(rows)
+            mirror[name] = company
+        return mirror
+
+    def test_hash_ring_moves_few_companies(self):
+        """
+        シャードを1つ増やしても、移る会社は新しいシャードへの分だけ（約 1/シャード数）であることを確認
+        """
+        ring = company_management._HashRing(range(4), CompanyRegistry.VIRTUAL_NODES)
+        names = [f"子会社{i}" for i in range(5000)]
+        before = {name: ring.shard_of(name) for name in names}
+        ring.add(4)
+        moved = [name for name in names if ring.shard_of(name) != before[name]]
+
+        assert all(ring.shard_of(name) == 4 for name in moved)
+        assert 0.1 < len(moved) / len(names) < 0.3
+        # どのシャードにも会社が振り分けられる
+        assert set(before.values()) == {0, 1, 2, 3}
+
+    @pytest.mark.parametrize("processes", [True, False], ids=["processes", "local"])
+    def test_matches_single_process(self, processes):
+        """
+        シャードに分けた登録簿の結果が、同じプロセスで会社を持った場合と一致することを確認
+        """
+        with CompanyRegistry(shards=3, processes=processes) as registry:
+            mirror = self.build(registry)
+
+            assert registry.headcounts() == {name: company.current_number for name, company in sorted(mirror.items())}
+            assert registry.headcount() == sum(company.current_number for company in mirror.values())
+
+            report = registry.payroll()
+            expected = [compute_payroll(company) for company in mirror.values()]
+            assert report.total == sum(r.total for r in expected)
+            assert report.headcount == registry.headcount()
+            for post in Post:
+                assert report.by_post[post] == sum(r.by_post[post] for r in expected)
+
+            company_name, executive = registry.oldest_executive()
+            oldest_age = max(
+                (e.age for company in mirror.values() for e in company.employees if e.post == Post.YARUIN),
+            )
+            assert executive.age == oldest_age
+            assert executive.post == Post.YARUIN
+            assert mirror[company_name].get_personnel_by_id(executive.id).age == oldest_age
+
+    def test_routing(self):
+        """
+        採用・検索・削除が会社を持つシャードに送られ、社員は会社に所属しないコピーとして返ることを確認
+        """
+        with CompanyRegistry(shards=4) as registry:
+            registry.create_company("本社", capacity=2)
+            taro_id = registry.add_employee("本社", "太郎", Gender.MAN, 40, Post.KATYO)
+            registry.add_employee("本社", "花子", Gender.WOMAN, 30, Post.HIRA)
+
+            # 上限に達すると採用しない
+            assert registry.add_employee("本社", "次郎", Gender.MAN, 20, Post.HIRA) is None
+            taro = registry.get_personnel_by_id("本社", taro_id)
+            assert (taro.name, taro.post, taro.id) == ("太郎", Post.KATYO, taro_id)
+            assert taro._company is None
+            assert registry.delete_employee("本社", taro_id)
+            assert not registry.delete_employee("本社", taro_id)
+            assert registry.get_personnel_by_id("本社", taro_id) is None
+            assert registry.headcounts() == {"本社": 1}
+            assert 0 <= registry.shard_of("本社") < registry.shard_count
+
+    def test_errors(self):
+        """
+        シャードで起きた例外（登録済み・未登録の会社）と不正な行が、呼び出し元で送出されることを確認
+        """
+        registry = CompanyRegistry(shards=2)
+        registry.create_company("本社")
+        with pytest.raises(ValueError):
+            registry.create_company("本社")
+        with pytest.raises(KeyError):
+            registry.add_employee("未登録", "太郎", Gender.MAN, 40, Post.HIRA)
+        with pytest.raises(ValueError):
+            registry.add_employee("本社", "太郎", Gender.MAN, "40", Post.HIRA)
+        assert registry.oldest_executive() is None
+
+        registry.close()
+        with pytest.raises(ValueError):
+            registry.headcount()
+
+
+# ============================================================
+# テストクラス17: 社員の検索（クエリ）のテスト
+# ============================================================
+
+# クエリの演算子に対応する比較（期待値をリスト内包表記で求めるときに使う）
+NAIVE_OPERATORS = {
+    "": operator.eq, "ne": operator.ne, "lt": operator.lt, "lte": operator.le,
+    "gt": operator.gt, "gte": operator.ge, "in": lambda value, candidates: value in candidates,
+}
+
+
+class TestEmployeeQuery:
+    """
+    社員の検索（EmployeeQuery）のテストクラス
+
+    テスト項目:
+    - 条件・並べ替え・件数の結果が、リスト内包表記で調べた結果と一致するか
+    - 条件に合わせて正しいインデックスが選ばれるか（explain()）
+    - クエリの使い回し・不正な条件
+    """
+
+    @pytest.fixture(params=[Company.OBJECT_STORAGE, Company.COLUMNAR_STORAGE, Company.SQLITE_STORAGE])
+    def company(self, request):
+        """
+        昇進・降格・削除を済ませた300人の会社を作るフィクスチャ
+        """
+        rng = random.Random(7)
+        company = Company(storage=request.param, sink=NullSink())
+        company.MAX_NUMBER_OF_PEOPLE = 300
+        company.add_employees([
+            (f"社員{i % 40}", rng.choice(list(Gender)), rng.randint(18, 70), rng.choice(list(Post)))
+            for i in range(300)
+        ])
+        employees = company.employees
+        for employee in rng.sample(employees, 60):
+            rng.choice([employee.promote, employee.demote])()
+        company.delete_employees(rng.sample(employees, 30))
+        return company
+
+    @pytest.mark.parametrize("conditions, ordering, limit, offset", [
+        ({"post": Post.KATYO, "age__gte": 40}, ("-age",), 10, 0),
+        ({"post": Post.YARUIN}, (), None, 0),
+        ({"post__gte": Post.KATYO, "age__lt": 50}, ("-age",), 5, 2),
+        ({"post__in": [Post.HIRA, Post.SYUNIN], "gender": Gender.WOMAN}, ("age", "-name"), 7, 0),
+        ({"name": "社員3"}, (), None, 0),
+        ({"name": "社員3", "age__gt": 30}, ("-age",), None, 1),
+        ({"age__gte": 60, "gender__ne": Gender.MAN}, ("name", "-age"), 4, 0),
+        ({"name__in": {"社員1", "社員2"}}, ("-post", "age"), None, 0),
+        ({}, ("-age",), 3, 0),
+        ({}, (), 5, 10),
+        ({"age__gte": 55, "age__lte": 60}, (), None, 0),
+        ({"age": 40}, ("name",), None, 0),
+        ({"age__gt": 30, "age__lt": 35, "post": Post.HIRA}, ("-age",), 3, 1),
+        ({"age__gte": 40.5, "age__lte": 50, "gender": Gender.MAN}, ("-age",), None, 0),
+    ])
+    def test_matches_naive(self, company, conditions, ordering, limit, offset):
+        """
+        クエリの結果が、リスト内包表記で絞り込んで並べた結果と一致することを確認
+        """
+        query = company.query().where(**conditions).order_by(*ordering)
+        if limit is not None:
+            query = query.limit(limit)
+        query = query.offset(offset)
+
+        def matches(employee):
+            for key, value in conditions.items():
+                field, _, op = key.partition("__")
+                actual = getattr(employee, field)
+                if field == "post" and op not in ("", "in"):
+                    actual, value = actual.rank, value.rank
+                if not NAIVE_OPERATORS[op](actual, value):
+                    return False
+            return True
+
+        expected = [employee for employee in company.employees if matches(employee)]
+        for field in reversed(ordering):
+            name = field.lstrip("-")
+            key = (lambda e: e.post.rank) if name == "post" else operator.attrgetter(name)
+            expected.sort(key=key, reverse=field.startswith("-"))
+        stop = None if limit is None else offset + limit
+
+        assert [employee.id for employee in query] == [employee.id for employee in expected[offset:stop]]
+
+    def test_index_selection(self, company):
+        """
+        条件に合わせて、社員ID・名前・役職のインデックス、または全員を調べる方法が選ばれることを確認
+        """
+        employee = company.employees[5]
+        assert company.query().where(id=employee.id, post=Post.HIRA).index == "id"
+        assert company.query().where(age__gte=30, name="社員1").index == "name"
+        assert company.query().where(post=Post.KATYO, age__gte=40).index == "post"
+        assert company.query().where(age__gte=40).index == "scan"
+        assert company.query().where(age__gte=55, age__lte=60).index == "age"
+        assert company.query().order_by("-age").limit(5).index == "age"
+        assert company.query().where(id=employee.id).first() == employee
+        assert company.query().where(id="存在しない").first() is None
+
+        plan = company.query().where(post=Post.KATYO, age__gte=40).order_by("-age").limit(10).explain()
+        assert "post" in plan and "課長" in plan
+        assert "インデックスの順のまま" in plan
+        assert "範囲: age 40歳〜" in plan
+        assert "絞り込み: age" not in plan
+        assert "並べ替える" in company.query().where(age__gte=40).order_by("name").explain()
+
+    def test_select_president_by_query(self, company):
+        """
+        役員の最年長をクエリで求めた結果が select_president() と一致することを確認
+        """
+        oldest = company.query().where(post=Post.YARUIN).order_by("-age").first()
+        assert oldest == company.select_president()
+
+    def test_queries_are_immutable_and_lazy(self, company):
+        """
+        where() などが元のクエリを変えず、結果がイテレーターであることを確認
+        """
+        base = company.query().where(post=Post.HIRA)
+        older = base.where(age__gte=50)
+
+        assert base.count() >= older.count()
+        assert isinstance(base, EmployeeQuery)
+        result = iter(older)
+        assert iter(result) is result
+        assert company.query().count() == company.current_number
+
+    @pytest.mark.parametrize("call", [
+        lambda query: query.where(salary=1),
+        lambda query: query.where(age__between=(1, 2)),
+        lambda query: query.where(gender__gte=Gender.MAN),
+        lambda query: query.order_by("salary"),
+        lambda query: query.order_by("--age"),
+        lambda query: query.limit(-1),
+        lambda query: query.offset(-1),
+    ])
+    def test_invalid_arguments(self, call):
+        """
+        不正な条件・並べ替え・件数で ValueError になることを確認
+        """
+        with pytest.raises(ValueError):
+            call(Company().query())
+
+
+# ============================================================
+# テストクラス18: 年齢順インデックスのテスト
+# ============================================================
+
+class TestAgeIndex:
+    """
+    年齢順インデックス（employees_by_age・oldest_employees・age_percentile）のテストクラス
+
+    テスト項目:
+    - 採用・削除・昇進・降格を繰り返しても、範囲・上位・パーセンタイルが従来の方法と同じか
+    - パーセンタイルの定義（nearest-rank 法）と境界
+    - 不正な引数
+    """
+
+    @pytest.fixture(params=[
+        Company.OBJECT_STORAGE, Company.COLUMNAR_STORAGE, Company.SQLITE_STORAGE, "snapshot",
+        "object-indexed", "columnar-indexed",
+    ])
+    def company(self, request, tmp_path, monkeypatch):
+        """
+        小さなバケットの年齢順インデックスで、ランダムな操作を済ませた会社を作るフィクスチャ
+
+        インデックスは初めて使うときに作られるので、ふつうは操作の後の検索で作られる
+        "-indexed" は操作の前に検索してインデックスを作っておく会社（操作のたびの更新を確認する）
+        "snapshot" はスナップショットから読み込んだ直後の会社
+        """
+        # バケットの分割・削除が何度も起きるように、バケットを小さくする
+        monkeypatch.setattr(company_management._SortedKeys, "LOAD", 4)
+        rng = random.Random(18)
+        storage, _, indexed = request.param.partition("-")
+        if storage == "snapshot":
+            storage = Company.OBJECT_STORAGE
+        company = Company(storage=storage, sink=NullSink())
+        company.MAX_NUMBER_OF_PEOPLE = 1000
+        company.add_employees([
+            (f"社員{i}", rng.choice(list(Gender)), rng.randint(18, 70), rng.choice(list(Post))) for i in range(200)
+        ])
+        if request.param == "snapshot":
+            path = tmp_path / "company.snap"
+            company.save(path)
+            company = Company.load(path, sink=NullSink())
+            # 読み込んだ直後の昇進で、インデックスが正しく作られることも確認する
+            company.employees[0].promote()
+        if indexed:
+            assert company.count_by_age() == 200
+            assert company._store._age_index is not None
+
+        for step in range(600):
+            action = rng.random()
+            if action < 0.3:
+                company.add_employee(f"追加{step}", Gender.WOMAN, rng.randint(18, 70), rng.choice(list(Post)))
+            elif action < 0.45:
+                company.delete_employee(rng.choice(company.employees))
+            elif action < 0.5:
+                company.delete_employees(rng.sample(company.employees, 5))
+            elif action < 0.75:
+                rng.choice(company.employees).promote()
+            else:
+                rng.choice(company.employees).demote()
+        return company
+
+    @staticmethod
+    def _by_age(employees):
+        """
+        社員を年齢の高い順（同い年なら採用順）に並べるヘルパーメソッド
+        """
+        return sorted(employees, key=lambda employee: -employee.age)
+
+    @pytest.mark.parametrize("post", [None] + list(Post))
+    def test_range_and_top_k_match_naive(self, company, post):
+        """
+        年齢の範囲・上位 N 人が、リスト内包表記で求めた結果と一致することを確認
+        """
+        members = [e for e in company.employees if post is None or e.post == post]
+        expected = self._by_age(members)
+
+        assert company.employees_by_age(post=post) == expected
+        assert company.employees_by_age(55, 60, post) == [e for e in expected if 55 <= e.age <= 60]
+        assert company.employees_by_age(max_age=25, post=post) == [e for e in expected if e.age <= 25]
+        assert company.employees_by_age(min_age=65, post=post) == [e for e in expected if e.age >= 65]
+        assert company.employees_by_age(60, 55, post) == []
+        assert company.count_by_age(55, 60, post) == len([e for e in expected if 55 <= e.age <= 60])
+        assert company.count_by_age(post=post) == len(expected)
+        assert company.count_by_age(60, 55, post) == 0
+        assert company.query().where(age__gte=55, age__lte=60).count() == company.count_by_age(55, 60)
+        for count in (0, 1, 10, len(expected) + 5):
+            assert company.oldest_employees(count, post) == expected[:count]
+
+    @pytest.mark.parametrize("post", [None] + list(Post))
+    def test_percentile_matches_naive(self, company, post):
+        """
+        年齢のパーセンタイルが、並べ替えて nearest-rank 法で求めた結果と一致することを確認
+        """
+        ages = sorted(e.age for e in company.employees if post is None or e.post == post)
+        for percent in (0, 1, 25, 50, 90, 99, 100, 33.3):
+            rank = max(1, -(-percent * len(ages) // 100))
+            assert company.age_percentile(percent, post) == ages[int(rank) - 1]
+
+    def test_index_is_built_on_first_use(self):
+        """
+        年齢順インデックスは採用では作られず、初めて年齢で検索したときに今の役職・年齢から作られることを確認
+        """
+        company = Company(storage=Company.COLUMNAR_STORAGE, sink=NullSink())
+        company.add_employees(BULK_ROWS + [("三郎", Gender.MAN, 60, Post.HIRA)])
+        company.get_personnel_by_name("三郎").promote()
+        company.delete_employee(company.get_personnel_by_name("花子"))
+        assert company._store._age_index is None
+
+        assert [emp.name for emp in company.oldest_employees(2, Post.SYUNIN)] == ["三郎"]
+        assert company._store._age_index is not None
+
+        # 作った後は、採用・昇進のたびに更新される
+        company.add_employee("四郎", Gender.MAN, 65, Post.HIRA)
+        company.get_personnel_by_name("四郎").promote()
+        assert [emp.name for emp in company.oldest_employees(2, Post.SYUNIN)] == ["四郎", "三郎"]
+
+    def test_percentile_definition(self):
+        """
+        中央値・最小・最大と、社員がいない場合の結果を確認
+        """
+        company = Company(sink=NullSink())
+        assert company.age_percentile(50) is None
+        company.add_employees([(f"社員{age}", Gender.MAN, age, Post.HIRA) for age in (50, 20, 40, 30)])
+
+        assert company.age_percentile(50) == 30
+        assert company.age_percentile(0) == 20
+        assert company.age_percentile(100) == 50
+        assert company.age_percentile(75, Post.HIRA) == 40
+        assert company.age_percentile(50, Post.YARUIN) is None
+
+    def test_index_follows_promotion_and_deletion(self):
+        """
+        昇進・降格・削除がすぐに役職別の結果へ反映されることを確認
+        """
+        company = Company(sink=NullSink())
+        company.add_employees([
+            ("課長", Gender.MAN, 58, Post.KATYO),
+            ("主任", Gender.WOMAN, 57, Post.SYUNIN),
+            ("役員", Gender.MAN, 56, Post.YARUIN),
+        ])
+        katyo = company.get_personnel_by_name("課長")
+
+        katyo.promote()
+        assert company.employees_by_age(55, 60, Post.YARUIN) == [katyo, company.get_personnel_by_name("役員")]
+        assert company.employees_by_age(post=Post.KATYO) == []
+
+        katyo.demote()
+        company.delete_employee(katyo)
+        assert company.oldest_employees(5) == [company.get_personnel_by_name("主任"), company.get_personnel_by_name("役員")]
+        # 削除した社員は昇進しても会社のインデックスに影響しない
+        katyo.promote()
+        assert company.oldest_employees(5, Post.YARUIN) == [company.get_personnel_by_name("役員")]
+
+    @pytest.mark.parametrize("call", [
+        lambda company: company.age_percentile(-1),
+        lambda company: company.age_percentile(100.5),
+        lambda company: company.oldest_employees(-1),
+    ])
+    def test_invalid_arguments(self, call):
+        """
+        不正なパーセント・人数で ValueError になることを確認
+        """
+        with pytest.raises(ValueError):
+            call(Company())
+
+
+# ============================================================
+# テストクラス19: 名前の全員検索のテスト
+# ============================================================
+
+# 表記ゆれのある名前（同じ人の書き方違いを含む）
+SPELLING_VARIANTS = [
+    "佐藤 太郎", "佐藤　太郎", "佐藤太郎", "佐藤 花子", "佐々木 太郎", "佐藤木 一郎",
+    "ｻﾄｳ ﾀﾛｳ", "サトウ タロウ", "Ｔａｒｏ Ｓａｔｏ", "Taro Sato", "鈴木 一郎", "鈴木　一郎",
+]
+
+
+def naive_normalize(name):
+    """
+    全角・半角と空白の違いをなくす比較用の関数（期待値をリスト内包表記で求めるときに使う）
+    """
+    return "".join(unicodedata.normalize("NFKC", name).split())
+
+
+class TestNameSearch:
+    """
+    名前の全員検索（find_personnel_by_name）のテストクラス
+
+    テスト項目:
+    - 完全一致・表記ゆれ・前方一致の結果が、全員を調べた結果と一致するか
+    - 採用・削除を繰り返してもインデックスが正しく更新されるか
+    - 不正な一致のしかた
+    """
+
+    @pytest.fixture(params=[Company.OBJECT_STORAGE, Company.COLUMNAR_STORAGE, Company.SQLITE_STORAGE, "snapshot"])
+    def company(self, request, tmp_path):
+        """
+        表記ゆれのある名前の社員を採用した会社を作るフィクスチャ
+
+        "snapshot" はスナップショットから読み込んだ直後の会社（インデックスを後から作る）
+        """
+        rng = random.Random(19)
+        storage = Company.OBJECT_STORAGE if request.param == "snapshot" else request.param
+        company = Company(storage=storage, sink=NullSink())
+        company.MAX_NUMBER_OF_PEOPLE = 1000
+        company.add_employees([
+            (rng.choice(SPELLING_VARIANTS), rng.choice(list(Gender)), rng.randint(18, 70), rng.choice(list(Post)))
+            for _ in range(120)
+        ])
+        if request.param == "snapshot":
+            path = tmp_path / "company.snap"
+            company.save(path)
+            company = Company.load(path, sink=NullSink())
+        return company
+
+    @staticmethod
+    def _expected(company, name, match):
+        """
+        全員を調べて、一致する社員を採用順に求めるヘルパーメソッド
+        """
+        if match == Company.EXACT_MATCH:
+            return [e for e in company.employees if e.name == name]
+        if match == Company.NORMALIZED_MATCH:
+            return [e for e in company.employees if naive_normalize(e.name) == naive_normalize(name)]
+        return [e for e in company.employees if naive_normalize(e.name).startswith(naive_normalize(name))]
+
+    @pytest.mark.parametrize("name, match", [
+        ("佐藤 太郎", Company.EXACT_MATCH),
+        ("佐藤太郎", Company.NORMALIZED_MATCH),
+        ("佐藤　 太郎 ", Company.NORMALIZED_MATCH),
+        ("サトウタロウ", Company.NORMALIZED_MATCH),
+        ("taro sato", Company.NORMALIZED_MATCH),
+        ("佐藤", Company.PREFIX_MATCH),
+        ("佐藤　", Company.PREFIX_MATCH),
+        ("佐", Company.PREFIX_MATCH),
+        ("ｻﾄｳ", Company.PREFIX_MATCH),
+        ("Ｔａ", Company.PREFIX_MATCH),
+        ("", Company.PREFIX_MATCH),
+        ("田中", Company.PREFIX_MATCH),
+    ])
+    def test_matches_naive(self, company, name, match):
+        """
+        検索結果が、全員を調べて求めた結果と一致することを確認
+        """
+        assert company.find_personnel_by_name(name, match) == self._expected(company, name, match)
+
+    def test_variants_and_family_name(self):
+        """
+        表記ゆれの違う同じ名前がまとめて見つかり、名字の検索に別の名字が混ざらないことを確認
+        """
+        company = Company(sink=NullSink())
+        company.MAX_NUMBER_OF_PEOPLE = 50
+        company.add_employees([(name, Gender.MAN, 30, Post.HIRA) for name in SPELLING_VARIANTS])
+
+        assert [e.name for e in company.find_personnel_by_name("佐藤　太郎", Company.NORMALIZED_MATCH)] == [
+            "佐藤 太郎", "佐藤　太郎", "佐藤太郎",
+        ]
+        assert [e.name for e in company.find_personnel_by_name("ｻﾄｳﾀﾛｳ", Company.NORMALIZED_MATCH)] == [
+            "ｻﾄｳ ﾀﾛｳ", "サトウ タロウ",
+        ]
+        assert [e.name for e in company.find_personnel_by_name("佐藤", Company.PREFIX_MATCH)] == [
+            "佐藤 太郎", "佐藤　太郎", "佐藤太郎", "佐藤 花子", "佐藤木 一郎",
+        ]
+        assert company.find_personnel_by_name("佐藤太郎") == [company.employees[2]]
+        assert company.find_personnel_by_name("佐藤 次郎", Company.NORMALIZED_MATCH) == []
+
+        president = President("社長", Gender.MAN, 60)
+        assert president.find_personnel_by_name("佐藤") == []
+        president.company = company
+        assert len(president.find_personnel_by_name("鈴木", "prefix")) == 2
+
+    def test_index_follows_hiring_and_deletion(self, company):
+        """
+        採用・削除を繰り返しても、検索結果が全員を調べた結果と一致することを確認
+        """
+        rng = random.Random(190)
+        for step in range(200):
+            if rng.random() < 0.5 and company.current_number > 0:
+                people = rng.sample(company.employees, min(company.current_number, rng.randint(1, 8)))
+                company.delete_employees(people)
+            else:
+                company.add_employee(rng.choice(SPELLING_VARIANTS), Gender.WOMAN, 30, Post.HIRA)
+            name = rng.choice(SPELLING_VARIANTS)
+            for match, query in ((Company.NORMALIZED_MATCH, name), (Company.PREFIX_MATCH, name[:2])):
+                assert company.find_personnel_by_name(query, match) == self._expected(company, query, match)
+
+    @pytest.mark.parametrize("storage", [Company.OBJECT_STORAGE, Company.COLUMNAR_STORAGE])
+    def test_index_is_built_on_first_search(self, storage):
+        """
+        表記ゆれをなくした名前のインデックスは採用・削除では作られず、
+        初めて表記ゆれ・前方一致で検索したときに作られ、その後は採用・削除のたびに更新されることを確認
+        """
+        company = Company(storage=storage, sink=NullSink())
+        company.MAX_NUMBER_OF_PEOPLE = 50
+        company.add_employees([(name, Gender.MAN, 30, Post.HIRA) for name in SPELLING_VARIANTS])
+        company.delete_employee(company.find_personnel_by_name("佐藤 花子")[0])
+        assert company.find_personnel_by_name("佐藤太郎") == [company.employees[2]]
+        assert company._store._normalized_index is None
+
+        assert len(company.find_personnel_by_name("佐藤", Company.PREFIX_MATCH)) == 4
+        assert company._store._normalized_index is not None
+
+        company.add_employee("佐藤 花子", Gender.WOMAN, 30, Post.HIRA)
+        company.delete_employee(company.find_personnel_by_name("佐藤木 一郎")[0])
+        assert [e.name for e in company.find_personnel_by_name("佐藤", Company.PREFIX_MATCH)] == [
+            "佐藤 太郎", "佐藤　太郎", "佐藤太郎", "佐藤 花子",
+        ]
+        assert company.find_personnel_by_name("佐藤木一郎", Company.NORMALIZED_MATCH) == []
+
+    def test_invalid_match(self):
+        """
+        不正な一致のしかたで ValueError になることを確認
+        """
+        with pytest.raises(ValueError):
+            Company().find_personnel_by_name("佐藤", "fuzzy")
+
+
+# ============================================================
+# テストクラス20: 変更履歴（イベントログ）のテスト
+# ============================================================
+
+def employee_state(company):
+    """
+    社員の状態を採用順に並べたリストにするヘルパー関数（再生した会社との比較に使う）
+    """
+    return [(e.id, e.name, e.gender, e.age, e.post) for e in company.employees]
+
+
+class TestEventLog:
+    """
+    変更履歴（ChangeLog）のテストクラス
+
+    テスト項目:
+    - スナップショットとその後のイベントから、同じ状態の会社を作り直せるか
+    - 監査用に全イベントを古い順に読めるか
+    - イベントを1件ずつではなく、まとめて書き込むか（グループコミット）
+    - 途中までしか書けていない末尾を読み飛ばし、その続きから記録できるか
+    - 不正な使い方
+    """
+
+    @staticmethod
+    def _mutate(company, rng, steps):
+        """
+        採用・削除・昇進・降格・人事評価・辞任を無作為に行うヘルパーメソッド
+        """
+        president = President("社長", Gender.MAN, 70)
+        president.company = company
+        for _ in range(steps):
+            action = rng.random()
+            if action < 0.3 or company.current_number < 5:
+                company.add_employees([
+                    (f"社員{rng.randint(0, 50)}", rng.choice(list(Gender)), rng.randint(18, 65), rng.choice(list(Post)))
+                    for _ in range(rng.randint(1, 4))
+                ])
+            elif action < 0.4:
+                company.add_employee("単独", Gender.WOMAN, rng.randint(18, 65), Post.HIRA)
+            elif action < 0.55:
+                company.delete_employees(rng.sample(company.employees, rng.randint(1, 3)))
+            elif action < 0.65:
+                company.delete_employee(rng.choice(company.employees))
+            elif action < 0.75:
+                rng.choice(company.employees).promote()
+            elif action < 0.85:
+                rng.choice(company.employees).demote()
+            elif action < 0.95:
+                company.apply_reviews([(e, rng.choice((-2, -1, 1, 2))) for e in rng.sample(company.employees, 3)])
+            else:
+                president = president.resignation()
+
+    @pytest.mark.parametrize("storage", [Company.OBJECT_STORAGE, Company.COLUMNAR_STORAGE, Company.SQLITE_STORAGE])
+    def test_replay_matches_state(self, tmp_path, storage):
+        """
+        スナップショットを何度か取った後でも、再生した会社が元の会社と同じ状態になることを確認
+        """
+        company = Company(sink=NullSink())
+        company.MAX_NUMBER_OF_PEOPLE = 10000
+        company.add_employees([("既存", Gender.MAN, 40, Post.KATYO), ("既存2", Gender.WOMAN, 35, Post.HIRA)])
+        log = ChangeLog(tmp_path, snapshot_interval=37)
+        log.attach(company)
+        self._mutate(company, random.Random(20), 300)
+        log.close()
+
+        assert company.change_log is None
+        assert log.snapshot_lsn > 0
+        replayed = ChangeLog(tmp_path).replay(storage=storage, sink=NullSink(), attach=False)
+        assert employee_state(replayed) == employee_state(company)
+        assert replayed.MAX_NUMBER_OF_PEOPLE == 10000
+        # 検索用インデックスも作り直されている
+        oldest = replayed.select_president()
+        assert (oldest.id, oldest.post) == (company.select_president().id, company.select_president().post)
+
+    def test_events_for_audit(self, tmp_path):
+        """
+        採用・昇進・人事評価・辞任・削除のイベントを、古い順に読めることを確認
+        """
+        company = Company(sink=NullSink())
+        log = ChangeLog(tmp_path)
+        log.attach(company)
+        company.add_employees([("山田", Gender.MAN, 50, Post.KATYO), ("鈴木", Gender.WOMAN, 30, Post.HIRA)])
+        yamada, suzuki = company.employees
+        yamada.promote()
+        company.apply_reviews([(suzuki, 2)])
+        president = President("社長", Gender.MAN, 60)
+        president.company = company
+        president.resignation()
+
+        events = list(log.events())
+        assert [(e.lsn, e.kind, e.employee_id) for e in events] == [
+            (0, ChangeLog.HIRE, yamada.id), (1, ChangeLog.HIRE, suzuki.id),
+            (2, ChangeLog.POST, yamada.id), (3, ChangeLog.POST, suzuki.id),
+            (4, ChangeLog.RESIGN, yamada.id), (5, ChangeLog.DELETE, yamada.id),
+        ]
+        assert events[1].fields == {"name": "鈴木", "gender": Gender.WOMAN, "age": 30, "post": Post.HIRA}
+        assert events[3].fields == {"post": Post.KATYO}
+        assert [e.lsn for e in log.events(start=4)] == [4, 5]
+
+    def test_group_commit(self, tmp_path):
+        """
+        イベントを commit_size 件ずつまとめて書き込み、flush() で残りを書き込むことを確認
+        """
+        company = Company(sink=NullSink())
+        company.MAX_NUMBER_OF_PEOPLE = 1000
+        log = ChangeLog(tmp_path, commit_size=100, commit_interval=3600)
+        log.attach(company)
+        for index in range(250):
+            company.add_employee(f"社員{index}", Gender.MAN, 30, Post.HIRA)
+
+        assert (log.lsn, log.committed_lsn, log.commit_count) == (250, 200, 2)
+        # 書き込んでいないイベントは、別の変更履歴からは見えない
+        assert ChangeLog(tmp_path).replay(attach=False).current_number == 200
+        company.flush()
+        assert (log.committed_lsn, log.commit_count) == (250, 3)
+        assert ChangeLog(tmp_path).replay(attach=False).current_number == 250
+
+    def test_torn_tail(self, tmp_path):
+        """
+        途中までしか書けていない末尾を読み飛ばし、その続きから記録できることを確認
+        """
+        company = Company(sink=NullSink())
+        log = ChangeLog(tmp_path, snapshot_interval=0)
+        log.attach(company)
+        company.add_employees([("山田", Gender.MAN, 50, Post.KATYO), ("鈴木", Gender.WOMAN, 30, Post.HIRA)])
+        log.close()
+        # 異常終了で、次のイベントの途中までしか書けなかった状態にする
+        segment = tmp_path / "events-00000000000000000000.log"
+        with open(segment, "ab") as file:
+            file.write(b"\x01\x02\x03\x04\x20\x00")
+
+        log = ChangeLog(tmp_path)
+        replayed = log.replay(sink=NullSink())
+        assert employee_state(replayed) == employee_state(company)
+        replayed.add_employee("佐藤", Gender.MAN, 45, Post.SYUNIN)
+        replayed.close()
+
+        assert [e.kind for e in log.events()] == [ChangeLog.HIRE] * 3
+        again = ChangeLog(tmp_path).replay(sink=NullSink(), attach=False)
+        assert [e.name for e in again.employees] == ["山田", "鈴木", "佐藤"]
+
+    def test_replay_allocates_new_ids(self, tmp_path):
+        """
+        再生した会社が、削除済みの社員IDも含めて記録済みのIDを払い出さないことを確認
+        """
+        company = Company(sink=NullSink())
+        log = ChangeLog(tmp_path, snapshot_interval=2)
+        log.attach(company)
+        company.add_employees([("山田", Gender.MAN, 50, Post.KATYO), ("鈴木", Gender.WOMAN, 30, Post.HIRA)])
+        company.delete_employee(company.employees[1])
+        company.close()
+
+        replayed = ChangeLog(tmp_path).replay(sink=NullSink())
+        replayed.add_employee("佐藤", Gender.MAN, 45, Post.SYUNIN)
+        assert [e.id for e in replayed.employees] == ["1000", "1002"]
+
+    def test_invalid_usage(self, tmp_path):
+        """
+        二重の記録・既存の変更履歴への attach()・スナップショットのない replay() で ValueError になることを確認
+        """
+        with pytest.raises(ValueError):
+            ChangeLog(tmp_path / "empty").replay()
+        with pytest.raises(ValueError):
+            ChangeLog(tmp_path, commit_size=0)
+
+        company = Company(sink=NullSink())
+        log = ChangeLog(tmp_path / "log")
+        log.attach(company)
+        with pytest.raises(ValueError):
+            log.attach(Company())
+        with pytest.raises(ValueError):
+            ChangeLog(tmp_path / "other").attach(company)
+        log.close()
+        with pytest.raises(ValueError):
+            ChangeLog(tmp_path / "log").attach(Company())
+
+
+# ============================================================
+# テストクラス21: ストレージごとの基本機能のテスト
+# ============================================================
+
+@pytest.fixture(params=[Company.OBJECT_STORAGE, Company.COLUMNAR_STORAGE, Company.SQLITE_STORAGE])
+def storage(request):
+    """
+    社員データの保存形式（オブジェクト・列形式・SQLite の3通りでテストを実行する）
+    """
+    return request.param
+
+
+class TestStorageBackends:
+    """
+    どのストレージ（storage 引数）でも、会社の基本機能が同じように動くかのテストクラス
+
+    company_management_complete_tests.py の会社・社長のシナリオを、3つのストレージで実行する
+
+    テスト項目:
+    - 採用・検索・削除・上限・次期社長の選出・一覧表示・辞任
+    - 昇進・降格・削除をランダムに繰り返しても、オブジェクト形式と同じ結果になるか
+    """
+
+    def test_complete_workflow(self, storage):
+        """
+        社員の追加・検索・昇進・次期社長の選出・社長の辞任が一通りできることを確認
+        """
+        president = President("倍井 杉蔵", Gender.MAN, 88)
+        company = Company(storage=storage, sink=NullSink())
+        president.company = company
+
+        president.add_employee("太郎", Gender.MAN, 30, Post.HIRA)
+        president.add_employee("花子", Gender.WOMAN, 40, Post.YARUIN)
+        president.add_employee("次郎", Gender.MAN, 35, Post.SYUNIN)
+        assert company.current_number == 3
+
+        found = president.get_personnel_by_name("太郎")
+        assert (found.name, found.post) == ("太郎", Post.HIRA)
+        found.promote()
+        assert president.get_personnel_by_name("太郎").post == Post.SYUNIN
+        assert president.get_personnel_by_name("太郎").salary == 300000
+
+        assert company.select_president().name == "花子"
+        new_president = president.resignation()
+        assert isinstance(new_president, President)
+        assert new_president.name == "花子"
+        assert [emp.name for emp in company.employees] == ["太郎", "次郎"]
+
+    def test_resignation_does_not_read_all_employees(self, storage, monkeypatch):
+        """
+        社長の辞任は、社員リストを作らずに（全員を読まずに）次期社長を選ぶことを確認
+        """
+        president = President("倍井 杉蔵", Gender.MAN, 88)
+        company = Company(storage=storage, sink=NullSink())
+        president.company = company
+        company.add_employees([(f"社員{i}", Gender.MAN, 20 + i % 40, Post.HIRA) for i in range(10)])
+
+        def read_all():
+            raise AssertionError("社員リストを作りました")
+
+        monkeypatch.setattr(company._store, "employees", read_all)
+        new_president = president.resignation()
+
+        assert (new_president.name, new_president.age) == ("社員9", 29)
+        assert company.current_number == 9
+
+    def test_capacity(self, storage, capsys):
+        """
+        最大社員数までは採用でき、それを超えると上限のメッセージを表示して採用しないことを確認
+        """
+        company = Company(storage=storage)
+        for i in range(Company.MAX_NUMBER_OF_PEOPLE):
+            company.add_employee(f"社員{i}", Gender.MAN, 25, Post.HIRA)
+        capsys.readouterr()
+
+        company.add_employee("11人目", Gender.MAN, 25, Post.HIRA)
+
+        assert company.current_number == Company.MAX_NUMBER_OF_PEOPLE
+        assert company.get_personnel_by_name("11人目") is None
+        assert "上限" in capsys.readouterr().out
+
+    def test_search_and_delete(self, storage, capsys):
+        """
+        名前・IDでの検索と、削除（2回目・他社の社員は存在しない扱い）を確認
+        """
+        company = Company(storage=storage)
+        assert company.get_personnel_by_name("太郎") is None
+        assert company.get_personnel_by_id("1000") is None
+        assert company.select_president() is None
+
+        company.add_employees(BULK_ROWS)
+        taro = company.get_personnel_by_name("太郎")
+        assert company.get_personnel_by_id(taro.id).name == "太郎"
+        assert company.get_personnel_by_id("9999") is None
+
+        other = Company(storage=storage)
+        other.add_employees(BULK_ROWS)
+        capsys.readouterr()
+
+        company.delete_employee(taro)
+        company.delete_employee(taro)
+        company.delete_employee(other.get_personnel_by_name("花子"))
+
+        out = capsys.readouterr().out
+        assert "太郎さんを削除しました。" in out
+        assert out.count("社員リストに存在しません。") == 2
+        assert [emp.name for emp in company.employees] == ["花子", "次郎"]
+        assert other.current_number == 3
+
+    def test_select_president(self, storage):
+        """
+        役員がいれば最年長の役員、いなければ全社員の最年長が選ばれることを確認
+        """
+        company = Company(storage=storage, sink=NullSink())
+        company.add_employees([
+            ("太郎", Gender.MAN, 60, Post.KATYO),
+            ("花子", Gender.WOMAN, 45, Post.YARUIN),
+            ("次郎", Gender.MAN, 50, Post.YARUIN),
+        ])
+        assert company.select_president().name == "次郎"
+
+        company.delete_employees([company.get_personnel_by_name("花子"), company.get_personnel_by_name("次郎")])
+        assert company.select_president().name == "太郎"
+
+    def test_display_matches_legacy(self, storage, capsys):
+        """
+        社員一覧の表示（0人の場合も）が、1行ずつ print() していたころと同じことを確認
+        """
+        company = Company(storage=storage)
+        for rows in ([], BULK_ROWS):
+            company.add_employees(rows)
+            capsys.readouterr()
+
+            company.display_all_employees()
+            displayed = capsys.readouterr().out
+            legacy_display(company)
+            assert displayed == capsys.readouterr().out
+
+    def test_matches_object_storage(self, storage):
+        """
+        採用・昇進・降格・削除をランダムに繰り返しても、社員・検索・選出がオブジェクト形式と同じことを確認
+        """
+        rng = random.Random(0)
+        rows = [
+            (f"山田 社員{i % 13}", rng.choice(list(Gender)), rng.randint(18, 70), rng.choice(list(Post)))
+            for i in range(60)
+        ]
+        companies = [Company(sink=NullSink()), Company(storage=storage, sink=NullSink())]
+        for company in companies:
+            company.MAX_NUMBER_OF_PEOPLE = 100
+            company.add_employees(rows[:40])
+
+        for step in range(120):
+            action = rng.choice(["promote", "demote", "delete", "hire"])
+            position = rng.randrange(companies[0].current_number)
+            for company in companies:
+                employee = company.employees[position]
+                if action == "promote":
+                    employee.promote()
+                elif action == "demote":
+                    employee.demote()
+                elif action == "delete":
+                    company.delete_employee(employee)
+                else:
+                    company.add_employee(*rows[40 + step % 20])
+
+            expected, actual = companies
+            assert employee_records(actual) == employee_records(expected)
+            assert actual.select_president().id == expected.select_president().id
+
+        for name in ("山田 社員3", "山田　社員3"):
+            assert [emp.id for emp in actual.find_personnel_by_name(name, Company.NORMALIZED_MATCH)] == [
+                emp.id for emp in expected.find_personnel_by_name(name, Company.NORMALIZED_MATCH)
+            ]
+        assert [emp.id for emp in actual.find_personnel_by_name("山田", Company.PREFIX_MATCH)] == [
+            emp.id for emp in expected.find_personnel_by_name("山田", Company.PREFIX_MATCH)
+        ]
+        for post in (None,) + tuple(Post):
+            assert actual.count_by_age(post=post, min_age=30, max_age=50) == expected.count_by_age(
+                post=post, min_age=30, max_age=50
+            )
@@ -0,0 +1,407 @@
+"""
+ロギングデコレーターのベンチマーク集
+
+デコレーターを付けたことで、関数の呼び出しがどれだけ遅くなるかを計測します。
+
+実行方法:
+    py logging-benchmarks.py              # すべてのベンチマーク
+    py logging-benchmarks.py log_call     # 指定したベンチマークだけ
+
+注意:
+    logging-decorators.py を logging_decorators.py として保存してから実行してください
+    （ハイフンを含むファイル名はインポートできないため）
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import logging
+import math
+import random
+import threading
+import time
+
+import logging_decorators
+from logging_decorators import logger, log_call, log_time, cache_result, LatencyHistogram
+
+
+# ===================================================================
+# 共通の部品
+# ===================================================================
+
+def measure(func, repeat: int) -> float:
+    """
+    func を repeat 回実行したときの1回あたりの時間（マイクロ秒）を返す関数
+
+    Args:
+        func: 計測する関数（引数なし）
+        repeat (int): 実行回数
+
+    Returns:
+        float: 1回あたりの時間（マイクロ秒）
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+@contextlib.contextmanager
+def log_level(level: int):
+    """
+    ロガーのレベルと出力先を一時的に変えるコンテキストマネージャー
+
+    出力先は StringIO にする（画面への出力の時間を計測に含めない）
+
+    Args:
+        level (int): ロガーのレベル（logging.INFO など）
+    """
+    handlers = logger.handlers[:]
+    old_level = logger.level
+    stream_handler = logging.StreamHandler(io.StringIO())
+    stream_handler.setFormatter(logging_decorators.formatter)
+    logger.handlers[:] = [stream_handler]
+    logger.setLevel(level)
+    try:
+        yield
+    finally:
+        logger.handlers[:] = handlers
+        logger.setLevel(old_level)
+
+
+# ===================================================================
+# ベンチマーク1: log_call のオーバーヘッド
+# ===================================================================
+
+def eager_log_call(func):
+    """
+    従来の log_call（呼び出しのたびに全引数を repr() して f-string で組み立てる）の比較用の実装
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        func_name = func.__name__
+        args_repr = [repr(a) for a in args]
+        kwargs_repr = [f"{k}={v!r}" for k, v in kwargs.items()]
+        signature = ", ".join(args_repr + kwargs_repr)
+        logger.info(f"→ 呼び出し: {func_name}({signature})")
+        result = func(*args, **kwargs)
+        logger.info(f"← 完了: {func_name}() → {result!r}")
+        return result
+    return wrapper
+
+
+def bench_log_call(repeat: int) -> None:
+    """
+    log_call を付けた関数の1回あたりの時間を、INFO が無効・有効の場合で比較する
+
+    引数は小さな値と、大きなリスト・辞書の2通り（大きいほど repr() のコストが目立つ）
+
+    Args:
+        repeat (int): 呼び出し回数
+    """
+    def target(data, options=None):
+        return len(data)
+
+    plain = target
+    eager = eager_log_call(target)
+    lazy = log_call(target)
+
+    small = ([1, 2, 3], {"mode": "fast"})
+    large = (list(range(10_000)), {"rows": [{"id": i, "tags": ["a", "b"]} for i in range(1_000)]})
+
+    print("\n■ log_call: 1回あたりの時間（µs）")
+    print(f"{'レベル':<10} {'引数':<8} {'デコレーターなし':>16} {'従来':>12} {'改善後':>12} {'倍率':>8}")
+    for level_name, level in (("INFO無効", logging.WARNING), ("INFO有効", logging.INFO)):
+        with log_level(level):
+            for label, (data, options) in (("小", small), ("大", large)):
+                # 大きな引数で INFO が有効な場合は1回が遅いので回数を減らす
+                count = repeat if level != logging.INFO or label == "小" else max(1, repeat // 100)
+                plain_us = measure(lambda: plain(data, options=options), count)
+                eager_us = measure(lambda: eager(data, options=options), count)
+                lazy_us = measure(lambda: lazy(data, options=options), count)
+                print(
+                    f"{level_name:<10} {label:<8} {plain_us:>16.3f} {eager_us:>12.3f} "
+                    f"{lazy_us:>12.3f} {eager_us / lazy_us:>7.1f}x"
+                )
+
+
+# ===================================================================
+# ベンチマーク2: サンプリング（間引き）
+# ===================================================================
+
+def bench_sampling(repeat: int) -> None:
+    """
+    INFO が有効なときに、log_call のサンプリング方法ごとの1回あたりの時間を比較する
+
+    ほとんどの呼び出しは間引かれるので、かかるのは回数のカウントと判定だけになる
+
+    Args:
+        repeat (int): 呼び出し回数
+    """
+    def target(x):
+        return x + 1
+
+    cases = [
+        ("デコレーターなし", target),
+        ("全件記録", log_call(target)),
+        ("1000回に1回", log_call(sample_every=1000)(target)),
+        ("確率 0.1%", log_call(sample_rate=0.001)(target)),
+        ("最大10回/秒", log_call(max_per_second=10)(target)),
+    ]
+
+    print("\n■ サンプリング: INFO 有効時の1回あたりの時間（µs）")
+    print(f"{'方法':<16} {'時間':>10} {'記録':>10} {'間引き':>10}")
+    with log_level(logging.INFO):
+        for label, func in cases:
+            # 全件記録は1回が遅いので回数を減らす
+            count = repeat if label != "全件記録" else max(1, repeat // 10)
+            elapsed_us = measure(lambda: func(1), count)
+            sampler = getattr(func, "sampler", None)
+            logged = f"{sampler.logged:,}" if sampler is not None else "-"
+            skipped = f"{sampler.skipped:,}" if sampler is not None else "-"
+            print(f"{label:<16} {elapsed_us:>10.3f} {logged:>10} {skipped:>10}")
+
+
+# ===================================================================
+# ベンチマーク3: 実行時間の計測（log_time）
+# ===================================================================
+
+def per_call_log_time(func):
+    """
+    従来の log_time（time.time() で計測し、1回ごとに INFO で出力する）の比較用の実装
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start_time = time.time()
+        result = func(*args, **kwargs)
+        elapsed_time = (time.time() - start_time) * 1000
+        logger.info(f"⏱ {func.__name__}() の実行時間: {elapsed_time:.2f}ms")
+        return result
+    return wrapper
+
+
+def bench_log_time(repeat: int) -> None:
+    """
+    log_time の1回あたりの時間と、ヒストグラムのパーセンタイルの誤差を計測する
+
+    誤差は、対数正規分布の値（中央値 約0.4ms）を記録し、全件を並べ替えて求めた値と比べる
+
+    Args:
+        repeat (int): 呼び出し回数（誤差の計測では記録する値の数）
+    """
+    def target(x):
+        return x + 1
+
+    cases = [
+        ("デコレーターなし", target),
+        ("従来（1回ごとに出力）", per_call_log_time(target)),
+        ("ヒストグラムのみ", log_time(target)),
+        ("ヒストグラム＋1回ごと", log_time(log_each_call=True)(target)),
+    ]
+    print("\n■ log_time: INFO 有効時の1回あたりの時間（µs）")
+    with log_level(logging.INFO):
+        for label, func in cases:
+            print(f"{label:<20} {measure(lambda: func(1), repeat):>10.3f}")
+
+    rng = random.Random(0)
+    values = [int(rng.lognormvariate(13, 1.5)) for _ in range(repeat)]
+    histogram = LatencyHistogram()
+    record_us = measure(lambda: [histogram.record(value) for value in values], 1) / len(values)
+    values.sort()
+    print(f"\n■ ヒストグラム: {len(values):,}件（記録 {record_us:.3f} µs/件、メモリ {len(histogram.counts) * 8:,} バイト）")
+    print(f"{'':<8} {'正確な値(ms)':>14} {'ヒストグラム(ms)':>16} {'誤差':>8}")
+    for percent in (50, 90, 99, 100):
+        exact = values[max(1, math.ceil(len(values) * percent / 100)) - 1]
+        approx = histogram.percentile(percent)
+        print(f"p{percent:<7} {exact / 1e6:>14.3f} {approx / 1e6:>16.3f} {(approx - exact) / exact:>8.2%}")
+
+
+# ===================================================================
+# ベンチマーク4: 結果のキャッシュ（cache_result）
+# ===================================================================
+
+def unbounded_cache_result(func):
+    """
+    従来の cache_result（上限なし・ヒットのたびに DEBUG の文字列を組み立てる）の比較用の実装
+    """
+    cache = {}
+    hits = misses = 0
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        nonlocal hits, misses
+        key = (args, tuple(sorted(kwargs.items())))
+        if key in cache:
+            hits += 1
+            logger.debug(f"💾 {func.__name__}() キャッシュヒット（ヒット率: {hits}/{hits + misses}）")
+            return cache[key]
+        misses += 1
+        logger.debug(f"🔍 {func.__name__}() キャッシュミス（新規計算）")
+        result = cache[key] = func(*args, **kwargs)
+        return result
+    return wrapper
+
+
+def bench_cache(repeat: int) -> None:
+    """
+    cache_result の1回あたりの時間と件数を、上限・追い出し方ごとに比較する
+
+    キーは Zipf 分布に近い偏り（よく使うキーと、ほとんど使わないキー）で 10万種類から選ぶ
+    DEBUG が有効なロガーで計測する（従来の実装はヒットのたびに文字列を組み立てる）
+
+    Args:
+        repeat (int): 呼び出し回数
+    """
+    def target(x):
+        return x * 2
+
+    rng = random.Random(0)
+    keys = [int(rng.paretovariate(0.5)) % 100_000 for _ in range(repeat)]
+    cases = [
+        ("従来（上限なし）", unbounded_cache_result(target)),
+        ("上限なし", cache_result(target)),
+        ("LRU 1,000件", cache_result(maxsize=1_000)(target)),
+        ("LFU 1,000件", cache_result(maxsize=1_000, policy="lfu")(target)),
+        ("LRU 20KB", cache_result(max_bytes=20_000)(target)),
+        ("LRU ttl=1ms", cache_result(ttl=0.001)(target)),
+    ]
+
+    print("\n■ cache_result: DEBUG 有効時の1回あたりの時間（µs）")
+    print(f"{'方法':<16} {'時間':>10} {'ヒット率':>10} {'件数':>10} {'追い出し':>10} {'期限切れ':>10}")
+    with log_level(logging.DEBUG):
+        for label, func in cases:
+            iterator = iter(keys)
+            elapsed_us = measure(lambda: func(next(iterator)), len(keys))
+            info = func.cache_info() if hasattr(func, "cache_info") else None
+            if info is None:
+                print(f"{label:<16} {elapsed_us:>10.3f} {'-':>10} {'-':>10} {'-':>10} {'-':>10}")
+                continue
+            print(
+                f"{label:<16} {elapsed_us:>10.3f} {info.hits / (info.hits + info.misses):>10.1%} "
+                f"{info.currsize:>10,} {info.evictions:>10,} {info.expirations:>10,}"
+            )
+
+
+# ===================================================================
+# ベンチマーク5: 複数スレッドからの同時呼び出し（cache_result）
+# ===================================================================
+
+THREADS = 64
+
+
+def run_threads(work, count: int = THREADS) -> float:
+    """
+    count 個のスレッドで work(スレッド番号) を同時に始め、全て終わるまでの時間（ミリ秒）を返す関数
+
+    Args:
+        work: 各スレッドで実行する関数
+        count (int): スレッド数
+
+    Returns:
+        float: 経過時間（ミリ秒）
+    """
+    barrier = threading.Barrier(count + 1)
+
+    def run(index):
+        barrier.wait()
+        work(index)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    start = time.perf_counter()
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_contention(repeat: int) -> None:
+    """
+    64スレッドから cache_result を同時に呼んだときの、計算回数と時間を比較する
+
+    - 同時ミス: 全スレッドが同じ8種類のキーを同時に要求する（関数は1回 20ms かかる）
+      thread_safe=False では、同じキーを複数のスレッドが計算してしまう
+    - ヒット: 温まったキャッシュを全スレッドで読む（ロックの数による違いを見る）
+      GIL があるので、ロックを分けても並列には動かない（取り合いが減る分だけの差になる）
+
+    Args:
+        repeat (int): ヒットの計測での呼び出し回数（全スレッドの合計）
+    """
+    keys = 8
+    print(f"\n■ cache_result: {THREADS}スレッドで同時に{keys}種類のキーを要求（1回 20ms の関数）")
+    print(f"{'方法':<24} {'時間(ms)':>10} {'計算回数':>10} {'待ち合わせ':>10}")
+    for label, options in (
+        ("thread_safe=False", {}),
+        ("thread_safe=True", {"thread_safe": True}),
+    ):
+        calls = []
+
+        @cache_result(**options)
+        def slow(key):
+            calls.append(key)
+            time.sleep(0.02)
+            return key * 2
+
+        elapsed_ms = run_threads(lambda index: slow(index % keys))
+        info = slow.cache_info()
+        print(f"{label:<24} {elapsed_ms:>10.1f} {len(calls):>10,} {info.coalesced:>10,}")
+
+    per_thread = max(1, repeat // THREADS)
+    print(f"\n■ cache_result: {THREADS}スレッドで温まったキャッシュを読む（1回あたりの時間 µs、全スレッド合計で割る）")
+    print(f"{'方法':<24} {'時間':>10} {'ヒット率':>10}")
+    for label, options in (
+        ("thread_safe=False", {}),
+        ("ロック1つ", {"thread_safe": True, "lock_stripes": 1}),
+        ("ロック16個", {"thread_safe": True, "lock_stripes": 16}),
+    ):
+        func = cache_result(maxsize=10_000, **options)(lambda x: x * 2)
+        for key in range(1_000):
+            func(key)
+
+        def work(index):
+            for i in range(per_thread):
+                func((index * 7919 + i) % 1_000)
+
+        elapsed_ms = run_threads(work)
+        info = func.cache_info()
+        print(
+            f"{label:<24} {elapsed_ms * 1000 / (per_thread * THREADS):>10.3f} "
+            f"{info.hits / (info.hits + info.misses):>10.1%}"
+        )
+
+
+# ===================================================================
+# エントリーポイント
+# ===================================================================
+
+# ベンチマーク名 → 関数
+BENCHMARKS = {
+    "log_call": bench_log_call,
+    "sampling": bench_sampling,
+    "log_time": bench_log_time,
+    "cache": bench_cache,
+    "contention": bench_contention,
+}
+
+
+def main():
+    """
+    コマンドライン引数で指定されたベンチマークを実行する
+    """
+    parser = argparse.ArgumentParser(description="ロギングデコレーターのベンチマーク")
+    parser.add_argument("names", nargs="*", help=f"実行するベンチマーク（{', '.join(BENCHMARKS)}）")
+    parser.add_argument("--repeat", type=int, default=100_000, help="呼び出し回数")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"不明なベンチマーク: {', '.join(unknown)}")
+
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name](args.repeat)
+
+
+if __name__ == "__main__":
+    main()
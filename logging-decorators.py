@@ -15,10 +15,16 @@
 """
 
 import logging
+import sys
+import threading
 import time
 import functools
+import random
+import reprlib
+from array import array
+from collections import OrderedDict, namedtuple
 from datetime import datetime
-from typing import Any, Callable
+from typing import Any, Callable, Optional
 import traceback
 import json
 
@@ -47,11 +53,263 @@ if not logger.handlers:
     logger.addHandler(console_handler)
 
 
+# ===================================================================
+# ログに出す値の文字列化（長さと深さを制限）
+# ===================================================================
+
+# 大きなリストや辞書・長い文字列をそのまま repr() するとログが巨大になり、時間もかかる
+# reprlib で長さと入れ子の深さを制限する（超えた部分は "..." になる）
+REPR_MAX_LENGTH = 200  # 1つの値の最大文字数
+REPR_MAX_DEPTH = 3     # リスト・辞書などの入れ子をたどる深さ
+REPR_MAX_ITEMS = 10    # リスト・辞書などで表示する要素数
+
+_value_repr = reprlib.Repr()
+_value_repr.maxlevel = REPR_MAX_DEPTH
+_value_repr.maxstring = REPR_MAX_LENGTH
+_value_repr.maxother = REPR_MAX_LENGTH
+_value_repr.maxlong = REPR_MAX_LENGTH
+for _attr in ("maxlist", "maxtuple", "maxdict", "maxset", "maxfrozenset", "maxdeque", "maxarray"):
+    setattr(_value_repr, _attr, REPR_MAX_ITEMS)
+
+# 入れ子を持たない型（短ければ reprlib を通さずに repr() してよい）
+_SCALAR_TYPES = frozenset((int, float, bool, type(None)))
+
+
+def _is_short(value: Any) -> bool:
+    """
+    reprlib を通さずに repr() してよい小さな値かを判定する関数
+
+    Args:
+        value: 判定する値
+
+    Returns:
+        bool: 数値・None・短い文字列なら True
+    """
+    kind = type(value)
+    if kind in _SCALAR_TYPES:
+        return True
+    return (kind is str or kind is bytes) and len(value) <= REPR_MAX_LENGTH
+
+
+def short_repr(value: Any) -> str:
+    """
+    長さと入れ子の深さを制限した repr() を返す関数
+
+    Args:
+        value: 文字列にする値
+
+    Returns:
+        str: 最大 REPR_MAX_LENGTH 文字程度の文字列
+    """
+    # 小さな値と、小さな値だけを少し持つリスト・タプル・辞書は、そのまま repr() する
+    # （reprlib は小さな値でも repr() の数倍かかる）
+    kind = type(value)
+    if _is_short(value):
+        text = repr(value)
+    elif (kind is list or kind is tuple) and len(value) <= REPR_MAX_ITEMS and all(map(_is_short, value)):
+        text = repr(value)
+    elif (
+        kind is dict and len(value) <= REPR_MAX_ITEMS
+        and all(map(_is_short, value)) and all(map(_is_short, value.values()))
+    ):
+        text = repr(value)
+    else:
+        text = _value_repr.repr(value)
+    # reprlib が省略しない型（独自クラスの中身など）も、最後に長さで切る
+    if len(text) > REPR_MAX_LENGTH:
+        text = text[:REPR_MAX_LENGTH - 3] + "..."
+    return text
+
+
+class _LazySignature:
+    """
+    引数の文字列化をログに書き出すときまで遅らせるクラス
+
+    logger.info("%s", _LazySignature(args, kwargs)) のように渡すと、
+    ハンドラーが実際にメッセージを組み立てるときだけ __str__() が呼ばれる
+    """
+
+    __slots__ = ("args", "kwargs")
+
+    def __init__(self, args: tuple, kwargs: dict):
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self) -> str:
+        args_repr = [short_repr(a) for a in self.args]  # 位置引数
+        kwargs_repr = [f"{k}={short_repr(v)}" for k, v in self.kwargs.items()]  # キーワード引数
+        return ", ".join(args_repr + kwargs_repr)
+
+
+class _LazyRepr:
+    """
+    1つの値の文字列化（short_repr）をログに書き出すときまで遅らせるクラス
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __str__(self) -> str:
+        return short_repr(self.value)
+
+
+# ===================================================================
+# ログに出す呼び出しの間引き（サンプリング）
+# ===================================================================
+
+class Sampler:
+    """
+    1秒に何万回も呼ばれる関数のログを間引くクラス
+
+    次のどれか1つの方法で、ログに出す呼び出しを選ぶ
+    - every: N回に1回だけ記録する（1回目、N+1回目、…）
+    - rate: 呼び出しごとに確率 rate で記録する（0.01 なら約1%）
+    - per_second: 1秒あたり最大 per_second 回まで記録する（トークンバケット。1未満なら 1/per_second 秒に1回）
+
+    間引いた呼び出しでかかるのは、呼び出し回数のカウントと判定だけ
+    （間引いた回数は calls - logged で求めるので、別には数えない）
+    複数スレッドから同時に呼ぶと、回数が少しずれることがある（ロックは取らない）
+
+    Attributes:
+        calls (int): 判定した呼び出し回数
+        logged (int): ログに記録した回数
+        skipped (int): 間引いた回数
+    """
+
+    def __init__(
+        self,
+        every: Optional[int] = None,
+        rate: Optional[float] = None,
+        per_second: Optional[float] = None,
+    ):
+        """
+        Samplerクラスのコンストラクタ
+
+        Args:
+            every: N回に1回だけ記録する場合の N
+            rate: 確率で記録する場合の確率（0〜1）
+            per_second: 1秒あたりの最大記録回数
+
+        Raises:
+            ValueError: 指定がない・2つ以上ある・値が不正な場合
+        """
+        given = [value is not None for value in (every, rate, per_second)]
+        if sum(given) != 1:
+            raise ValueError("every・rate・per_second のどれか1つを指定してください")
+        if every is not None and (not isinstance(every, int) or every < 1):
+            raise ValueError(f"every は1以上の整数にしてください: {every!r}")
+        if rate is not None and not 0 <= rate <= 1:
+            raise ValueError(f"rate は0〜1にしてください: {rate!r}")
+        if per_second is not None and per_second <= 0:
+            raise ValueError(f"per_second は正の数にしてください: {per_second!r}")
+
+        self.calls = 0
+        self.logged = 0
+        self._every = every
+        self._rate = rate
+        self._per_second = per_second
+        # トークンバケット：最大 per_second 個（1秒分）までためられる
+        # 1回の記録にトークンが1個いるので、per_second が1未満（数秒に1回）でも1個まではためる
+        self._capacity = max(1.0, per_second) if per_second is not None else None
+        self._tokens = self._capacity
+        self._refilled_at = time.monotonic()
+
+        # 方法ごとの判定関数を選んでおく（呼び出しのたびに分岐しない）
+        if every is not None:
+            self._decide = self._should_log_every
+        elif rate is not None:
+            self._decide = self._should_log_rate
+        else:
+            self._decide = self._should_log_per_second
+
+    @property
+    def skipped(self) -> int:
+        """
+        間引いた回数
+
+        Returns:
+            int: calls - logged
+        """
+        return self.calls - self.logged
+
+    def should_log(self) -> bool:
+        """
+        この呼び出しをログに記録するかを判定するメソッド
+
+        （判定はコンストラクタで選んだ方法ごとの関数に任せる）
+
+        Returns:
+            bool: 記録するなら True
+        """
+        return self._decide()
+
+    def _should_log_every(self) -> bool:
+        """every の判定（N回に1回）"""
+        self.calls += 1
+        if (self.calls - 1) % self._every:
+            return False
+        self.logged += 1
+        return True
+
+    def _should_log_rate(self) -> bool:
+        """rate の判定（確率）"""
+        self.calls += 1
+        if random.random() >= self._rate:
+            return False
+        self.logged += 1
+        return True
+
+    def _should_log_per_second(self) -> bool:
+        """per_second の判定（トークンバケット）"""
+        self.calls += 1
+        now = time.monotonic()
+        # 前回からの経過時間の分だけトークンを補充する（1秒分か1個の多い方が上限）
+        self._tokens = min(self._capacity, self._tokens + (now - self._refilled_at) * self._per_second)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        self.logged += 1
+        return True
+
+    def __repr__(self) -> str:
+        return f"Sampler(calls={self.calls}, logged={self.logged}, skipped={self.skipped})"
+
+
+def _make_sampler(
+    sample_every: Optional[int],
+    sample_rate: Optional[float],
+    max_per_second: Optional[float],
+) -> Optional[Sampler]:
+    """
+    デコレーターの引数から Sampler を作る関数
+
+    Args:
+        sample_every: N回に1回だけ記録する場合の N
+        sample_rate: 確率で記録する場合の確率
+        max_per_second: 1秒あたりの最大記録回数
+
+    Returns:
+        Optional[Sampler]: どれも指定しなければ None（全呼び出しを記録する）
+    """
+    if sample_every is None and sample_rate is None and max_per_second is None:
+        return None
+    return Sampler(every=sample_every, rate=sample_rate, per_second=max_per_second)
+
+
 # ===================================================================
 # デコレーター1: 関数呼び出しをログ出力
 # ===================================================================
 
-def log_call(func: Callable) -> Callable:
+def log_call(
+    func: Optional[Callable] = None,
+    *,
+    sample_every: Optional[int] = None,
+    sample_rate: Optional[float] = None,
+    max_per_second: Optional[float] = None,
+) -> Callable:
     """
     関数の呼び出しをログに記録するデコレーター
     
@@ -59,6 +317,9 @@ def log_call(func: Callable) -> Callable:
     - 関数の開始をログ出力
     - 引数の値をログ出力
     - 戻り値をログ出力
+    - INFO が無効なら引数・戻り値を文字列にしない（関数をそのまま呼ぶだけ）
+    - 引数・戻り値は長さと深さを制限して表示（short_repr）
+    - サンプリングを指定すると、一部の呼び出しだけを記録（間引いた回数は .sampler で確認）
     
     使用例:
         @log_call
@@ -66,85 +327,340 @@ def log_call(func: Callable) -> Callable:
             return a + b
         
         result = add(3, 5)  # ログが自動で出力される
+        
+        @log_call(sample_every=1000)  # 1000回に1回だけ記録
+        def hot_function(x):
+            return x * 2
+        
+        print(hot_function.sampler.skipped)  # 間引いた回数
     
     Args:
-        func: デコレートする関数
+        func: デコレートする関数（引数付きで使う場合は省略）
+        sample_every: N回に1回だけ記録する
+        sample_rate: 確率 sample_rate で記録する（0〜1）
+        max_per_second: 1秒あたり最大 max_per_second 回まで記録する
     
     Returns:
-        ラップされた関数
+        ラップされた関数（引数付きで使う場合はデコレーター関数）
     """
-    @functools.wraps(func)  # 元の関数の情報を保持
-    def wrapper(*args, **kwargs):
-        # 関数名を取得
+    # 指定が不正なら、デコレートする前にここで ValueError にする
+    _make_sampler(sample_every, sample_rate, max_per_second)
+    
+    def decorator(func: Callable) -> Callable:
+        # 関数名を取得（呼び出しのたびに取り出さない）
         func_name = func.__name__
+        # 関数ごとに1つの Sampler を使う（指定がなければ None）
+        sampler = _make_sampler(sample_every, sample_rate, max_per_second)
+        should_log = sampler.should_log if sampler is not None else None
+
+        @functools.wraps(func)  # 元の関数の情報を保持
+        def wrapper(*args, **kwargs):
+            # INFO が無効なら、引数の文字列化もログの呼び出しもせずに実行するだけ
+            if not logger.isEnabledFor(logging.INFO):
+                return func(*args, **kwargs)
+            
+            # 間引く呼び出しは、回数を数えて実行するだけ
+            if should_log is not None and not should_log():
+                return func(*args, **kwargs)
+            
+            # 関数開始のログ
+            # % 形式で渡すので、引数の文字列化はハンドラーが実際に出力するときまで行われない
+            if sampler is None:
+                logger.info("→ 呼び出し: %s(%s)", func_name, _LazySignature(args, kwargs))
+            else:
+                logger.info(
+                    "→ 呼び出し: %s(%s) [記録 %d/%d回]",
+                    func_name, _LazySignature(args, kwargs), sampler.logged, sampler.calls,
+                )
+            
+            # 実際の関数を実行
+            result = func(*args, **kwargs)
+            
+            # 関数終了のログ（戻り値付き）
+            logger.info("← 完了: %s() → %s", func_name, _LazyRepr(result))
+            
+            return result
         
-        # 引数をフォーマット
-        args_repr = [repr(a) for a in args]  # 位置引数
-        kwargs_repr = [f"{k}={v!r}" for k, v in kwargs.items()]  # キーワード引数
-        signature = ", ".join(args_repr + kwargs_repr)
-        
-        # 関数開始のログ
-        logger.info(f"→ 呼び出し: {func_name}({signature})")
-        
-        # 実際の関数を実行
-        result = func(*args, **kwargs)
-        
-        # 関数終了のログ（戻り値付き）
-        logger.info(f"← 完了: {func_name}() → {result!r}")
-        
-        return result
+        # 間引いた回数などを確認できるようにする
+        wrapper.sampler = sampler
+        return wrapper
     
-    return wrapper
+    # @log_call と @log_call(...) のどちらの書き方でも使えるようにする
+    if func is None:
+        return decorator
+    return decorator(func)
+
+
+# ===================================================================
+# 実行時間のヒストグラム（log_time で使う）
+# ===================================================================
+
+class LatencyHistogram:
+    """
+    実行時間（ナノ秒）の分布を一定のメモリで記録するヒストグラム（HDR ヒストグラム方式）
+
+    値を「2のべき乗ごとの区間を、さらに等分した区間」（対数＋線形の区間）に振り分けて数える
+    - SUB_BUCKET_BITS = 7 なら、各区間の幅は値の 1/64 以下（誤差は約1.6%以内）
+    - 1ns 〜 MAX_VALUE_NS（約4.9時間）を約2,400個の区間で数える（呼び出し回数によらず約20KB）
+    - MAX_VALUE_NS を超える値は最後の区間に数える（最大値は正確に記録する）
+
+    パーセンタイルは、その順位の値が入っている区間の上端（最大値を超えない）を返す
+
+    複数スレッドから同時に記録すると、回数が少しずれることがある（ロックは取らない）
+
+    使用例:
+        histogram = LatencyHistogram()
+        histogram.record(1_500_000)  # 1.5ms
+        print(histogram.p99, histogram.max, histogram.count)
+    """
+
+    SUB_BUCKET_BITS = 7
+    MAX_VALUE_NS = (1 << 44) - 1
+
+    # 区間の数（MAX_VALUE_NS が入る区間の番号 + 1）
+    _SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+    _SUB_BUCKET_HALF = _SUB_BUCKET_COUNT >> 1
+    _BUCKET_COUNT = (
+        ((MAX_VALUE_NS.bit_length() - SUB_BUCKET_BITS) * _SUB_BUCKET_HALF)
+        + (MAX_VALUE_NS >> (MAX_VALUE_NS.bit_length() - SUB_BUCKET_BITS)) + 1
+    )
+
+    def __init__(self):
+        """
+        LatencyHistogramクラスのコンストラクタ（全区間0件で初期化）
+        """
+        self.counts = array("Q", bytes(8 * self._BUCKET_COUNT))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.min = 0
+
+    @classmethod
+    def _index(cls, value: int) -> int:
+        """
+        値が入る区間の番号を返すメソッド
+
+        SUB_BUCKET_COUNT 未満の値はそのまま（1ns 刻み）、それ以上は
+        上位 SUB_BUCKET_BITS ビットだけを残した値（2のべき乗ごとに半分の区間）で区別する
+
+        Args:
+            value: 値（ナノ秒、0 以上 MAX_VALUE_NS 以下）
+
+        Returns:
+            int: 区間の番号
+        """
+        if value < cls._SUB_BUCKET_COUNT:
+            return value
+        shift = value.bit_length() - cls.SUB_BUCKET_BITS
+        return shift * cls._SUB_BUCKET_HALF + (value >> shift)
+
+    @classmethod
+    def _upper_bound(cls, index: int) -> int:
+        """
+        区間に入る最大の値を返すメソッド（_index の逆）
+
+        Args:
+            index: 区間の番号
+
+        Returns:
+            int: 区間の上端（ナノ秒）
+        """
+        if index < cls._SUB_BUCKET_COUNT:
+            return index
+        shift = index // cls._SUB_BUCKET_HALF - 1
+        mantissa = index - shift * cls._SUB_BUCKET_HALF
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value: int) -> None:
+        """
+        値を1件記録するメソッド
+
+        Args:
+            value: 値（ナノ秒）
+        """
+        # 呼び出しのたびに使うので、_index() を呼ばずにここで計算する
+        if value >= self._SUB_BUCKET_COUNT:
+            if value > self.MAX_VALUE_NS:
+                index = self._BUCKET_COUNT - 1
+            else:
+                shift = value.bit_length() - self.SUB_BUCKET_BITS
+                index = shift * self._SUB_BUCKET_HALF + (value >> shift)
+        elif value < 0:
+            index = value = 0
+        else:
+            index = value
+        self.counts[index] += 1
+        if value > self.max:
+            self.max = value
+        if value < self.min or not self.count:
+            self.min = value
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percent: float) -> int:
+        """
+        パーセンタイルを返すメソッド
+
+        Args:
+            percent: 0〜100
+
+        Returns:
+            int: その順位の値が入っている区間の上端（ナノ秒。最大値を超えない。0件なら0）
+
+        Raises:
+            ValueError: percent が 0〜100 の範囲外の場合
+        """
+        if not 0 <= percent <= 100:
+            raise ValueError(f"percent は0〜100にしてください: {percent!r}")
+        if self.count == 0:
+            return 0
+        # 小さい方から数えて rank 件目の値（1件目〜count件目）
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= rank:
+                # 最後の区間には MAX_VALUE_NS を超えた値も入るので、上端ではなく最大値を返す
+                if index == self._BUCKET_COUNT - 1:
+                    return self.max
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+    @property
+    def p50(self) -> int:
+        """中央値（ナノ秒）"""
+        return self.percentile(50)
+
+    @property
+    def p90(self) -> int:
+        """90パーセンタイル（ナノ秒）"""
+        return self.percentile(90)
+
+    @property
+    def p99(self) -> int:
+        """99パーセンタイル（ナノ秒）"""
+        return self.percentile(99)
+
+    @property
+    def mean(self) -> float:
+        """平均（ナノ秒。0件なら0）"""
+        return self.total / self.count if self.count else 0.0
+
+    def reset(self) -> None:
+        """
+        記録を全て消すメソッド
+        """
+        self.counts = array("Q", bytes(8 * self._BUCKET_COUNT))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.min = 0
+
+    def summary(self) -> str:
+        """
+        件数・パーセンタイル・最大値を1行の文字列にするメソッド
+
+        Returns:
+            str: "件数=... p50=...ms p90=...ms p99=...ms 最大=...ms"
+        """
+        return (
+            f"件数={self.count} p50={self.p50 / 1e6:.3f}ms p90={self.p90 / 1e6:.3f}ms "
+            f"p99={self.p99 / 1e6:.3f}ms 最大={self.max / 1e6:.3f}ms"
+        )
+
+    def __repr__(self) -> str:
+        return f"LatencyHistogram({self.summary()})"
 
 
 # ===================================================================
 # デコレーター2: 実行時間を計測
 # ===================================================================
 
-def log_time(func: Callable) -> Callable:
+def log_time(
+    func: Optional[Callable] = None,
+    *,
+    log_each_call: bool = False,
+    summary_interval: Optional[float] = 60.0,
+) -> Callable:
     """
-    関数の実行時間を計測してログに記録するデコレーター
+    関数の実行時間を計測してヒストグラムに記録するデコレーター
     
     機能:
-    - 関数の実行時間を自動計測
-    - ミリ秒単位で表示
-    - 遅い関数を簡単に特定できる
+    - 関数の実行時間を time.perf_counter_ns() で計測（単調増加・高分解能）
+    - 関数ごとのヒストグラム（.latency）に記録し、p50/p90/p99/最大/件数を確認できる
+    - summary_interval 秒ごとに、まとめの1行（件数・パーセンタイル・最大）をログ出力
+    - log_each_call=True なら、従来どおり1回ごとにも実行時間をログ出力
     
     使用例:
         @log_time
         def slow_function():
             time.sleep(1)
         
-        slow_function()  # "実行時間: 1000.5ms" とログ出力
+        slow_function()
+        print(slow_function.latency.p99)  # ナノ秒
+        slow_function.log_summary()       # "📈 slow_function() 件数=1 p50=1000.5ms ..." とログ出力
+        
+        @log_time(log_each_call=True)     # "⏱ slow_function() の実行時間: 1000.50ms" も毎回出力
+        def traced_function():
+            pass
     
     Args:
-        func: デコレートする関数
+        func: デコレートする関数（引数付きで使う場合は省略）
+        log_each_call: 1回ごとに実行時間をログ出力するか
+        summary_interval: まとめの行を出力する間隔（秒。None なら自動では出力しない）
+            （間隔がたった後の最初の呼び出しで出力する）
     
     Returns:
-        ラップされた関数
+        ラップされた関数（引数付きで使う場合はデコレーター関数）
     """
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
+    if summary_interval is not None and summary_interval <= 0:
+        raise ValueError(f"summary_interval は正の数にしてください: {summary_interval!r}")
+    
+    def decorator(func: Callable) -> Callable:
         func_name = func.__name__
+        # 関数ごとのヒストグラム
+        histogram = LatencyHistogram()
+        # 次にまとめの行を出力する時刻（ナノ秒）
+        interval_ns = None if summary_interval is None else int(summary_interval * 1e9)
+        next_summary = None if interval_ns is None else time.perf_counter_ns() + interval_ns
         
-        # 開始時刻を記録
-        start_time = time.time()
+        def log_summary():
+            logger.info("📈 %s() %s", func_name, histogram.summary())
         
-        # 実際の関数を実行
-        result = func(*args, **kwargs)
-        
-        # 終了時刻を記録
-        end_time = time.time()
-        
-        # 実行時間を計算（ミリ秒）
-        elapsed_time = (end_time - start_time) * 1000
-        
-        # ログ出力
-        logger.info(f"⏱ {func_name}() の実行時間: {elapsed_time:.2f}ms")
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            nonlocal next_summary
+            
+            # 開始時刻を記録（ナノ秒の整数。time.time() と違い時計の調整の影響を受けない）
+            start_time = time.perf_counter_ns()
+            
+            try:
+                # 実際の関数を実行
+                return func(*args, **kwargs)
+            finally:
+                # 例外で終わった呼び出しも含めて記録する
+                end_time = time.perf_counter_ns()
+                elapsed_ns = end_time - start_time
+                histogram.record(elapsed_ns)
+                
+                # 1回ごとのログ出力（指定した場合だけ）
+                if log_each_call:
+                    logger.info("⏱ %s() の実行時間: %.2fms", func_name, elapsed_ns / 1e6)
+                
+                # 間隔がたっていれば、まとめの行を出力
+                if next_summary is not None and end_time >= next_summary:
+                    next_summary = end_time + interval_ns
+                    log_summary()
         
-        return result
+        # ヒストグラムと、まとめの行を今すぐ出力するメソッドを確認できるようにする
+        wrapper.latency = histogram
+        wrapper.log_summary = log_summary
+        return wrapper
     
-    return wrapper
+    # @log_time と @log_time(...) のどちらの書き方でも使えるようにする
+    if func is None:
+        return decorator
+    return decorator(func)
 
 
 # ===================================================================
@@ -240,7 +756,13 @@ def count_calls(func: Callable) -> Callable:
 # デコレーター5: 引数と戻り値を詳細にログ出力
 # ===================================================================
 
-def log_detailed(func: Callable) -> Callable:
+def log_detailed(
+    func: Optional[Callable] = None,
+    *,
+    sample_every: Optional[int] = None,
+    sample_rate: Optional[float] = None,
+    max_per_second: Optional[float] = None,
+) -> Callable:
     """
     引数と戻り値を詳細にログ出力するデコレーター
     
@@ -248,49 +770,79 @@ def log_detailed(func: Callable) -> Callable:
     - 引数の型と値を詳細に表示
     - 戻り値の型と値を詳細に表示
     - デバッグ時に便利
+    - サンプリングを指定すると、一部の呼び出しだけを記録（log_call と同じ指定方法）
     
     使用例:
         @log_detailed
         def calculate(x, y):
             return x + y
+        
+        @log_detailed(max_per_second=5)  # 1秒あたり最大5回まで記録
+        def hot_calculate(x, y):
+            return x + y
     
     Args:
-        func: デコレートする関数
+        func: デコレートする関数（引数付きで使う場合は省略）
+        sample_every: N回に1回だけ記録する
+        sample_rate: 確率 sample_rate で記録する（0〜1）
+        max_per_second: 1秒あたり最大 max_per_second 回まで記録する
     
     Returns:
-        ラップされた関数
+        ラップされた関数（引数付きで使う場合はデコレーター関数）
     """
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        func_name = func.__name__
-        
-        # 引数の詳細情報を作成
-        logger.debug(f"{'='*60}")
-        logger.debug(f"関数: {func_name}()")
-        logger.debug(f"{'='*60}")
-        
-        # 位置引数の詳細
-        if args:
-            logger.debug("位置引数:")
-            for i, arg in enumerate(args):
-                logger.debug(f"  [{i}] {type(arg).__name__}: {arg!r}")
-        
-        # キーワード引数の詳細
-        if kwargs:
-            logger.debug("キーワード引数:")
-            for key, value in kwargs.items():
-                logger.debug(f"  {key}: {type(value).__name__} = {value!r}")
-        
-        # 実際の関数を実行
-        result = func(*args, **kwargs)
-        
-        # 戻り値の詳細
-        logger.debug(f"戻り値: {type(result).__name__} = {result!r}")
-        logger.debug(f"{'='*60}")
+    # 指定が不正なら、デコレートする前にここで ValueError にする
+    _make_sampler(sample_every, sample_rate, max_per_second)
+    
+    def decorator(func: Callable) -> Callable:
+        # 関数ごとに1つの Sampler を使う（指定がなければ None）
+        sampler = _make_sampler(sample_every, sample_rate, max_per_second)
         
-        return result
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # DEBUG が無効な場合と、間引く呼び出しは実行するだけ
+            if not logger.isEnabledFor(logging.DEBUG):
+                return func(*args, **kwargs)
+            if sampler is not None and not sampler.should_log():
+                return func(*args, **kwargs)
+            
+            func_name = func.__name__
+            
+            # 引数の詳細情報を作成
+            logger.debug(f"{'='*60}")
+            logger.debug(f"関数: {func_name}()")
+            if sampler is not None:
+                logger.debug(f"サンプリング: {sampler.calls}回中{sampler.logged}回を記録")
+            logger.debug(f"{'='*60}")
+            
+            # 位置引数の詳細
+            if args:
+                logger.debug("位置引数:")
+                for i, arg in enumerate(args):
+                    logger.debug(f"  [{i}] {type(arg).__name__}: {arg!r}")
+            
+            # キーワード引数の詳細
+            if kwargs:
+                logger.debug("キーワード引数:")
+                for key, value in kwargs.items():
+                    logger.debug(f"  {key}: {type(value).__name__} = {value!r}")
+            
+            # 実際の関数を実行
+            result = func(*args, **kwargs)
+            
+            # 戻り値の詳細
+            logger.debug(f"戻り値: {type(result).__name__} = {result!r}")
+            logger.debug(f"{'='*60}")
+            
+            return result
+            
+        # 間引いた回数などを確認できるようにする
+        wrapper.sampler = sampler
+        return wrapper
     
-    return wrapper
+    # @log_detailed と @log_detailed(...) のどちらの書き方でも使えるようにする
+    if func is None:
+        return decorator
+    return decorator(func)
 
 
 # ===================================================================
@@ -364,18 +916,410 @@ def retry(max_attempts: int = 3, delay: float = 1.0):
 # デコレーター7: 実行結果をキャッシュ（メモ化）
 # ===================================================================
 
-def cache_result(func: Callable) -> Callable:
+# cache_info() が返す統計
+# coalesced は、他のスレッドが計算中の結果を待って受け取った回数（thread_safe=True の場合だけ数える）
+CacheInfo = namedtuple(
+    "CacheInfo",
+    ["hits", "misses", "evictions", "expirations", "maxsize", "currsize", "max_bytes", "currbytes", "coalesced"],
+)
+
+
+class _ResultCache:
+    """
+    cache_result が使うキャッシュ本体（件数・バイト数の上限と有効期限つき）
+
+    上限を超えたら、policy に従って1件ずつ追い出す（どちらも O(1)）
+    - "lru": 最後に使ってから最も時間がたった結果（OrderedDict の並び順で管理）
+    - "lfu": 使われた回数が最も少ない結果（回数ごとの OrderedDict で管理。同じ回数なら古い方）
+      結果がある回数を小さい順につないでおくので、最も少ない回数は、どの結果を消しても O(1) でわかる
+
+    有効期限（ttl 秒）を過ぎた結果は、読んだときか、次に結果を保存するときに消す
+    （全件が同じ ttl なので、保存した順に並べておけば期限切れは先頭から順に見つかる）
+    """
+
+    def __init__(
+        self,
+        maxsize: Optional[int],
+        ttl: Optional[float],
+        policy: str,
+        max_bytes: Optional[int],
+        sizeof: Callable[[Any], int],
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.policy = policy
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # 他のスレッドが計算中の結果を待った回数（_StripedCache がキャッシュのロックを取って数える）
+        self.coalesced = 0
+        self.currbytes = 0
+        # キー → [結果, 期限（monotonic の秒。ttl なしなら None）, バイト数, 使われた回数]
+        self._entries: dict = {}
+        # LRU: 使った順（先頭が最も古い）
+        self._order: OrderedDict = OrderedDict()
+        # LFU: 使われた回数 → その回数のキー（先頭が最も古い）と、最も少ない回数
+        self._by_frequency: dict = {}
+        self._min_frequency = 0
+        # LFU: 結果がある回数を小さい順につないだ双方向リスト（回数 → 次に大きい・小さい回数）
+        # 0 は先頭と末尾を兼ねる印（_higher[0] が最も少ない回数、結果がなければ 0）
+        self._higher: dict = {0: 0}
+        self._lower: dict = {0: 0}
+        # 有効期限: 保存した順（先頭が最も早く期限切れになる）
+        self._expiry: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Any, count_miss: bool = True) -> tuple:
+        """
+        結果を読むメソッド（ヒット・ミスを数える）
+
+        Args:
+            key: キー
+            count_miss: 見つからなかったときにミスとして数えるか
+                （_StripedCache は、計算中の印を確かめるときにもう一度読むので、1回目は数えない）
+
+        Returns:
+            tuple: (見つかったか, 結果)
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            if count_miss:
+                self.misses += 1
+            return False, None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            # 期限切れはミスとして扱い、ここで消す
+            self._remove(key)
+            self.expirations += 1
+            if count_miss:
+                self.misses += 1
+            return False, None
+        self.hits += 1
+        self._touch(key, entry)
+        return True, entry[0]
+
+    def put(self, key: Any, value: Any) -> None:
+        """
+        結果を保存し、上限を超えた分を追い出すメソッド
+        """
+        if key in self._entries:
+            self._remove(key)
+        self._expire()
+
+        size = 0
+        if self.max_bytes is not None:
+            size = self.sizeof(value)
+            # 1件だけで上限を超える結果は保存しない
+            if size > self.max_bytes:
+                return
+
+        # 追加すると上限を超える分を、追加する前に追い出す
+        # （LFU で、追加したばかりの結果（使われた回数1）が追い出されないように）
+        while self._entries and (
+            (self.maxsize is not None and len(self._entries) >= self.maxsize)
+            or (self.max_bytes is not None and self.currbytes + size > self.max_bytes)
+        ):
+            self._remove(self._victim())
+            self.evictions += 1
+
+        expires = None
+        if self.ttl is not None:
+            expires = time.monotonic() + self.ttl
+            self._expiry[key] = None
+        self._entries[key] = [value, expires, size, 1]
+        self.currbytes += size
+        if self.policy == "lru":
+            self._order[key] = None
+        else:
+            self._frequency_keys(1, 0)[key] = None
+
+    def clear(self) -> None:
+        """
+        全ての結果を消すメソッド（統計はそのまま）
+        """
+        self._entries.clear()
+        self._order.clear()
+        self._by_frequency.clear()
+        self._higher = {0: 0}
+        self._lower = {0: 0}
+        self._expiry.clear()
+        self._min_frequency = 0
+        self.currbytes = 0
+
+    def info(self) -> CacheInfo:
+        """
+        統計を返すメソッド
+        """
+        return CacheInfo(
+            self.hits, self.misses, self.evictions, self.expirations,
+            self.maxsize, len(self._entries), self.max_bytes, self.currbytes, self.coalesced,
+        )
+
+    def _touch(self, key: Any, entry: list) -> None:
+        """
+        使われた結果の並び順（LRU）・回数（LFU）を更新するメソッド O(1)
+        """
+        if self.policy == "lru":
+            self._order.move_to_end(key)
+            return
+        frequency = entry[3]
+        entry[3] = frequency + 1
+        by_frequency = self._by_frequency
+        keys = by_frequency[frequency]
+        higher_keys = by_frequency.get(frequency + 1)
+        if higher_keys is None:
+            if len(keys) == 1:
+                # このキーだけの並び（よく使われるキー）なら、並びごと1つ多い回数に付け替える
+                # （回数のリストの位置は変わらない）
+                self._renumber_frequency(frequency)
+                return
+            # 1つ多い回数の並びを、今の回数のすぐ後ろにつないで作る
+            higher_keys = self._frequency_keys(frequency + 1, frequency)
+        higher_keys[key] = None
+        del keys[key]
+        if not keys:
+            self._unlink_frequency(frequency)
+
+    def _victim(self) -> Any:
+        """
+        次に追い出すキーを返すメソッド O(1)
+        """
+        if self.policy == "lru":
+            return next(iter(self._order))
+        return next(iter(self._by_frequency[self._min_frequency]))
+
+    def _remove(self, key: Any) -> None:
+        """
+        結果を1件消すメソッド
+        """
+        entry = self._entries.pop(key)
+        self.currbytes -= entry[2]
+        if entry[1] is not None:
+            del self._expiry[key]
+        if self.policy == "lru":
+            del self._order[key]
+            return
+        keys = self._by_frequency[entry[3]]
+        del keys[key]
+        if not keys:
+            self._unlink_frequency(entry[3])
+
+    def _frequency_keys(self, frequency: int, lower: int) -> OrderedDict:
+        """
+        使われた回数が frequency のキーの並びを返すメソッド O(1)
+
+        なければ作って、回数のリストの lower（結果がある回数か、先頭を表す 0）のすぐ後ろにつなぐ
+        """
+        keys = self._by_frequency.get(frequency)
+        if keys is None:
+            keys = self._by_frequency[frequency] = OrderedDict()
+            higher = self._higher[lower]
+            self._higher[lower] = frequency
+            self._lower[frequency] = lower
+            self._higher[frequency] = higher
+            self._lower[higher] = frequency
+            self._min_frequency = self._higher[0]
+        return keys
+
+    def _renumber_frequency(self, frequency: int) -> None:
+        """
+        回数 frequency の並びを、回数 frequency + 1 の並びに付け替えるメソッド O(1)
+
+        frequency + 1 の並びがない場合だけ使う（リストの frequency の位置にそのまま入る）
+        """
+        higher = frequency + 1
+        self._by_frequency[higher] = self._by_frequency.pop(frequency)
+        lower = self._lower.pop(frequency)
+        self._higher[lower] = higher
+        self._lower[higher] = lower
+        next_higher = self._higher.pop(frequency)
+        self._higher[higher] = next_higher
+        self._lower[next_higher] = higher
+        if self._min_frequency == frequency:
+            self._min_frequency = higher
+
+    def _unlink_frequency(self, frequency: int) -> None:
+        """
+        空になった回数の並びを消し、回数のリストから外すメソッド O(1)
+
+        最も少ない回数の並びなら、最も少ない回数はリストの次の回数になる
+        """
+        del self._by_frequency[frequency]
+        lower = self._lower.pop(frequency)
+        higher = self._higher.pop(frequency)
+        self._higher[lower] = higher
+        self._lower[higher] = lower
+        self._min_frequency = self._higher[0]
+
+    def _expire(self) -> None:
+        """
+        期限切れの結果を、保存した順に先頭から消すメソッド
+        """
+        if not self._expiry:
+            return
+        now = time.monotonic()
+        while self._expiry:
+            key = next(iter(self._expiry))
+            if self._entries[key][1] > now:
+                break
+            self._remove(key)
+            self.expirations += 1
+
+
+class _Flight:
+    """
+    計算中の1つのキーの結果を、同じキーを待っている他のスレッドに渡すクラス（シングルフライト）
+    """
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class _StripedCache:
+    """
+    複数スレッドから同時に使える cache_result のキャッシュ本体
+
+    - 結果は1つの _ResultCache に入れ、1つのロックで守る
+      （件数・バイト数の上限と LRU・LFU の追い出しは、thread_safe=False の場合と同じ）
+      ロックを取るのは結果を読む・保存する間だけで、関数の実行中は取らない
+    - 同じキーのミスが同時に起きた場合は、最初のスレッドだけが関数を実行し、
+      他のスレッドはその結果を待って受け取る（シングルフライト）
+      実行中に例外が出た場合は、待っていたスレッドにも同じ例外を送出する（例外はキャッシュしない）
+    - 計算中の印はキーのハッシュ値でストライプ（ロックと印の辞書の組）に分けるので、
+      別のストライプのキーのミス同士は、印をつける・外すときにロックを取り合わない
+      （ロックの順番は常に「ストライプのロック → キャッシュのロック」）
+    """
+
+    def __init__(
+        self,
+        stripes: int,
+        maxsize: Optional[int],
+        ttl: Optional[float],
+        policy: str,
+        max_bytes: Optional[int],
+        sizeof: Callable[[Any], int],
+    ):
+        self._lock = threading.Lock()
+        self._cache = _ResultCache(maxsize, ttl, policy, max_bytes, sizeof)
+        self._stripes = [
+            (threading.Lock(), {})  # キー → 計算中の _Flight
+            for _ in range(stripes)
+        ]
+
+    def get_or_compute(self, key: Any, func: Callable, args: tuple, kwargs: dict) -> tuple:
+        """
+        キャッシュにあれば結果を返し、なければ関数を実行して保存するメソッド
+
+        Returns:
+            tuple: ("hit" / "miss" / "coalesced", 結果)
+        """
+        cache = self._cache
+        # ヒットはキャッシュのロックだけで返す（見つからなくても、ここではミスとして数えない）
+        with self._lock:
+            found, result = cache.get(key, count_miss=False)
+        if found:
+            return "hit", result
+
+        stripe_lock, flights = self._stripes[hash(key) % len(self._stripes)]
+        with stripe_lock:
+            # 1回目に読んでから、他のスレッドが保存して印を外したかもしれないので、印をつける前に読み直す
+            # （保存は印を外す前に行うので、印がなければ保存済みの結果が必ず見つかる）
+            with self._lock:
+                found, result = cache.get(key)
+                if found:
+                    return "hit", result
+                flight = flights.get(key)
+                leader = flight is None
+                if not leader:
+                    cache.coalesced += 1
+            if leader:
+                flight = flights[key] = _Flight()
+
+        if not leader:
+            # 他のスレッドが計算中なので、その結果を待つ
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return "coalesced", flight.result
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as error:
+            flight.error = error
+            with stripe_lock:
+                del flights[key]
+            raise
+        else:
+            flight.result = result
+            # 保存してから計算中の印を外す（どちらにも見つからない瞬間を作らない）
+            with stripe_lock:
+                with self._lock:
+                    cache.put(key, result)
+                del flights[key]
+            return "miss", result
+        finally:
+            flight.done.set()
+
+    def hit_counts(self) -> tuple:
+        """
+        (ヒット数, ミス数) を返すメソッド（ログ出力用。ロックは取らないので概算）
+        """
+        return self._cache.hits, self._cache.misses
+
+    def clear(self) -> None:
+        """
+        全ての結果を消すメソッド（計算中の結果は、終わり次第保存される）
+        """
+        with self._lock:
+            self._cache.clear()
+
+    def info(self) -> CacheInfo:
+        """
+        統計を返すメソッド
+        """
+        with self._lock:
+            return self._cache.info()
+
+
+def cache_result(
+    func: Optional[Callable] = None,
+    *,
+    maxsize: Optional[int] = None,
+    ttl: Optional[float] = None,
+    policy: str = "lru",
+    max_bytes: Optional[int] = None,
+    sizeof: Callable[[Any], int] = sys.getsizeof,
+    log_hits: bool = False,
+    thread_safe: bool = False,
+    lock_stripes: int = 16,
+) -> Callable:
     """
     関数の実行結果をキャッシュするデコレーター
     
     機能:
     - 同じ引数での呼び出しは結果を再利用
     - 計算時間を大幅に短縮
-    - キャッシュのヒット率をログ出力
+    - 件数（maxsize）・バイト数（max_bytes）の上限を超えたら、LRU か LFU で O(1) で追い出す
+    - 有効期限（ttl 秒）を過ぎた結果は使わない
+    - cache_info() でヒット・ミス・追い出し・期限切れの回数と現在の件数・バイト数を確認
+    - log_hits=True なら、ヒット・ミスを DEBUG でログ出力（既定ではしない）
+    - thread_safe=True なら複数スレッドから同時に使える
+      （キャッシュは1つのロックで守り、同じキーの同時のミスは1回だけ計算する。上限の意味は変わらない）
     
     注意:
     - 引数がハッシュ可能である必要がある
     - 副作用のある関数には使用不可
+    - 上限を指定しなければ、従来どおり全ての結果を持ち続ける
+    - max_bytes のバイト数は sizeof（既定は sys.getsizeof。中身は数えない）で見積もる
+    - thread_safe=True で、関数が同じ引数で自分自身を呼ぶと、自分の計算を待ち続ける
     
     使用例:
         @cache_result
@@ -385,55 +1329,135 @@ def cache_result(func: Callable) -> Callable:
         
         expensive_calculation(5)  # 1秒かかる
         expensive_calculation(5)  # 即座に返る（キャッシュ）
+        
+        @cache_result(maxsize=1000, ttl=60, policy="lfu")
+        def fetch_user(user_id):
+            ...
+        
+        print(fetch_user.cache_info())  # CacheInfo(hits=..., misses=..., ...)
+        
+        @cache_result(maxsize=10_000, thread_safe=True)  # 複数スレッドから呼ぶ関数
+        def load_config(name):
+            ...
     
     Args:
-        func: デコレートする関数
+        func: デコレートする関数（引数付きで使う場合は省略）
+        maxsize: 最大件数（None なら無制限）
+        ttl: 結果の有効期限（秒。None なら無期限）
+        policy: 追い出し方（"lru" または "lfu"）
+        max_bytes: 結果の合計バイト数の上限（None なら無制限）
+        sizeof: 結果のバイト数を見積もる関数
+        log_hits: ヒット・ミスを DEBUG でログ出力するか
+        thread_safe: 複数スレッドから同時に使えるようにするか
+        lock_stripes: thread_safe=True の場合に、計算中の印を分けるロックの数
     
     Returns:
-        ラップされた関数
+        ラップされた関数（引数付きで使う場合はデコレーター関数）
     """
-    # キャッシュ用の辞書
-    cache = {}
-    cache_hits = 0
-    cache_misses = 0
+    if policy not in ("lru", "lfu"):
+        raise ValueError(f"policy は 'lru' か 'lfu' にしてください: {policy!r}")
+    if maxsize is not None and maxsize < 1:
+        raise ValueError(f"maxsize は1以上にしてください: {maxsize!r}")
+    if ttl is not None and ttl <= 0:
+        raise ValueError(f"ttl は正の数にしてください: {ttl!r}")
+    if max_bytes is not None and max_bytes < 1:
+        raise ValueError(f"max_bytes は1以上にしてください: {max_bytes!r}")
+    if lock_stripes < 1:
+        raise ValueError(f"lock_stripes は1以上にしてください: {lock_stripes!r}")
     
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        nonlocal cache_hits, cache_misses
-        
+    def decorator(func: Callable) -> Callable:
         func_name = func.__name__
         
-        # 引数からキャッシュキーを作成
-        # kwargs を sorted して順序に依存しないようにする
-        cache_key = (args, tuple(sorted(kwargs.items())))
-        
-        # キャッシュにあるかチェック
-        if cache_key in cache:
-            cache_hits += 1
-            logger.debug(
-                f"💾 {func_name}() キャッシュヒット "
-                f"（ヒット率: {cache_hits}/{cache_hits + cache_misses}）"
+        if thread_safe:
+            return _thread_safe_cache_wrapper(
+                func, _StripedCache(lock_stripes, maxsize, ttl, policy, max_bytes, sizeof), log_hits,
             )
-            return cache[cache_key]
         
-        # キャッシュにない場合は実行
-        cache_misses += 1
-        logger.debug(f"🔍 {func_name}() キャッシュミス（新規計算）")
+        # キャッシュ本体（関数ごとに1つ）
+        cache = _ResultCache(maxsize, ttl, policy, max_bytes, sizeof)
         
-        result = func(*args, **kwargs)
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # 引数からキャッシュキーを作成
+            # kwargs を sorted して順序に依存しないようにする
+            cache_key = (args, tuple(sorted(kwargs.items()))) if kwargs else (args, ())
+            
+            # キャッシュにあるかチェック
+            found, result = cache.get(cache_key)
+            if found:
+                if log_hits:
+                    logger.debug(
+                        "💾 %s() キャッシュヒット（ヒット率: %d/%d）",
+                        func_name, cache.hits, cache.hits + cache.misses,
+                    )
+                return result
+            
+            # キャッシュにない場合は実行
+            if log_hits:
+                logger.debug("🔍 %s() キャッシュミス（新規計算）", func_name)
+            
+            result = func(*args, **kwargs)
+            
+            # 結果をキャッシュに保存（上限を超えたら追い出す）
+            cache.put(cache_key, result)
+            
+            return result
         
-        # 結果をキャッシュに保存
-        cache[cache_key] = result
+        # キャッシュクリア用のメソッドを追加
+        def clear_cache():
+            cache.clear()
+            logger.info(f"🗑️ {func_name}() のキャッシュをクリアしました")
+        
+        wrapper.clear_cache = clear_cache
+        wrapper.cache_info = cache.info
+        return wrapper
+    
+    # @cache_result と @cache_result(...) のどちらの書き方でも使えるようにする
+    if func is None:
+        return decorator
+    return decorator(func)
+
+
+def _thread_safe_cache_wrapper(func: Callable, cache: _StripedCache, log_hits: bool) -> Callable:
+    """
+    cache_result(thread_safe=True) のラップされた関数を作る関数
+
+    Args:
+        func: デコレートする関数
+        cache: キャッシュ本体
+        log_hits: ヒット・ミスを DEBUG でログ出力するか
+
+    Returns:
+        ラップされた関数
+    """
+    func_name = func.__name__
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # 引数からキャッシュキーを作成（cache_result と同じ）
+        cache_key = (args, tuple(sorted(kwargs.items()))) if kwargs else (args, ())
+        
+        # キャッシュにあれば返し、なければ実行する（同じキーを計算中なら待つ）
+        outcome, result = cache.get_or_compute(cache_key, func, args, kwargs)
+        
+        if log_hits:
+            if outcome == "hit":
+                hits, misses = cache.hit_counts()
+                logger.debug("💾 %s() キャッシュヒット（ヒット率: %d/%d）", func_name, hits, hits + misses)
+            elif outcome == "coalesced":
+                logger.debug("⏳ %s() 他のスレッドの計算結果を受け取りました", func_name)
+            else:
+                logger.debug("🔍 %s() キャッシュミス（新規計算）", func_name)
         
         return result
     
     # キャッシュクリア用のメソッドを追加
     def clear_cache():
         cache.clear()
-        logger.info(f"🗑️ {func.__name__}() のキャッシュをクリアしました")
+        logger.info(f"🗑️ {func_name}() のキャッシュをクリアしました")
     
     wrapper.clear_cache = clear_cache
-    
+    wrapper.cache_info = cache.info
     return wrapper
 
 
@@ -502,7 +1526,13 @@ def validate_args(**validators):
 # デコレーター9: デバッグ情報を出力
 # ===================================================================
 
-def debug(func: Callable) -> Callable:
+def debug(
+    func: Optional[Callable] = None,
+    *,
+    sample_every: Optional[int] = None,
+    sample_rate: Optional[float] = None,
+    max_per_second: Optional[float] = None,
+) -> Callable:
     """
     デバッグ情報を詳細に出力するデコレーター
     
@@ -510,49 +1540,79 @@ def debug(func: Callable) -> Callable:
     - 関数の全情報を出力
     - ソースコードの場所
     - 実行コンテキスト
+    - サンプリングを指定すると、一部の呼び出しだけを記録（log_call と同じ指定方法）
     
     使用例:
         @debug
         def my_function():
             pass
+        
+        @debug(sample_rate=0.01)  # 約1%の呼び出しだけ記録
+        def hot_function():
+            pass
     
     Args:
-        func: デコレートする関数
+        func: デコレートする関数（引数付きで使う場合は省略）
+        sample_every: N回に1回だけ記録する
+        sample_rate: 確率 sample_rate で記録する（0〜1）
+        max_per_second: 1秒あたり最大 max_per_second 回まで記録する
     
     Returns:
-        ラップされた関数
+        ラップされた関数（引数付きで使う場合はデコレーター関数）
     """
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        import inspect
-        
-        func_name = func.__name__
-        
-        # 関数の情報を取得
-        logger.debug(f"{'🐛 DEBUG INFO ':=^60}")
-        logger.debug(f"関数名: {func_name}")
-        logger.debug(f"モジュール: {func.__module__}")
-        
-        # ソースコードの場所
-        try:
-            source_file = inspect.getfile(func)
-            source_line = inspect.getsourcelines(func)[1]
-            logger.debug(f"定義場所: {source_file}:{source_line}")
-        except:
-            pass
-        
-        # 引数情報
-        logger.debug(f"引数: args={args}, kwargs={kwargs}")
-        
-        # 実行
-        logger.debug("実行開始...")
-        result = func(*args, **kwargs)
-        logger.debug(f"実行完了: 戻り値={result!r}")
-        logger.debug(f"{'='*60}")
+    # 指定が不正なら、デコレートする前にここで ValueError にする
+    _make_sampler(sample_every, sample_rate, max_per_second)
+    
+    def decorator(func: Callable) -> Callable:
+        # 関数ごとに1つの Sampler を使う（指定がなければ None）
+        sampler = _make_sampler(sample_every, sample_rate, max_per_second)
         
-        return result
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # DEBUG が無効な場合と、間引く呼び出しは実行するだけ
+            if not logger.isEnabledFor(logging.DEBUG):
+                return func(*args, **kwargs)
+            if sampler is not None and not sampler.should_log():
+                return func(*args, **kwargs)
+            
+            import inspect
+            
+            func_name = func.__name__
+            
+            # 関数の情報を取得
+            logger.debug(f"{'🐛 DEBUG INFO ':=^60}")
+            logger.debug(f"関数名: {func_name}")
+            logger.debug(f"モジュール: {func.__module__}")
+            if sampler is not None:
+                logger.debug(f"サンプリング: {sampler.calls}回中{sampler.logged}回を記録")
+            
+            # ソースコードの場所
+            try:
+                source_file = inspect.getfile(func)
+                source_line = inspect.getsourcelines(func)[1]
+                logger.debug(f"定義場所: {source_file}:{source_line}")
+            except:
+                pass
+            
+            # 引数情報
+            logger.debug(f"引数: args={args}, kwargs={kwargs}")
+            
+            # 実行
+            logger.debug("実行開始...")
+            result = func(*args, **kwargs)
+            logger.debug(f"実行完了: 戻り値={result!r}")
+            logger.debug(f"{'='*60}")
+            
+            return result
+            
+        # 間引いた回数などを確認できるようにする
+        wrapper.sampler = sampler
+        return wrapper
     
-    return wrapper
+    # @debug と @debug(...) のどちらの書き方でも使えるようにする
+    if func is None:
+        return decorator
+    return decorator(func)
 
 
 # ===================================================================
@@ -582,7 +1642,7 @@ def log_all(func: Callable) -> Callable:
     # 複数のデコレーターを適用
     # 適用順序: 下から上に適用される
     func = log_errors(func)  # まずエラーハンドリング
-    func = log_time(func)    # 次に時間計測
+    func = log_time(log_each_call=True)(func)  # 次に時間計測（1回ごとに出力）
     func = log_call(func)    # 最後に呼び出しログ
     
     return func
@@ -618,6 +1678,9 @@ if __name__ == "__main__":
         return "完了"
     
     slow_function()
+    slow_function()
+    slow_function.log_summary()
+    print(f"p99: {slow_function.latency.p99 / 1e6:.1f}ms（{slow_function.latency.count}回）")
     
     # 例3: エラーハンドリング
     print("\n■ 例3: @log_errors")
@@ -667,8 +1730,8 @@ if __name__ == "__main__":
     print("\n■ 例6: @cache_result")
     print("-" * 70)
     
-    @cache_result
-    @log_time
+    @cache_result(maxsize=128)
+    @log_time(log_each_call=True)
     def expensive_calc(n):
         time.sleep(0.1)  # 重い処理の模擬
         return n ** 2
@@ -678,6 +1741,7 @@ if __name__ == "__main__":
     
     print("2回目の呼び出し（キャッシュ）:")
     expensive_calc(5)
+    print(expensive_calc.cache_info())
     
     # 例7: 全部盛り
     print("\n■ 例7: @log_all")
@@ -0,0 +1,1001 @@
+"""
+ロギングデコレーター集（logging-decorators.py）のテストスイート
+
+ログの出力そのものではなく、大量に呼ばれる関数で使うための機能
+（引数の文字列化の制限・サンプリング・実行時間の分布・キャッシュ）が
+正しく動くかをテストします。
+
+Test Classes:
+    TestArgumentFormatting: 引数の文字列化（長さの制限・遅延）のテスト
+    TestSampling: ログに出す呼び出しの間引き（サンプリング）のテスト
+    TestLatencyHistogram: 実行時間のヒストグラムと log_time のテスト
+    TestResultCache: 結果のキャッシュ（LRU・LFU・有効期限・バイト数の上限）のテスト
+    TestThreadSafeCache: 複数スレッドから使うキャッシュ（シングルフライト）のテスト
+
+実行方法:
+    pytest logging_decorators_tests.py -v
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+import types
+
+import pytest
+import logging_decorators
+from logging_decorators import (
+    REPR_MAX_LENGTH, REPR_MAX_ITEMS,
+    short_repr, log_call, log_detailed, debug, Sampler,
+    log_time, LatencyHistogram,
+    cache_result, CacheInfo,
+)
+
+
+class CountingRepr:
+    """
+    repr() された回数を数えるクラス（文字列化が遅れているかの確認に使う）
+    """
+
+    def __init__(self):
+        self.repr_calls = 0
+
+    def __repr__(self) -> str:
+        self.repr_calls += 1
+        return "CountingRepr()"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    モジュールが使う time.monotonic()・time.perf_counter_ns() を、テストで進める時計に置き換えるフィクスチャ
+
+    clock.now に秒を足すと時間が進む
+    """
+    fake = types.SimpleNamespace(now=1_000.0)
+    fake.monotonic = lambda: fake.now
+    fake.perf_counter_ns = lambda: round(fake.now * 1e9)
+    monkeypatch.setattr(logging_decorators, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def log_level():
+    """
+    モジュールのロガーのレベルを変えるフィクスチャ（テストの後で元に戻す）
+    """
+    logger = logging_decorators.logger
+    original = logger.level
+    yield logger.setLevel
+    logger.setLevel(original)
+
+
+# ============================================================
+# テストクラス1: 引数の文字列化のテスト
+# ============================================================
+
+class TestArgumentFormatting:
+    """
+    引数の文字列化（short_repr と log_call の遅延）のテストクラス
+
+    テスト項目:
+    - 小さな値は repr() と同じになるか
+    - 長い文字列・大きなリスト・深い入れ子が制限されるか
+    - INFO が無効なら引数を文字列にしないか
+    - INFO が有効なら、制限した引数と戻り値がログに出るか
+    """
+
+    @pytest.mark.parametrize("value", [
+        0, -12, 3.5, True, None, "abc", b"xyz",
+        [1, 2, 3], (1, "a"), {"a": 1, "b": None},
+    ])
+    def test_small_values_match_repr(self, value):
+        """
+        小さな値と、小さな値だけを少し持つリスト・タプル・辞書は repr() と同じになることを確認
+        """
+        assert short_repr(value) == repr(value)
+
+    @pytest.mark.parametrize("value", [
+        "x" * 10_000,
+        b"x" * 10_000,
+        list(range(10_000)),
+        {i: str(i) * 100 for i in range(1_000)},
+        10 ** 1_000,
+        [[[[[[1]]]]]],
+        [CountingRepr()] * 1_000,
+    ])
+    def test_large_values_are_capped(self, value):
+        """
+        大きな値・深い入れ子でも、REPR_MAX_LENGTH 文字以内になることを確認
+        """
+        assert len(short_repr(value)) <= REPR_MAX_LENGTH
+
+    def test_items_and_depth_are_limited(self):
+        """
+        リストの要素数と入れ子の深さが制限され、省略した部分が "..." になることを確認
+        """
+        text = short_repr(list(range(100)))
+        assert text.startswith("[0, 1, 2")
+        assert str(REPR_MAX_ITEMS - 1) in text and str(REPR_MAX_ITEMS + 1) not in text
+        assert "..." in text
+        assert "..." in short_repr([[[[[[1]]]]]])
+
+    def test_long_custom_repr_is_truncated(self):
+        """
+        reprlib が省略しない独自クラスの repr() も、長さで切られることを確認
+        """
+        class Verbose:
+            def __repr__(self):
+                return "v" * 1_000
+
+        text = short_repr(Verbose())
+        assert len(text) <= REPR_MAX_LENGTH
+        assert "..." in text
+
+    def test_disabled_info_skips_formatting(self, log_level):
+        """
+        INFO が無効なら、引数も戻り値も文字列にせずに関数を実行するだけであることを確認
+        """
+        value = CountingRepr()
+
+        @log_call
+        def echo(x):
+            return x
+
+        log_level(logging.WARNING)
+        for _ in range(100):
+            assert echo(value) is value
+        assert value.repr_calls == 0
+
+    def test_enabled_info_logs_capped_arguments(self, log_level, caplog):
+        """
+        INFO が有効なら、制限した引数・戻り値がログに出ることを確認
+        """
+        @log_call
+        def join(items, sep=","):
+            return sep.join(items)
+
+        log_level(logging.DEBUG)
+        with caplog.at_level(logging.INFO, logger=logging_decorators.logger.name):
+            join(["x" * 1_000] * 50, sep="-")
+
+        call, done = [record.getMessage() for record in caplog.records]
+        assert call.startswith("→ 呼び出し: join(")
+        assert "sep='-'" in call
+        assert len(call) < 3 * REPR_MAX_LENGTH
+        assert done.startswith("← 完了: join() → ")
+        assert len(done) < 2 * REPR_MAX_LENGTH
+
+    def test_formatting_is_deferred_to_handler(self, log_level, monkeypatch):
+        """
+        引数の文字列化は、ハンドラーがメッセージを組み立てるときまで行われないことを確認
+        """
+        value = CountingRepr()
+        records = []
+
+        class KeepRecords(logging.Handler):
+            def emit(self, record):
+                records.append(record)
+
+        @log_call
+        def echo(x):
+            return x
+
+        # メッセージを組み立てないハンドラーだけにする
+        log_level(logging.DEBUG)
+        monkeypatch.setattr(logging_decorators.logger, "handlers", [KeepRecords()])
+        monkeypatch.setattr(logging_decorators.logger, "propagate", False)
+        echo(value)
+
+        assert len(records) == 2
+        assert value.repr_calls == 0
+        assert "CountingRepr()" in records[0].getMessage()
+        assert value.repr_calls == 1
+
+
+# ============================================================
+# テストクラス2: サンプリングのテスト
+# ============================================================
+
+class TestSampling:
+    """
+    ログに出す呼び出しの間引き（Sampler と各デコレーターの sample_* 引数）のテストクラス
+
+    テスト項目:
+    - every: N回に1回（1回目、N+1回目、…）だけ記録するか
+    - rate: 記録する割合が確率に近いか
+    - per_second: 1秒あたりの記録回数が上限を超えないか（1未満の場合も）
+    - 不正な指定で ValueError になるか
+    - デコレーターが間引いた呼び出しを記録しないか
+    """
+
+    def test_every(self):
+        """
+        every=N なら、1回目、N+1回目、… だけを記録することを確認
+        """
+        sampler = Sampler(every=3)
+        decisions = [sampler.should_log() for _ in range(10)]
+
+        assert decisions == [True, False, False] * 3 + [True]
+        assert (sampler.calls, sampler.logged, sampler.skipped) == (10, 4, 6)
+
+    @pytest.mark.parametrize("rate", [0.0, 0.01, 0.25, 1.0])
+    def test_rate(self, rate, monkeypatch):
+        """
+        rate で記録する割合が、確率 rate に近いことを確認（0 なら全く記録せず、1 なら全て記録する）
+        """
+        monkeypatch.setattr(logging_decorators, "random", random.Random(22))
+        sampler = Sampler(rate=rate)
+        calls = 40_000
+        logged = sum(sampler.should_log() for _ in range(calls))
+
+        assert logged == sampler.logged
+        assert abs(logged - rate * calls) <= 0.1 * rate * calls
+
+    def test_per_second_limits_each_second(self, clock):
+        """
+        per_second=N なら、1秒に何回呼んでも最大 N 回（ためた分を含めて）しか記録しないことを確認
+        """
+        sampler = Sampler(per_second=5)
+        logged = []
+        for _ in range(10):
+            logged.append(sum(sampler.should_log() for _ in range(1_000)))
+            clock.now += 1.0
+
+        # 最初は1秒分（5回）がたまっていて、その後も1秒ごとに5回ずつ
+        assert logged == [5] * 10
+
+        # 呼ばれない間も、ためられるのは1秒分まで
+        clock.now += 60.0
+        assert sum(sampler.should_log() for _ in range(1_000)) == 5
+
+    def test_per_second_refills_gradually(self, clock):
+        """
+        トークンは経過時間に比例して補充されることを確認
+        """
+        sampler = Sampler(per_second=10)
+        assert sum(sampler.should_log() for _ in range(100)) == 10
+        clock.now += 0.25
+        assert sum(sampler.should_log() for _ in range(100)) == 2
+
+    @pytest.mark.parametrize("per_second, interval", [(0.5, 2.0), (0.1, 10.0), (0.25, 4.0)])
+    def test_fractional_per_second(self, clock, per_second, interval):
+        """
+        per_second が1未満なら、1/per_second 秒に1回記録することを確認
+        """
+        sampler = Sampler(per_second=per_second)
+
+        # 最初の呼び出しは記録し、その後は interval 秒たつまで記録しない
+        assert sampler.should_log()
+        clock.now += interval * 0.9
+        assert not sampler.should_log()
+
+        logged = 0
+        for _ in range(100):
+            clock.now += interval / 10
+            logged += sampler.should_log()
+        assert logged == 10
+        assert sampler.logged == 11
+
+    def test_subclass_can_extend_should_log(self):
+        """
+        should_log() はインスタンスごとに置き換えられず、サブクラスで上書きできることを確認
+        """
+        class CountingSampler(Sampler):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.asked = 0
+
+            def should_log(self):
+                self.asked += 1
+                return super().should_log()
+
+        sampler = CountingSampler(every=2)
+        decisions = [sampler.should_log() for _ in range(4)]
+
+        assert decisions == [True, False, True, False]
+        assert (sampler.asked, sampler.logged) == (4, 2)
+
+    @pytest.mark.parametrize("kwargs", [
+        {},
+        {"every": 2, "rate": 0.5},
+        {"every": 0},
+        {"every": 1.5},
+        {"rate": 1.5},
+        {"rate": -0.1},
+        {"per_second": 0},
+        {"per_second": -1},
+    ])
+    def test_invalid_arguments(self, kwargs):
+        """
+        指定がない・2つ以上ある・値が不正な場合に ValueError になることを確認
+        """
+        with pytest.raises(ValueError):
+            Sampler(**kwargs)
+
+    def test_decorator_rejects_invalid_sampling(self):
+        """
+        デコレーターに不正なサンプリングを指定すると、デコレートする前に ValueError になることを確認
+        """
+        with pytest.raises(ValueError):
+            log_call(sample_every=0)
+        with pytest.raises(ValueError):
+            log_detailed(sample_every=2, max_per_second=1)
+        with pytest.raises(ValueError):
+            debug(sample_rate=2)
+
+    def test_log_call_records_sampled_calls_only(self, log_level, caplog):
+        """
+        log_call(sample_every=N) は、記録する呼び出しだけをログに出し、全ての呼び出しを実行することを確認
+        """
+        @log_call(sample_every=100)
+        def double(x):
+            return x * 2
+
+        log_level(logging.DEBUG)
+        with caplog.at_level(logging.INFO, logger=logging_decorators.logger.name):
+            results = [double(i) for i in range(250)]
+
+        assert results == [i * 2 for i in range(250)]
+        calls = [record.getMessage() for record in caplog.records if "呼び出し" in record.getMessage()]
+        assert calls == [
+            "→ 呼び出し: double(0) [記録 1/1回]",
+            "→ 呼び出し: double(100) [記録 2/101回]",
+            "→ 呼び出し: double(200) [記録 3/201回]",
+        ]
+        assert double.sampler.skipped == 247
+
+    def test_decorators_with_per_second(self, clock, log_level, caplog):
+        """
+        log_detailed・debug の max_per_second が、1秒あたりの記録回数を制限することを確認
+        """
+        @log_detailed(max_per_second=2)
+        def detailed(x):
+            return x
+
+        @debug(max_per_second=0.5)
+        def debugged(x):
+            return x
+
+        log_level(logging.DEBUG)
+        with caplog.at_level(logging.DEBUG, logger=logging_decorators.logger.name):
+            for _ in range(4):
+                for i in range(50):
+                    detailed(i)
+                    debugged(i)
+                clock.now += 1.0
+
+        assert detailed.sampler.logged == 8
+        assert debugged.sampler.logged == 2
+        assert debugged.sampler.calls == 200
+
+
+# ============================================================
+# テストクラス3: 実行時間のヒストグラムのテスト
+# ============================================================
+
+def exact_percentile(values, percent):
+    """
+    全ての値を並べて、パーセンタイル（小さい方から ceil(件数 × percent / 100) 件目）を求めるヘルパー関数
+    """
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * percent / 100))
+    return ordered[rank - 1]
+
+
+class TestLatencyHistogram:
+    """
+    実行時間のヒストグラム（LatencyHistogram と log_time）のテストクラス
+
+    テスト項目:
+    - 区間の上端と値の差が、値の 1/64 以内か
+    - パーセンタイルが、全ての値を並べて求めた値から 1/64 以内か
+    - 件数・合計・最小・最大・平均が正確か
+    - 範囲外の値（負の値・MAX_VALUE_NS 超）の扱い
+    - log_time が実行時間を記録し、まとめの行を間隔ごとに出力するか
+    """
+
+    # 区間の幅による誤差の上限（値に対する割合）
+    RELATIVE_ERROR = 1 / (1 << (LatencyHistogram.SUB_BUCKET_BITS - 1))
+
+    def test_bucket_bounds(self):
+        """
+        どの値も、入る区間の上端との差が値の 1/64 以内で、区間の番号が値の順に並ぶことを確認
+        """
+        rng = random.Random(23)
+        values = list(range(1_000)) + [
+            rng.randint(1, LatencyHistogram.MAX_VALUE_NS) for _ in range(20_000)
+        ] + [(1 << shift) + delta for shift in range(7, 44) for delta in (-1, 0, 1)]
+        for value in values:
+            index = LatencyHistogram._index(value)
+            upper = LatencyHistogram._upper_bound(index)
+            assert value <= upper <= value * (1 + self.RELATIVE_ERROR)
+            assert LatencyHistogram._index(upper) == index
+            assert index < LatencyHistogram._BUCKET_COUNT
+
+        assert LatencyHistogram._index(LatencyHistogram.MAX_VALUE_NS) == LatencyHistogram._BUCKET_COUNT - 1
+
+    @pytest.mark.parametrize("distribution", ["uniform", "lognormal", "bimodal"])
+    def test_percentiles_match_exact(self, distribution):
+        """
+        パーセンタイルが、全ての値を並べて求めた値以上で、その 1/64 以内に収まることを確認
+        """
+        rng = random.Random(230)
+        if distribution == "uniform":
+            values = [rng.randint(0, 10_000_000) for _ in range(50_000)]
+        elif distribution == "lognormal":
+            values = [int(rng.lognormvariate(13, 1.5)) for _ in range(50_000)]
+        else:
+            values = [rng.randint(50_000, 60_000) if rng.random() < 0.98 else rng.randint(10**9, 2 * 10**9)
+                      for _ in range(50_000)]
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+
+        for percent in (0, 1, 10, 50, 90, 99, 99.9, 100):
+            exact = exact_percentile(values, percent)
+            assert exact <= histogram.percentile(percent) <= exact * (1 + self.RELATIVE_ERROR)
+        assert histogram.percentile(100) == max(values)
+        assert histogram.p50 == histogram.percentile(50)
+        assert histogram.p99 == histogram.percentile(99)
+
+    def test_totals_are_exact(self):
+        """
+        件数・合計・最小・最大・平均は、区間によらず正確に記録されることを確認
+        """
+        values = [12_345, 7, 999_999_937, 128, 65_536]
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+
+        assert histogram.count == len(values)
+        assert histogram.total == sum(values)
+        assert histogram.min == min(values)
+        assert histogram.max == max(values)
+        assert histogram.mean == sum(values) / len(values)
+        assert sum(histogram.counts) == len(values)
+
+    def test_out_of_range_values(self):
+        """
+        負の値は0として、MAX_VALUE_NS を超える値は最後の区間に数え、最大値は正確に記録することを確認
+        """
+        histogram = LatencyHistogram()
+        huge = LatencyHistogram.MAX_VALUE_NS * 10
+        histogram.record(-5)
+        histogram.record(huge)
+
+        assert histogram.min == 0
+        assert histogram.counts[0] == 1
+        assert histogram.counts[-1] == 1
+        assert histogram.max == huge
+        assert histogram.percentile(100) == huge
+        assert histogram.percentile(50) == 0
+
+    def test_empty_and_reset(self):
+        """
+        0件ならパーセンタイル・平均は0で、reset() で記録が全て消えることを確認
+        """
+        histogram = LatencyHistogram()
+        assert (histogram.p50, histogram.p99, histogram.mean) == (0, 0, 0.0)
+
+        for value in range(1_000):
+            histogram.record(value)
+        histogram.reset()
+        assert (histogram.count, histogram.total, histogram.max, histogram.min) == (0, 0, 0, 0)
+        assert histogram.percentile(90) == 0
+        assert not any(histogram.counts)
+
+    @pytest.mark.parametrize("percent", [-1, 100.5])
+    def test_invalid_percent(self, percent):
+        """
+        0〜100 の範囲外のパーセントで ValueError になることを確認
+        """
+        with pytest.raises(ValueError):
+            LatencyHistogram().percentile(percent)
+
+    def test_log_time_records_latency(self, clock):
+        """
+        log_time が、例外で終わった呼び出しも含めて実行時間を記録することを確認
+        """
+        @log_time(summary_interval=None)
+        def work(seconds):
+            clock.now += seconds
+            if seconds < 0.002:
+                raise RuntimeError("too fast")
+            return seconds
+
+        for _ in range(90):
+            work(0.010)
+        for _ in range(9):
+            work(0.050)
+        with pytest.raises(RuntimeError):
+            work(0.001)
+
+        latency = work.latency
+        assert latency.count == 100
+        assert abs(latency.p50 - 10_000_000) <= 10_000_000 * self.RELATIVE_ERROR
+        assert abs(latency.p99 - 50_000_000) <= 50_000_000 * self.RELATIVE_ERROR
+        assert latency.max == 50_000_000
+        assert latency.min == 1_000_000
+
+    def test_log_time_summary_interval(self, clock, log_level, caplog):
+        """
+        まとめの行は summary_interval 秒ごとに1回だけ出力され、1回ごとの行は既定では出力されないことを確認
+        """
+        @log_time(summary_interval=10)
+        def tick():
+            clock.now += 0.5
+
+        log_level(logging.DEBUG)
+        with caplog.at_level(logging.INFO, logger=logging_decorators.logger.name):
+            for _ in range(60):
+                tick()
+
+        # 30秒の間に、10秒ごとに1回
+        messages = [record.getMessage() for record in caplog.records]
+        assert [message.split(" p50=")[0] for message in messages] == [
+            "📈 tick() 件数=20", "📈 tick() 件数=40", "📈 tick() 件数=60",
+        ]
+
+    def test_invalid_summary_interval(self):
+        """
+        0以下の summary_interval で ValueError になることを確認
+        """
+        with pytest.raises(ValueError):
+            log_time(summary_interval=0)
+
+
+# ============================================================
+# テストクラス4: 結果のキャッシュのテスト
+# ============================================================
+
+class ModelLfu:
+    """
+    LFU の追い出しを全件を調べて求めるモデル（_ResultCache との比較に使う）
+
+    追い出すのは、使われた回数が最も少なく、同じ回数なら今の回数になったのが最も古いキー
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = {}  # キー → [結果, 使われた回数, 今の回数になった順番]
+        self.tick = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return False, None
+        self.tick += 1
+        entry[1] += 1
+        entry[2] = self.tick
+        return True, entry[0]
+
+    def put(self, key, value):
+        self.entries.pop(key, None)
+        if len(self.entries) >= self.maxsize:
+            victim = min(self.entries, key=lambda k: (self.entries[k][1], self.entries[k][2]))
+            del self.entries[victim]
+            self.evictions += 1
+        self.tick += 1
+        self.entries[key] = [value, 1, self.tick]
+
+
+class TestResultCache:
+    """
+    結果のキャッシュ（cache_result と _ResultCache）のテストクラス
+
+    テスト項目:
+    - LRU: 最後に使ってから最も時間がたった結果を追い出すか
+    - LFU: 使われた回数が最も少ない結果を追い出すか（途中で回数が空いても）
+    - 有効期限を過ぎた結果を使わず、期限切れとして数えるか
+    - バイト数の上限を超えないように追い出すか
+    - cache_info() の統計が正しいか
+    - 不正な指定で ValueError になるか
+    """
+
+    @staticmethod
+    def _counted(**options):
+        """
+        実行した引数を記録する関数に cache_result を付けて返すヘルパーメソッド
+        """
+        computed = []
+
+        @cache_result(**options)
+        def square(n):
+            computed.append(n)
+            return n * n
+
+        return square, computed
+
+    def test_unbounded_cache(self):
+        """
+        上限を指定しなければ、全ての結果を持ち続けることを確認
+        """
+        square, computed = self._counted()
+        for n in list(range(100)) * 3:
+            assert square(n) == n * n
+
+        assert computed == list(range(100))
+        assert square.cache_info() == CacheInfo(200, 100, 0, 0, None, 100, None, 0, 0)
+
+    def test_keyword_arguments_share_entry(self):
+        """
+        キーワード引数の順番が違っても、同じ結果を使うことを確認
+        """
+        computed = []
+
+        @cache_result
+        def area(width, height):
+            computed.append((width, height))
+            return width * height
+
+        assert area(width=2, height=3) == area(height=3, width=2) == 6
+        assert computed == [(2, 3)]
+
+    def test_lru_eviction(self):
+        """
+        LRU では、最後に使ってから最も時間がたった結果を追い出すことを確認
+        """
+        square, computed = self._counted(maxsize=3)
+        for n in (1, 2, 3):
+            square(n)
+        square(1)   # 1 を使ったので、最も古いのは 2
+        square(4)   # 2 を追い出す
+        computed.clear()
+        for n in (1, 3, 4, 2):
+            square(n)
+
+        # 2 を計算し直し、そのときに最も古い 1 を追い出す
+        assert computed == [2]
+        info = square.cache_info()
+        assert (info.evictions, info.currsize, info.maxsize) == (2, 3, 3)
+
+    def test_lfu_eviction(self):
+        """
+        LFU では使われた回数が最も少ない結果を追い出し、同じ回数なら古い方を追い出すことを確認
+        """
+        square, computed = self._counted(maxsize=3, policy="lfu")
+        for n in (1, 2, 3):
+            square(n)
+        for _ in range(3):
+            square(1)
+        square(2)
+        square(4)   # 回数が最も少ない 3 を追い出す
+        square(5)   # 追加したばかりの 4 と同じ回数（1）なので、古い 4 を追い出す
+        computed.clear()
+        for n in (1, 2, 5, 3):
+            square(n)
+
+        assert computed == [3]
+
+    def test_lfu_matches_model(self):
+        """
+        ランダムな読み書きで、LFU の結果と追い出しが全件を調べるモデルと一致し、
+        最も少ない回数の記録が常に正しいことを確認
+        """
+        rng = random.Random(24)
+        cache = logging_decorators._ResultCache(8, None, "lfu", None, lambda value: 0)
+        model = ModelLfu(8)
+        for step in range(20_000):
+            # 少数のキーをよく使い、多数のキーはたまにしか使わない
+            key = rng.randrange(4) if rng.random() < 0.5 else rng.randrange(40)
+            if rng.random() < 0.8:
+                assert cache.get(key) == model.get(key)
+            else:
+                cache.put(key, step)
+                model.put(key, step)
+            assert set(cache._entries) == set(model.entries)
+            if cache._entries:
+                assert cache._min_frequency == min(cache._by_frequency)
+                assert cache._min_frequency == min(entry[1] for entry in model.entries.values())
+        assert cache.evictions == model.evictions
+
+    def test_lfu_min_frequency_after_removal(self):
+        """
+        最も少ない回数の結果が期限切れや追い出しでなくなっても、
+        次に少ない回数の結果から追い出すことを確認（回数が空いている場合）
+        """
+        cache = logging_decorators._ResultCache(None, None, "lfu", 10, lambda value: value)
+        cache.put("a", 1)
+        for _ in range(5):
+            cache.get("a")   # 回数6
+        cache.put("b", 1)
+        for _ in range(2):
+            cache.get("b")   # 回数3
+        cache.put("c", 1)    # 回数1
+
+        # 9 バイトを追加するには2件（c、b の順）を追い出す
+        cache.put("d", 9)
+        assert set(cache._entries) == {"a", "d"}
+        assert cache.evictions == 2
+        assert cache._min_frequency == 1
+
+        # 回数1の d が消えると、次に少ないのは a の回数6
+        cache._remove("d")
+        assert cache._min_frequency == 6
+        assert cache._victim() == "a"
+
+    @pytest.mark.parametrize("policy", ["lru", "lfu"])
+    def test_ttl_expiration(self, clock, policy):
+        """
+        有効期限を過ぎた結果は使わずに計算し直し、期限切れとして数えることを確認
+        """
+        square, computed = self._counted(ttl=10, policy=policy)
+        square(1)
+        clock.now += 5
+        square(2)
+        square(1)
+        assert computed == [1, 2]
+
+        clock.now += 6   # 1 は期限切れ、2 はまだ
+        square(1)
+        square(2)
+        assert computed == [1, 2, 1]
+        info = square.cache_info()
+        assert (info.hits, info.misses, info.expirations, info.currsize) == (2, 3, 1, 2)
+
+        # 保存するときに、読んでいない期限切れの結果も消す
+        clock.now += 20
+        square(3)
+        info = square.cache_info()
+        assert (info.expirations, info.currsize) == (3, 1)
+
+    @pytest.mark.parametrize("policy", ["lru", "lfu"])
+    def test_max_bytes(self, policy):
+        """
+        結果の合計バイト数が max_bytes を超えないように追い出し、
+        1件だけで上限を超える結果は保存しないことを確認
+        """
+        @cache_result(max_bytes=100, sizeof=len, policy=policy)
+        def text(n):
+            return "x" * n
+
+        for n in (30, 30, 30):
+            text(n)              # 同じ引数なので1件だけ（LFU では使われた回数3）
+        for n in (40, 20, 25):
+            text(n)              # 25 を追加すると115バイトになるので1件追い出す
+        info = text.cache_info()
+        # LRU は最も古い 30 を、LFU は回数1のうち最も古い 40 を追い出す
+        assert info.currbytes == (85 if policy == "lru" else 75)
+        assert info.evictions == 1
+
+        text(500)
+        text(500)
+        info = text.cache_info()
+        assert info.currbytes <= 100
+        assert info.misses == 6
+        assert info.max_bytes == 100
+
+    def test_max_bytes_tracks_currbytes(self):
+        """
+        追加・追い出し・削除のたびに、合計バイト数が保存している結果の合計と一致することを確認
+        """
+        rng = random.Random(240)
+
+        @cache_result(max_bytes=1_000, maxsize=20, sizeof=len, policy="lfu")
+        def text(n):
+            return "y" * n
+
+        for _ in range(5_000):
+            text(rng.randint(1, 200))
+            info = text.cache_info()
+            assert info.currbytes <= 1_000
+            assert info.currsize <= 20
+        text.clear_cache()
+        info = text.cache_info()
+        assert (info.currsize, info.currbytes) == (0, 0)
+        assert info.hits + info.misses == 5_000
+
+    def test_clear_keeps_statistics(self):
+        """
+        clear_cache() は結果を消すが、統計はそのまま残すことを確認
+        """
+        square, computed = self._counted(maxsize=10, policy="lfu")
+        for n in (1, 1, 2):
+            square(n)
+        square.clear_cache()
+        square(1)
+
+        assert computed == [1, 2, 1]
+        assert square.cache_info() == CacheInfo(1, 3, 0, 0, 10, 1, None, 0, 0)
+
+    @pytest.mark.parametrize("kwargs", [
+        {"policy": "fifo"},
+        {"maxsize": 0},
+        {"ttl": 0},
+        {"max_bytes": 0},
+        {"thread_safe": True, "lock_stripes": 0},
+    ])
+    def test_invalid_arguments(self, kwargs):
+        """
+        不正な指定で ValueError になることを確認
+        """
+        with pytest.raises(ValueError):
+            cache_result(**kwargs)
+
+
+# ============================================================
+# テストクラス5: 複数スレッドから使うキャッシュのテスト
+# ============================================================
+
+def run_threads(count, target):
+    """
+    count 個のスレッドで target(番号) を同時に実行し、全て終わるまで待つヘルパー関数
+
+    Returns:
+        list: スレッドごとの戻り値（例外が出たスレッドは例外オブジェクト）
+    """
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(number):
+        barrier.wait()
+        try:
+            results[number] = target(number)
+        except Exception as error:
+            results[number] = error
+
+    threads = [threading.Thread(target=run, args=(number,)) for number in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    assert not any(thread.is_alive() for thread in threads)
+    return results
+
+
+def wait_until(condition, timeout=10.0):
+    """
+    condition() が True になるまで待つヘルパー関数（タイムアウトしたら False）
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+class TestThreadSafeCache:
+    """
+    cache_result(thread_safe=True) のテストクラス
+
+    テスト項目:
+    - 同じキーの同時のミスは1回だけ計算し、他のスレッドは結果を待って受け取るか
+    - 待った回数（coalesced）が失われずに数えられるか
+    - 計算中の例外が、待っていたスレッドにも送出され、キャッシュされないか
+    - 件数の上限をストライプに分けても、合計が上限を超えないか
+    """
+
+    THREADS = 64
+
+    def test_single_flight(self):
+        """
+        64スレッドが同時に同じキーを読むと、関数は1回だけ実行され、全員が同じ結果を受け取ることを確認
+        """
+        computed = []
+
+        @cache_result(thread_safe=True)
+        def load(name):
+            computed.append(name)
+            # 他の全てのスレッドが待ち始めるまで、計算を終えない
+            assert wait_until(lambda: load.cache_info().coalesced == self.THREADS - 1)
+            return object()
+
+        results = run_threads(self.THREADS, lambda number: load("config"))
+
+        assert computed == ["config"]
+        assert all(result is results[0] for result in results)
+        info = load.cache_info()
+        assert (info.misses, info.coalesced, info.hits, info.currsize) == (self.THREADS, self.THREADS - 1, 0, 1)
+        assert load("config") is results[0]
+        assert load.cache_info().hits == 1
+
+    @pytest.mark.parametrize("stripes", [1, 4, 16])
+    def test_counts_are_not_lost(self, stripes):
+        """
+        多くのキーを同時に読んでも、各キーは1回だけ計算され、
+        ミスの回数が「計算した回数 + 待った回数」と一致する（数え漏れがない）ことを確認
+        """
+        computed = []
+        computed_lock = threading.Lock()
+
+        @cache_result(thread_safe=True, lock_stripes=stripes)
+        def square(n):
+            with computed_lock:
+                computed.append(n)
+            time.sleep(0.002)
+            return n * n
+
+        keys = 40
+        rounds = 5
+
+        def work(number):
+            rng = random.Random(number)
+            order = list(range(keys)) * rounds
+            rng.shuffle(order)
+            return all(square(n) == n * n for n in order)
+
+        assert all(result is True for result in run_threads(32, work))
+        assert sorted(computed) == list(range(keys))
+        info = square.cache_info()
+        assert info.hits + info.misses == 32 * keys * rounds
+        assert info.misses == len(computed) + info.coalesced
+        assert info.coalesced > 0
+        assert info.currsize == keys
+
+    def test_error_is_shared_and_not_cached(self):
+        """
+        計算中の例外は待っていたスレッドにも送出され、次の呼び出しで計算し直すことを確認
+        """
+        attempts = []
+
+        @cache_result(thread_safe=True)
+        def flaky(name):
+            attempts.append(name)
+            if len(attempts) == 1:
+                assert wait_until(lambda: flaky.cache_info().coalesced == self.THREADS - 1)
+                raise RuntimeError("temporary failure")
+            return name.upper()
+
+        results = run_threads(self.THREADS, lambda number: flaky("db"))
+
+        assert attempts == ["db"]
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert len({id(result) for result in results}) == 1
+        assert flaky.cache_info().currsize == 0
+
+        assert flaky("db") == "DB"
+        assert attempts == ["db", "db"]
+        assert flaky("db") == "DB"
+
+    def test_maxsize_applies_to_whole_cache(self):
+        """
+        ロックのストライプの数に関係なく、件数の上限がキャッシュ全体に対して効くことを確認
+        """
+        @cache_result(thread_safe=True, maxsize=10, lock_stripes=16)
+        def square(n):
+            return n * n
+
+        run_threads(8, lambda number: [square(n) for n in range(number * 100, number * 100 + 100)])
+
+        info = square.cache_info()
+        assert info.maxsize == 10
+        assert info.currsize == 10
+        assert info.evictions == 790
+
+    @pytest.mark.parametrize("policy", ["lru", "lfu"])
+    def test_same_hit_rate_as_plain_cache(self, policy):
+        """
+        同じ呼び出しなら、thread_safe の有無でヒット数・追い出し数が変わらないことを確認
+        """
+        infos = []
+        for thread_safe in (False, True):
+            @cache_result(thread_safe=thread_safe, maxsize=32, policy=policy, lock_stripes=16)
+            def square(n):
+                return n * n
+
+            for _ in range(3):
+                for n in range(32):
+                    square(n)
+            infos.append(square.cache_info())
+
+        plain, striped = infos
+        assert (plain.hits, plain.misses, plain.evictions) == (64, 32, 0)
+        assert striped == plain
+
+    def test_clear_cache(self):
+        """
+        clear_cache() で全てのストライプの結果が消え、統計はそのまま残ることを確認
+        """
+        square, computed = TestResultCache._counted(thread_safe=True, lock_stripes=4)
+        for n in range(20):
+            square(n)
+        square.clear_cache()
+        square(3)
+
+        assert computed == list(range(20)) + [3]
+        info = square.cache_info()
+        assert (info.misses, info.currsize) == (21, 1)